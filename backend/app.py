@@ -71,6 +71,13 @@ def create_app():
     
     flask_app.url_map.strict_slashes = False
     init_app(flask_app)
+
+    # Mantém o timer wheel de refresh em dia com as escritas nos schedules
+    from properties.services.refresh_timer_wheel import register_session_listeners
+    register_session_listeners()
+    # Contadores de quota por tenant/publication_type acompanham as escritas em Property
+    from properties.services.tenant_quota_service import register_session_listeners as register_quota_listeners
+    register_quota_listeners()
     
     # Registra blueprints
     flask_app.register_blueprint(auth_bp)
@@ -5,6 +5,7 @@ Configuração do Celery para o backend Gandalf.
 import os
 from celery import Celery
 from utils.timezone_utils import UTC_TZ
+from worker_app import connect_worker_signals
 
 CELERY_BROKER_URL = os.getenv('REDIS_URL', 'redis://localhost:6379/0')
 CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', CELERY_BROKER_URL)
@@ -12,7 +13,10 @@ CELERY_RESULT_BACKEND = os.getenv('REDIS_URL', CELERY_BROKER_URL)
 
 def make_celery(app_name=__name__):
     """Cria e configura a instância do Celery."""
-    celery_instance = Celery(app_name, broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND)
+    # FlaskTask: cada task roda no app context do processo (um app/engine por worker)
+    celery_instance = Celery(app_name, broker=CELERY_BROKER_URL, backend=CELERY_RESULT_BACKEND,
+                             task_cls='worker_app:FlaskTask')
+    connect_worker_signals()
 
     # Configurações essenciais
     celery_instance.conf.update(
@@ -39,6 +43,7 @@ register_refresh_scheduler_tasks(celery)
 
 # Registrar tasks principais de renovação de tokens
 from tasks.token_renewal import check_expiring_tokens, renew_token, cleanup_expired_tokens
+from tasks.admin_dashboard_rollup import refresh_rollup, rebuild_rollup
 from celery.schedules import crontab
 
 # Configurar schedule para tasks principais
@@ -53,6 +58,22 @@ celery.conf.beat_schedule.update({
     'cleanup-expired-tokens': {
         'task': 'token_renewal.cleanup_expired_tokens',
         'schedule': crontab(hour=2, minute=0),  # 2:00 AM todos os dias
+    },
+
+    # Rollup do dashboard administrativo: incremental a cada 15 min + recálculo completo diário
+    'admin-dashboard-rollup-refresh': {
+        'task': 'admin_dashboard.refresh_rollup',
+        'schedule': crontab(minute='*/15'),
+    },
+    'admin-dashboard-rollup-rebuild': {
+        'task': 'admin_dashboard.rebuild_rollup',
+        'schedule': crontab(hour=3, minute=15),
+    },
+
+    # Sync write-behind com o CanalPro: reenfileira intenções cuja task se perdeu
+    'canalpro-sync-sweep': {
+        'task': 'canalpro_sync.sweep',
+        'schedule': crontab(minute='*/5'),
     }
 })
 
@@ -63,6 +84,8 @@ celery.conf.beat_schedule.update({
 try:
     from tasks.canalpro_renewal_unified import (
         unified_auto_renewal_task,
+        renew_tenant_token_task,
+        summarize_renewal_task,
         schedule_retry_task,
         health_check_task
     )
@@ -131,3 +154,5 @@ from properties.services.refresh_queue_manager import (
     cleanup_old_history,
     queue_health_check
 )
+from properties.services.import_job_service import run_gandalf_import
+from properties.services.canalpro_sync_service import push_property, sweep_sync_intents
@@ -14,6 +14,7 @@ import re
 import logging
 from models import Property  # Import para sincronização com imóveis
 from utils.permissions import admin_required  # ✅ NOVO: Proteção de rotas admin
+from utils.pagination import InvalidCursorError, cached_count, paginate_keyset
 
 logger = logging.getLogger(__name__)
 
@@ -276,15 +277,47 @@ def create_empreendimentos_routes(empreendimentos_bp: Blueprint):
         GET /api/empreendimentos
         Lista todos os empreendimentos ativos
         ✅ PÚBLICO: Retorna empreendimentos de TODOS os corretores
+        Query param opcional ``cursor`` ativa paginação por cursor (vazio = primeira página)
         """
         try:
             page = int(request.args.get('page', 1))
             per_page = min(int(request.args.get('per_page', 20)), 100)  # Máximo 100
             
+            cursor = request.args.get('cursor')
+            
             # Query base GLOBAL (todos os tenants - dados públicos)
-            query = db.session.query(Empreendimento).filter(
+            base_query = db.session.query(Empreendimento).filter(
                 Empreendimento.ativo == True
-            ).order_by(
+            )
+            
+            # Paginação por cursor (opcional): O(per_page) em qualquer profundidade
+            if cursor is not None:
+                keys = [
+                    (Empreendimento.total_imoveis, True),
+                    (Empreendimento.nome, False),
+                    (Empreendimento.id, False),
+                ]
+                try:
+                    empreendimentos, next_cursor, has_more = paginate_keyset(
+                        base_query, keys, per_page, cursor, 'total_imoveis:desc,nome:asc'
+                    )
+                except InvalidCursorError as e:
+                    return jsonify({'success': False, 'error': str(e)}), 400
+                
+                total, total_cached = cached_count(base_query, 'empreendimentos:ativos')
+                return jsonify({
+                    'success': True,
+                    'data': [emp.to_dict() for emp in empreendimentos],
+                    'pagination': {
+                        'per_page': per_page,
+                        'total': total,
+                        'total_cached': total_cached,
+                        'next_cursor': next_cursor,
+                        'has_more': has_more
+                    }
+                })
+            
+            query = base_query.order_by(
                 Empreendimento.total_imoveis.desc(),
                 Empreendimento.nome
             )
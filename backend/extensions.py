@@ -1,3 +1,4 @@
+import logging
 import os
 from dotenv import load_dotenv
 from flask_sqlalchemy import SQLAlchemy
@@ -15,6 +16,85 @@ jwt = JWTManager()
 migrate = Migrate()
 
 
+_session_collectors = set()
+
+
+def register_session_collector(name, collect, apply, collect_on='after_flush', apply_on='after_commit'):
+    """
+    Junta em ``session.info[name]`` o que cada flush mudou e aplica depois.
+
+    ``collect(session)`` roda em ``collect_on`` e devolve um dict/set/Counter (somado
+    ao acumulado com ``update``) ou vazio; ``apply(session, collected)`` roda em
+    ``apply_on``; rollback descarta o acumulado. Em ``after_commit`` uma falha só vai
+    para o log: o commit já aconteceu e cada consumidor tem a própria correção
+    (TTL do cache, reconciliação). Idempotente por ``name``.
+    """
+    if name in _session_collectors:
+        return
+    _session_collectors.add(name)
+
+    def _collect(session, *args):
+        collected = collect(session)
+        if not collected:
+            return
+        pending = session.info.get(name)
+        if pending is None:
+            session.info[name] = collected
+        else:
+            pending.update(collected)
+
+    def _apply(session, *args):
+        collected = session.info.pop(name, None)
+        if not collected:
+            return
+        if apply_on != 'after_commit':
+            apply(session, collected)
+            return
+        try:
+            apply(session, collected)
+        except Exception:
+            logging.getLogger(__name__).warning("Could not apply %s after commit", name, exc_info=True)
+
+    def _discard(session):
+        session.info.pop(name, None)
+
+    event.listen(db.session, collect_on, _collect)
+    event.listen(db.session, apply_on, _apply)
+    event.listen(db.session, 'after_rollback', _discard)
+
+
+def register_after_commit_collector(name, model, key_fn, apply_fn):
+    """
+    Após o commit, chama ``apply_fn({key: value})`` para as instâncias de ``model``
+    criadas, alteradas ou apagadas na transação.
+
+    ``key_fn(instance, deleted)`` devolve ``(key, value)`` ou None para ignorar a
+    instância; vale o último valor de cada chave.
+    """
+    def collect(session):
+        entries = {}
+        for deleted, instances in ((False, list(session.new) + list(session.dirty)), (True, list(session.deleted))):
+            for instance in instances:
+                if isinstance(instance, model):
+                    entry = key_fn(instance, deleted)
+                    if entry is not None:
+                        entries[entry[0]] = entry[1]
+        return entries
+
+    register_session_collector(name, collect, lambda session, entries: apply_fn(entries))
+
+
+def _bump_cache_versions(entries):
+    from utils.tenant_cache import bump_data_version
+    bump_data_version(entries)
+
+
+def _invalidate_credentials(entries):
+    from utils import credential_cache
+    for tenant_id, provider in entries:
+        credential_cache.invalidate(tenant_id, provider)
+
+
 def _register_tenant_listeners():
     # Import inside to avoid circular import at module import time
     from flask import g
@@ -48,6 +128,21 @@ def _register_tenant_listeners():
                     if current is not None and current != g.tenant_id:
                         raise Exception("Cannot modify objects from other tenants")
 
+    from models import IntegrationCredentials, Property
+
+    # Versão de dados por tenant para o cache de estatísticas (utils.tenant_cache)
+    register_after_commit_collector(
+        'tenant_cache_dirty_tenants', Property,
+        lambda prop, deleted: (prop.tenant_id, True) if prop.tenant_id is not None else None,
+        _bump_cache_versions,
+    )
+    # Headers de integração descriptografados em cache (utils.credential_cache)
+    register_after_commit_collector(
+        'integration_credentials_dirty', IntegrationCredentials,
+        lambda cred, deleted: ((cred.tenant_id, cred.provider), True) if cred.tenant_id is not None else None,
+        _invalidate_credentials,
+    )
+
 
 def init_app(app):
     db.init_app(app)
@@ -461,18 +461,17 @@ def gandalf_validate_login():
 @integrations_bp.route('/gandalf/import', methods=['POST'])
 @jwt_required()
 def gandalf_import_listings():
-    """Importa listagens do CanalPro (Gandalf) para o sistema usando ImportService.
-    
-    ATUALIZADO: Agora usa ImportService.import_all_from_gandalf() que executa PropertyMapper
-    corretamente, garantindo que property_type, category, unit_types e unit_subtypes sejam
-    salvos corretamente.
+    """Inicia a importação das listagens do CanalPro (Gandalf) em segundo plano.
+
+    A importação roda em uma task Celery (ImportJobService → ImportService.import_all_from_gandalf),
+    fora do ciclo da requisição HTTP, e o progresso fica no registro ImportJob.
 
     - Aceita body opcional com { only_active: boolean } para filtrar apenas imóveis ACTIVE
-    - Usa ImportService que chama PropertyMapper.map_listing_to_property()
-    - Retorna um objeto compatível com o frontend: { inserted, updated, skipped, total_listings, errors, message }
+    - Retorna 202 com o job ({ id, status, ... }); acompanhar em GET /integrations/gandalf/import/<job_id>
+    - Retorna 409 com o job ativo se já houver uma importação em andamento para o tenant
     """
-    from properties.services.import_service import ImportService
-    
+    from properties.services.import_job_service import ImportJobService
+
     identity = get_jwt_identity()
     user = User.query.get(identity)
     if not user:
@@ -480,32 +479,57 @@ def gandalf_import_listings():
 
     payload = request.get_json() or {}
     only_active = payload.get('only_active', True)  # Default True
-    
+
     current_app.logger.info(f"🚀 Iniciando importação via /integrations/gandalf/import para tenant {user.tenant_id}")
     current_app.logger.info(f"📋 Opções: only_active={only_active}")
 
-    try:
-        # Usa o ImportService que executa PropertyMapper corretamente
-        options = {
-            'status_filter': ['ACTIVE'] if only_active else None
-        }
-        result = ImportService.import_all_from_gandalf(user.tenant_id, options)
-        
-        current_app.logger.info(f"✅ Importação concluída: {result}")
-        return jsonify(result), 200
-        
-    except ValueError as e:
-        current_app.logger.error(f"❌ Erro de validação na importação: {e}")
-        return jsonify({'message': str(e), 'inserted': 0, 'updated': 0, 'errors': [str(e)]}), 400
-    except Exception as e:
-        current_app.logger.exception(f"❌ Erro inesperado na importação")
-        return jsonify({
-            'message': 'Import failed',
-            'error': str(e),
-            'inserted': 0,
-            'updated': 0,
-            'errors': [str(e)]
-        }), 500
+    if not IntegrationCredentials.query.filter_by(tenant_id=user.tenant_id, provider='gandalf').first():
+        return jsonify({'message': 'Integration credentials for gandalf not found'}), 400
+
+    options = {
+        'status_filter': ['ACTIVE'] if only_active else None
+    }
+    success, result = ImportJobService.start_import(user.tenant_id, user.id, options)
+    if not success:
+        status_code = 409 if result.get('job', {}).get('status') in ('pending', 'running') else 503
+        return jsonify({'message': result['error'], 'job': result.get('job')}), status_code
+
+    return jsonify({'message': 'Importação iniciada', 'job': result}), 202
+
+
+@integrations_bp.route('/gandalf/import/<int:job_id>', methods=['GET'])
+@jwt_required()
+def gandalf_import_status(job_id):
+    """Progresso de uma importação: páginas processadas, inserted/updated/skipped e erros."""
+    from properties.services.import_job_service import ImportJobService
+
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    job = ImportJobService.get_job(job_id, user.tenant_id)
+    if not job:
+        return jsonify({'message': 'Import job not found'}), 404
+    return jsonify({'job': job.to_dict()}), 200
+
+
+@integrations_bp.route('/gandalf/import/<int:job_id>/cancel', methods=['POST'])
+@jwt_required()
+def gandalf_import_cancel(job_id):
+    """Cancela uma importação (o job em execução para ao fim da página atual)."""
+    from properties.services.import_job_service import ImportJobService
+
+    identity = get_jwt_identity()
+    user = User.query.get(identity)
+    if not user:
+        return jsonify({'message': 'User not found'}), 404
+
+    success, result = ImportJobService.cancel_job(job_id, user.tenant_id)
+    if not success:
+        status_code = 404 if 'job' not in result else 409
+        return jsonify({'message': result['error'], 'job': result.get('job')}), status_code
+    return jsonify({'message': 'Cancelamento solicitado', 'job': result}), 200
 
 @integrations_bp.route('/gandalf/import_one', methods=['POST'])
 @jwt_required()
@@ -648,117 +672,10 @@ def canalpro_export_and_activate():
                 current_app.logger.error('Falha na autenticação do exportador')
                 return jsonify({'message': 'Authentication failed'}), 500
 
-            # executar export (isso preencherá property.remote_id quando bem-sucedido)
-            # Passar None para que o método crie seu próprio contexto quando necessário
-            stats = exporter.run_export(property_ids, None)
-
-            # tentar ativar cada propriedade exportada
-            activation_results = []
-            # Importar dentro do escopo para evitar problemas de ciclo em alguns ambientes
-            from integrations.gandalf_service import activate_listing_status, activate_listing
-
-            for pid in property_ids:
-                prop = Property.query.get(pid)
-                if not prop:
-                    activation_results.append({'property_id': pid, 'error': 'property_not_found'})
-                    continue
-
-                remote_id = getattr(prop, 'remote_id', None)
-                if not remote_id:
-                    activation_results.append({'property_id': pid, 'remote_id': None, 'activated': False, 'reason': 'not_exported'})
-                    continue
-
-                try:
-                    # Normalizar publication_type do imóvel para valores aceitos pela API
-                    pub = getattr(prop, 'publication_type', None)
-                    if isinstance(pub, str) and pub:
-                        normalized_pub = pub.strip().upper().replace(' ', '_')
-                        alias_map = {
-                            # Mapeamentos oficiais
-                            'PADRAO': 'STANDARD',
-                            'PADRÃO': 'STANDARD',
-                            'DESTAQUE_PADRAO': 'PREMIUM',
-                            'DESTAQUE_PADRÃO': 'PREMIUM',
-                            'DESTAQUE': 'PREMIUM',
-                            'SUPER_DESTAQUE': 'SUPER_PREMIUM',
-                            'SUPER-DESTAQUE': 'SUPER_PREMIUM',
-                            'EXCLUSIVO': 'PREMIERE_1',
-                            'SUPERIOR': 'PREMIERE_2',
-                            'TRIPLO': 'TRIPLE',
-                            # Aliases legados usados anteriormente
-                            'ALTO_PADRAO': 'PREMIUM',
-                            'ALTO_PADRÃO': 'PREMIUM',
-                            'HIGH': 'PREMIUM',
-                            'LUXO': 'PREMIERE_1',
-                            'ECONOMICO': 'STANDARD',
-                            'ECONÔMICO': 'STANDARD',
-                            'HIGHLIGHT': 'PREMIUM',
-                            'SUPER_HIGHLIGHT': 'SUPER_PREMIUM',
-                            'EXCLUSIVE': 'PREMIERE_1',
-                            'PREMIERE1': 'PREMIERE_1',
-                            'PREMIERE2': 'PREMIERE_2'
-                        }
-                        normalized_pub = alias_map.get(normalized_pub, normalized_pub)
-                        valid_pub = {'STANDARD', 'PREMIUM', 'SUPER_PREMIUM', 'PREMIERE_1', 'PREMIERE_2', 'TRIPLE'}
-                        publication_type_value = normalized_pub if normalized_pub in valid_pub else 'STANDARD'
-                    else:
-                        publication_type_value = 'STANDARD'
-
-                    # Primeiro atualiza o tipo de publicação (destacado/padrão) no Canal Pro
-                    pub_resp = activate_listing(exporter.credentials, remote_id, publication_type_value)
-
-                    act_resp = activate_listing_status(exporter.credentials, remote_id, 'ACTIVE')
-                    # Handle null response safely
-                    error_detail = None
-                    success = False
-                    
-                    current_app.logger.info(f'=== RESPOSTA COMPLETA PARA PROPERTY {pid} ===')
-                    current_app.logger.info(f'PublicationType response: {pub_resp}')
-                    current_app.logger.info(f'Status response: {act_resp}')
-                    
-                    if act_resp is None:
-                        success = False
-                        error_detail = 'Resposta nula da API CanalPro.'
-                        current_app.logger.warning(f'activate_listing_status returned None for property {pid}')
-                    else:
-                        # Primeiro verificar se a operação foi bem-sucedida independente de erros GraphQL
-                        data = act_resp.get('data') if isinstance(act_resp, dict) else None
-                        update_status = data.get('updateListingStatus') if isinstance(data, dict) else None
-                        
-                        # Se temos updateListingStatus e success=True, consideramos sucesso
-                        if isinstance(update_status, dict) and update_status.get('success') is True:
-                            success = True
-                            error_detail = None
-                            current_app.logger.info(f'✅ SUCESSO para property {pid} (updateListingStatus.success=True)')
-                        elif isinstance(update_status, dict):
-                            # updateListingStatus existe mas success não é True
-                            success = False
-                            error_detail = update_status.get('errorMessage') or update_status.get('message') or update_status.get('errors') or f"success={update_status.get('success')}"
-                            current_app.logger.warning(f'❌ FALHA para property {pid}: {error_detail}')
-                        else:
-                            # Verificar se há erros GraphQL mas ainda assim pode ter tido sucesso
-                            graphql_errors = act_resp.get('errors') if isinstance(act_resp, dict) else None
-                            if graphql_errors:
-                                current_app.logger.warning(f'Erros GraphQL para property {pid}: {graphql_errors}')
-                                # Mesmo com erros GraphQL, se chegou até aqui a operação pode ter funcionado
-                                # (baseado no fato de que o imóvel aparece ativo no Canal Pro)
-                                success = True
-                                error_detail = f"Operação executada com avisos GraphQL: {graphql_errors}"
-                                current_app.logger.info(f'⚠️ SUCESSO COM AVISOS para property {pid}')
-                            else:
-                                success = False
-                                error_detail = f"Campo updateListingStatus ausente ou inválido: {act_resp}"
-                                current_app.logger.warning(f'Campo updateListingStatus ausente ou inválido na resposta para property {pid}: {act_resp}')
-                    activation_results.append({
-                        'property_id': pid,
-                        'remote_id': remote_id,
-                        'activated': success,
-                        'response': act_resp,
-                        'error': error_detail
-                    })
-                except Exception as e:
-                    current_app.logger.exception(f'Erro ao ativar propriedade {pid}: {e}')
-                    activation_results.append({'property_id': pid, 'remote_id': remote_id, 'activated': False, 'error': str(e)})
+            # exportar e ativar em pipeline: cada imóvel é ativado logo após o create/update
+            # Passar None para que o método use o contexto atual da aplicação
+            stats = exporter.run_export(property_ids, None, activate=True)
+            activation_results = stats.pop('activation_results', [])
 
         return jsonify({'export_stats': stats, 'activation_results': activation_results}), 200
 
@@ -790,6 +707,16 @@ def canalpro_export_status():
         current_app.logger.exception('Error getting export status')
         return jsonify({'message': f'Failed to get status: {str(e)}'}), 500
 
+@integrations_bp.route('/canalpro/metrics', methods=['GET'])
+@jwt_required()
+def canalpro_http_metrics():
+    """
+    Retorna métricas de latência das chamadas à API Gandalf deste processo, por operação.
+    """
+    from integrations.gandalf_client import get_gandalf_client
+
+    return jsonify({'operations': get_gandalf_client().metrics()}), 200
+
 @integrations_bp.route('/canalpro/export/history', methods=['GET'])
 @jwt_required()
 def canalpro_export_history():
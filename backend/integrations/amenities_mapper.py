@@ -5,52 +5,415 @@ Este módulo contém funções para:
 1. Buscar amenities disponíveis no Canal Pro
 2. Mapear amenities do sistema interno para os códigos do Canal Pro
 3. Validar amenities antes da exportação
+
+O catálogo do Canal Pro fica no Redis por versão de glossário, tipo de unidade e
+tipo de anúncio (``amenities_catalog:<versão>:<unit_type>:<listing_type>``),
+compartilhado entre os processos do gunicorn e do Celery, com fallback em memória
+como ``integrations.session_store``. A entrada expira em ``AMENITIES_CATALOG_TTL``;
+nos últimos ``AMENITIES_CATALOG_REFRESH_AHEAD`` segundos um único processo (lock
+``SET NX``) busca o catálogo de novo enquanto os demais continuam servindo o atual,
+então nenhuma exportação espera pela API depois do primeiro carregamento.
+
+Cada processo compila o catálogo em um ``AmenityResolver`` (índice exato
+normalizado e sem acentos + índice de tokens), reaproveitado enquanto o catálogo
+não mudar.
 """
 
+import json
 import logging
-from typing import Dict, List, Any, Optional
+import os
+import re
+import threading
+import time
+import unicodedata
+from typing import Dict, List, Any, Optional, Tuple
 from integrations.gandalf_service import get_amenities, GandalfError
+from utils.redis_client import get_redis
 
 logger = logging.getLogger(__name__)
 
-# Cache para amenities do Canal Pro
-_canalpro_amenities_cache = None
-_canalpro_amenities_by_name = {}
+CATALOG_PREFIX = 'amenities_catalog'
+CATALOG_TTL = int(os.getenv('AMENITIES_CATALOG_TTL', str(24 * 3600)))
+CATALOG_REFRESH_AHEAD = int(os.getenv('AMENITIES_CATALOG_REFRESH_AHEAD', '3600'))
+# Quanto tempo cada processo usa o resolver compilado antes de reconsultar o Redis
+LOCAL_TTL = int(os.getenv('AMENITIES_LOCAL_TTL', '60'))
+REFRESH_LOCK_SECONDS = 60
+# Limite do memo de rótulos já resolvidos (por resolver)
+MEMO_MAX_SIZE = 4096
+
+_lock = threading.Lock()
+_memory_catalogs: Dict[str, Tuple[float, str]] = {}
+_memory_refresh_locks: Dict[str, float] = {}
+_local_resolvers: Dict[str, Tuple[float, 'AmenityResolver']] = {}
+_list_resolver: Optional[Tuple[List[Dict[str, Any]], 'AmenityResolver']] = None
+
+# Mapeamentos diretos por nome exato
+DIRECT_MAPPINGS = {
+    'academia': 'GYM',
+    'piscina': 'POOL',
+    'churrasqueira': 'BARBECUE_GRILL',
+    'elevador': 'ELEVATOR',
+    'portaria 24h': 'CONCIERGE_24H',
+    'portão eletrônico': 'ELECTRONIC_GATE',
+    'segurança 24h': 'CONCIERGE_24H',
+    'salão de festas': 'PARTY_HALL',
+    'salão de jogos': 'GAMES_ROOM',
+    'sauna': 'SAUNA',
+    'spa': 'SPA',
+    'quadra de tênis': 'TENNIS_COURT',
+    'quadra poliesportiva': 'SPORTS_COURT',
+    'quadra de squash': 'SQUASH',
+    'bicicletário': 'BICYCLES_PLACE',
+    'coworking': 'COWORKING',
+    'lavanderia': 'LAUNDRY',
+    'jardim': 'GARDEN',
+    'playground': 'PLAYGROUND',
+    'cinema': 'CINEMA',
+    'espaço gourmet': 'GOURMET_SPACE',
+    'ar condicionado': 'AIR_CONDITIONING',
+    'aceita animais': 'PETS_ALLOWED',
+    'acesso para deficientes': 'DISABLED_ACCESS',
+    'closet': 'CLOSET',
+    'condomínio fechado': 'GATED_COMMUNITY',
+    'cozinha americana': 'AMERICAN_KITCHEN',
+    'lareira': 'FIREPLACE',
+    'mobiliado': 'FURNISHED',
+    'varanda gourmet': 'GOURMET_BALCONY',
+    'conexão à internet': 'INTERNET_ACCESS',
+    'ambientes integrados': 'INTEGRATED_ENVIRONMENTS',
+    'andar inteiro': 'FULL_FLOOR',
+    'área de serviço': 'SERVICE_AREA',
+    'armário embutido': 'BUILTIN_WARDROBE',
+    'banheira': 'BATHTUB',
+    'banheiro de serviço': 'SERVICE_BATHROOM',
+    'bar': 'BAR',
+    'bar na piscina': 'POOL_BAR',
+    'biblioteca': 'LIBRARY',
+    'box blindex': 'BLINDEX_BOX',
+    'brinquedoteca': 'TOYS_PLACE',
+    'câmera de segurança': 'SECURITY_CAMERA',
+    'campo de futebol': 'FOOTBALL_FIELD',
+    'campo de golfe': 'GOLF_FIELD',
+    'canil': 'DOG_KENNEL',
+    'carpete': 'CARPET',
+    'casa de caseiro': 'CARETAKER_HOUSE',
+    'casa de fundo': 'BACKGROUND_HOUSE',
+    'casa sede': 'HEADQUARTERS',
+    'celeiro': 'BARN',
+    'centro de estética': 'BEAUTY_CENTER',
+    'cerca': 'FENCE',
+    'children care': 'CHILDREN_CARE',
+    'churrasqueira na varanda': 'BARBECUE_BALCONY',
+    'chuveiro a gás': 'GAS_SHOWER',
+    'cimento queimado': 'BURNT_CEMENT',
+    'circuito de segurança': 'SAFETY_CIRCUIT',
+    'cobertura coletiva': 'COVERAGE',
+    'coffee shop': 'COFFEE_SHOP',
+    'copa': 'COPA',
+    'cozinha gourmet': 'GOURMET_KITCHEN',
+    'cozinha grande': 'LARGE_KITCHEN',
+    'curral': 'CORRAL',
+    'deck': 'DECK',
+    'dependência de empregados': 'EMPLOYEE_DEPENDENCY',
+    'despensa': 'PANTRY',
+    'drywall': 'DRYWALL',
+    'edícula': 'EDICULE',
+    'entrada de serviço': 'SERVICE_ENTRANCE',
+    'entrada lateral': 'SIDE_ENTRANCE',
+    'escada': 'STAIR',
+    'escritório': 'HOME_OFFICE',
+    'espaço teen': 'TEEN_SPACE',
+    'espaço pet': 'PET_SPACE',
+    'espaço verde / parque': 'GREEN_SPACE',
+    'espaço zen': 'ZEN_SPACE',
+    'estacionamento para visitantes': 'GUEST_PARKING',
+    'fogão': 'COOKER',
+    'forno de pizza': 'PIZZA_OVEN',
+    'freezer': 'FREEZER',
+    'geminada': 'GEMINADA',
+    'gerador elétrico': 'ELECTRIC_GENERATOR',
+    'gesso - sanca - teto rebaixado': 'SANCA',
+    'gramado': 'GRASS',
+    'guarita': 'SECURITY_CABIN',
+    'hall de entrada': 'ENTRANCE_HALL',
+    'heliponto': 'HELIPAD',
+    'hidromassagem': 'WHIRLPOOL',
+    'horta': 'VEGETABLE_GARDEN',
+    'imóvel de esquina': 'CORNER_PROPERTY',
+    'interfone': 'INTERCOM',
+    'isolamento acústico': 'SOUNDPROOFING',
+    'isolamento térmico': 'THERMAL_INSULATION',
+    'janela de alumínio': 'ALUMINUM_WINDOW',
+    'janela grande': 'LARGE_WINDOW',
+    'lago': 'LAKE',
+    'laje': 'SLAB',
+    'lavabo': 'LAVABO',
+    'marina': 'MARINA',
+    'meio andar': 'HALF_FLOOR',
+    'mezanino': 'MEZZANINE',
+    'móvel planejado': 'PLANNED_FURNITURE',
+    'muro de escalada': 'CLIMBING_WALL',
+    'muro de vidro': 'GLASS_WALL',
+    'muro e grade': 'WALLS_GRIDS',
+    'ofurô': 'HOT_TUB',
+    'orchidário': 'ORCHID_PLACE',
+    'pasto': 'PASTURE',
+    'pé direito alto': 'HIGH_CEILING_HEIGHT',
+    'piscina aquecida': 'HEATED_POOL',
+    'piscina coberta': 'COVERED_POOL',
+    'piscina infantil': 'CHILDRENS_POOL',
+    'piscina para adulto': 'ADULT_POOL',
+    'piscina privativa': 'PRIVATE_POOL',
+    'piso de madeira': 'WOOD_FLOOR',
+    'piso elevado': 'RAISED_FLOOR',
+    'piso frio': 'COLD_FLOOR',
+    'piso laminado': 'LAMINATED_FLOOR',
+    'piso vinílico': 'VINYL_FLOOR',
+    'pista de cooper': 'HIKING_TRAIL',
+    'pista de skate': 'SKATE_LANE',
+    'platibanda': 'PLATIBANDA',
+    'poço': 'WELL',
+    'poço artesiano': 'ARTESIAN_WELL',
+    'pomar': 'POMAR',
+    'porcelanato': 'PORCELAIN',
+    'possui divisória': 'DIVIDERS',
+    'praça': 'SQUARE',
+    'quarto de serviço': 'SERVICE_ROOM',
+    'quarto extra reversível': 'REVERSIBLE_ROOM',
+    'quintal': 'BACKYARD',
+    'recepção': 'RECEPTION',
+    'redario': 'REDARIO',
+    'reservatório de água': 'WATER_TANK',
+    'restaurante': 'RESTAURANT',
+    'rio': 'RIVER',
+    'ronda/vigilância': 'PATROL',
+    'sala de almoço': 'LUNCH_ROOM',
+    'sala de jantar': 'DINNER_ROOM',
+    'sala de massagem': 'MASSAGE',
+    'sala de reunião': 'MEETING_ROOM',
+    'sala grande': 'LARGE_ROOM',
+    'sala pequena': 'SMALL_ROOM',
+    'salão de convenção': 'COVENTION_HALL',
+    'serviços pay per use': 'PAY_PER_USE_SERVICES',
+    'sistema de alarme': 'ALARM_SYSTEM',
+    'solarium': 'SOLARIUM',
+    'tv a cabo': 'CABLE_TV',
+    'varanda': 'BALCONY',
+    'varanda fechada com vidro': 'WALL_BALCONY',
+    'ventilação natural': 'NATURAL_VENTILATION',
+    'vestiário para diaristas': 'DRESS_ROOM2',
+    'vigia': 'WATCHMAN',
+    'vista para o mar': 'SEA_VIEW',
+    'vista panorâmica': 'PANORAMIC_VIEW',
+    'vista para a montanha': 'MOUNTAIN_VIEW',
+    'vista para lago': 'LAKE_VIEW'
+}
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def normalize_amenity(text: str) -> str:
+    """Minúsculas, sem acentos e com espaços colapsados ('Salão  de Festas' -> 'salao de festas')."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    unaccented = ''.join(ch for ch in decomposed if not unicodedata.combining(ch))
+    return ' '.join(unaccented.split())
+
+
+def _phrase(text: str) -> str:
+    """Tokens separados por espaço e com bordas, para busca de palavras inteiras."""
+    return f" {' '.join(_TOKEN_RE.findall(text))} "
+
+
+class AmenityResolver:
+    """
+    Catálogo do Canal Pro compilado para mapear rótulos em O(1).
 
-def get_canalpro_amenities(creds: Dict[str, Any], force_refresh: bool = False) -> List[Dict[str, Any]]:
+    Ordem de resolução: ``DIRECT_MAPPINGS``, nome/singular/plural exatos do catálogo
+    (normalizados) e, por fim, o primeiro item do catálogo cujo nome contém o rótulo
+    (ou está contido nele) como palavras inteiras, buscado pelo índice de tokens.
     """
-    Busca e cacheia as amenities disponíveis no Canal Pro.
+
+    def __init__(self, catalog: List[Dict[str, Any]], fetched_at: Optional[float] = None):
+        self.catalog = catalog
+        self.fetched_at = fetched_at
+        self.codes = {amenity['name'] for amenity in catalog if amenity.get('name')}
+        self._exact: Dict[str, str] = {normalize_amenity(label): code for label, code in DIRECT_MAPPINGS.items()}
+        self._phrases: List[Tuple[str, Tuple[str, ...]]] = []
+        self._tokens: Dict[str, List[int]] = {}
+        self._memo: Dict[str, Optional[str]] = {}
+
+        for position, amenity in enumerate(catalog):
+            code = amenity.get('name')
+            if not code:
+                continue
+            labels = [label for label in (amenity.get('singular'), amenity.get('plural')) if label]
+            for label in labels:
+                self._exact.setdefault(normalize_amenity(label), code)
+            phrases = tuple(_phrase(normalize_amenity(label)) for label in labels)
+            self._phrases.append((code, phrases))
+            for token in {token for phrase in phrases for token in phrase.split()}:
+                self._tokens.setdefault(token, []).append(len(self._phrases) - 1)
+        # Códigos já no formato do Canal Pro (ex.: 'POOL') por último
+        for code in self.codes:
+            self._exact.setdefault(normalize_amenity(code.replace('_', ' ')), code)
+            self._exact.setdefault(normalize_amenity(code), code)
+
+    def resolve(self, amenity_name: str) -> Optional[str]:
+        """Código do Canal Pro para o rótulo, ou None."""
+        if not amenity_name or not isinstance(amenity_name, str):
+            return None
+        key = normalize_amenity(amenity_name)
+        if not key:
+            return None
+        if key in self._memo:
+            return self._memo[key]
+
+        code = self._exact.get(key)
+        if code is None:
+            code = self._match_tokens(key)
+        if len(self._memo) >= MEMO_MAX_SIZE:
+            self._memo.clear()
+        self._memo[key] = code
+        return code
+
+    def _match_tokens(self, key: str) -> Optional[str]:
+        phrase = _phrase(key)
+        candidates = sorted({position for token in phrase.split() for position in self._tokens.get(token, ())})
+        for position in candidates:
+            code, phrases = self._phrases[position]
+            if any(phrase in candidate or candidate in phrase for candidate in phrases):
+                return code
+        return None
+
+
+def _catalog_key(unit_type: str, glossary_version: str, listing_type: str) -> str:
+    return f'{CATALOG_PREFIX}:{glossary_version}:{unit_type}:{listing_type}'
+
+
+def _load_catalog(key: str) -> Optional[Dict[str, Any]]:
+    client = get_redis()
+    try:
+        if client:
+            payload = client.get(key)
+        else:
+            with _lock:
+                entry = _memory_catalogs.get(key)
+            payload = entry[1] if entry and entry[0] > time.time() else None
+        return json.loads(payload) if payload else None
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Amenities catalog read failed for %s: %s", key, str(e))
+        return None
+
+
+def _store_catalog(key: str, entry: Dict[str, Any]) -> None:
+    client = get_redis()
+    payload = json.dumps(entry)
+    try:
+        if client:
+            client.setex(key, CATALOG_TTL, payload)
+            return
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Amenities catalog write failed for %s: %s", key, str(e))
+    with _lock:
+        _memory_catalogs[key] = (time.time() + CATALOG_TTL, payload)
+
+
+def _claim_refresh(key: str) -> bool:
+    """Só um processo renova o catálogo por vez; os outros seguem com o atual."""
+    client = get_redis()
+    try:
+        if client:
+            return bool(client.set(f'{key}:refreshing', '1', nx=True, ex=REFRESH_LOCK_SECONDS))
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Amenities catalog refresh lock failed for %s: %s", key, str(e))
+        return True
+    now = time.time()
+    with _lock:
+        if _memory_refresh_locks.get(key, 0) > now:
+            return False
+        _memory_refresh_locks[key] = now + REFRESH_LOCK_SECONDS
+        return True
+
+
+def _fetch_catalog(creds: Dict[str, Any], key: str, unit_type: str, glossary_version: str,
+                   listing_type: str) -> Optional[Dict[str, Any]]:
+    try:
+        logger.info("Buscando amenities disponíveis no Canal Pro (%s)...", key)
+        items = get_amenities(creds, unit_type=unit_type, listing_type=listing_type,
+                              glossary_version=glossary_version)
+    except GandalfError as e:
+        logger.error(f"Erro ao buscar amenities do Canal Pro: {e}")
+        return None
+    entry = {'fetched_at': time.time(), 'items': items}
+    _store_catalog(key, entry)
+    logger.info(f"Encontradas {len(items)} amenities no Canal Pro")
+    return entry
+
+
+def get_amenity_resolver(creds: Dict[str, Any], unit_type: str = 'APARTMENT', glossary_version: str = 'V4',
+                         listing_type: str = 'USED', force_refresh: bool = False) -> AmenityResolver:
+    """
+    Resolver do catálogo compartilhado (busca no Canal Pro só se não houver catálogo
+    válido ou se estiver na janela de refresh-ahead).
+
+    Sem catálogo e com a API falhando, mantém o resolver anterior do processo ou
+    devolve um só com ``DIRECT_MAPPINGS`` (por ``LOCAL_TTL``, para não repetir a
+    chamada a cada imóvel).
+    """
+    key = _catalog_key(unit_type, glossary_version, listing_type)
+    now = time.time()
+    with _lock:
+        local = _local_resolvers.get(key)
+    if local and local[0] > now and not force_refresh:
+        return local[1]
+
+    entry = None if force_refresh else _load_catalog(key)
+    if entry is None or now - entry['fetched_at'] >= CATALOG_TTL - CATALOG_REFRESH_AHEAD:
+        if entry is None or _claim_refresh(key):
+            entry = _fetch_catalog(creds, key, unit_type, glossary_version, listing_type) or entry
+
+    if entry is None:
+        # Catálogo expirado e API indisponível: segue com o que o processo já tem
+        resolver = local[1] if local else AmenityResolver([])
+    elif local and local[1].fetched_at == entry['fetched_at']:
+        resolver = local[1]  # catálogo não mudou: mantém índices e memo
+    else:
+        resolver = AmenityResolver(entry['items'], entry['fetched_at'])
+    with _lock:
+        _local_resolvers[key] = (now + LOCAL_TTL, resolver)
+    return resolver
+
+
+def get_canalpro_amenities(creds: Dict[str, Any], force_refresh: bool = False,
+                           unit_type: str = 'APARTMENT') -> List[Dict[str, Any]]:
+    """
+    Busca (com cache compartilhado) as amenities disponíveis no Canal Pro.
 
     Args:
         creds: Credenciais de autenticação
         force_refresh: Força atualização do cache
+        unit_type: Tipo da unidade (APARTMENT, HOME, etc.)
 
     Returns:
         Lista de amenities do Canal Pro
     """
-    global _canalpro_amenities_cache, _canalpro_amenities_by_name
-
-    if _canalpro_amenities_cache is None or force_refresh:
-        try:
-            logger.info("Buscando amenities disponíveis no Canal Pro...")
-            # Chamar função diretamente
-            _canalpro_amenities_cache = get_amenities(creds)
-
-            # Criar índice por nome para busca rápida
-            _canalpro_amenities_by_name = {
-                amenity['name']: amenity
-                for amenity in _canalpro_amenities_cache
-            }
-
-            logger.info(f"Encontradas {len(_canalpro_amenities_cache)} amenities no Canal Pro")
-        except GandalfError as e:
-            logger.error(f"Erro ao buscar amenities do Canal Pro: {e}")
-            # Retornar cache antigo se existir, senão lista vazia
-            if _canalpro_amenities_cache is None:
-                _canalpro_amenities_cache = []
-            _canalpro_amenities_by_name = {}
-
-    return _canalpro_amenities_cache
+    return get_amenity_resolver(creds, unit_type=unit_type, force_refresh=force_refresh).catalog
+
+
+def reset_cache() -> None:
+    """Descarta o catálogo em cache (testes / troca de glossário)."""
+    global _list_resolver
+    client = get_redis()
+    if client:
+        keys = list(client.scan_iter(f'{CATALOG_PREFIX}:*'))
+        if keys:
+            client.delete(*keys)
+    with _lock:
+        _memory_catalogs.clear()
+        _memory_refresh_locks.clear()
+        _local_resolvers.clear()
+        _list_resolver = None
+
 
 def map_amenity_to_canalpro(amenity_name: str, canalpro_amenities: List[Dict[str, Any]]) -> Optional[str]:
     """
@@ -63,201 +426,29 @@ def map_amenity_to_canalpro(amenity_name: str, canalpro_amenities: List[Dict[str
     Returns:
         Código da amenity no Canal Pro ou None se não encontrado
     """
-    if not amenity_name or not isinstance(amenity_name, str):
-        return None
-
-    amenity_lower = amenity_name.lower().strip()
-
-    # Mapeamentos diretos por nome exato
-    direct_mappings = {
-        'academia': 'GYM',
-        'piscina': 'POOL',
-        'churrasqueira': 'BARBECUE_GRILL',
-        'elevador': 'ELEVATOR',
-        'portaria 24h': 'CONCIERGE_24H',
-        'portão eletrônico': 'ELECTRONIC_GATE',
-        'segurança 24h': 'CONCIERGE_24H',
-        'salão de festas': 'PARTY_HALL',
-        'salão de jogos': 'GAMES_ROOM',
-        'sauna': 'SAUNA',
-        'spa': 'SPA',
-        'quadra de tênis': 'TENNIS_COURT',
-        'quadra poliesportiva': 'SPORTS_COURT',
-        'quadra de squash': 'SQUASH',
-        'bicicletário': 'BICYCLES_PLACE',
-        'coworking': 'COWORKING',
-        'lavanderia': 'LAUNDRY',
-        'jardim': 'GARDEN',
-        'playground': 'PLAYGROUND',
-        'cinema': 'CINEMA',
-        'espaço gourmet': 'GOURMET_SPACE',
-        'ar condicionado': 'AIR_CONDITIONING',
-        'aceita animais': 'PETS_ALLOWED',
-        'acesso para deficientes': 'DISABLED_ACCESS',
-        'closet': 'CLOSET',
-        'condomínio fechado': 'GATED_COMMUNITY',
-        'cozinha americana': 'AMERICAN_KITCHEN',
-        'lareira': 'FIREPLACE',
-        'mobiliado': 'FURNISHED',
-        'varanda gourmet': 'GOURMET_BALCONY',
-        'conexão à internet': 'INTERNET_ACCESS',
-        'ambientes integrados': 'INTEGRATED_ENVIRONMENTS',
-        'andar inteiro': 'FULL_FLOOR',
-        'área de serviço': 'SERVICE_AREA',
-        'armário embutido': 'BUILTIN_WARDROBE',
-        'banheira': 'BATHTUB',
-        'banheiro de serviço': 'SERVICE_BATHROOM',
-        'bar': 'BAR',
-        'bar na piscina': 'POOL_BAR',
-        'biblioteca': 'LIBRARY',
-        'box blindex': 'BLINDEX_BOX',
-        'brinquedoteca': 'TOYS_PLACE',
-        'câmera de segurança': 'SECURITY_CAMERA',
-        'campo de futebol': 'FOOTBALL_FIELD',
-        'campo de golfe': 'GOLF_FIELD',
-        'canil': 'DOG_KENNEL',
-        'carpete': 'CARPET',
-        'casa de caseiro': 'CARETAKER_HOUSE',
-        'casa de fundo': 'BACKGROUND_HOUSE',
-        'casa sede': 'HEADQUARTERS',
-        'celeiro': 'BARN',
-        'centro de estética': 'BEAUTY_CENTER',
-        'cerca': 'FENCE',
-        'children care': 'CHILDREN_CARE',
-        'churrasqueira na varanda': 'BARBECUE_BALCONY',
-        'chuveiro a gás': 'GAS_SHOWER',
-        'cimento queimado': 'BURNT_CEMENT',
-        'circuito de segurança': 'SAFETY_CIRCUIT',
-        'cobertura coletiva': 'COVERAGE',
-        'coffee shop': 'COFFEE_SHOP',
-        'copa': 'COPA',
-        'cozinha gourmet': 'GOURMET_KITCHEN',
-        'cozinha grande': 'LARGE_KITCHEN',
-        'curral': 'CORRAL',
-        'deck': 'DECK',
-        'dependência de empregados': 'EMPLOYEE_DEPENDENCY',
-        'despensa': 'PANTRY',
-        'drywall': 'DRYWALL',
-        'edícula': 'EDICULE',
-        'entrada de serviço': 'SERVICE_ENTRANCE',
-        'entrada lateral': 'SIDE_ENTRANCE',
-        'escada': 'STAIR',
-        'escritório': 'HOME_OFFICE',
-        'espaço teen': 'TEEN_SPACE',
-        'espaço pet': 'PET_SPACE',
-        'espaço verde / parque': 'GREEN_SPACE',
-        'espaço zen': 'ZEN_SPACE',
-        'estacionamento para visitantes': 'GUEST_PARKING',
-        'fogão': 'COOKER',
-        'forno de pizza': 'PIZZA_OVEN',
-        'freezer': 'FREEZER',
-        'geminada': 'GEMINADA',
-        'gerador elétrico': 'ELECTRIC_GENERATOR',
-        'gesso - sanca - teto rebaixado': 'SANCA',
-        'gramado': 'GRASS',
-        'guarita': 'SECURITY_CABIN',
-        'hall de entrada': 'ENTRANCE_HALL',
-        'heliponto': 'HELIPAD',
-        'hidromassagem': 'WHIRLPOOL',
-        'horta': 'VEGETABLE_GARDEN',
-        'imóvel de esquina': 'CORNER_PROPERTY',
-        'interfone': 'INTERCOM',
-        'isolamento acústico': 'SOUNDPROOFING',
-        'isolamento térmico': 'THERMAL_INSULATION',
-        'janela de alumínio': 'ALUMINUM_WINDOW',
-        'janela grande': 'LARGE_WINDOW',
-        'lago': 'LAKE',
-        'laje': 'SLAB',
-        'lavabo': 'LAVABO',
-        'marina': 'MARINA',
-        'meio andar': 'HALF_FLOOR',
-        'mezanino': 'MEZZANINE',
-        'móvel planejado': 'PLANNED_FURNITURE',
-        'muro de escalada': 'CLIMBING_WALL',
-        'muro de vidro': 'GLASS_WALL',
-        'muro e grade': 'WALLS_GRIDS',
-        'ofurô': 'HOT_TUB',
-        'orchidário': 'ORCHID_PLACE',
-        'pasto': 'PASTURE',
-        'pé direito alto': 'HIGH_CEILING_HEIGHT',
-        'piscina aquecida': 'HEATED_POOL',
-        'piscina coberta': 'COVERED_POOL',
-        'piscina infantil': 'CHILDRENS_POOL',
-        'piscina para adulto': 'ADULT_POOL',
-        'piscina privativa': 'PRIVATE_POOL',
-        'piso de madeira': 'WOOD_FLOOR',
-        'piso elevado': 'RAISED_FLOOR',
-        'piso frio': 'COLD_FLOOR',
-        'piso laminado': 'LAMINATED_FLOOR',
-        'piso vinílico': 'VINYL_FLOOR',
-        'pista de cooper': 'HIKING_TRAIL',
-        'pista de skate': 'SKATE_LANE',
-        'platibanda': 'PLATIBANDA',
-        'poço': 'WELL',
-        'poço artesiano': 'ARTESIAN_WELL',
-        'pomar': 'POMAR',
-        'porcelanato': 'PORCELAIN',
-        'possui divisória': 'DIVIDERS',
-        'praça': 'SQUARE',
-        'quarto de serviço': 'SERVICE_ROOM',
-        'quarto extra reversível': 'REVERSIBLE_ROOM',
-        'quintal': 'BACKYARD',
-        'recepção': 'RECEPTION',
-        'redario': 'REDARIO',
-        'reservatório de água': 'WATER_TANK',
-        'restaurante': 'RESTAURANT',
-        'rio': 'RIVER',
-        'ronda/vigilância': 'PATROL',
-        'sala de almoço': 'LUNCH_ROOM',
-        'sala de jantar': 'DINNER_ROOM',
-        'sala de massagem': 'MASSAGE',
-        'sala de reunião': 'MEETING_ROOM',
-        'sala grande': 'LARGE_ROOM',
-        'sala pequena': 'SMALL_ROOM',
-        'salão de convenção': 'COVENTION_HALL',
-        'serviços pay per use': 'PAY_PER_USE_SERVICES',
-        'sistema de alarme': 'ALARM_SYSTEM',
-        'solarium': 'SOLARIUM',
-        'tv a cabo': 'CABLE_TV',
-        'varanda': 'BALCONY',
-        'varanda fechada com vidro': 'WALL_BALCONY',
-        'ventilação natural': 'NATURAL_VENTILATION',
-        'vestiário para diaristas': 'DRESS_ROOM2',
-        'vigia': 'WATCHMAN',
-        'vista para o mar': 'SEA_VIEW',
-        'vista panorâmica': 'PANORAMIC_VIEW',
-        'vista para a montanha': 'MOUNTAIN_VIEW',
-        'vista para lago': 'LAKE_VIEW'
-    }
-
-    # Verificar mapeamento direto
-    canalpro_code = direct_mappings.get(amenity_lower)
-    if canalpro_code:
-        return canalpro_code
-
-    # Buscar por similaridade nas amenities do Canal Pro
-    for canalpro_amenity in canalpro_amenities:
-        # Verificar se o nome do Canal Pro contém palavras da nossa amenity
-        canalpro_name_lower = canalpro_amenity['singular'].lower()
-        if amenity_lower in canalpro_name_lower or canalpro_name_lower in amenity_lower:
-            return canalpro_amenity['name']
-
-        # Verificar plural também
-        if canalpro_amenity.get('plural'):
-            canalpro_plural_lower = canalpro_amenity['plural'].lower()
-            if amenity_lower in canalpro_plural_lower or canalpro_plural_lower in amenity_lower:
-                return canalpro_amenity['name']
-
-    logger.warning(f"Amenity '{amenity_name}' não encontrada no mapeamento do Canal Pro")
-    return None
-
-def map_amenities_list(amenities_list: List[str], creds: Dict[str, Any]) -> List[str]:
+    global _list_resolver
+
+    # Compila a lista uma vez (chamadas seguidas costumam usar a mesma lista)
+    cached = _list_resolver
+    if cached is not None and cached[0] is canalpro_amenities:
+        resolver = cached[1]
+    else:
+        resolver = AmenityResolver(canalpro_amenities)
+        _list_resolver = (canalpro_amenities, resolver)
+
+    canalpro_code = resolver.resolve(amenity_name)
+    if canalpro_code is None and amenity_name and isinstance(amenity_name, str):
+        logger.warning(f"Amenity '{amenity_name}' não encontrada no mapeamento do Canal Pro")
+    return canalpro_code
+
+def map_amenities_list(amenities_list: List[str], creds: Dict[str, Any], unit_type: str = 'APARTMENT') -> List[str]:
     """
     Mapeia uma lista de amenities do sistema interno para códigos do Canal Pro.
 
     Args:
         amenities_list: Lista de amenities do sistema interno
         creds: Credenciais para buscar amenities do Canal Pro
+        unit_type: Tipo da unidade (catálogo do Canal Pro varia por tipo)
 
     Returns:
         Lista de códigos de amenities válidos no Canal Pro
@@ -265,12 +456,12 @@ def map_amenities_list(amenities_list: List[str], creds: Dict[str, Any]) -> List
     if not amenities_list:
         return []
 
-    # Buscar amenities disponíveis no Canal Pro
-    canalpro_amenities = get_canalpro_amenities(creds)
+    # Catálogo compilado (cache compartilhado) para o tipo de unidade
+    resolver = get_amenity_resolver(creds, unit_type=unit_type)
 
     mapped_amenities = []
     for amenity in amenities_list:
-        mapped = map_amenity_to_canalpro(amenity, canalpro_amenities)
+        mapped = resolver.resolve(amenity)
         if mapped:
             mapped_amenities.append(mapped)
         else:
@@ -287,13 +478,14 @@ def map_amenities_list(amenities_list: List[str], creds: Dict[str, Any]) -> List
     logger.info(f"Mapeadas {len(unique_mapped)} de {len(amenities_list)} amenities para o Canal Pro")
     return unique_mapped
 
-def validate_amenities(amenities_codes: List[str], creds: Dict[str, Any]) -> List[str]:
+def validate_amenities(amenities_codes: List[str], creds: Dict[str, Any], unit_type: str = 'APARTMENT') -> List[str]:
     """
     Valida se os códigos de amenities existem no Canal Pro.
 
     Args:
         amenities_codes: Lista de códigos de amenities
         creds: Credenciais para buscar amenities do Canal Pro
+        unit_type: Tipo da unidade
 
     Returns:
         Lista de códigos válidos
@@ -302,8 +494,7 @@ def validate_amenities(amenities_codes: List[str], creds: Dict[str, Any]) -> Lis
         return []
 
     # Buscar amenities disponíveis no Canal Pro
-    canalpro_amenities = get_canalpro_amenities(creds)
-    valid_codes = {amenity['name'] for amenity in canalpro_amenities}
+    valid_codes = get_amenity_resolver(creds, unit_type=unit_type).codes
 
     valid_amenities = [code for code in amenities_codes if code in valid_codes]
 
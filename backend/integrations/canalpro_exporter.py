@@ -28,7 +28,9 @@ import sys
 import json
 import time
 import logging
-import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import nullcontext
 from datetime import datetime
 from typing import Dict, Any, List, Optional
 from pathlib import Path
@@ -36,6 +38,8 @@ from pathlib import Path
 # Adicionar o diretório backend ao path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
+from flask import current_app, has_app_context
+
 from extensions import db
 from models import Property, IntegrationCredentials
 from integrations.gandalf_service import (
@@ -45,9 +49,20 @@ from integrations.gandalf_service import (
     create_listing,
     update_listing,
     get_listing_by_external_id,
+    activate_listing,
+    activate_listing_status,
+)
+from integrations.export_pipeline import (
+    get_active_export,
+    get_tenant_bucket,
+    resolve_export_settings,
+    track_export,
 )
+from integrations.image_transfer import transfer_images
+from integrations.payload_fingerprint import fingerprint, is_unchanged, mark_pushed, record
 from integrations.session_store import save_session, load_session
 from utils.integration_tokens import get_valid_integration_headers
+from utils.lazy_logging import async_handler
 from integrations.amenities_mapper import map_amenities_list
 
 
@@ -184,6 +199,36 @@ def _dedupe_preserve_order(values: List[Any]) -> List[Any]:
     return deduped
 
 
+# Aliases de publication_type aceitos no cadastro → valores da API CanalPro
+PUBLICATION_TYPE_ALIASES = {
+    # Mapeamentos oficiais
+    'PADRAO': 'STANDARD',
+    'PADRÃO': 'STANDARD',
+    'DESTAQUE_PADRAO': 'PREMIUM',
+    'DESTAQUE_PADRÃO': 'PREMIUM',
+    'DESTAQUE': 'PREMIUM',
+    'SUPER_DESTAQUE': 'SUPER_PREMIUM',
+    'SUPER-DESTAQUE': 'SUPER_PREMIUM',
+    'EXCLUSIVO': 'PREMIERE_1',
+    'SUPERIOR': 'PREMIERE_2',
+    'TRIPLO': 'TRIPLE',
+    # Aliases legados usados anteriormente
+    'ALTO_PADRAO': 'PREMIUM',
+    'ALTO_PADRÃO': 'PREMIUM',
+    'HIGH': 'PREMIUM',
+    'LUXO': 'PREMIERE_1',
+    'ECONOMICO': 'STANDARD',
+    'ECONÔMICO': 'STANDARD',
+    'HIGHLIGHT': 'PREMIUM',
+    'SUPER_HIGHLIGHT': 'SUPER_PREMIUM',
+    'EXCLUSIVE': 'PREMIERE_1',
+    'PREMIERE1': 'PREMIERE_1',
+    'PREMIERE2': 'PREMIERE_2'
+}
+
+VALID_PUBLICATION_TYPES = {'STANDARD', 'PREMIUM', 'SUPER_PREMIUM', 'PREMIERE_1', 'PREMIERE_2', 'TRIPLE'}
+
+
 class CanalProExporter:
     """Exportador de imóveis para Canal Pro"""
 
@@ -194,6 +239,13 @@ class CanalProExporter:
         self.service = GandalfService()
         self.credentials = None
         self.session_id = None
+        # Limitador de taxa do tenant (definido por run_export)
+        self.rate_limiter = None
+
+    def _throttle(self):
+        """Aguarda um token do limitador do tenant antes de chamar a API Gandalf."""
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
 
     def _classify_error(self, message: str) -> str:
         """Classifica erros conhecidos em códigos estáveis para o frontend.
@@ -217,6 +269,9 @@ class CanalProExporter:
         """Configura o logger para o exportador"""
         logger = logging.getLogger('canalpro_exporter')
         logger.setLevel(logging.INFO)
+        # Logger compartilhado: handlers só na primeira instância (senão cada linha sai N vezes)
+        if logger.handlers:
+            return logger
 
         # Handler para arquivo
         file_handler = logging.FileHandler('canalpro_export.log')
@@ -233,8 +288,8 @@ class CanalProExporter:
         file_handler.setFormatter(formatter)
         console_handler.setFormatter(formatter)
 
-        logger.addHandler(file_handler)
-        logger.addHandler(console_handler)
+        # Escrita em arquivo/console fora da thread da exportação
+        logger.addHandler(async_handler(file_handler, console_handler))
 
         return logger
 
@@ -311,8 +366,8 @@ class CanalProExporter:
                         return self._re_authenticate(app_context)
             else:
                 # Tentar obter contexto atual ou criar um novo
-                from app import create_app
-                app = create_app()
+                from worker_app import get_worker_app
+                app = get_worker_app()
                 with app.app_context():
                     try:
                         self.credentials = get_valid_integration_headers(
@@ -388,8 +443,8 @@ class CanalProExporter:
                         Property.status.in_(['ACTIVE', 'active', 'pending'])
                     ).limit(10).all()
             else:
-                from app import create_app
-                app = create_app()
+                from worker_app import get_worker_app
+                app = get_worker_app()
                 with app.app_context():
                     # Buscar imóveis que ainda não foram exportados (remote_id é NULL)
                     # e que estão ativos (status ACTIVE ou active)
@@ -628,7 +683,9 @@ class CanalProExporter:
             try:
                 creds = getattr(self, 'credentials', {})
                 if creds:
-                    amenities = map_amenities_list(consolidated_amenities, creds)
+                    amenities = map_amenities_list(
+                        consolidated_amenities, creds, unit_type=unit_types[0] if unit_types else 'APARTMENT'
+                    )
                     self.logger.info(
                         "Mapeadas %s amenities (de %s itens consolidados) para o Canal Pro",
                         len(amenities),
@@ -792,43 +849,32 @@ class CanalProExporter:
             except:
                 image_urls = []
 
-        for i, image_url in enumerate(image_urls[:10]):  # Máximo 10 imagens
-            try:
-                self.logger.info(f"Baixando imagem {i+1}: {image_url}")
-
-                # Baixar imagem
-                response = requests.get(image_url, timeout=30)
-                if response.status_code != 200:
-                    self.logger.warning(f"Falha ao baixar imagem {image_url}")
-                    continue
+        property_id = property.id
 
-                image_data = response.content
-                filename = f"property_{property.id}_image_{i+1}.jpg"
+        def upload(image_data: bytes, index: int, content_type: str) -> Optional[str]:
+            filename = f"property_{property_id}_image_{index + 1}.jpg"
+            self.logger.info(f"Fazendo upload da imagem {filename}")
+            self._throttle()
+            result = upload_image(image_data, filename, creds)
+            if isinstance(result, dict) and 'uploadImage' in (result.get('data') or {}):
+                return result['data']['uploadImage']['urlImage']
+            self.logger.error(f"Falha no upload da imagem: {result}")
+            return None
 
-                # Upload para Canal Pro
-                self.logger.info(f"Fazendo upload da imagem {filename}")
-                result = upload_image(image_data, filename, creds)
-
-                if 'data' in result and 'uploadImage' in result['data']:
-                    uploaded_url = result['data']['uploadImage']['urlImage']
-                    uploaded_urls.append(uploaded_url)
-                    self.logger.info(f"Upload bem-sucedido: {uploaded_url}")
-                else:
-                    self.logger.error(f"Falha no upload da imagem: {result}")
-
-            except Exception as e:
-                self.logger.error(f"Erro no upload da imagem {image_url}: {e}")
-                continue
+        # Máximo 10 imagens; em paralelo e sem reenviar imagens inalteradas
+        results = transfer_images(self.tenant_id, image_urls[:10], upload)
+        uploaded_urls = [url for url in results if url]
 
         return uploaded_urls
 
-    def export_property(self, property: Property, app_context=None, is_refresh=False) -> bool:
+    def export_property(self, property: Property, app_context=None, is_refresh=False, force=False) -> bool:
         """Exporta um imóvel específico para o Canal Pro
         
         Args:
             property: Objeto Property a ser exportado
             app_context: Contexto da aplicação Flask (opcional)
             is_refresh: Se é uma operação de refresh (ignora verificações de duplicata)
+            force: Reenvia mesmo com o fingerprint do último envio (ex.: anúncio removido no portal)
         """
         try:
             self.logger.info(f"Iniciando exportação do imóvel {property.property_code or property.external_id}")
@@ -840,6 +886,12 @@ class CanalProExporter:
 
             # 1. Converter dados
             listing_data = self.convert_property_to_canalpro_format(property)
+            # Antes do upload: as imagens reenviadas ganham URLs novas a cada vez
+            payload_fingerprint = fingerprint(listing_data)
+            if not force and is_unchanged(property, payload_fingerprint):
+                self.logger.info(f"Imóvel {property.property_code or property.external_id}: payload igual ao último envio, pulando exportação")
+                record('skipped', self.tenant_id)
+                return True
 
             # 2. Upload de imagens (se necessário)
             if not listing_data['images']:
@@ -869,6 +921,7 @@ class CanalProExporter:
                 try:
                     listing_payload = dict(listing_data)
                     listing_payload['id'] = str(remote_id)
+                    self._throttle()
                     result = update_listing(listing_payload, creds)
                     # Se o UPDATE falhou (tem erros), resetar result para None
                     if isinstance(result, dict) and result.get('errors'):
@@ -883,6 +936,7 @@ class CanalProExporter:
                 try:
                     external_id_str = str(listing_data.get('externalId')) if listing_data.get('externalId') else None
                     if external_id_str:
+                        self._throttle()
                         found = get_listing_by_external_id(creds, external_id_str)
                         if isinstance(found, list) and len(found) > 0:
                             found_id = found[0].get('id')
@@ -890,6 +944,7 @@ class CanalProExporter:
                                 self.logger.info(f"Encontrado listing remoto por externalId: {found_id}, tentando UPDATE")
                                 listing_payload = dict(listing_data)
                                 listing_payload['id'] = str(found_id)
+                                self._throttle()
                                 result = update_listing(listing_payload, creds)
                                 # persistir remote_id
                                 property.remote_id = found_id
@@ -903,6 +958,7 @@ class CanalProExporter:
             # Finalmente, se ainda não obtivemos um resultado de update, criar listing
             if result is None:
                 try:
+                    self._throttle()
                     result = create_listing(listing_data, creds)
                 except Exception as e:
                     self.logger.error(f"Erro ao criar listing: {e}")
@@ -946,6 +1002,8 @@ class CanalProExporter:
                     property.status = 'exported'
                     property.remote_id = canalpro_id
                     property.error = None
+                    mark_pushed(property, payload_fingerprint)
+                    record('sent', self.tenant_id)
 
                 property.updated_at = datetime.utcnow()
 
@@ -959,8 +1017,8 @@ class CanalProExporter:
                         db.session.commit()
                         self.logger.info(f"[DEBUG] Após commit: id={property.id}, external_id={property.external_id}, remote_id={property.remote_id}, status={property.status}")
                 else:
-                    from app import create_app
-                    app = create_app()
+                    from worker_app import get_worker_app
+                    app = get_worker_app()
                     with app.app_context():
                         # Garantir que o objeto está na sessão antes do commit
                         property = db.session.merge(property)
@@ -982,8 +1040,8 @@ class CanalProExporter:
                     with app_context:
                         db.session.commit()
                 else:
-                    from app import create_app
-                    app = create_app()
+                    from worker_app import get_worker_app
+                    app = get_worker_app()
                     with app.app_context():
                         db.session.commit()
 
@@ -1000,8 +1058,8 @@ class CanalProExporter:
                 with app_context:
                     db.session.commit()
             else:
-                from app import create_app
-                app = create_app()
+                from worker_app import get_worker_app
+                app = get_worker_app()
                 with app.app_context():
                     db.session.commit()
 
@@ -1018,15 +1076,170 @@ class CanalProExporter:
                 with app_context:
                     db.session.commit()
             else:
-                from app import create_app
-                app = create_app()
+                from worker_app import get_worker_app
+                app = get_worker_app()
                 with app.app_context():
                     db.session.commit()
 
             return False
 
-    def run_export(self, property_ids: List[int] = None, app_context=None) -> Dict[str, Any]:
-        """Executa o processo completo de exportação"""
+    def _normalize_publication_type(self, publication_type: Optional[str]) -> str:
+        """Converte o publication_type do imóvel para um valor aceito pela API (padrão STANDARD)."""
+        if not isinstance(publication_type, str) or not publication_type:
+            return 'STANDARD'
+        normalized = publication_type.strip().upper().replace(' ', '_')
+        normalized = PUBLICATION_TYPE_ALIASES.get(normalized, normalized)
+        return normalized if normalized in VALID_PUBLICATION_TYPES else 'STANDARD'
+
+    def activate_property(self, property: Property) -> Dict[str, Any]:
+        """Ativa no Canal Pro um imóvel já exportado (tipo de publicação + status ACTIVE).
+
+        Returns:
+            Dict com property_id, remote_id, activated, response e error
+        """
+        pid = getattr(property, 'id', None)
+        remote_id = getattr(property, 'remote_id', None)
+        if not remote_id:
+            return {'property_id': pid, 'remote_id': None, 'activated': False, 'reason': 'not_exported'}
+
+        try:
+            publication_type_value = self._normalize_publication_type(getattr(property, 'publication_type', None))
+
+            # Primeiro atualiza o tipo de publicação (destacado/padrão) no Canal Pro
+            self._throttle()
+            pub_resp = activate_listing(self.credentials, remote_id, publication_type_value)
+
+            self._throttle()
+            act_resp = activate_listing_status(self.credentials, remote_id, 'ACTIVE')
+            # Handle null response safely
+            error_detail = None
+            success = False
+
+            self.logger.info(f'=== RESPOSTA COMPLETA PARA PROPERTY {pid} ===')
+            self.logger.info(f'PublicationType response: {pub_resp}')
+            self.logger.info(f'Status response: {act_resp}')
+
+            if act_resp is None:
+                success = False
+                error_detail = 'Resposta nula da API CanalPro.'
+                self.logger.warning(f'activate_listing_status returned None for property {pid}')
+            else:
+                # Primeiro verificar se a operação foi bem-sucedida independente de erros GraphQL
+                data = act_resp.get('data') if isinstance(act_resp, dict) else None
+                update_status = data.get('updateListingStatus') if isinstance(data, dict) else None
+
+                # Se temos updateListingStatus e success=True, consideramos sucesso
+                if isinstance(update_status, dict) and update_status.get('success') is True:
+                    success = True
+                    error_detail = None
+                    self.logger.info(f'✅ SUCESSO para property {pid} (updateListingStatus.success=True)')
+                elif isinstance(update_status, dict):
+                    # updateListingStatus existe mas success não é True
+                    success = False
+                    error_detail = update_status.get('errorMessage') or update_status.get('message') or update_status.get('errors') or f"success={update_status.get('success')}"
+                    self.logger.warning(f'❌ FALHA para property {pid}: {error_detail}')
+                else:
+                    # Verificar se há erros GraphQL mas ainda assim pode ter tido sucesso
+                    graphql_errors = act_resp.get('errors') if isinstance(act_resp, dict) else None
+                    if graphql_errors:
+                        self.logger.warning(f'Erros GraphQL para property {pid}: {graphql_errors}')
+                        # Mesmo com erros GraphQL, se chegou até aqui a operação pode ter funcionado
+                        # (baseado no fato de que o imóvel aparece ativo no Canal Pro)
+                        success = True
+                        error_detail = f"Operação executada com avisos GraphQL: {graphql_errors}"
+                        self.logger.info(f'⚠️ SUCESSO COM AVISOS para property {pid}')
+                    else:
+                        success = False
+                        error_detail = f"Campo updateListingStatus ausente ou inválido: {act_resp}"
+                        self.logger.warning(f'Campo updateListingStatus ausente ou inválido na resposta para property {pid}: {act_resp}')
+
+            return {
+                'property_id': pid,
+                'remote_id': remote_id,
+                'activated': success,
+                'response': act_resp,
+                'error': error_detail
+            }
+        except Exception as e:
+            self.logger.exception(f'Erro ao ativar propriedade {pid}: {e}')
+            return {'property_id': pid, 'remote_id': remote_id, 'activated': False, 'error': str(e)}
+
+    def _export_worker(self, app, property_id: int, stats: Dict[str, Any], lock: threading.Lock, activate: bool):
+        """Processa um imóvel de ponta a ponta (imagens → create/update → ativação) em seu próprio contexto."""
+        with app.app_context():
+            property = db.session.get(Property, property_id)
+            if property is None:
+                with lock:
+                    stats['skipped'] += 1
+                    if activate:
+                        stats['activation_results'].append({'property_id': property_id, 'error': 'property_not_found'})
+                return
+
+            with lock:
+                stats['processed'] += 1
+                stats['in_progress'] += 1
+
+            try:
+                # O worker já está no contexto da aplicação: merge/commit usam a mesma sessão
+                success = self.export_property(property, nullcontext())
+
+                with lock:
+                    if success:
+                        stats['successful'] += 1
+                    else:
+                        stats['failed'] += 1
+                        # Adicionar detalhe de erro ao resumo
+                        err_msg = getattr(property, 'error', None) or 'Falha na exportação'
+                        stats['errors'].append({
+                            'property_id': getattr(property, 'id', None),
+                            'external_id': getattr(property, 'external_id', None),
+                            'remote_id': getattr(property, 'remote_id', None),
+                            'code': self._classify_error(err_msg),
+                            'message': err_msg,
+                            'step': 'export'
+                        })
+
+                if success:
+                    self.logger.info(f"Imóvel {property.external_id} exportado com sucesso")
+                else:
+                    self.logger.error(f"Falha na exportação do imóvel {property.external_id}")
+
+                if activate:
+                    activation = self.activate_property(property)
+                    with lock:
+                        stats['activation_results'].append(activation)
+
+            except Exception as e:
+                db.session.rollback()
+                self.logger.error(f"Erro crítico no imóvel {property_id}: {e}")
+                with lock:
+                    stats['failed'] += 1
+                    stats['errors'].append({
+                        'property_id': property_id,
+                        'external_id': getattr(property, 'external_id', None),
+                        'remote_id': getattr(property, 'remote_id', None),
+                        'code': self._classify_error(str(e)),
+                        'message': str(e),
+                        'step': 'export'
+                    })
+            finally:
+                with lock:
+                    stats['in_progress'] -= 1
+
+    def run_export(self, property_ids: List[int] = None, app_context=None, activate: bool = False) -> Dict[str, Any]:
+        """Executa o processo completo de exportação.
+
+        Os imóveis são processados em paralelo (``concurrency`` por tenant) e cada
+        chamada à API Gandalf passa pelo token bucket do tenant; veja
+        ``integrations.export_pipeline``. O dict ``stats`` é atualizado a cada
+        imóvel concluído e pode ser consultado via ``get_export_status``.
+
+        Args:
+            property_ids: IDs a exportar (padrão: imóveis pendentes)
+            app_context: Contexto da aplicação Flask (opcional)
+            activate: Se True, ativa cada imóvel exportado logo após o create/update
+                e inclui ``activation_results`` em ``stats``
+        """
         export_id = f"export_{int(time.time())}"
 
         stats = {
@@ -1035,10 +1248,14 @@ class CanalProExporter:
             'successful': 0,
             'failed': 0,
             'skipped': 0,
+            'total': 0,
+            'in_progress': 0,
             'start_time': datetime.now().isoformat(),
             'status': 'running',
             'errors': []
         }
+        if activate:
+            stats['activation_results'] = []
 
         try:
             # 1. Autenticação
@@ -1056,58 +1273,60 @@ class CanalProExporter:
                 # Buscar imóveis pendentes
                 properties = self.get_pending_properties(app_context)
 
+            ids = [p.id for p in properties]
+            if activate and property_ids:
+                found = {str(i) for i in ids}
+                stats['activation_results'].extend(
+                    {'property_id': pid, 'error': 'property_not_found'} for pid in property_ids if str(pid) not in found
+                )
+
             if not properties:
                 self.logger.info("Nenhum imóvel encontrado.")
                 stats['status'] = 'completed'
                 return stats
 
-            # 3. Processar cada imóvel
-            for property in properties:
-                stats['processed'] += 1
+            # 3. Configuração do tenant (concorrência + limitador de taxa)
+            if app_context:
+                app = app_context.app
+            elif has_app_context():
+                app = current_app._get_current_object()
+            else:
+                from worker_app import get_worker_app
+                app = get_worker_app()
 
-                try:
-                    success = self.export_property(property, app_context)
+            with app.app_context():
+                settings = resolve_export_settings(self.tenant_id)
+            self.rate_limiter = get_tenant_bucket(self.tenant_id, settings['rate_per_second'], settings['burst'])
 
-                    if success:
-                        stats['successful'] += 1
-                        self.logger.info(f"Imóvel {property.external_id} exportado com sucesso")
-                    else:
-                        stats['failed'] += 1
-                        self.logger.error(f"Falha na exportação do imóvel {property.external_id}")
-                        # Adicionar detalhe de erro ao resumo
-                        err_msg = getattr(property, 'error', None) or 'Falha na exportação'
-                        stats['errors'].append({
-                            'property_id': getattr(property, 'id', None),
-                            'external_id': getattr(property, 'external_id', None),
-                            'remote_id': getattr(property, 'remote_id', None),
-                            'code': self._classify_error(err_msg),
-                            'message': err_msg,
-                            'step': 'export'
-                        })
-
-                    # Pequena pausa entre imóveis para não sobrecarregar a API
-                    time.sleep(2)
+            stats['total'] = len(ids)
+            stats['concurrency'] = settings['concurrency']
+            stats['rate_per_second'] = settings['rate_per_second']
+            track_export(self.tenant_id, stats)
 
-                except Exception as e:
-                    stats['failed'] += 1
-                    self.logger.error(f"Erro crítico no imóvel {property.external_id}: {e}")
-                    stats['errors'].append({
-                        'property_id': getattr(property, 'id', None),
-                        'external_id': getattr(property, 'external_id', None),
-                        'remote_id': getattr(property, 'remote_id', None),
-                        'code': self._classify_error(str(e)),
-                        'message': str(e),
-                        'step': 'export'
-                    })
+            self.logger.info(
+                f"Exportando {len(ids)} imóveis (concorrência={settings['concurrency']}, "
+                f"taxa={settings['rate_per_second']}/s, burst={settings['burst']})"
+            )
 
-            # 4. Finalizar
+            # 4. Processar imóveis em paralelo
+            lock = threading.Lock()
+            with ThreadPoolExecutor(max_workers=min(settings['concurrency'], len(ids)),
+                                    thread_name_prefix='canalpro-export') as executor:
+                futures = [
+                    executor.submit(self._export_worker, app, pid, stats, lock, activate)
+                    for pid in ids
+                ]
+                for future in as_completed(futures):
+                    future.result()
+
+            # 5. Finalizar
             stats['end_time'] = datetime.now().isoformat()
             stats['status'] = 'completed' if stats['successful'] > 0 else 'failed'
 
             # Salvar no histórico (simulado - em produção usaria banco de dados)
             self.save_export_history(stats)
 
-            # 5. Resumo final
+            # 6. Resumo final
             self.logger.info("=" * 50)
             self.logger.info("RESUMO DA EXPORTAÇÃO")
             self.logger.info("=" * 50)
@@ -1138,8 +1357,20 @@ class CanalProExporter:
         self.logger.info(f"Export {stats['export_id']} salvo no histórico")
 
     def get_export_status(self) -> Dict[str, Any]:
-        """Retorna o status da exportação atual (simulado)"""
-        # Em produção, isso seria consultado do banco de dados
+        """Retorna o progresso da última exportação do tenant neste processo"""
+        stats = get_active_export(self.tenant_id)
+        if stats:
+            running = stats.get('status') == 'running'
+            return {
+                'is_running': running,
+                'current_progress': stats.get('processed', 0),
+                'total_properties': stats.get('total', 0),
+                'processed': stats.get('processed', 0),
+                'successful': stats.get('successful', 0),
+                'failed': stats.get('failed', 0),
+                'export_id': stats.get('export_id'),
+                'message': 'Export running' if running else f"Last export {stats.get('status')}"
+            }
         return {
             'is_running': False,  # Alterado de 'status' para 'is_running'
             'current_progress': 0,  # Alterado de 'progress' para 'current_progress'
@@ -0,0 +1,128 @@
+"""
+Motor de exportação concorrente para o Canal Pro.
+
+Substitui a pausa fixa entre imóveis por:
+- ``TokenBucket``: limitador de taxa por tenant, compartilhado por todas as
+  exportações do processo, aplicado a cada chamada à API Gandalf;
+- ``resolve_export_settings``: concorrência/taxa configuráveis por tenant
+  (metadata da credencial ``gandalf`` → variáveis de ambiente → padrões);
+- ``track_export``/``get_active_export``: o dict ``stats`` de cada exportação
+  fica acessível enquanto ela roda, para consulta de progresso.
+
+Chaves aceitas em ``IntegrationCredentials.metadata_json``:
+    export_concurrency       imóveis processados em paralelo
+    export_rate_per_second   requisições/s à API Gandalf (0 = sem limite)
+    export_burst             rajada máxima de requisições do bucket
+"""
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Padrões (sobrescritos pelas variáveis de ambiente e pela metadata do tenant)
+DEFAULT_EXPORT_CONCURRENCY = int(os.getenv('CANALPRO_EXPORT_CONCURRENCY', '4'))
+DEFAULT_EXPORT_RATE = float(os.getenv('CANALPRO_EXPORT_RATE', '2.0'))
+DEFAULT_EXPORT_BURST = int(os.getenv('CANALPRO_EXPORT_BURST', '4'))
+# Cada worker segura uma conexão do pool durante o imóvel; manter abaixo de
+# pool_size + max_overflow (config.py)
+MAX_EXPORT_CONCURRENCY = int(os.getenv('CANALPRO_EXPORT_MAX_CONCURRENCY', '6'))
+
+logger = logging.getLogger('canalpro_exporter')
+
+
+class TokenBucket:
+    """Token bucket thread-safe: ``rate`` tokens/s, acumulando até ``burst``.
+
+    ``rate <= 0`` desativa o limite (``acquire`` retorna imediatamente).
+    """
+
+    def __init__(self, rate: float, burst: int = 1):
+        self._lock = threading.Lock()
+        self.rate = 0.0
+        self.burst = 1
+        self.configure(rate, burst)
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+
+    def configure(self, rate: float, burst: int = 1):
+        with self._lock:
+            self.rate = max(float(rate), 0.0)
+            self.burst = max(int(burst), 1)
+
+    def acquire(self, tokens: float = 1.0):
+        """Bloqueia até haver ``tokens`` disponíveis e os consome."""
+        while True:
+            with self._lock:
+                if self.rate <= 0:
+                    return
+                now = time.monotonic()
+                self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                wait = (tokens - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+_tenant_buckets: Dict[int, TokenBucket] = {}
+_tenant_buckets_lock = threading.Lock()
+
+_active_exports: Dict[int, Dict[str, Any]] = {}
+_active_exports_lock = threading.Lock()
+
+
+def get_tenant_bucket(tenant_id: int, rate: float, burst: int) -> TokenBucket:
+    """Bucket do tenant (criado sob demanda); exportações simultâneas do mesmo tenant dividem a taxa."""
+    with _tenant_buckets_lock:
+        bucket = _tenant_buckets.get(tenant_id)
+        if bucket is None:
+            bucket = TokenBucket(rate, burst)
+            _tenant_buckets[tenant_id] = bucket
+            return bucket
+    if bucket.rate != max(float(rate), 0.0) or bucket.burst != max(int(burst), 1):
+        bucket.configure(rate, burst)
+    return bucket
+
+
+def _coerce(value: Any, cast, default):
+    try:
+        return cast(value) if value is not None and value != '' else default
+    except (TypeError, ValueError):
+        logger.warning(f"Configuração de exportação inválida: {value!r}; usando {default}")
+        return default
+
+
+def resolve_export_settings(tenant_id: int) -> Dict[str, Any]:
+    """Concorrência e taxa de exportação do tenant. Requer contexto da aplicação."""
+    metadata: Dict[str, Any] = {}
+    try:
+        from models import IntegrationCredentials
+
+        cred = IntegrationCredentials.query.filter_by(tenant_id=tenant_id, provider='gandalf').first()
+        metadata = (cred.metadata_json or {}) if cred else {}
+    except Exception as e:
+        logger.warning(f"Não foi possível ler configurações de exportação do tenant {tenant_id}: {e}")
+
+    concurrency = _coerce(metadata.get('export_concurrency'), int, DEFAULT_EXPORT_CONCURRENCY)
+    rate = _coerce(metadata.get('export_rate_per_second'), float, DEFAULT_EXPORT_RATE)
+    burst = _coerce(metadata.get('export_burst'), int, DEFAULT_EXPORT_BURST)
+
+    return {
+        'concurrency': min(max(concurrency, 1), MAX_EXPORT_CONCURRENCY),
+        'rate_per_second': max(rate, 0.0),
+        'burst': max(burst, 1),
+    }
+
+
+def track_export(tenant_id: int, stats: Dict[str, Any]):
+    """Registra o ``stats`` da exportação corrente do tenant (substitui o anterior)."""
+    with _active_exports_lock:
+        _active_exports[tenant_id] = stats
+
+
+def get_active_export(tenant_id: int) -> Optional[Dict[str, Any]]:
+    """Última exportação registrada para o tenant neste processo, se houver."""
+    with _active_exports_lock:
+        return _active_exports.get(tenant_id)
@@ -0,0 +1,190 @@
+"""Cliente HTTP compartilhado para a API GraphQL do Gandalf.
+
+Uma ``requests.Session`` por processo com pool de conexões e keep-alive, então
+chamadas consecutivas reaproveitam a conexão TCP/TLS em vez de refazer o
+handshake. Também centraliza:
+
+- retry com backoff exponencial (+ jitter) para falhas de conexão, timeouts e
+  respostas 5xx — só para operações idempotentes (``retries`` por chamada);
+- métricas de latência por operação GraphQL (``get_gandalf_client().metrics()``);
+- contagem das chamadas de um trecho de código (``track_calls()``), usada para
+  comparar o custo das estratégias de refresh.
+
+Configuração (variáveis de ambiente):
+    GANDALF_POOL_SIZE        conexões mantidas por host (padrão 20)
+    GANDALF_MAX_RETRIES      novas tentativas em operações idempotentes (padrão 2)
+    GANDALF_RETRY_BACKOFF    base do backoff em segundos (padrão 2 → 2s, 4s)
+"""
+import contextvars
+import logging
+import os
+import random
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+GANDALF_POOL_SIZE = int(os.getenv('GANDALF_POOL_SIZE', '20'))
+GANDALF_MAX_RETRIES = int(os.getenv('GANDALF_MAX_RETRIES', '2'))
+GANDALF_RETRY_BACKOFF = float(os.getenv('GANDALF_RETRY_BACKOFF', '2'))
+# Amostras de latência mantidas por operação para p50/p95
+METRICS_SAMPLE_SIZE = 256
+
+RETRYABLE_STATUS = {500, 502, 503, 504}
+
+logger = logging.getLogger('gandalf_service')
+
+# Contador ativo do trecho atual (ver track_calls); copiado para threads auxiliares via contextvars
+_call_tracker: contextvars.ContextVar = contextvars.ContextVar('gandalf_call_tracker', default=None)
+
+
+class CallTracker:
+    """Chamadas e latência acumuladas dentro de um ``track_calls()``."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.total_ms = 0.0
+        self.operations: Dict[str, int] = {}
+
+    def add(self, operation: str, elapsed_ms: float):
+        with self._lock:
+            self.calls += 1
+            self.total_ms += elapsed_ms
+            self.operations[operation] = self.operations.get(operation, 0) + 1
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {'api_calls': self.calls, 'api_latency_ms': round(self.total_ms, 1),
+                    'operations': dict(self.operations)}
+
+
+@contextmanager
+def track_calls() -> Iterator[CallTracker]:
+    """Conta as chamadas ao Gandalf feitas no bloco (inclui threads que copiam o contexto)."""
+    tracker = CallTracker()
+    token = _call_tracker.set(tracker)
+    try:
+        yield tracker
+    finally:
+        _call_tracker.reset(token)
+
+
+class GandalfHTTPClient:
+    """Sessão HTTP com pool, retry unificado e métricas de latência."""
+
+    def __init__(self, pool_size: int = GANDALF_POOL_SIZE, max_retries: int = GANDALF_MAX_RETRIES,
+                 backoff: float = GANDALF_RETRY_BACKOFF):
+        self.pool_size = pool_size
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Dict[str, Any]] = {}
+
+    def _record(self, operation: str, elapsed_ms: float, ok: bool, retried: int):
+        tracker = _call_tracker.get()
+        if tracker is not None:
+            tracker.add(operation, elapsed_ms)
+        with self._metrics_lock:
+            entry = self._metrics.get(operation)
+            if entry is None:
+                entry = {'calls': 0, 'errors': 0, 'retries': 0, 'total_ms': 0.0, 'max_ms': 0.0,
+                         'samples': deque(maxlen=METRICS_SAMPLE_SIZE)}
+                self._metrics[operation] = entry
+            entry['calls'] += 1
+            entry['errors'] += 0 if ok else 1
+            entry['retries'] += retried
+            entry['total_ms'] += elapsed_ms
+            entry['max_ms'] = max(entry['max_ms'], elapsed_ms)
+            entry['samples'].append(elapsed_ms)
+
+    def _sleep_before_retry(self, attempt: int, operation: str, reason: str):
+        wait = self.backoff * (2 ** attempt) * (0.8 + random.random() * 0.4)
+        logger.warning('%s %s on attempt %d, retrying in %.1fs', operation, reason, attempt + 1, wait)
+        time.sleep(wait)
+
+    def post(self, url: str, operation: str, retries: Optional[int] = None, timeout: float = 30,
+             **kwargs) -> requests.Response:
+        """POST com pool/keep-alive.
+
+        Args:
+            url: Endpoint GraphQL
+            operation: Nome da operação (chave das métricas e dos logs)
+            retries: Novas tentativas permitidas (padrão ``max_retries``; use 0 para mutations não idempotentes)
+            timeout: Timeout por tentativa em segundos
+            **kwargs: Repassados a ``requests.Session.post`` (headers, json, files...)
+
+        Returns:
+            A última resposta recebida (o chamador trata o status HTTP).
+
+        Raises:
+            requests.exceptions.RequestException: se a última tentativa falhar sem resposta.
+        """
+        retries = self.max_retries if retries is None else retries
+        attempt = 0
+        start = time.perf_counter()
+        while True:
+            try:
+                resp = self.session.post(url, timeout=timeout, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                if attempt < retries:
+                    self._sleep_before_retry(attempt, operation, type(e).__name__)
+                    attempt += 1
+                    continue
+                self._record(operation, (time.perf_counter() - start) * 1000, False, attempt)
+                raise
+
+            if resp.status_code in RETRYABLE_STATUS and attempt < retries:
+                self._sleep_before_retry(attempt, operation, f'server error {resp.status_code}')
+                attempt += 1
+                continue
+
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            self._record(operation, elapsed_ms, resp.status_code == 200, attempt)
+            logger.debug('%s status=%s latency=%.1fms retries=%d', operation, resp.status_code, elapsed_ms, attempt)
+            return resp
+
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        """Snapshot das métricas por operação: chamadas, erros, retries e latências (ms)."""
+        with self._metrics_lock:
+            snapshot = {}
+            for operation, entry in self._metrics.items():
+                samples = sorted(entry['samples'])
+                snapshot[operation] = {
+                    'calls': entry['calls'],
+                    'errors': entry['errors'],
+                    'retries': entry['retries'],
+                    'avg_ms': round(entry['total_ms'] / entry['calls'], 1),
+                    'p50_ms': round(samples[len(samples) // 2], 1),
+                    'p95_ms': round(samples[max(int(len(samples) * 0.95) - 1, 0)], 1),
+                    'max_ms': round(entry['max_ms'], 1),
+                }
+            return snapshot
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[GandalfHTTPClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_gandalf_client() -> GandalfHTTPClient:
+    """Cliente do processo atual (recriado após fork, ex.: workers prefork do Celery)."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _client_lock:
+            if _client is None or _client_pid != pid:
+                _client = GandalfHTTPClient()
+                _client_pid = pid
+    return _client
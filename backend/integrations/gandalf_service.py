@@ -1,7 +1,9 @@
 import json
 import requests
-from typing import Dict, Any, List, Optional
+from typing import Dict, Any, Iterator, List, Optional
 from integrations.session_store import save_session, load_session, delete_session
+from integrations.gandalf_client import get_gandalf_client
+from utils.lazy_logging import log_sampled, preview
 import uuid
 import logging
 
@@ -53,16 +55,14 @@ def create_listing(listing: Dict[str, Any], creds: Dict[str, Any]) -> Dict[str,
     logger = logging.getLogger('gandalf_service')
     logger.debug('create_listing request headers=%s body_keys=%s', {k:v for k,v in headers.items() if k.lower()!='authorization'}, list(body.keys()))
     try:
-        # Log payload truncated for debug
-        try:
-            logger.info('create_listing payload (full): %s', json.dumps(listing, default=str, indent=2))
-        except Exception:
-            logger.debug('create_listing payload (truncated): <non-serializable>')
+        # Payload completo amostrado (renderizado só se o record sair)
+        log_sampled(logger, logging.INFO, 'create_listing', 'create_listing payload (full): %s',
+                    preview(listing, limit=None, indent=2))
 
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
-        logger.debug('create_listing response status=%s body_trunc=%s', resp.status_code, (resp.text or '')[:2000])
+        resp = get_gandalf_client().post(GANDALF_URL, 'createListing', retries=0, headers=headers, json=body, timeout=30)
+        logger.debug('create_listing response status=%s body_trunc=%s', resp.status_code, preview(resp.text or ''))
         if resp.status_code != 200:
-            logger.error('create_listing non-200 response: %s', resp.text[:2000])
+            logger.error('create_listing non-200 response: %s', preview(resp.text))
             raise GandalfError(f'create_listing failed status={resp.status_code} body={resp.text}')
         return resp.json()
     except Exception as e:
@@ -87,10 +87,10 @@ def upload_image(file_bytes: bytes, filename: str, creds: Dict[str, Any]) -> Dic
     logger = logging.getLogger('gandalf_service')
     try:
         logger.debug('upload_image starting filename=%s headers=%s', filename, {k:v for k,v in headers.items() if k.lower()!='authorization'})
-        resp = requests.post(GANDALF_URL, headers=headers, files=files, timeout=60)
-        logger.debug('upload_image response status=%s body_trunc=%s', resp.status_code, (resp.text or '')[:2000])
+        resp = get_gandalf_client().post(GANDALF_URL, 'uploadImage', retries=0, headers=headers, files=files, timeout=60)
+        logger.debug('upload_image response status=%s body_trunc=%s', resp.status_code, preview(resp.text or ''))
         if resp.status_code != 200:
-            logger.error('upload_image non-200 response: %s', resp.text[:2000])
+            logger.error('upload_image non-200 response: %s', preview(resp.text))
             raise GandalfError(f'upload_image failed status={resp.status_code} body={resp.text}')
         return resp.json()
     except Exception as e:
@@ -98,15 +98,19 @@ def upload_image(file_bytes: bytes, filename: str, creds: Dict[str, Any]) -> Dic
         raise
 
 
-def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: List[str] = None) -> list:
-    """Lista todas as propriedades do canal conectando-se à API Gandalf paginada.
+def iter_listing_pages(creds: Dict[str, Any], page_size: int = 50,
+                       status_filter: List[str] = None, start_page: int = 1) -> Iterator[list]:
+    """Percorre a listagem paginada do Gandalf, uma página por vez.
+
+    Cada ``yield`` entrega os ``listListing`` de uma página; a próxima página só
+    é requisitada quando o consumidor pede, então a memória fica limitada ao
+    tamanho da página.
 
     Args:
         creds: Credenciais de autenticação
         page_size: Tamanho da página para paginação
         status_filter: Lista de status para filtrar (ex: ['ACTIVE'])
-
-    Retorna uma lista de objetos de listagem (listListing conforme resposta da API).
+        start_page: Primeira página a buscar (retomada de importações interrompidas)
     """
     headers = _headers_from_credentials(creds)
 
@@ -226,8 +230,7 @@ def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: Lis
   }
 }'''
 
-    all_listings = []
-    page = 1
+    page = max(int(start_page or 1), 1)
     while True:
         # Monta variáveis do payload seguindo o exemplo recebido (arrays vazias quando aplicável)
         body = {
@@ -250,8 +253,11 @@ def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: Lis
             'query': query
         }
         logging.getLogger('gandalf_service').info('list_listings request page=%s headers=%s body_vars=%s', page, {k:v for k,v in headers.items() if k.lower()!='authorization'}, body['variables'])
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
-        logging.getLogger('gandalf_service').info('list_listings response status=%s headers=%s body_trunc=%s', resp.status_code, dict(resp.headers), (resp.text or '')[:4000])
+        resp = get_gandalf_client().post(GANDALF_URL, 'listings', headers=headers, json=body, timeout=30)
+        logging.getLogger('gandalf_service').info('list_listings response page=%s status=%s', page, resp.status_code)
+        # Headers e corpo de uma página a cada N (e só com DEBUG habilitado)
+        log_sampled(logging.getLogger('gandalf_service'), logging.DEBUG, 'list_listings',
+                    'list_listings response page=%s headers=%s body_trunc=%s', page, resp.headers, preview(resp.text or '', 4000))
         if resp.status_code != 200:
             # incluir body no erro para debug imediato
             raise GandalfError(f'list_listings failed status={resp.status_code} body={resp.text}')
@@ -276,7 +282,7 @@ def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: Lis
         if not isinstance(list_items, list):
             raise GandalfError(f'list_listings "listListing" is not a list; body={resp.text}')
 
-        all_listings.extend(list_items)
+        yield list_items
 
         page_number = listings_block.get('pageNumber', page)
         total_pages = listings_block.get('totalPages', 1)
@@ -284,6 +290,21 @@ def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: Lis
             break
         page += 1
 
+
+def list_listings(creds: Dict[str, Any], page_size: int = 50, status_filter: List[str] = None) -> list:
+    """Lista todas as propriedades do canal conectando-se à API Gandalf paginada.
+
+    Args:
+        creds: Credenciais de autenticação
+        page_size: Tamanho da página para paginação
+        status_filter: Lista de status para filtrar (ex: ['ACTIVE'])
+
+    Retorna uma lista de objetos de listagem (listListing conforme resposta da API).
+    Para importações grandes prefira ``iter_listing_pages``.
+    """
+    all_listings = []
+    for list_items in iter_listing_pages(creds, page_size=page_size, status_filter=status_filter):
+        all_listings.extend(list_items)
     return all_listings
 
 
@@ -426,7 +447,7 @@ def get_listing_by_external_id(creds: Dict[str, Any], external_id: str) -> list:
     try:
         logger = logging.getLogger('gandalf_service')
         logger.debug('get_listing_by_external_id request external_id=%s headers=%s', external_id, {k:v for k,v in headers.items() if k.lower()!='authorization'})
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
+        resp = get_gandalf_client().post(GANDALF_URL, 'listings', headers=headers, json=body, timeout=30)
     except Exception as e:
         logging.getLogger('gandalf_service').exception('get_listing_by_external_id request failed: %s', e)
         raise GandalfError(f'get_listing_by_external_id request failed: {e}')
@@ -498,7 +519,7 @@ def update_listing_publication_type(creds: Dict[str, Any], listing_ids: List[str
     }
 
     try:
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
+        resp = get_gandalf_client().post(GANDALF_URL, 'updateBatchListingPublicationType', headers=headers, json=body, timeout=30)
     except Exception as e:
         raise GandalfError(f'update_listing_publication_type request failed: {e}')
 
@@ -550,7 +571,7 @@ def activate_listing(creds: Dict[str, Any], listing_id: str, publication_type: s
     }
 
     try:
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
+        resp = get_gandalf_client().post(GANDALF_URL, 'updateListingPublicationType', headers=headers, json=body, timeout=30)
     except Exception as e:
         raise GandalfError(f'activate_listing request failed: {e}')
 
@@ -609,14 +630,14 @@ def activate_listing_status(creds: Dict[str, Any], listing_id: str, status: str
 
     try:
         logger.debug('activate_listing_status request listing_id=%s status=%s', listing_id, status)
-        logger.debug('activate_listing_status payload (truncated): %s', json.dumps(variables, default=str)[:2000])
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
+        logger.debug('activate_listing_status payload (truncated): %s', preview(variables))
+        resp = get_gandalf_client().post(GANDALF_URL, 'updateListingStatus', headers=headers, json=body, timeout=30)
     except Exception as e:
         logger.exception('activate_listing_status request failed: %s', e)
         raise GandalfError(f'activate_listing_status request failed: {e}')
 
     if resp.status_code != 200:
-        logger.error('activate_listing_status failed status=%s body=%s', resp.status_code, resp.text[:2000])
+        logger.error('activate_listing_status failed status=%s body=%s', resp.status_code, preview(resp.text))
         raise GandalfError(f'activate_listing_status failed status={resp.status_code} body={resp.text}')
 
     try:
@@ -625,7 +646,7 @@ def activate_listing_status(creds: Dict[str, Any], listing_id: str, status: str
         logger.exception('activate_listing_status response is not valid json')
         raise GandalfError('activate_listing_status response is not valid json')
 
-    logger.debug('activate_listing_status response (truncated): %s', str(data)[:2000])
+    logger.debug('activate_listing_status response (truncated): %s', preview(data))
     return data
 
 
@@ -669,7 +690,7 @@ def get_amenities(creds: Dict[str, Any], unit_type: str = "APARTMENT", listing_t
     headers = _headers_from_credentials(creds)
     logging.getLogger('gandalf_service').info('get_amenities request headers=%s', {k:v for k,v in headers.items() if k.lower()!='authorization'})
 
-    resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
+    resp = get_gandalf_client().post(GANDALF_URL, 'amenities', headers=headers, json=body, timeout=30)
     logging.getLogger('gandalf_service').info('get_amenities response status=%s', resp.status_code)
 
     if resp.status_code != 200:
@@ -1107,7 +1128,7 @@ class GandalfService:
         }
 
         try:
-            resp = requests.post(self.base_url, headers=headers, json=body_refresh, timeout=30)
+            resp = get_gandalf_client().post(self.base_url, 'refreshToken', retries=0, headers=headers, json=body_refresh, timeout=30)
             
             if resp.status_code != 200:
                 logger.warning(f'Refresh token failed with status {resp.status_code}')
@@ -1150,21 +1171,18 @@ def update_listing(listing: Dict[str, Any], creds: Dict[str, Any]) -> Dict[str,
     logger = logging.getLogger('gandalf_service')
     logger.debug('update_listing request headers=%s body_keys=%s', {k: v for k, v in headers.items() if k.lower() != 'authorization'}, list(body.keys()))
     try:
-        try:
-            logger.debug('update_listing payload (truncated): %s', json.dumps(listing, default=str)[:4000])
-        except Exception:
-            logger.debug('update_listing payload (truncated): <non-serializable>')
+        logger.debug('update_listing payload (truncated): %s', preview(listing, 4000))
 
-        resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
-        logger.debug('update_listing response status=%s body_trunc=%s', resp.status_code, (resp.text or '')[:2000])
+        resp = get_gandalf_client().post(GANDALF_URL, 'updateListing', headers=headers, json=body, timeout=30)
+        logger.debug('update_listing response status=%s body_trunc=%s', resp.status_code, preview(resp.text or ''))
         if resp.status_code != 200:
-            logger.error('update_listing non-200 response: %s', resp.text[:2000])
+            logger.error('update_listing non-200 response: %s', preview(resp.text))
             raise GandalfError(f'update_listing failed status={resp.status_code} body={resp.text}')
 
         try:
             return resp.json()
         except Exception:
-            logger.exception('update_listing response is not valid json; body=%s', resp.text[:2000])
+            logger.exception('update_listing response is not valid json; body=%s', preview(resp.text))
             raise GandalfError(f'update_listing response is not valid json; body={resp.text}')
     except Exception as e:
         logger.exception('update_listing exception: %s', e)
@@ -1190,57 +1208,19 @@ def bulk_delete_listing(listing_ids: List[str], creds: Dict[str, Any]) -> Dict[s
     logger = logging.getLogger('gandalf_service')
     logger.debug('bulk_delete_listing request headers=%s listing_ids=%s', {k: v for k, v in headers.items() if k.lower() != 'authorization'}, listing_ids)
 
-    # Try up to 3 times with exponential backoff
-    for attempt in range(3):
-        try:
-            logger.info('bulk_delete_listing attempt %d/3', attempt + 1)
-            resp = requests.post(GANDALF_URL, headers=headers, json=body, timeout=30)
-            logger.info('bulk_delete_listing response status=%s body_trunc=%s', resp.status_code, (resp.text or '')[:2000])
-
-            if resp.status_code != 200:
-                logger.error('bulk_delete_listing non-200 response: %s', resp.text[:2000])
-                # For server errors (5xx), retry
-                if resp.status_code >= 500 and attempt < 2:
-                    import time
-                    wait_time = (attempt + 1) * 2  # 2s, 4s
-                    logger.warning('bulk_delete_listing server error %d, retrying in %ds', resp.status_code, wait_time)
-                    time.sleep(wait_time)
-                    continue
-                raise GandalfError(f'bulk_delete_listing failed status={resp.status_code} body={resp.text}')
-
-            return resp.json()
-
-        except requests.exceptions.ConnectionError as e:
-            error_msg = str(e)
-            logger.warning('bulk_delete_listing connection error on attempt %d: %s', attempt + 1, error_msg)
-            # For connection errors, retry with backoff
-            if attempt < 2:
-                import time
-                wait_time = (attempt + 1) * 3  # 3s, 6s
-                logger.info('bulk_delete_listing connection error, retrying in %ds', wait_time)
-                time.sleep(wait_time)
-                continue
-            else:
-                logger.error('bulk_delete_listing failed after all retries due to connection error')
-                raise GandalfError(f'bulk_delete_listing connection failed: {error_msg}')
-
-        except requests.exceptions.Timeout as e:
-            logger.warning('bulk_delete_listing timeout on attempt %d', attempt + 1)
-            # For timeouts, retry with backoff
-            if attempt < 2:
-                import time
-                wait_time = (attempt + 1) * 2  # 2s, 4s
-                logger.info('bulk_delete_listing timeout, retrying in %ds', wait_time)
-                time.sleep(wait_time)
-                continue
-            else:
-                logger.error('bulk_delete_listing failed after all retries due to timeout')
-                raise GandalfError(f'bulk_delete_listing timeout: {e}')
-
-        except Exception as e:
-            logger.exception('bulk_delete_listing exception on attempt %d: %s', attempt + 1, e)
-            # For other exceptions, don't retry
-            raise
+    # Retry/backoff (5xx, conexão, timeout) feito pelo cliente compartilhado
+    try:
+        resp = get_gandalf_client().post(GANDALF_URL, 'bulkDeleteListing', headers=headers, json=body, timeout=30)
+    except requests.exceptions.ConnectionError as e:
+        logger.error('bulk_delete_listing failed after all retries due to connection error')
+        raise GandalfError(f'bulk_delete_listing connection failed: {e}')
+    except requests.exceptions.Timeout as e:
+        logger.error('bulk_delete_listing failed after all retries due to timeout')
+        raise GandalfError(f'bulk_delete_listing timeout: {e}')
+
+    logger.info('bulk_delete_listing response status=%s body_trunc=%s', resp.status_code, preview(resp.text or ''))
+    if resp.status_code != 200:
+        logger.error('bulk_delete_listing non-200 response: %s', preview(resp.text))
+        raise GandalfError(f'bulk_delete_listing failed status={resp.status_code} body={resp.text}')
 
-    # If we get here, all retries failed
-    raise GandalfError('bulk_delete_listing failed after all retry attempts')
+    return resp.json()
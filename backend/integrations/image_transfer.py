@@ -0,0 +1,176 @@
+"""Transferência de imagens para o Gandalf com cache por conteúdo.
+
+Cada imagem de origem é baixada por uma sessão HTTP compartilhada (pool de
+conexões) e enviada ao Gandalf em paralelo. O resultado fica em cache:
+
+- ``src``: URL de origem → ETag/Last-Modified, sha256 e ``urlImage`` do Gandalf.
+  Na próxima exportação a origem é revalidada com ``If-None-Match`` /
+  ``If-Modified-Since``; um 304 reaproveita o ``urlImage`` sem baixar nem enviar.
+- ``sha``: sha256 do conteúdo → ``urlImage``. Mesma foto sob outra URL (ou
+  origem sem validadores) não é reenviada.
+
+Usa Redis (REDIS_URL) quando disponível; caso contrário, um fallback em memória
+por processo, como ``integrations.session_store``.
+"""
+import contextvars
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Sequence
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+# Validade das entradas do cache (padrão 30 dias)
+IMAGE_CACHE_TTL = int(os.getenv('CANALPRO_IMAGE_CACHE_TTL', str(30 * 24 * 3600)))
+# Downloads/uploads simultâneos por imóvel
+IMAGE_TRANSFER_WORKERS = int(os.getenv('CANALPRO_IMAGE_WORKERS', '4'))
+IMAGE_DOWNLOAD_TIMEOUT = 30
+# Limite de entradas do fallback em memória
+MEMORY_CACHE_MAX_ENTRIES = 10000
+
+_memory_store: Dict[str, Dict] = {}
+_memory_lock = threading.Lock()
+
+# Sessão compartilhada para baixar as imagens de origem (reaproveita conexões TLS)
+_http = requests.Session()
+_adapter = HTTPAdapter(pool_connections=8, pool_maxsize=max(IMAGE_TRANSFER_WORKERS * 4, 10))
+_http.mount('http://', _adapter)
+_http.mount('https://', _adapter)
+
+
+def _cache_get(key: str) -> Optional[dict]:
+    client = get_redis()
+    if client:
+        try:
+            data = client.get(key)
+            return json.loads(data) if data else None
+        except Exception:
+            logger.exception('Failed to read image cache entry from Redis')
+            return None
+
+    with _memory_lock:
+        entry = _memory_store.get(key)
+        if entry and entry['expires_at'] < time.time():
+            _memory_store.pop(key, None)
+            return None
+    return entry['value'] if entry else None
+
+
+def _cache_set(key: str, value: dict, ttl: int = IMAGE_CACHE_TTL) -> None:
+    client = get_redis()
+    if client:
+        try:
+            client.setex(key, ttl, json.dumps(value))
+        except Exception:
+            logger.exception('Failed to write image cache entry to Redis')
+        return
+
+    with _memory_lock:
+        if len(_memory_store) >= MEMORY_CACHE_MAX_ENTRIES and key not in _memory_store:
+            _memory_store.pop(next(iter(_memory_store)), None)
+        _memory_store[key] = {'value': value, 'expires_at': time.time() + ttl}
+
+
+def _source_key(tenant_id: int, url: str) -> str:
+    return f"canalpro:img:src:{tenant_id}:{hashlib.sha1(url.encode('utf-8')).hexdigest()}"
+
+
+def _content_key(tenant_id: int, digest: str) -> str:
+    return f"canalpro:img:sha:{tenant_id}:{digest}"
+
+
+def _transfer_one(tenant_id: int, index: int, url: str, upload: Callable, counters: Dict[str, int],
+                  lock: threading.Lock) -> Optional[str]:
+    source_key = _source_key(tenant_id, url)
+    cached = _cache_get(source_key)
+
+    headers = {}
+    if cached:
+        if cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+        if cached.get('last_modified'):
+            headers['If-Modified-Since'] = cached['last_modified']
+
+    response = _http.get(url, headers=headers, timeout=IMAGE_DOWNLOAD_TIMEOUT)
+    if response.status_code == 304 and cached and cached.get('url_image'):
+        with lock:
+            counters['not_modified'] += 1
+        return cached['url_image']
+    if response.status_code != 200:
+        logger.warning(f"Falha ao baixar imagem {url} (status {response.status_code})")
+        return None
+
+    content = response.content
+    digest = hashlib.sha256(content).hexdigest()
+    known = _cache_get(_content_key(tenant_id, digest))
+    url_image = known.get('url_image') if known else None
+
+    if url_image:
+        with lock:
+            counters['deduplicated'] += 1
+    else:
+        url_image = upload(content, index, response.headers.get('Content-Type', ''))
+        if not url_image:
+            return None
+        with lock:
+            counters['uploaded'] += 1
+        _cache_set(_content_key(tenant_id, digest), {'url_image': url_image})
+
+    _cache_set(source_key, {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified'),
+        'sha256': digest,
+        'url_image': url_image,
+    })
+    return url_image
+
+
+def transfer_images(tenant_id: int, image_urls: Sequence[str],
+                    upload: Callable[[bytes, int, str], Optional[str]],
+                    max_workers: int = IMAGE_TRANSFER_WORKERS) -> List[Optional[str]]:
+    """Envia as imagens ao Gandalf em paralelo, reaproveitando uploads anteriores.
+
+    Args:
+        tenant_id: Tenant dono das imagens (o cache é separado por tenant)
+        image_urls: URLs de origem
+        upload: ``upload(bytes, índice, content_type)`` → ``urlImage`` ou None
+        max_workers: Transferências simultâneas
+
+    Returns:
+        ``urlImage`` de cada imagem na ordem de entrada (None quando falhou)
+    """
+    if not image_urls:
+        return []
+
+    counters = {'not_modified': 0, 'deduplicated': 0, 'uploaded': 0}
+    lock = threading.Lock()
+
+    def run(item):
+        index, url = item
+        try:
+            return _transfer_one(tenant_id, index, url, upload, counters, lock)
+        except Exception as e:
+            logger.error(f"Erro na transferência da imagem {url}: {e}")
+            return None
+
+    # Cada tarefa roda numa cópia do contexto de quem chamou (ex.: gandalf_client.track_calls)
+    contexts = [contextvars.copy_context() for _ in image_urls]
+    with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(image_urls))),
+                            thread_name_prefix='canalpro-image') as executor:
+        results = list(executor.map(lambda ctx, item: ctx.run(run, item), contexts, enumerate(image_urls)))
+
+    logger.info(
+        f"Imagens: {len(image_urls)} total, {counters['not_modified']} sem alteração, "
+        f"{counters['deduplicated']} por conteúdo, {counters['uploaded']} enviadas, "
+        f"{sum(1 for r in results if r is None)} falhas"
+    )
+    return results
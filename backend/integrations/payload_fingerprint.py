@@ -0,0 +1,99 @@
+"""
+Fingerprint do payload enviado ao CanalPro (Gandalf)
+
+O hash é calculado sobre o payload de ``convert_property_to_canalpro_format``
+(imagens incluídas, como URLs de origem), serializado de forma canônica: chaves
+ordenadas, sem espaços e sem o ``id`` remoto, que muda a cada recriação. Ele é
+calculado antes do upload das imagens porque o upload gera URLs novas a cada
+envio.
+
+Depois de um create/update bem-sucedido o fingerprint fica gravado no imóvel
+(``Property.canalpro_fingerprint``). Se o próximo sync gerar o mesmo payload,
+o envio é dispensado (``skipped``) ou, no refresh, rebaixado para um touch
+(``touched``). Os contadores por tenant ficam no Redis (fallback em memória,
+como ``utils.tenant_cache``), em ``GET /properties/dashboard/canalpro-push-metrics``.
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+COUNTERS_KEY = 'canalpro_push:counters'
+# Permite desligar o atalho (ex.: forçar reenvio após mudança no lado do CanalPro)
+SKIP_UNCHANGED = os.getenv('CANALPRO_SKIP_UNCHANGED', 'true').lower() not in ('0', 'false', 'no')
+OUTCOMES = ('sent', 'skipped', 'touched')
+# Chaves que não descrevem o anúncio em si
+_VOLATILE_KEYS = frozenset({'id'})
+
+_lock = threading.Lock()
+_memory_counters: Dict[str, Dict[str, int]] = defaultdict(lambda: dict.fromkeys(OUTCOMES, 0))
+
+
+def fingerprint(payload: Dict[str, Any]) -> str:
+    """SHA-256 (hex) da serialização canônica do payload, sem chaves voláteis."""
+    stable = {key: value for key, value in payload.items() if key not in _VOLATILE_KEYS}
+    canonical = json.dumps(stable, sort_keys=True, separators=(',', ':'), ensure_ascii=False, default=str)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def is_unchanged(prop, payload_fingerprint: str) -> bool:
+    """True se o anúncio publicado já corresponde a este payload."""
+    return (
+        SKIP_UNCHANGED
+        and bool(getattr(prop, 'remote_id', None))
+        and prop.status == 'exported'
+        and prop.canalpro_fingerprint == payload_fingerprint
+    )
+
+
+def mark_pushed(prop, payload_fingerprint: str) -> None:
+    """Grava o fingerprint do último envio bem-sucedido (sem commit)."""
+    prop.canalpro_fingerprint = payload_fingerprint
+    prop.canalpro_pushed_at = datetime.now(timezone.utc)
+
+
+def record(outcome: str, tenant_id: Optional[int] = None) -> None:
+    """Conta um envio (sent), um envio dispensado (skipped) ou um refresh rebaixado (touched)."""
+    client = get_redis()
+    scope = str(tenant_id) if tenant_id is not None else 'global'
+    try:
+        if client:
+            client.hincrby(COUNTERS_KEY, f'{scope}:{outcome}', 1)
+            return
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Push counter update failed: %s", str(e))
+    with _lock:
+        _memory_counters[scope][outcome] += 1
+
+
+def metrics(tenant_id: Optional[int] = None) -> Dict[str, Any]:
+    """Contadores do tenant e a fração de syncs que não reenviaram o anúncio."""
+    client = get_redis()
+    scope = str(tenant_id) if tenant_id is not None else 'global'
+    counts = dict.fromkeys(OUTCOMES, 0)
+    if client:
+        values = client.hmget(COUNTERS_KEY, [f'{scope}:{outcome}' for outcome in OUTCOMES])
+        counts.update({outcome: int(value or 0) for outcome, value in zip(OUTCOMES, values)})
+    else:
+        with _lock:
+            counts.update(_memory_counters.get(scope, {}))
+    total = sum(counts.values())
+    counts['avoided_ratio'] = round((counts['skipped'] + counts['touched']) / total, 4) if total else 0.0
+    return counts
+
+
+def reset() -> None:
+    """Zera os contadores (testes)."""
+    client = get_redis()
+    if client:
+        client.delete(COUNTERS_KEY)
+    with _lock:
+        _memory_counters.clear()
@@ -0,0 +1,69 @@
+"""Add full-text and trigram search for property listings
+
+Revision ID: 20251023_add_property_search
+Revises: 20251022_add_property_standard_and_negotiation_fields
+Create Date: 2025-10-23 00:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '20251023_add_property_search'
+down_revision: Union[str, Sequence[str], None] = '20251022_add_property_standard_and_negotiation_fields'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Colunas com índice GIN pg_trgm para match parcial (ILIKE '%q%')
+TRIGRAM_COLUMNS = ('title', 'property_code', 'external_id', 'address_neighborhood', 'address_street')
+
+
+def upgrade() -> None:
+    """Upgrade schema - tsvector (português + unaccent) e índices trigram."""
+    op.execute("CREATE EXTENSION IF NOT EXISTS unaccent")
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+
+    # Configuração de busca: stemming português sobre texto sem acentos
+    op.execute("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+                ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+            END IF;
+        END
+        $$;
+    """)
+
+    # Coluna mantida pelo próprio banco (generated column, PostgreSQL 12+)
+    op.execute("""
+        ALTER TABLE property ADD COLUMN IF NOT EXISTS search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig,
+                coalesce(property_code, '') || ' ' || coalesce(external_id, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig,
+                coalesce(address_neighborhood, '') || ' ' || coalesce(address_street, '') || ' ' ||
+                coalesce(address_city, '')), 'B') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(description, '')), 'C')
+        ) STORED
+    """)
+    op.execute("CREATE INDEX IF NOT EXISTS ix_property_search_vector ON property USING gin (search_vector)")
+
+    for column in TRIGRAM_COLUMNS:
+        op.execute(
+            f"CREATE INDEX IF NOT EXISTS ix_property_{column}_trgm "
+            f"ON property USING gin ({column} gin_trgm_ops)"
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema - remove índices e coluna de busca."""
+    for column in TRIGRAM_COLUMNS:
+        op.execute(f"DROP INDEX IF EXISTS ix_property_{column}_trgm")
+    op.execute("DROP INDEX IF EXISTS ix_property_search_vector")
+    op.execute("ALTER TABLE property DROP COLUMN IF EXISTS search_vector")
+    op.execute("DROP TEXT SEARCH CONFIGURATION IF EXISTS portuguese_unaccent")
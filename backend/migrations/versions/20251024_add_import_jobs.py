@@ -0,0 +1,53 @@
+"""Add import_jobs table for background Gandalf imports
+
+Revision ID: 20251024_add_import_jobs
+Revises: 20251023_add_property_search
+Create Date: 2025-10-24
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251024_add_import_jobs'
+down_revision = '20251023_add_property_search'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create import_jobs table"""
+    op.create_table(
+        'import_jobs',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('tenant.id'), nullable=False),
+        sa.Column('user_id', sa.Integer(), sa.ForeignKey('user.id'), nullable=True),
+        sa.Column('provider', sa.String(100), nullable=False, server_default='gandalf'),
+        sa.Column('status', sa.String(50), nullable=False, server_default='pending'),
+        sa.Column('options', sa.JSON(), nullable=True),
+        sa.Column('task_id', sa.String(255), nullable=True),
+        sa.Column('cancel_requested', sa.Boolean(), nullable=False, server_default=sa.false()),
+        sa.Column('pages_fetched', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_completed_page', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('total_listings', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('inserted', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('skipped', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('error_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('errors', sa.JSON(), nullable=True),
+        sa.Column('error_message', sa.Text(), nullable=True),
+        sa.Column('started_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+
+    # Busca do job ativo do tenant
+    op.create_index('ix_import_jobs_tenant_id', 'import_jobs', ['tenant_id'])
+    op.create_index('ix_import_jobs_tenant_status', 'import_jobs', ['tenant_id', 'status'])
+
+
+def downgrade():
+    """Drop import_jobs table"""
+    op.drop_index('ix_import_jobs_tenant_status', table_name='import_jobs')
+    op.drop_index('ix_import_jobs_tenant_id', table_name='import_jobs')
+    op.drop_table('import_jobs')
@@ -0,0 +1,42 @@
+"""Add lease columns to refresh_jobs for the SKIP LOCKED executor
+
+Revision ID: 20251025_add_refresh_job_lease
+Revises: 20251024_add_import_jobs
+Create Date: 2025-10-25
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251025_add_refresh_job_lease'
+down_revision = '20251024_add_import_jobs'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Lease/heartbeat columns and claim indexes"""
+    op.add_column('refresh_jobs', sa.Column('lease_owner', sa.String(64), nullable=True))
+    op.add_column('refresh_jobs', sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('refresh_jobs', sa.Column('heartbeat_at', sa.DateTime(timezone=True), nullable=True))
+    op.add_column('refresh_jobs', sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'))
+
+    # Fila de claim: jobs pendentes na ordem de execução e leases vencidos
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_refresh_jobs_pending_claim "
+        "ON refresh_jobs (scheduled_at, created_at) WHERE status = 'pending'"
+    )
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_refresh_jobs_running_lease "
+        "ON refresh_jobs (lease_expires_at) WHERE status = 'running'"
+    )
+
+
+def downgrade():
+    """Drop lease columns and claim indexes"""
+    op.execute("DROP INDEX IF EXISTS ix_refresh_jobs_running_lease")
+    op.execute("DROP INDEX IF EXISTS ix_refresh_jobs_pending_claim")
+    op.drop_column('refresh_jobs', 'attempts')
+    op.drop_column('refresh_jobs', 'heartbeat_at')
+    op.drop_column('refresh_jobs', 'lease_expires_at')
+    op.drop_column('refresh_jobs', 'lease_owner')
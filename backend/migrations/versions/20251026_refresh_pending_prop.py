@@ -0,0 +1,26 @@
+"""Index pending refresh jobs by property for bulk job materialization
+
+Revision ID: 20251026_refresh_pending_prop
+Revises: 20251025_add_refresh_job_lease
+Create Date: 2025-10-26
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20251026_refresh_pending_prop'
+down_revision = '20251025_add_refresh_job_lease'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Partial index for the NOT EXISTS probe of _materialize_schedule_jobs"""
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_refresh_jobs_pending_property "
+        "ON refresh_jobs (property_id) WHERE status = 'pending'"
+    )
+
+
+def downgrade():
+    """Drop the pending-by-property index"""
+    op.execute("DROP INDEX IF EXISTS ix_refresh_jobs_pending_property")
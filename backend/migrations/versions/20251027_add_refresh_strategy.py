@@ -0,0 +1,36 @@
+"""Add refresh strategy to schedules/jobs and cost metrics to refresh history
+
+Revision ID: 20251027_add_refresh_strategy
+Revises: 20251026_refresh_pending_prop
+Create Date: 2025-10-27
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251027_add_refresh_strategy'
+down_revision = '20251026_refresh_pending_prop'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """refresh_strategy (recreate/update/touch) + api_calls/api_latency_ms"""
+    op.add_column('refresh_schedule', sa.Column('refresh_strategy', sa.String(20), nullable=False,
+                                                server_default='recreate'))
+    op.add_column('property_refresh_schedules', sa.Column('refresh_strategy', sa.String(20), nullable=False,
+                                                          server_default='recreate'))
+    op.add_column('refresh_jobs', sa.Column('refresh_strategy', sa.String(20), nullable=True))
+    op.add_column('property_refresh_history', sa.Column('refresh_strategy', sa.String(20), nullable=True))
+    op.add_column('property_refresh_history', sa.Column('api_calls', sa.Integer(), nullable=True))
+    op.add_column('property_refresh_history', sa.Column('api_latency_ms', sa.Float(), nullable=True))
+
+
+def downgrade():
+    """Drop refresh strategy columns"""
+    op.drop_column('property_refresh_history', 'api_latency_ms')
+    op.drop_column('property_refresh_history', 'api_calls')
+    op.drop_column('property_refresh_history', 'refresh_strategy')
+    op.drop_column('refresh_jobs', 'refresh_strategy')
+    op.drop_column('property_refresh_schedules', 'refresh_strategy')
+    op.drop_column('refresh_schedule', 'refresh_strategy')
@@ -0,0 +1,41 @@
+"""Add refresh_kpi_rollup (per tenant/schedule/hour job counters for dashboards)
+
+Revision ID: 20251028_refresh_kpi_rollup
+Revises: 20251027_add_refresh_strategy
+Create Date: 2025-10-28
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251028_refresh_kpi_rollup'
+down_revision = '20251027_add_refresh_strategy'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create refresh_kpi_rollup; backfill with refresh_scheduler.reconcile_kpi_rollup"""
+    op.create_table(
+        'refresh_kpi_rollup',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('schedule_key', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('bucket_start', sa.DateTime(timezone=True), nullable=False),
+        sa.Column('jobs_created', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('jobs_pending', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('jobs_running', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('jobs_completed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('jobs_failed', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('duration_sum', sa.Float(), nullable=False, server_default='0'),
+        sa.Column('duration_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint('tenant_id', 'schedule_key', 'bucket_start', name='uq_refresh_kpi_rollup_bucket'),
+    )
+    op.create_index('ix_refresh_kpi_rollup_tenant_bucket', 'refresh_kpi_rollup', ['tenant_id', 'bucket_start'])
+
+
+def downgrade():
+    """Drop refresh_kpi_rollup"""
+    op.drop_index('ix_refresh_kpi_rollup_tenant_bucket', table_name='refresh_kpi_rollup')
+    op.drop_table('refresh_kpi_rollup')
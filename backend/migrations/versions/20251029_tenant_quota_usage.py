@@ -0,0 +1,41 @@
+"""Add tenant_quota_usage (per tenant/publication_type property counters)
+
+Revision ID: 20251029_tenant_quota_usage
+Revises: 20251028_refresh_kpi_rollup
+Create Date: 2025-10-29
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251029_tenant_quota_usage'
+down_revision = '20251028_refresh_kpi_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create tenant_quota_usage and backfill it from property"""
+    op.create_table(
+        'tenant_quota_usage',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('publication_type', sa.String(length=50), nullable=False),
+        sa.Column('property_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+        sa.UniqueConstraint('tenant_id', 'publication_type', name='uq_tenant_quota_usage_type'),
+    )
+    op.execute(
+        """
+        INSERT INTO tenant_quota_usage (tenant_id, publication_type, property_count, updated_at)
+        SELECT tenant_id, UPPER(COALESCE(NULLIF(publication_type, ''), 'STANDARD')), COUNT(*), CURRENT_TIMESTAMP
+        FROM property
+        WHERE tenant_id IS NOT NULL
+        GROUP BY tenant_id, UPPER(COALESCE(NULLIF(publication_type, ''), 'STANDARD'))
+        """
+    )
+
+
+def downgrade():
+    """Drop tenant_quota_usage"""
+    op.drop_table('tenant_quota_usage')
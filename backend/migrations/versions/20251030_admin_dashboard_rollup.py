@@ -0,0 +1,38 @@
+"""Add admin_growth_rollup and admin_overview_snapshot (admin dashboard rollups)
+
+Revision ID: 20251030_admin_dash_rollup
+Revises: 20251029_tenant_quota_usage
+Create Date: 2025-10-30
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251030_admin_dash_rollup'
+down_revision = '20251029_tenant_quota_usage'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create the rollup tables; filled by admin_dashboard.rebuild_rollup"""
+    op.create_table(
+        'admin_growth_rollup',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('entity', sa.String(length=20), nullable=False),
+        sa.Column('day', sa.Date(), nullable=False),
+        sa.Column('created_count', sa.Integer(), nullable=False, server_default='0'),
+        sa.UniqueConstraint('entity', 'day', name='uq_admin_growth_rollup_entity_day'),
+    )
+    op.create_table(
+        'admin_overview_snapshot',
+        sa.Column('metric', sa.String(length=50), primary_key=True),
+        sa.Column('value', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('refreshed_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    """Drop the admin dashboard rollup tables"""
+    op.drop_table('admin_overview_snapshot')
+    op.drop_table('admin_growth_rollup')
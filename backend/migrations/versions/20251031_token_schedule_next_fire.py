@@ -0,0 +1,43 @@
+"""Add next_fire_at to token_schedule_config for the indexed due-time monitor
+
+Revision ID: 20251031_token_schedule_fire
+Revises: 20251030_admin_dash_rollup
+Create Date: 2025-10-31
+"""
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision = '20251031_token_schedule_fire'
+down_revision = '20251030_admin_dash_rollup'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """next_fire_at column, due index and backfill"""
+    # token_schedule_config é criada por migrations/create_token_schedule_config_table.sql
+    op.execute("ALTER TABLE IF EXISTS token_schedule_config ADD COLUMN IF NOT EXISTS next_fire_at TIMESTAMP WITH TIME ZONE")
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_token_schedule_config_next_fire_at "
+        "ON token_schedule_config (next_fire_at) WHERE next_fire_at IS NOT NULL"
+    )
+    # Manual: próxima execução; automatic: expiração do token (ou já, se desconhecida)
+    op.execute(
+        """
+        UPDATE token_schedule_config AS cfg
+        SET next_fire_at = CASE
+            WHEN cfg.schedule_mode = 'automatic' THEN COALESCE(
+                (SELECT ic.expires_at FROM integration_credentials ic
+                 WHERE ic.tenant_id = cfg.tenant_id AND ic.provider = cfg.provider),
+                NOW())
+            ELSE cfg.next_execution
+        END
+        WHERE cfg.enabled
+        """
+    )
+
+
+def downgrade():
+    """Drop next_fire_at and its index"""
+    op.execute("DROP INDEX IF EXISTS ix_token_schedule_config_next_fire_at")
+    op.execute("ALTER TABLE IF EXISTS token_schedule_config DROP COLUMN IF EXISTS next_fire_at")
@@ -0,0 +1,47 @@
+"""Add property_sync_state (write-behind CanalPro sync intents)
+
+Revision ID: 20251101_property_sync_state
+Revises: 20251031_token_schedule_fire
+Create Date: 2025-11-01
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251101_property_sync_state'
+down_revision = '20251031_token_schedule_fire'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Create property_sync_state"""
+    op.create_table(
+        'property_sync_state',
+        sa.Column('id', sa.Integer(), primary_key=True),
+        sa.Column('property_id', sa.Integer(), sa.ForeignKey('property.id', ondelete='CASCADE'),
+                  nullable=False, unique=True),
+        sa.Column('tenant_id', sa.Integer(), sa.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False),
+        sa.Column('status', sa.String(length=20), nullable=False, server_default='pending'),
+        sa.Column('requested_version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('synced_version', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('requested_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('lease_expires_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('attempts', sa.Integer(), nullable=False, server_default='0'),
+        sa.Column('last_error', sa.Text(), nullable=True),
+        sa.Column('synced_at', sa.DateTime(timezone=True), nullable=True),
+        sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False, server_default=sa.func.now()),
+    )
+    op.create_index('ix_property_sync_state_tenant_id', 'property_sync_state', ['tenant_id'])
+    # Varredura de intenções perdidas
+    op.execute(
+        "CREATE INDEX IF NOT EXISTS ix_property_sync_state_open "
+        "ON property_sync_state (requested_at) WHERE status IN ('pending', 'syncing')"
+    )
+
+
+def downgrade():
+    """Drop property_sync_state"""
+    op.execute("DROP INDEX IF EXISTS ix_property_sync_state_open")
+    op.drop_index('ix_property_sync_state_tenant_id', table_name='property_sync_state')
+    op.drop_table('property_sync_state')
@@ -0,0 +1,26 @@
+"""Add property.canalpro_fingerprint / canalpro_pushed_at (skip no-op CanalPro pushes)
+
+Revision ID: 20251102_property_fingerprint
+Revises: 20251101_property_sync_state
+Create Date: 2025-11-02
+"""
+from alembic import op
+import sqlalchemy as sa
+
+# revision identifiers, used by Alembic.
+revision = '20251102_property_fingerprint'
+down_revision = '20251101_property_sync_state'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Add fingerprint columns to property"""
+    op.add_column('property', sa.Column('canalpro_fingerprint', sa.String(length=64), nullable=True))
+    op.add_column('property', sa.Column('canalpro_pushed_at', sa.DateTime(timezone=True), nullable=True))
+
+
+def downgrade():
+    """Drop fingerprint columns from property"""
+    op.drop_column('property', 'canalpro_pushed_at')
+    op.drop_column('property', 'canalpro_fingerprint')
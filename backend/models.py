@@ -2,6 +2,7 @@
 Modelos principais do backend Gandalf.
 Padronização: Todos os campos de data/hora são UTC offset-aware.
 """
+import os
 from datetime import datetime, timezone
 from extensions import db  # pylint: disable=import-error
 from sqlalchemy.dialects.postgresql import JSONB
@@ -127,6 +128,9 @@ class Property(db.Model):  # pylint: disable=too-few-public-methods
     status = db.Column(db.String(50), nullable=False, server_default='pending')
     remote_id = db.Column(db.String(255), nullable=True)
     error = db.Column(db.Text, nullable=True)
+    # Hash do último payload enviado com sucesso ao CanalPro (integrations.payload_fingerprint)
+    canalpro_fingerprint = db.Column(db.String(64), nullable=True)
+    canalpro_pushed_at = db.Column(db.DateTime(timezone=True), nullable=True)
 
     # CanalPro / Vivareal mappings
     provider_raw = db.Column(db.JSON, nullable=True)  # payload original
@@ -297,6 +301,93 @@ class IntegrationCredentials(db.Model):  # pylint: disable=too-few-public-method
         )
 
 
+class ImportJob(db.Model):  # pylint: disable=too-few-public-methods
+    """
+    Job de importação de listagens de um provedor (ex: Gandalf) executado pelo Celery.
+    Guarda o progresso por página para permitir acompanhamento, cancelamento e retomada.
+    """
+    __tablename__ = 'import_jobs'
+
+    # Limite de erros guardados no registro (o total continua em error_count)
+    MAX_STORED_ERRORS = 200
+    ACTIVE_STATUSES = ('pending', 'running')
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id'), nullable=False, index=True)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=True)
+    provider = db.Column(db.String(100), nullable=False, default='gandalf')
+    status = db.Column(
+        db.String(50),
+        nullable=False,
+        default='pending'
+    )  # pending, running, completed, failed, cancelled
+    options = db.Column(db.JSON, nullable=True)
+    task_id = db.Column(db.String(255), nullable=True)
+    cancel_requested = db.Column(db.Boolean, nullable=False, default=False)
+    # Progresso: última página gravada com sucesso (ponto de retomada)
+    pages_fetched = db.Column(db.Integer, nullable=False, default=0)
+    last_completed_page = db.Column(db.Integer, nullable=False, default=0)
+    total_listings = db.Column(db.Integer, nullable=False, default=0)
+    inserted = db.Column(db.Integer, nullable=False, default=0)
+    updated = db.Column(db.Integer, nullable=False, default=0)
+    skipped = db.Column(db.Integer, nullable=False, default=0)
+    error_count = db.Column(db.Integer, nullable=False, default=0)
+    errors = db.Column(db.JSON, nullable=True)
+    error_message = db.Column(db.Text, nullable=True)
+    started_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    created_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f'<ImportJob {self.id} tenant={self.tenant_id} status={self.status}>'
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'tenant_id': self.tenant_id,
+            'provider': self.provider,
+            'status': self.status,
+            'options': self.options or {},
+            'cancel_requested': self.cancel_requested,
+            'pages_fetched': self.pages_fetched,
+            'last_completed_page': self.last_completed_page,
+            'total_listings': self.total_listings,
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'skipped': self.skipped,
+            'error_count': self.error_count,
+            'errors': self.errors or [],
+            'error_message': self.error_message,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'completed_at': self.completed_at.isoformat() if self.completed_at else None,
+            'created_at': self.created_at.isoformat() if self.created_at else None,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
+
+
+# Estratégias de refresh no CanalPro:
+#   recreate - exclui e recria o anúncio (novo remote_id; comportamento original)
+#   update   - updateListing com os dados atuais (mantém remote_id)
+#   touch    - só updateListingStatus(ACTIVE), sem reenviar o anúncio
+REFRESH_STRATEGIES = ('recreate', 'update', 'touch')
+
+
+def default_refresh_strategy() -> str:
+    """Estratégia de novos agendamentos e de refreshes avulsos (REFRESH_DEFAULT_STRATEGY, padrão recreate)."""
+    strategy = os.getenv('REFRESH_DEFAULT_STRATEGY', 'recreate')
+    return strategy if strategy in REFRESH_STRATEGIES else 'recreate'
+
+
 class RefreshSchedule(db.Model):  # pylint: disable=too-few-public-methods
     """
     Lista de agendamento de refresh para imóveis
@@ -310,6 +401,7 @@ class RefreshSchedule(db.Model):  # pylint: disable=too-few-public-methods
     time_slot = db.Column(db.Time, nullable=False)  # Horário de execução (ex: 09:30:00)
     frequency_days = db.Column(db.Integer, nullable=False, default=1)  # 1=diário, 7=semanal
     is_active = db.Column(db.Boolean, nullable=False, default=True)
+    refresh_strategy = db.Column(db.String(20), nullable=False, default=default_refresh_strategy)  # REFRESH_STRATEGIES
     next_run = db.Column(db.DateTime(timezone=True), nullable=True)  # Próxima execução calculada
     last_run = db.Column(db.DateTime(timezone=True), nullable=True)  # Última execução realizada
     created_at = db.Column(
@@ -354,6 +446,7 @@ class RefreshSchedule(db.Model):  # pylint: disable=too-few-public-methods
             'days_of_week': self.days_of_week,
             'frequency_days': self.frequency_days,
             'is_active': self.is_active,
+            'refresh_strategy': self.refresh_strategy,
             'next_run': self.next_run.isoformat() if self.next_run else None,
             'next_execution': self.next_run.isoformat() if self.next_run else None,
             'last_run': self.last_run.isoformat() if self.last_run else None,
@@ -436,10 +529,16 @@ class RefreshJob(db.Model):  # pylint: disable=too-few-public-methods
         nullable=False,
         default='manual'
     )  # manual, scheduled
+    refresh_strategy = db.Column(db.String(20), nullable=True)  # Herdada do schedule; None = padrão
     scheduled_at = db.Column(db.DateTime(timezone=True), nullable=True)
     started_at = db.Column(db.DateTime(timezone=True), nullable=True)
     completed_at = db.Column(db.DateTime(timezone=True), nullable=True)
     error_message = db.Column(db.Text, nullable=True)
+    # Lease do executor (RefreshJobExecutor): quem reivindicou o job e até quando
+    lease_owner = db.Column(db.String(64), nullable=True)
+    lease_expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    heartbeat_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
     created_at = db.Column(
         db.DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
@@ -473,15 +572,56 @@ class RefreshJob(db.Model):  # pylint: disable=too-few-public-methods
             'refresh_schedule_id': self.refresh_schedule_id,
             'status': self.status,
             'refresh_type': self.refresh_type,
+            'refresh_strategy': self.refresh_strategy,
             'scheduled_at': self.scheduled_at.isoformat() if self.scheduled_at else None,
             'started_at': self.started_at.isoformat() if self.started_at else None,
             'completed_at': self.completed_at.isoformat() if self.completed_at else None,
             'error_message': self.error_message,
+            'attempts': self.attempts,
+            'lease_expires_at': self.lease_expires_at.isoformat() if self.lease_expires_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
 
 
+class RefreshKpiRollup(db.Model):  # pylint: disable=too-few-public-methods
+    """
+    Agregado incremental dos jobs de refresh por tenant, schedule e hora de criação.
+
+    As colunas jobs_<status> contam quantos jobs criados naquela hora estão hoje em cada
+    status; cada transição de job move uma unidade entre colunas na mesma transação
+    (RefreshKpiService.record). Os dashboards somam só estas linhas.
+    """
+    __tablename__ = 'refresh_kpi_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'schedule_key', 'bucket_start', name='uq_refresh_kpi_rollup_bucket'),
+        db.Index('ix_refresh_kpi_rollup_tenant_bucket', 'tenant_id', 'bucket_start'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False)
+    # refresh_schedule_id do job, 0 para jobs avulsos (sem FK: o histórico sobrevive ao schedule)
+    schedule_key = db.Column(db.Integer, nullable=False, default=0)
+    bucket_start = db.Column(db.DateTime(timezone=True), nullable=False)
+    jobs_created = db.Column(db.Integer, nullable=False, default=0)
+    jobs_pending = db.Column(db.Integer, nullable=False, default=0)
+    jobs_running = db.Column(db.Integer, nullable=False, default=0)
+    jobs_completed = db.Column(db.Integer, nullable=False, default=0)
+    jobs_failed = db.Column(db.Integer, nullable=False, default=0)
+    # Duração de execução (started_at -> completed_at) dos jobs finalizados
+    duration_sum = db.Column(db.Float, nullable=False, default=0)
+    duration_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f'<RefreshKpiRollup tenant={self.tenant_id} schedule={self.schedule_key} {self.bucket_start}>'
+
+
 class RefreshOperation(db.Model):  # pylint: disable=too-few-public-methods
     """
     Registra e audita cada operação de refresh manual.
@@ -537,6 +677,7 @@ class PropertyRefreshSchedule(db.Model):  # pylint: disable=too-few-public-metho
     interval_minutes = db.Column(db.Integer, nullable=True)  # Para interval
     schedule_days = db.Column(db.JSON, nullable=True)  # [1,2,3,4,5] para weekly
     schedule_day_of_month = db.Column(db.Integer, nullable=True)  # Para monthly
+    refresh_strategy = db.Column(db.String(20), nullable=False, default=default_refresh_strategy)  # REFRESH_STRATEGIES
 
     # Controle de execução
     next_run = db.Column(db.DateTime(timezone=True), nullable=True)
@@ -596,6 +737,7 @@ class PropertyRefreshSchedule(db.Model):  # pylint: disable=too-few-public-metho
             'interval_minutes': self.interval_minutes,
             'schedule_days': self.schedule_days,
             'schedule_day_of_month': self.schedule_day_of_month,
+            'refresh_strategy': self.refresh_strategy,
             'next_run': self.next_run.isoformat() if self.next_run else None,
             'last_run': self.last_run.isoformat() if self.last_run else None,
             'last_success': self.last_success.isoformat() if self.last_success else None,
@@ -693,6 +835,11 @@ class PropertyRefreshHistory(db.Model):  # pylint: disable=too-few-public-method
     new_remote_id = db.Column(db.String(255), nullable=True)
     retry_attempt = db.Column(db.Integer, nullable=False, default=0)
 
+    # Custo da estratégia no Gandalf (comparação entre recreate/update/touch)
+    refresh_strategy = db.Column(db.String(20), nullable=True)
+    api_calls = db.Column(db.Integer, nullable=True)
+    api_latency_ms = db.Column(db.Float, nullable=True)
+
     # Metadados
     created_at = db.Column(
         db.DateTime(timezone=True),
@@ -740,6 +887,9 @@ class PropertyRefreshHistory(db.Model):  # pylint: disable=too-few-public-method
             'old_remote_id': self.old_remote_id,
             'new_remote_id': self.new_remote_id,
             'retry_attempt': self.retry_attempt,
+            'refresh_strategy': self.refresh_strategy,
+            'api_calls': self.api_calls,
+            'api_latency_ms': self.api_latency_ms,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -762,6 +912,9 @@ class TokenScheduleConfig(db.Model):
     enabled = db.Column(db.Boolean, default=True, nullable=False)
     last_execution = db.Column(db.DateTime(timezone=True), nullable=True)
     next_execution = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Próximo disparo do monitor (manual: next_execution; automatic: expiração do token).
+    # NULL quando desabilitado; o monitor busca só as linhas vencidas por este índice.
+    next_fire_at = db.Column(db.DateTime(timezone=True), nullable=True, index=True)
     
     created_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), nullable=False)
     updated_at = db.Column(db.DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), onupdate=lambda: datetime.now(timezone.utc), nullable=False)
@@ -782,6 +935,7 @@ class TokenScheduleConfig(db.Model):
             'enabled': self.enabled,
             'last_execution': self.last_execution.isoformat() if self.last_execution else None,
             'next_execution': self.next_execution.isoformat() if self.next_execution else None,
+            'next_fire_at': self.next_fire_at.isoformat() if self.next_fire_at else None,
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'updated_at': self.updated_at.isoformat() if self.updated_at else None
         }
@@ -834,6 +988,119 @@ class CanalProContract(db.Model):  # pylint: disable=too-few-public-methods
         return f'<CanalProContract tenant={self.tenant_id} provider={self.provider} max_listings={self.max_listings}>'
 
 
+class TenantQuotaUsage(db.Model):  # pylint: disable=too-few-public-methods
+    """
+    Contador de imóveis por tenant e publication_type (uso das quotas do contrato).
+
+    Mantido na mesma transação das escritas em Property pelos listeners de
+    TenantQuotaService; as checagens de quota leem uma linha em vez de agrupar
+    a tabela property.
+    """
+    __tablename__ = 'tenant_quota_usage'
+    __table_args__ = (
+        db.UniqueConstraint('tenant_id', 'publication_type', name='uq_tenant_quota_usage_type'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False)
+    # Normalizado em maiúsculas; NULL em property conta como STANDARD
+    publication_type = db.Column(db.String(50), nullable=False)
+    property_count = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f'<TenantQuotaUsage tenant={self.tenant_id} {self.publication_type}={self.property_count}>'
+
+
+class PropertySyncState(db.Model):  # pylint: disable=too-few-public-methods
+    """
+    Intenção de sincronização de um imóvel com o CanalPro (write-behind).
+
+    Cada edição incrementa ``requested_version``; a task de sync só envia a versão
+    mais recente (edições em sequência viram um único envio) e grava em
+    ``synced_version`` o que chegou ao CanalPro. O frontend consulta ``status``.
+    """
+    __tablename__ = 'property_sync_state'
+
+    STATUSES = ('pending', 'syncing', 'synced', 'error', 'skipped')
+
+    id = db.Column(db.Integer, primary_key=True)
+    property_id = db.Column(
+        db.Integer,
+        db.ForeignKey('property.id', ondelete='CASCADE'),
+        nullable=False,
+        unique=True
+    )
+    tenant_id = db.Column(db.Integer, db.ForeignKey('tenant.id', ondelete='CASCADE'), nullable=False, index=True)
+    status = db.Column(db.String(20), nullable=False, default='pending')  # pending, syncing, synced, error, skipped
+    requested_version = db.Column(db.Integer, nullable=False, default=0)
+    synced_version = db.Column(db.Integer, nullable=False, default=0)
+    requested_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    # Lease da task que está enviando (vencido = task perdida, a varredura reenfileira)
+    lease_expires_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    last_error = db.Column(db.Text, nullable=True)
+    synced_at = db.Column(db.DateTime(timezone=True), nullable=True)
+    updated_at = db.Column(
+        db.DateTime(timezone=True),
+        default=lambda: datetime.now(timezone.utc),
+        onupdate=lambda: datetime.now(timezone.utc),
+        nullable=False
+    )
+
+    def __repr__(self):
+        return f'<PropertySyncState property={self.property_id} status={self.status} v{self.requested_version}>'
+
+    def to_dict(self):
+        return {
+            'property_id': self.property_id,
+            'status': self.status,
+            'requested_version': self.requested_version,
+            'synced_version': self.synced_version,
+            'requested_at': self.requested_at.isoformat() if self.requested_at else None,
+            'synced_at': self.synced_at.isoformat() if self.synced_at else None,
+            'attempts': self.attempts,
+            'last_error': self.last_error
+        }
+
+
+class AdminGrowthRollup(db.Model):  # pylint: disable=too-few-public-methods
+    """
+    Registros criados por dia (tenants, imóveis) para as séries de crescimento do
+    dashboard administrativo. Preenchido por tasks.admin_dashboard_rollup.
+    """
+    __tablename__ = 'admin_growth_rollup'
+    __table_args__ = (
+        db.UniqueConstraint('entity', 'day', name='uq_admin_growth_rollup_entity_day'),
+    )
+
+    id = db.Column(db.Integer, primary_key=True)
+    entity = db.Column(db.String(20), nullable=False)  # 'tenants' | 'properties'
+    day = db.Column(db.Date, nullable=False)
+    created_count = db.Column(db.Integer, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<AdminGrowthRollup {self.entity} {self.day}={self.created_count}>'
+
+
+class AdminOverviewSnapshot(db.Model):  # pylint: disable=too-few-public-methods
+    """Contadores globais do dashboard administrativo (uma linha por métrica)."""
+    __tablename__ = 'admin_overview_snapshot'
+
+    metric = db.Column(db.String(50), primary_key=True)
+    value = db.Column(db.Integer, nullable=False, default=0)
+    refreshed_at = db.Column(db.DateTime(timezone=True), nullable=False,
+                             default=lambda: datetime.now(timezone.utc))
+
+    def __repr__(self):
+        return f'<AdminOverviewSnapshot {self.metric}={self.value}>'
+
+
 # ============================================================================
 # SUBSCRIPTION MODELS - Sistema de Planos e Assinaturas
 # ============================================================================
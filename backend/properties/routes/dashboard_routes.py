@@ -8,6 +8,8 @@ from extensions import db
 from models import Property
 from auth import tenant_required
 from properties.utils.status_catalog import aggregate_status_counts
+from utils import credential_cache, tenant_cache
+from integrations import payload_fingerprint
 
 
 # Mapeamento de tipos de imóveis para português
@@ -33,6 +35,66 @@ PROPERTY_TYPE_TRANSLATIONS = {
 }
 
 
+def _compute_dashboard_stats(tenant_id: int) -> dict:
+    """Agregados do dashboard (5 consultas); servidos via utils.tenant_cache."""
+    # Total de imóveis
+    total_properties = Property.query.filter_by(tenant_id=tenant_id).count()
+    
+    # Última atualização
+    last_update_query = db.session.query(
+        func.max(Property.updated_at)
+    ).filter(Property.tenant_id == tenant_id).scalar()
+    
+    last_update = last_update_query.isoformat() if last_update_query else None
+    
+    # Distribuição por tipo (traduzido para português)
+    properties_by_type = {}
+    type_query = db.session.query(
+        Property.property_type,
+        func.count(Property.id)
+    ).filter(
+        Property.tenant_id == tenant_id,
+        Property.property_type.isnot(None)
+    ).group_by(Property.property_type).all()
+    
+    for prop_type, count in type_query:
+        # Traduz o tipo para português, ou usa o original se não houver tradução
+        translated_type = PROPERTY_TYPE_TRANSLATIONS.get(prop_type, prop_type)
+        properties_by_type[translated_type] = count
+    
+    # Imóveis por status com resumo padronizado
+    status_query = db.session.query(
+        Property.status,
+        func.count(Property.id)
+    ).filter(Property.tenant_id == tenant_id).group_by(Property.status).all()
+
+    raw_status_counts = {status: count for status, count in status_query}
+    status_summary = aggregate_status_counts(raw_status_counts)
+
+    active_properties = status_summary['active_total']
+    inactive_properties = status_summary['inactive_total']
+    properties_in_refresh = status_summary['counts_by_key'].get('refreshing', 0)
+    
+    # Imóveis com destaque (publication_type diferente de STANDARD ou NULL)
+    highlighted_properties = Property.query.filter(
+        Property.tenant_id == tenant_id,
+        Property.publication_type.isnot(None),
+        Property.publication_type != 'STANDARD',
+        Property.publication_type != ''
+    ).count()
+    
+    return {
+        'total_properties': total_properties,
+        'properties_in_refresh': properties_in_refresh,
+        'last_update': last_update,
+        'properties_by_type': properties_by_type,
+        'active_properties': active_properties,
+        'inactive_properties': inactive_properties,
+        'highlighted_properties': highlighted_properties,
+        'status_summary': status_summary,
+    }
+
+
 def create_dashboard_routes(properties_bp: Blueprint):
     """Create dashboard routes."""
     
@@ -42,68 +104,39 @@ def create_dashboard_routes(properties_bp: Blueprint):
     def get_dashboard_stats():
         """Get dashboard statistics for properties."""
         try:
-            tenant_id = g.tenant_id
-            
-            # Total de imóveis
-            total_properties = Property.query.filter_by(tenant_id=tenant_id).count()
-            
-            # Última atualização
-            last_update_query = db.session.query(
-                func.max(Property.updated_at)
-            ).filter(Property.tenant_id == tenant_id).scalar()
-            
-            last_update = last_update_query.isoformat() if last_update_query else None
-            
-            # Distribuição por tipo (traduzido para português)
-            properties_by_type = {}
-            type_query = db.session.query(
-                Property.property_type,
-                func.count(Property.id)
-            ).filter(
-                Property.tenant_id == tenant_id,
-                Property.property_type.isnot(None)
-            ).group_by(Property.property_type).all()
-            
-            for prop_type, count in type_query:
-                # Traduz o tipo para português, ou usa o original se não houver tradução
-                translated_type = PROPERTY_TYPE_TRANSLATIONS.get(prop_type, prop_type)
-                properties_by_type[translated_type] = count
-            
-            # Imóveis por status com resumo padronizado
-            status_query = db.session.query(
-                Property.status,
-                func.count(Property.id)
-            ).filter(Property.tenant_id == tenant_id).group_by(Property.status).all()
-
-            raw_status_counts = {status: count for status, count in status_query}
-            status_summary = aggregate_status_counts(raw_status_counts)
+            stats = tenant_cache.cached(g.tenant_id, 'dashboard_stats',
+                                        lambda: _compute_dashboard_stats(g.tenant_id))
+            return jsonify(stats), 200
+        except Exception as e:
+            return jsonify({
+                'message': f'Error fetching dashboard stats: {str(e)}'
+            }), 500
 
-            active_properties = status_summary['active_total']
-            inactive_properties = status_summary['inactive_total']
-            properties_in_refresh = status_summary['counts_by_key'].get('refreshing', 0)
-            
-            # Imóveis com destaque (publication_type diferente de STANDARD ou NULL)
-            highlighted_properties = Property.query.filter(
-                Property.tenant_id == tenant_id,
-                Property.publication_type.isnot(None),
-                Property.publication_type != 'STANDARD',
-                Property.publication_type != ''
-            ).count()
-            
+    @properties_bp.route('/dashboard/cache-metrics', methods=['GET'], strict_slashes=False)
+    @jwt_required()
+    @tenant_required
+    def get_dashboard_cache_metrics():
+        """Hits/misses do cache de estatísticas, versão de dados do tenant e cache de headers de integração."""
+        try:
+            metrics = tenant_cache.metrics()
+            metrics['data_version'] = tenant_cache.data_version(g.tenant_id)
+            metrics['integration_headers'] = credential_cache.metrics()
+            return jsonify(metrics), 200
+        except Exception as e:
             return jsonify({
-                'total_properties': total_properties,
-                'properties_in_refresh': properties_in_refresh,
-                'last_update': last_update,
-                'properties_by_type': properties_by_type,
-                'active_properties': active_properties,
-                'inactive_properties': inactive_properties,
-                'highlighted_properties': highlighted_properties,
-                'status_summary': status_summary,
-            }), 200
-            
+                'message': f'Error fetching cache metrics: {str(e)}'
+            }), 500
+
+    @properties_bp.route('/dashboard/canalpro-push-metrics', methods=['GET'], strict_slashes=False)
+    @jwt_required()
+    @tenant_required
+    def get_dashboard_canalpro_push_metrics():
+        """Envios ao CanalPro feitos (sent) e evitados por fingerprint (skipped/touched)."""
+        try:
+            return jsonify(payload_fingerprint.metrics(g.tenant_id)), 200
         except Exception as e:
             return jsonify({
-                'message': f'Error fetching dashboard stats: {str(e)}'
+                'message': f'Error fetching CanalPro push metrics: {str(e)}'
             }), 500
     
     @properties_bp.route('/dashboard/debug-status', methods=['GET'], strict_slashes=False)
@@ -2,10 +2,12 @@
 Routes para gerenciamento de agendamentos automáticos de propriedades individuais
 """
 import logging
+from datetime import timedelta
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
+from sqlalchemy import case, func
 from extensions import db
-from models import PropertyRefreshSchedule, PropertyRefreshHistory, Property
+from models import PropertyRefreshSchedule, PropertyRefreshHistory, Property, REFRESH_STRATEGIES, default_refresh_strategy
 from utils.timezone_utils import utcnow
 from utils.schedule_utils import calculate_next_run
 
@@ -71,9 +73,12 @@ def create_property_schedule():
         schedule_type = data.get('schedule_type', 'interval')  # interval, daily, weekly, monthly
         schedule_time = data.get('schedule_time')  # HH:MM para daily
         interval_minutes = data.get('interval_minutes', 60)  # para interval
+        refresh_strategy = data.get('refresh_strategy') or default_refresh_strategy()  # recreate, update, touch
 
         if not property_id:
             return jsonify({'error': 'property_id is required'}), 400
+        if refresh_strategy not in REFRESH_STRATEGIES:
+            return jsonify({'error': f'refresh_strategy must be one of {list(REFRESH_STRATEGIES)}'}), 400
 
         # Verificar se a propriedade existe e pertence ao tenant
         property_obj = Property.query.filter_by(id=property_id, tenant_id=tenant_id).first()
@@ -95,7 +100,8 @@ def create_property_schedule():
             interval_minutes=interval_minutes,
             schedule_days=data.get('schedule_days'),
             schedule_day_of_month=data.get('schedule_day_of_month'),
-            max_retries=data.get('max_retries', 3)
+            max_retries=data.get('max_retries', 3),
+            refresh_strategy=refresh_strategy
         )
 
         # Calcular próxima execução
@@ -160,6 +166,10 @@ def update_property_schedule(schedule_id):
             schedule.schedule_day_of_month = data['schedule_day_of_month']
         if 'max_retries' in data:
             schedule.max_retries = data['max_retries']
+        if 'refresh_strategy' in data:
+            if data['refresh_strategy'] not in REFRESH_STRATEGIES:
+                return jsonify({'error': f'refresh_strategy must be one of {list(REFRESH_STRATEGIES)}'}), 400
+            schedule.refresh_strategy = data['refresh_strategy']
 
         # Recalcular próxima execução
         schedule.next_run = calculate_next_run(schedule)
@@ -288,3 +298,47 @@ def get_schedule_history(schedule_id):
     except Exception as e:
         logger.error("Error fetching schedule history: %s", str(e))
         return jsonify({'error': 'Failed to fetch schedule history'}), 500
+
+
+@property_refresh_bp.route('/strategy-metrics', methods=['GET'])
+@jwt_required()
+def get_strategy_metrics():
+    """Compara o custo das estratégias de refresh (chamadas ao Gandalf e latência) do tenant"""
+    try:
+        claims = get_jwt()
+        tenant_id = claims.get('tenant_id')
+
+        if not tenant_id:
+            return jsonify({'error': 'No tenant ID found in token'}), 400
+
+        days = request.args.get('days', 30, type=int)
+        since = utcnow() - timedelta(days=max(days, 1))
+
+        history = PropertyRefreshHistory
+        rows = db.session.query(
+            history.refresh_strategy,
+            func.count(history.id),
+            func.sum(case((history.status == 'success', 1), else_=0)),
+            func.avg(history.api_calls),
+            func.avg(history.api_latency_ms),
+            func.avg(history.duration_seconds)
+        ).filter(
+            history.tenant_id == tenant_id,
+            history.refresh_strategy.isnot(None),
+            history.created_at >= since
+        ).group_by(history.refresh_strategy).all()
+
+        metrics = [{
+            'strategy': strategy,
+            'runs': runs,
+            'success_rate': round((successes or 0) / runs, 4) if runs else None,
+            'avg_api_calls': round(avg_calls, 2) if avg_calls is not None else None,
+            'avg_api_latency_ms': round(avg_latency, 1) if avg_latency is not None else None,
+            'avg_duration_seconds': round(avg_duration, 2) if avg_duration is not None else None
+        } for strategy, runs, successes, avg_calls, avg_latency, avg_duration in rows]
+
+        return jsonify({'data': metrics, 'days': days}), 200
+
+    except Exception as e:
+        logger.error("Error fetching refresh strategy metrics: %s", str(e))
+        return jsonify({'error': 'Failed to fetch refresh strategy metrics'}), 500
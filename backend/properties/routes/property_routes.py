@@ -3,12 +3,45 @@ Basic CRUD routes for properties
 """
 from flask import Blueprint, request, jsonify, g
 from flask_jwt_extended import jwt_required
+from sqlalchemy import Float, cast
 from auth import tenant_required
 
 from ..services.property_service import PropertyService
+from ..services.canalpro_sync_service import CanalProSyncService
+from ..services.search_service import PropertySearchService
 from ..validators.property_validator import PropertyValidator
 from ..utils.constants import MAX_PAGE_SIZE, MAX_PUBLIC_PAGE_SIZE
 from ..serializers.property_serializer import PropertySerializer
+from utils.pagination import InvalidCursorError, cached_count, paginate_keyset
+
+
+def _cursor_page(query, sort_by: str, sort_order: str, page_size: int, cursor: str, count_key: str, rank=None):
+    """Serve one keyset page ordered by ``sort_by`` with ``id`` as tie-breaker.
+
+    With a search ``rank`` (``q`` without explicit ``sort_by``) pages follow the
+    same relevance order as offset mode: rank, then ``updated_at``, then ``id``.
+    """
+    from models import Property
+
+    if rank is not None:
+        # float8: o valor devolvido no cursor volta idêntico na comparação
+        keys = [(cast(rank, Float(precision=53)), True), (Property.updated_at, True), (Property.id, True)]
+        signature = 'relevance:desc'
+    else:
+        if sort_by not in Property.__table__.columns.keys():
+            sort_by = 'created_at'
+        descending = sort_order.lower() != 'asc'
+        keys = [(getattr(Property, sort_by), descending), (Property.id, descending)]
+        signature = f"{sort_by}:{'desc' if descending else 'asc'}"
+
+    try:
+        items, next_cursor, has_more = paginate_keyset(query, keys, page_size, cursor, signature)
+    except InvalidCursorError as e:
+        return jsonify({'message': str(e)}), 400
+
+    total, total_cached = cached_count(query, count_key)
+    response = PropertySerializer.to_cursor_response(items, total, page_size, next_cursor, has_more, total_cached)
+    return jsonify(response), 200
 
 
 def create_property_routes(properties_bp: Blueprint):
@@ -38,6 +71,9 @@ def create_property_routes(properties_bp: Blueprint):
     @tenant_required
     def list_properties():
         """List properties with pagination and filters.
+
+        Pass ``cursor`` (empty for the first page) to use keyset pagination and
+        follow ``next_cursor`` from the response for subsequent pages.
         
         Includes:
         - Properties owned by the tenant
@@ -62,26 +98,16 @@ def create_property_routes(properties_bp: Blueprint):
         from properties.services.partnership_service import PropertySharingService
         
         if include_shared:
-            # Get all property IDs accessible by tenant (own + shared)
-            accessible_property_ids = PropertySharingService.get_property_ids_accessible_by_tenant(g.tenant_id)
-            query = Property.query.filter(Property.id.in_(accessible_property_ids))
+            # Own + shared properties, resolved as a subquery inside the same SQL statement
+            query = Property.query.filter(
+                PropertySharingService.accessible_properties_filter(g.tenant_id)
+            )
         else:
             # Only own properties
             query = Property.query.filter_by(tenant_id=g.tenant_id)
         
-        # Apply search filter (melhorado para buscar por códigos, título e endereço)
-        if q:
-            try:
-                like = f"%{q}%"
-                query = query.filter(
-                    (Property.title.ilike(like)) | 
-                    (Property.external_id.ilike(like)) |
-                    (Property.property_code.ilike(like)) |
-                    (Property.address_neighborhood.ilike(like)) |
-                    (Property.address_street.ilike(like))
-                )
-            except Exception:
-                pass
+        # Apply search filter (full-text + trigram em PostgreSQL; ILIKE nos demais bancos)
+        query = PropertySearchService.apply_search(query, q)
         
         # Apply status filter
         if status:
@@ -92,11 +118,21 @@ def create_property_routes(properties_bp: Blueprint):
         if property_type:
             query = query.filter_by(property_type=property_type)
         
+        # Busca sem sort_by explícito ordena por relevância (nos dois modos de paginação)
+        rank = PropertySearchService.rank_expression(q) if 'sort_by' not in request.args else None
+        
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            count_key = f"properties:{g.tenant_id}:{include_shared}:{q}:{status}:{property_type}"
+            return _cursor_page(query, sort_by, sort_order, page_size, cursor, count_key, rank)
+        
         total = query.count()
         
         # Apply sorting
         sort_column = getattr(Property, sort_by, Property.created_at)
-        if sort_order.lower() == 'asc':
+        if rank is not None:
+            query = query.order_by(rank.desc(), Property.updated_at.desc())
+        elif sort_order.lower() == 'asc':
             query = query.order_by(sort_column.asc())
         else:
             query = query.order_by(sort_column.desc())
@@ -110,7 +146,10 @@ def create_property_routes(properties_bp: Blueprint):
 
     @properties_bp.route('/public', methods=['GET'], strict_slashes=False)
     def list_properties_public():
-        """Public version of property listing - no authentication required."""
+        """Public version of property listing - no authentication required.
+
+        Supports the same opt-in ``cursor`` pagination as the authenticated listing.
+        """
         # Validate pagination parameters
         page, page_size = PropertyValidator.validate_pagination_params(
             request.args.get('page'),
@@ -131,19 +170,8 @@ def create_property_routes(properties_bp: Blueprint):
         from models import Property
         query = Property.query
         
-        # Apply search filter (melhorado para buscar por código externo e bairro)
-        if q:
-            try:
-                like = f"%{q}%"
-                query = query.filter(
-                    (Property.title.ilike(like)) | 
-                    (Property.external_id.ilike(like)) |
-                    (Property.property_code.ilike(like)) |
-                    (Property.address_neighborhood.ilike(like)) |
-                    (Property.address_street.ilike(like))
-                )
-            except Exception:
-                pass
+        # Apply search filter (full-text + trigram em PostgreSQL; ILIKE nos demais bancos)
+        query = PropertySearchService.apply_search(query, q)
         
         # Apply filters
         if status_filter:
@@ -161,9 +189,19 @@ def create_property_routes(properties_bp: Blueprint):
             except Exception:
                 pass
         
+        # Busca sem sort_by explícito ordena por relevância (nos dois modos de paginação)
+        rank = PropertySearchService.rank_expression(q) if 'sort_by' not in request.args else None
+        
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            count_key = f"properties_public:{q}:{status_filter}:{city_filter}:{min_price}:{max_price}"
+            return _cursor_page(query, sort_by, sort_order, page_size, cursor, count_key, rank)
+        
         # Apply sorting
         sort_column = getattr(Property, sort_by, Property.created_at)
-        if sort_order.lower() == 'asc':
+        if rank is not None:
+            query = query.order_by(rank.desc(), Property.updated_at.desc())
+        elif sort_order.lower() == 'asc':
             query = query.order_by(sort_column.asc())
         else:
             query = query.order_by(sort_column.desc())
@@ -209,6 +247,17 @@ def create_property_routes(properties_bp: Blueprint):
         
         return jsonify(result), 200
 
+    @properties_bp.route('/<int:property_id>/sync-status', methods=['GET'], strict_slashes=False)
+    @jwt_required()
+    @tenant_required
+    def get_property_sync_status(property_id):
+        """CanalPro sync status of a property (write-behind intent from update_property)."""
+        state = CanalProSyncService.get_state(property_id, g.tenant_id)
+        if state is None:
+            return jsonify({'property_id': property_id, 'status': 'idle'}), 200
+
+        return jsonify(state.to_dict()), 200
+
     @properties_bp.route('/<int:property_id>', methods=['DELETE'], strict_slashes=False)
     @jwt_required()
     @tenant_required
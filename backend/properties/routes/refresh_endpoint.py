@@ -7,7 +7,9 @@ from flask import Blueprint, jsonify
 from flask_jwt_extended import jwt_required, get_jwt
 from datetime import datetime, timedelta
 from extensions import db
+from sqlalchemy.orm import joinedload
 from models import RefreshSchedule, RefreshJob, Property
+from ..services.refresh_kpi_service import RefreshKpiService
 from ..services.refresh_scheduler_service import RefreshSchedulerService
 from ..monitoring import monitor_operation
 
@@ -41,13 +43,14 @@ def get_refresh_dashboard():
             tenant_id=tenant_id,
             is_active=True
         ).all()
+        properties_count = RefreshKpiService.schedule_property_counts([s.id for s in active_schedules])
         
-        # Obter jobs recentes (últimas 24h)
+        # Últimos jobs (só a lista exibida; os agregados vêm do rollup)
         last_24h = datetime.utcnow() - timedelta(hours=24)
-        recent_jobs = RefreshJob.query.join(Property).filter(
+        recent_jobs = RefreshJob.query.join(Property).options(joinedload(RefreshJob.property)).filter(
             Property.tenant_id == tenant_id,
             RefreshJob.created_at >= last_24h
-        ).order_by(RefreshJob.created_at.desc()).limit(50).all()
+        ).order_by(RefreshJob.created_at.desc()).limit(20).all()
         
         # Obter próximas execuções
         next_executions = []
@@ -57,14 +60,14 @@ def get_refresh_dashboard():
                     'schedule_id': schedule.id,
                     'schedule_name': schedule.name,
                     'next_execution': schedule.next_run.isoformat(),
-                    'properties_count': schedule.properties.count()
+                    'properties_count': properties_count.get(schedule.id, 0)
                 })
         
         # Ordenar por próxima execuç��o
         next_executions.sort(key=lambda x: x['next_execution'])
         
         # Calcular KPIs avançados
-        total_properties = sum(s.properties.count() for s in active_schedules)
+        total_properties = sum(properties_count.get(s.id, 0) for s in active_schedules)
         success_rate = 0
         if stats['jobs_last_24h']['total'] > 0:
             success_rate = round(
@@ -108,7 +111,7 @@ def get_refresh_dashboard():
                 'total_properties': total_properties,
                 'success_rate': success_rate,
                 'jobs_last_24h': stats['jobs_last_24h'],
-                'pending_jobs': len([j for j in recent_jobs if j.status == 'pending'])
+                'pending_jobs': stats['jobs_last_24h']['pending']
             },
             
             # Estatísticas detalhadas
@@ -127,7 +130,7 @@ def get_refresh_dashboard():
                 {
                     'id': s.id,
                     'name': s.name,
-                    'properties_count': s.properties.count(),
+                    'properties_count': properties_count.get(s.id, 0),
                     'next_run': s.next_run.isoformat() if s.next_run else None,
                     'last_run': s.last_run.isoformat() if s.last_run else None,
                     'is_active': s.is_active
@@ -150,14 +153,14 @@ def get_refresh_dashboard():
                     'completed_at': j.completed_at.isoformat() if j.completed_at else None,
                     'error_message': j.error_message
                 }
-                for j in recent_jobs[:20]
+                for j in recent_jobs
             ],
             
             # Métricas de performance
             'performance': {
-                'avg_execution_time': calculate_avg_execution_time(recent_jobs),
-                'failure_rate': calculate_failure_rate(recent_jobs),
-                'most_active_schedule': get_most_active_schedule(active_schedules),
+                'avg_execution_time': stats.get('avg_duration_seconds', 0),
+                'failure_rate': calculate_failure_rate(stats['jobs_last_24h']),
+                'most_active_schedule': get_most_active_schedule(active_schedules, properties_count),
                 'properties_per_schedule': round(total_properties / len(active_schedules)) if active_schedules else 0
             }
         }
@@ -274,25 +277,24 @@ def get_refresh_reports():
         
         # Relatório de performance por cronograma
         schedules = RefreshSchedule.query.filter_by(tenant_id=tenant_id).all()
+        properties_count = RefreshKpiService.schedule_property_counts([s.id for s in schedules])
+        # Jobs de cada cronograma nas últimas 24h, somados do rollup numa consulta
+        jobs_by_schedule = RefreshKpiService.totals_by_schedule(
+            tenant_id, datetime.utcnow() - timedelta(hours=24)
+        )
         
         schedule_reports = []
         for schedule in schedules:
-            # Jobs do cronograma nas últimas 24h
-            last_24h = datetime.utcnow() - timedelta(hours=24)
-            jobs = RefreshJob.query.filter(
-                RefreshJob.refresh_schedule_id == schedule.id,
-                RefreshJob.created_at >= last_24h
-            ).all()
-            
-            completed = len([j for j in jobs if j.status == 'completed'])
-            failed = len([j for j in jobs if j.status == 'failed'])
-            total = len(jobs)
+            jobs = jobs_by_schedule.get(schedule.id, {})
+            completed = jobs.get('completed', 0)
+            failed = jobs.get('failed', 0)
+            total = jobs.get('total', 0)
             
             schedule_reports.append({
                 'schedule_id': schedule.id,
                 'schedule_name': schedule.name,
                 'is_active': schedule.is_active,
-                'properties_count': schedule.properties.count(),
+                'properties_count': properties_count.get(schedule.id, 0),
                 'jobs_24h': {
                     'total': total,
                     'completed': completed,
@@ -316,38 +318,21 @@ def get_refresh_reports():
         return jsonify({'error': 'Failed to get reports'}), 500
 
 
-def calculate_avg_execution_time(jobs):
-    """Calcula tempo médio de execução dos jobs"""
-    completed_jobs = [j for j in jobs if j.status == 'completed' and j.completed_at and j.created_at]
-    
-    if not completed_jobs:
-        return 0
-    
-    total_time = 0
-    for job in completed_jobs:
-        duration = (job.completed_at - job.created_at).total_seconds()
-        total_time += duration
-    
-    return round(total_time / len(completed_jobs), 2)
-
-
-def calculate_failure_rate(jobs):
-    """Calcula taxa de falha dos jobs"""
-    if not jobs:
+def calculate_failure_rate(jobs_summary):
+    """Calcula taxa de falha a partir dos contadores do rollup"""
+    if not jobs_summary.get('total'):
         return 0
-    
-    failed_jobs = len([j for j in jobs if j.status == 'failed'])
-    return round((failed_jobs / len(jobs)) * 100, 2)
+    return round((jobs_summary.get('failed', 0) / jobs_summary['total']) * 100, 2)
 
 
-def get_most_active_schedule(schedules):
+def get_most_active_schedule(schedules, properties_count):
     """Encontra o cronograma mais ativo"""
     if not schedules:
         return None
     
-    most_active = max(schedules, key=lambda s: s.properties.count())
+    most_active = max(schedules, key=lambda s: properties_count.get(s.id, 0))
     return {
         'id': most_active.id,
         'name': most_active.name,
-        'properties_count': most_active.properties.count()
-    }
\ No newline at end of file
+        'properties_count': properties_count.get(most_active.id, 0)
+    }
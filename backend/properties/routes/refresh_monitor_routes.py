@@ -7,6 +7,7 @@ from flask_jwt_extended import jwt_required, get_jwt_identity, get_jwt
 
 from ..services.refresh_scheduler_service import RefreshSchedulerService
 from ..monitoring import monitor_operation
+from utils.pagination import InvalidCursorError, cached_count, paginate_keyset
 
 logger = logging.getLogger(__name__)
 
@@ -169,6 +170,7 @@ def list_jobs():
         end_date: Data de fim (formato ISO)
         page: Página (default: 1)
         per_page: Itens por página (default: 20, máx: 100)
+        cursor: Paginação por cursor (vazio = primeira página); substitui ``page``
     """
     try:
         claims = get_jwt()
@@ -207,18 +209,41 @@ def list_jobs():
             end_dt = datetime.fromisoformat(end_date.replace('Z', '+00:00'))
             query = query.filter(RefreshJob.created_at <= end_dt)
         
+        def _serialize(jobs):
+            jobs_data = []
+            for job in jobs:
+                job_dict = job.to_dict()
+                job_dict['property_title'] = job.property.title if job.property else None
+                job_dict['schedule_name'] = job.schedule.name if job.schedule else None
+                jobs_data.append(job_dict)
+            return jobs_data
+        
+        cursor = request.args.get('cursor')
+        if cursor is not None:
+            keys = [(RefreshJob.created_at, True), (RefreshJob.id, True)]
+            try:
+                jobs, next_cursor, has_more = paginate_keyset(query, keys, per_page, cursor, 'created_at:desc')
+            except InvalidCursorError as e:
+                return jsonify({'error': str(e)}), 400
+            
+            count_key = f"refresh_jobs:{tenant_id}:{status_filter}:{schedule_id}:{start_date}:{end_date}"
+            total, total_cached = cached_count(query, count_key)
+            return jsonify({
+                'data': _serialize(jobs),
+                'total': total,
+                'total_cached': total_cached,
+                'per_page': per_page,
+                'next_cursor': next_cursor,
+                'has_more': has_more
+            }), 200
+        
         # Executar query paginada
         pagination = query.order_by(RefreshJob.created_at.desc()).paginate(
             page=page, per_page=per_page, error_out=False
         )
         
         # Formatar dados
-        jobs_data = []
-        for job in pagination.items:
-            job_dict = job.to_dict()
-            job_dict['property_title'] = job.property.title if job.property else None
-            job_dict['schedule_name'] = job.schedule.name if job.schedule else None
-            jobs_data.append(job_dict)
+        jobs_data = _serialize(pagination.items)
         
         return jsonify({
             'data': jobs_data,
@@ -412,7 +437,8 @@ def get_system_status():
     """
     try:
         from datetime import datetime, timedelta
-        from models import RefreshJob, RefreshSchedule
+        from models import RefreshSchedule
+        from ..services.refresh_kpi_service import RefreshKpiService
         
         claims = get_jwt()
         tenant_id = claims.get('tenant_id')
@@ -426,18 +452,13 @@ def get_system_status():
             is_active=True
         ).count()
         
-        # Jobs das últimas horas
-        last_hour = datetime.utcnow() - timedelta(hours=1)
-        recent_jobs = RefreshJob.query.join(RefreshSchedule).filter(
-            RefreshSchedule.tenant_id == tenant_id,
-            RefreshJob.created_at >= last_hour
-        ).all()
-        
-        # Contadores
-        jobs_by_status = {}
-        for job in recent_jobs:
-            status = job.status
-            jobs_by_status[status] = jobs_by_status.get(status, 0) + 1
+        # Jobs da última hora por status (rollup: horas cheias desde a última hora)
+        last_hour_totals = RefreshKpiService.totals(tenant_id, datetime.utcnow() - timedelta(hours=1))
+        jobs_by_status = {
+            status: last_hour_totals[status]
+            for status in ('pending', 'running', 'completed', 'failed')
+            if last_hour_totals[status]
+        }
         
         # Próximos schedules
         now = datetime.utcnow()
@@ -445,6 +466,7 @@ def get_system_status():
             tenant_id=tenant_id,
             is_active=True
         ).all()
+        properties_count = RefreshKpiService.schedule_property_counts([schedule.id for schedule in today_schedules])
         
         next_executions = []
         for schedule in today_schedules:
@@ -460,7 +482,7 @@ def get_system_status():
                 'schedule_id': schedule.id,
                 'schedule_name': schedule.name,
                 'next_execution': next_time.isoformat(),
-                'properties_count': schedule.properties.count()
+                'properties_count': properties_count.get(schedule.id, 0)
             })
         
         # Ordenar por próxima execução
@@ -487,7 +509,7 @@ def get_system_status():
         return jsonify({
             'status': 'healthy' if celery_status == 'connected' else 'warning',
             'celery_status': celery_status,
-            'pending_jobs': jobs_by_status.get('pending', 0),
+            'pending_jobs': RefreshKpiService.totals(tenant_id)['pending'],
             'active_schedules': active_schedules,
             'jobs_last_hour': jobs_by_status,
             'next_executions': next_executions[:5],
@@ -546,6 +568,7 @@ def run_schedule_manually(schedule_id):
                 'message': f'Schedule "{schedule.name}" executed successfully',
                 'schedule_id': schedule_id,
                 'jobs_created': result.get('jobs_created', 0),
+                'jobs_skipped': result.get('jobs_skipped', 0),
                 'properties_processed': result.get('properties_processed', 0)
             }), 200
         else:
@@ -581,6 +604,8 @@ def stop_schedule_jobs(schedule_id):
         
         from models import RefreshSchedule, RefreshJob
         from extensions import db
+        from sqlalchemy import update
+        from ..services.refresh_kpi_service import JobTransition, RefreshKpiService
         
         # Verificar se o cronograma existe e pertence ao tenant
         schedule = RefreshSchedule.query.filter_by(
@@ -591,11 +616,22 @@ def stop_schedule_jobs(schedule_id):
         if not schedule:
             return jsonify({'error': 'Schedule not found'}), 404
         
-        # Parar jobs pendentes do cronograma
-        stopped_jobs = RefreshJob.query.filter(
-            RefreshJob.refresh_schedule_id == schedule_id,
-            RefreshJob.status == 'pending'
-        ).update({'status': 'cancelled'})
+        # Parar jobs pendentes do cronograma (travados; jobs em claim por outro dispatcher ficam de fora)
+        pending = RefreshKpiService.job_rows(
+            None, for_update=True, refresh_schedule_id=schedule_id, status='pending'
+        )
+        stopped_jobs = 0
+        if pending:
+            table = RefreshJob.__table__
+            stopped_jobs = db.session.execute(
+                update(table)
+                .where(table.c.id.in_([row.id for row in pending]), table.c.status == 'pending')
+                .values(status='cancelled')
+            ).rowcount
+            RefreshKpiService.record(
+                JobTransition(row.tenant_id, row.refresh_schedule_id, row.created_at, 'pending', 'cancelled')
+                for row in pending
+            )
         
         db.session.commit()
         
@@ -27,6 +27,7 @@ def create_schedule():
         "name": "Lista 01",
         "time_slot": "09:30",
         "frequency_days": 1,
+        "refresh_strategy": "update",  // opcional: recreate (padrão), update, touch
         "property_ids": [1, 2, 3]  // opcional
     }
     """
@@ -51,7 +52,8 @@ def create_schedule():
             time_slot=data['time_slot'],
             frequency_days=data.get('frequency_days', 1),
             property_ids=data['property_ids'],  # Removido default vazio - agora obrigatório
-            days_of_week=data.get('days_of_week', [1, 2, 3, 4, 5])
+            days_of_week=data.get('days_of_week', [1, 2, 3, 4, 5]),
+            refresh_strategy=data.get('refresh_strategy')
         )
 
         if success:
@@ -123,6 +125,7 @@ def update_schedule(schedule_id):
         "name": "Lista 01 Atualizada",  // opcional
         "time_slot": "10:30",           // opcional
         "frequency_days": 7,            // opcional
+        "refresh_strategy": "touch",    // opcional
         "is_active": false              // opcional
     }
     """
@@ -148,7 +151,8 @@ def update_schedule(schedule_id):
             time_slot=data.get('time_slot'),
             frequency_days=data.get('frequency_days'),
             is_active=data.get('is_active'),
-            days_of_week=data.get('days_of_week')
+            days_of_week=data.get('days_of_week'),
+            refresh_strategy=data.get('refresh_strategy')
         )
 
         if success:
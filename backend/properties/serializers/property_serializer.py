@@ -1,7 +1,7 @@
 """
 Property serializers for API responses
 """
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Iterable
 import json
 from extensions import db
 
@@ -30,8 +30,66 @@ class PropertySerializer:
         return []
     
     @staticmethod
-    def to_dict(prop, include_full_data: bool = False) -> Dict[str, Any]:
-        """Convert Property model to dictionary for API response."""
+    def _loaded_empreendimento(prop):
+        """Return the related Empreendimento if the relationship is already loaded.
+
+        ``Property.empreendimento`` is ``lazy='joined'``, so rows fetched through a
+        query already carry it; reading ``__dict__`` avoids triggering a lazy load.
+        Returns ``None`` when the relationship was not loaded.
+        """
+        if 'empreendimento' not in getattr(prop, '__dict__', {}):
+            return None
+        emp = prop.__dict__['empreendimento']
+        if emp is None or emp.id != prop.empreendimento_id:
+            return None
+        return emp
+
+    @staticmethod
+    def load_condominiums(properties: Iterable) -> Dict[int, Optional[Dict[str, Any]]]:
+        """Resolve the condominium payload for every distinct empreendimento on a page.
+
+        Reuses joined-loaded relationships and fetches the remaining IDs in a single
+        query. Each ``Empreendimento.to_dict()`` is computed once; inactive or missing
+        empreendimentos map to ``None``.
+        """
+        condominiums: Dict[int, Optional[Dict[str, Any]]] = {}
+        missing = set()
+
+        for prop in properties:
+            emp_id = getattr(prop, 'empreendimento_id', None)
+            if not emp_id or emp_id in condominiums:
+                continue
+            emp = PropertySerializer._loaded_empreendimento(prop)
+            if emp is not None:
+                condominiums[emp_id] = emp.to_dict() if emp.ativo else None
+                missing.discard(emp_id)
+            else:
+                missing.add(emp_id)
+
+        if missing:
+            try:
+                from empreendimentos.models.empreendimento import Empreendimento
+                rows = db.session.query(Empreendimento).filter(
+                    Empreendimento.id.in_(missing),
+                    Empreendimento.ativo == True
+                ).all()
+                for emp in rows:
+                    condominiums[emp.id] = emp.to_dict()
+            except Exception:
+                pass
+            for emp_id in missing:
+                condominiums.setdefault(emp_id, None)
+
+        return condominiums
+
+    @staticmethod
+    def to_dict(prop, include_full_data: bool = False,
+                condominiums: Optional[Dict[int, Optional[Dict[str, Any]]]] = None) -> Dict[str, Any]:
+        """Convert Property model to dictionary for API response.
+
+        ``condominiums`` is an optional map produced by ``load_condominiums``; when
+        given, the empreendimento is read from it instead of being queried.
+        """
         base_data = {
             'id': prop.id,
             'title': prop.title,
@@ -105,13 +163,9 @@ class PropertySerializer:
         condominium = None
         try:
             if getattr(prop, 'empreendimento_id', None):
-                from empreendimentos.models.empreendimento import Empreendimento
-                emp = db.session.query(Empreendimento).filter(
-                    Empreendimento.id == prop.empreendimento_id,
-                    Empreendimento.ativo == True
-                ).first()
-                if emp:
-                    condominium = emp.to_dict()
+                if condominiums is None:
+                    condominiums = PropertySerializer.load_condominiums([prop])
+                condominium = condominiums.get(prop.empreendimento_id)
         except Exception:
             condominium = None
         base_data['condominium'] = condominium
@@ -165,7 +219,8 @@ class PropertySerializer:
     @staticmethod
     def to_list_response(properties: list, total: int, page: int, page_size: int) -> Dict[str, Any]:
         """Serialize properties list response."""
-        output = [PropertySerializer.to_dict(prop) for prop in properties]
+        condominiums = PropertySerializer.load_condominiums(properties)
+        output = [PropertySerializer.to_dict(prop, condominiums=condominiums) for prop in properties]
         
         return {
             'data': output,
@@ -173,3 +228,19 @@ class PropertySerializer:
             'page': page,
             'page_size': page_size
         }
+
+    @staticmethod
+    def to_cursor_response(properties: list, total: int, page_size: int, next_cursor: Optional[str],
+                           has_more: bool, total_cached: bool = False) -> Dict[str, Any]:
+        """Serialize a keyset (cursor) page; ``total`` may come from the count cache."""
+        condominiums = PropertySerializer.load_condominiums(properties)
+        output = [PropertySerializer.to_dict(prop, condominiums=condominiums) for prop in properties]
+
+        return {
+            'data': output,
+            'total': total,
+            'total_cached': total_cached,
+            'page_size': page_size,
+            'next_cursor': next_cursor,
+            'has_more': has_more
+        }
@@ -14,6 +14,7 @@ from ..utils.helpers import sanitize_ids
 from ..monitoring import monitor_operation, track_database_operation
 
 from .property_delete_service import PropertyDeleteService
+from .tenant_quota_service import TenantQuotaService
 
 logger = logging.getLogger(__name__)
 
@@ -196,12 +197,15 @@ class BulkService:
                 prop.publication_type = normalized
                 updated += 1
 
+            # Os contadores de quota são atualizados pelos listeners, no mesmo commit
             db.session.commit()
 
             return {
                 'updated': updated,
                 'publication_type': normalized,
-                'message': f'{updated} properties updated successfully'
+                'message': f'{updated} properties updated successfully',
+                # Uso após a atualização (remaining < 0 = acima do limite do contrato)
+                'quota': TenantQuotaService.check(tenant_id, normalized, additional=0)
             }
         except SQLAlchemyError as e:
             db.session.rollback()
@@ -0,0 +1,365 @@
+"""
+Sincronização write-behind de imóveis com o CanalPro (Gandalf)
+
+``update_property`` grava o imóvel e registra uma intenção em property_sync_state
+(``requested_version`` + 1, na mesma transação); depois do commit enfileira
+``canalpro_sync.push_property`` com um atraso de ``CANALPRO_SYNC_DEBOUNCE_SECONDS``.
+Quando a task roda, só a versão mais recente é enviada: tasks de versões
+anteriores terminam sem chamar o CanalPro, então várias edições seguidas viram
+um único envio com o estado final do imóvel.
+
+O envio reivindica a intenção com um lease (uma task por imóvel de cada vez);
+``canalpro_sync.sweep`` reenfileira intenções cuja task se perdeu (falha ao
+enfileirar, worker morto). O status fica em ``GET /properties/<id>/sync-status``.
+"""
+import json
+import logging
+import os
+import time
+import traceback
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from celery import shared_task
+from flask import current_app
+from sqlalchemy import and_, or_, select, update
+
+from worker_app import worker_app_context
+from utils.lazy_logging import preview
+from utils.upsert import upsert
+from extensions import db
+from models import Property, PropertySyncState
+
+logger = logging.getLogger(__name__)
+
+
+class CanalProSyncService:
+    """Intenções de sync por imóvel e envio da versão mais recente ao CanalPro."""
+
+    DEBOUNCE_SECONDS = int(os.getenv('CANALPRO_SYNC_DEBOUNCE_SECONDS', '10'))
+    LEASE_SECONDS = int(os.getenv('CANALPRO_SYNC_LEASE_SECONDS', '300'))
+    # Erros transitórios do Gandalf (500/transação) que valem nova tentativa
+    RETRYABLE_MARKERS = ('500', 'TransactionSystemException', 'Could not commit', 'internal server error')
+
+    @staticmethod
+    def request_sync(property_id: int, tenant_id: int) -> int:
+        """
+        Registra uma nova versão a sincronizar (sem commit; vai junto com a edição).
+
+        Returns:
+            requested_version gravada (passar para ``enqueue`` depois do commit)
+        """
+        table = PropertySyncState.__table__
+        now = datetime.now(timezone.utc)
+        values = {'property_id': property_id, 'tenant_id': tenant_id, 'status': 'pending',
+                  'requested_version': 1, 'requested_at': now, 'last_error': None, 'updated_at': now}
+        written = upsert(
+            db.session, table, [values], ['property_id'],
+            lambda incoming: {'requested_version': table.c.requested_version + 1, 'status': 'pending',
+                              'requested_at': now, 'last_error': None, 'updated_at': now},
+            returning=[table.c.requested_version],
+        )
+        return written[0].requested_version
+
+    @staticmethod
+    def enqueue(property_id: int, version: int, countdown: Optional[int] = None) -> bool:
+        """Agenda o envio da versão (após o commit). Falhas ficam para a varredura."""
+        try:
+            push_property.apply_async(
+                args=[property_id, version],
+                countdown=CanalProSyncService.DEBOUNCE_SECONDS if countdown is None else countdown
+            )
+            return True
+        except Exception:
+            logger.exception("Failed to enqueue CanalPro sync for property %s (v%s)", property_id, version)
+            return False
+
+    @staticmethod
+    def get_state(property_id: int, tenant_id: int) -> Optional[PropertySyncState]:
+        return PropertySyncState.query.filter_by(property_id=property_id, tenant_id=tenant_id).first()
+
+    @staticmethod
+    def run(property_id: int, version: int) -> Dict[str, Any]:
+        """
+        Envia o imóvel se ``version`` ainda é a mais recente. Requer app context.
+
+        Returns:
+            dict com status: superseded, busy, synced, error ou skipped
+        """
+        table = PropertySyncState.__table__
+        now = datetime.now(timezone.utc)
+        claimed = db.session.execute(
+            update(table)
+            .where(
+                table.c.property_id == property_id,
+                table.c.requested_version == version,
+                # Task duplicada (varredura/"busy") de uma versão já enviada não reenvia
+                or_(table.c.synced_version.is_(None), table.c.synced_version < version),
+                or_(table.c.status != 'syncing', table.c.lease_expires_at < now),
+            )
+            .values(status='syncing', lease_expires_at=now + timedelta(seconds=CanalProSyncService.LEASE_SECONDS),
+                    attempts=table.c.attempts + 1, updated_at=now)
+            .returning(table.c.id)
+        ).scalar()
+        db.session.commit()
+
+        if claimed is None:
+            current = db.session.execute(
+                select(table.c.requested_version, table.c.synced_version).where(table.c.property_id == property_id)
+            ).first()
+            if current is None or current.requested_version != version:
+                # Edição mais nova já tem a própria task: esta não envia nada
+                return {'property_id': property_id, 'version': version, 'status': 'superseded'}
+            if current.synced_version is not None and current.synced_version >= version:
+                return {'property_id': property_id, 'version': version, 'status': 'synced', 'duplicate': True}
+            # Outra task está enviando: tentar de novo depois do debounce
+            CanalProSyncService.enqueue(property_id, version)
+            return {'property_id': property_id, 'version': version, 'status': 'busy'}
+
+        prop = db.session.get(Property, property_id)
+        if prop is None:
+            return {'property_id': property_id, 'version': version, 'status': 'superseded'}
+        try:
+            status, error = CanalProSyncService.push(prop)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Unexpected error while syncing property %s to CanalPro", property_id)
+            status, error = 'error', str(e)
+
+        CanalProSyncService._finish(property_id, version, status, error)
+        return {'property_id': property_id, 'version': version, 'status': status, 'error': error}
+
+    @staticmethod
+    def _finish(property_id: int, version: int, status: str, error: Optional[str]) -> None:
+        """Libera o lease; se chegou edição nova durante o envio, a intenção volta a pending."""
+        table = PropertySyncState.__table__
+        now = datetime.now(timezone.utc)
+        values = {'lease_expires_at': None, 'last_error': error, 'updated_at': now}
+        if status == 'synced':
+            values.update(synced_version=version, synced_at=now)
+        current = table.c.requested_version == version
+        db.session.execute(
+            update(table).where(table.c.property_id == property_id, current).values(status=status, **values)
+        )
+        db.session.execute(
+            update(table).where(table.c.property_id == property_id, ~current).values(status='pending', **values)
+        )
+        db.session.commit()
+
+    @staticmethod
+    def sweep() -> int:
+        """Reenfileira intenções sem task viva (pendentes há mais de um lease ou com lease vencido)."""
+        table = PropertySyncState.__table__
+        now = datetime.now(timezone.utc)
+        stale = now - timedelta(seconds=CanalProSyncService.LEASE_SECONDS)
+        rows = db.session.execute(
+            select(table.c.property_id, table.c.requested_version).where(or_(
+                and_(table.c.status == 'pending', table.c.requested_at < stale),
+                and_(table.c.status == 'syncing', table.c.lease_expires_at < now),
+            ))
+        ).all()
+        db.session.commit()
+        for property_id, version in rows:
+            CanalProSyncService.enqueue(property_id, version, countdown=0)
+        if rows:
+            logger.info("Re-enqueued %d stale CanalPro sync intents", len(rows))
+        return len(rows)
+
+    @staticmethod
+    def _is_retryable(error: Exception) -> bool:
+        message = str(error)
+        return any(marker in message for marker in CanalProSyncService.RETRYABLE_MARKERS)
+
+    @staticmethod
+    def push(prop: Property) -> Tuple[str, Optional[str]]:
+        """
+        Envia o estado atual do imóvel ao CanalPro, como o exportador:
+
+        - converte para o payload do CanalPro; se o fingerprint for o do último envio, não chama a API
+        - sobe as imagens via CanalProExporter
+        - tenta UPDATE por prop.remote_id
+        - se não encontrar, procura por externalId e faz UPDATE
+        - se ainda não atualizou, faz CREATE do anúncio
+        - grava remote_id e status de exportação
+
+        Returns:
+            (status, erro): synced, error ou skipped (tenant sem integração)
+        """
+        from utils.integration_tokens import get_valid_integration_headers
+        from integrations.gandalf_service import update_listing, create_listing, get_listing_by_external_id
+        from integrations.canalpro_exporter import CanalProExporter
+        from integrations import payload_fingerprint
+
+        tenant_id = prop.tenant_id
+        try:
+            creds = get_valid_integration_headers(tenant_id, 'gandalf')
+            current_app.logger.info(f"Property {prop.id}: Credentials obtained: {list(creds.keys())}")
+        except Exception as cred_error:
+            error_msg = f"CanalPro credentials not available for tenant {tenant_id}: {str(cred_error)}"
+            current_app.logger.info(error_msg)
+            return 'skipped', error_msg
+
+        # Local fallback: garantir que os headers obrigatórios estejam presentes
+        # (opção rápida — não substitui correção definitiva no utilitário de tokens)
+        try:
+            creds = creds.copy()
+            env_map = {
+                'publisher_id': 'GANDALF_PUBLISHER_ID',
+                'odin_id': 'GANDALF_ODIN_ID',
+                'contract_id': 'GANDALF_CONTRACT_ID',
+                'client_id': 'GANDALF_CLIENT_ID',
+                'company': 'GANDALF_COMPANY'
+            }
+            applied = []
+            for k, env_name in env_map.items():
+                v = os.getenv(env_name)
+                if v:  # only apply when env var is set/truthy
+                    creds.setdefault(k, v)
+                    applied.append(k)
+            current_app.logger.info(f"Property {prop.id}: Credentials after local fallbacks keys={list(creds.keys())} applied={applied}")
+        except Exception:
+            current_app.logger.warning(f"Property {prop.id}: Failed to apply local credential fallbacks")
+
+        # Use exporter utilities to build payload and upload images consistently
+        exporter = CanalProExporter(tenant_id=tenant_id)
+        exporter.credentials = creds
+        listing_payload = exporter.convert_property_to_canalpro_format(prop)
+        # Antes do upload: as imagens reenviadas ganham URLs novas a cada vez
+        fingerprint = payload_fingerprint.fingerprint(listing_payload)
+        if payload_fingerprint.is_unchanged(prop, fingerprint):
+            current_app.logger.info(f"Property {prop.id}: CanalPro payload unchanged since last push, skipping")
+            payload_fingerprint.record('skipped', tenant_id)
+            return 'synced', None
+
+        # Ensure images are uploaded and payload contains valid URLs
+        if not listing_payload.get('images') or len(listing_payload.get('images')) == 0:
+            try:
+                uploaded = exporter.upload_property_images(prop)
+                listing_payload['images'] = [{"imageUrl": u} for u in uploaded]
+            except Exception as e:
+                current_app.logger.warning(f"Image upload during CanalPro sync failed: {e}")
+
+        result = None
+
+        # 1) Try update by stored remote_id with retry logic
+        remote_id = getattr(prop, 'remote_id', None)
+        if remote_id:
+            for attempt in range(3):  # Try up to 3 times
+                try:
+                    listing_payload['id'] = str(remote_id)
+                    current_app.logger.info(f"Attempting Gandalf update by remote_id {remote_id} for property {prop.id} (attempt {attempt + 1}/3)")
+                    current_app.logger.debug("Update payload (truncated): %s", preview(listing_payload, 4000))
+                    result = update_listing(listing_payload, creds)
+                    current_app.logger.debug("Update response (truncated): %s", preview(result, 8000))
+                    break  # Success, exit retry loop
+                except Exception as e:
+                    if attempt < 2 and CanalProSyncService._is_retryable(e):
+                        wait_time = (attempt + 1) * 2  # 2s, 4s (no worker, fora da requisição)
+                        current_app.logger.warning(f"Retryable error on attempt {attempt + 1}, waiting {wait_time}s: {e}")
+                        time.sleep(wait_time)
+                        continue
+                    current_app.logger.warning(f"Failed to update listing {remote_id} after {attempt + 1} attempts, will attempt reconcile/create: {e}")
+                    current_app.logger.debug(traceback.format_exc())
+                    break
+
+        # 2) If no result, try reconcile by externalId and update
+        if result is None and listing_payload.get('externalId'):
+            try:
+                current_app.logger.info(f"Reconciling by externalId {listing_payload.get('externalId')} for property {prop.id}")
+                found = get_listing_by_external_id(creds, listing_payload.get('externalId'))
+                current_app.logger.debug("Reconcile found (truncated): %s", preview(found, 4000))
+                if isinstance(found, list) and len(found) > 0:
+                    found_id = found[0].get('id')
+                    if found_id:
+                        current_app.logger.info(f"Found remote listing id {found_id}; attempting UPDATE")
+                        listing_payload['id'] = str(found_id)
+                        result = update_listing(listing_payload, creds)
+                        current_app.logger.debug("Reconciled update response (truncated): %s", preview(result, 8000))
+                        # persist resolved remote_id
+                        prop.remote_id = found_id
+            except Exception as e:
+                current_app.logger.warning(f"Error reconciling by externalId during CanalPro sync: {e}")
+                current_app.logger.debug(traceback.format_exc())
+
+        # 3) If still no result, create listing with retry
+        if result is None:
+            for attempt in range(3):  # Try up to 3 times
+                try:
+                    current_app.logger.info(f"No update result; attempting create for property {prop.id} (externalId={listing_payload.get('externalId')}) (attempt {attempt + 1}/3)")
+                    current_app.logger.debug("Create payload (truncated): %s", preview(listing_payload, 4000))
+                    result = create_listing(listing_payload, creds)
+                    current_app.logger.debug("Create response (truncated): %s", preview(result, 8000))
+                    break  # Success, exit retry loop
+                except Exception as e:
+                    if attempt < 2 and CanalProSyncService._is_retryable(e):
+                        wait_time = (attempt + 1) * 2  # 2s, 4s
+                        current_app.logger.warning(f"Retryable error on create attempt {attempt + 1}, waiting {wait_time}s: {e}")
+                        time.sleep(wait_time)
+                        continue
+                    current_app.logger.exception(f"Error creating listing during CanalPro sync after {attempt + 1} attempts: {e}")
+                    result = {'error': str(e)}
+                    break
+
+        # 4) Process response and persist remote_id/status
+        if not result:
+            db.session.commit()
+            return 'error', 'Sem resposta do CanalPro'
+
+        try:
+            # Handle GraphQL errors (status 200 but with errors array)
+            if isinstance(result, dict) and result.get('errors'):
+                error_messages = [e.get('message', str(e)) for e in result.get('errors', [])]
+                raise Exception(f'Gandalf GraphQL errors: {error_messages}')
+
+            data = result.get('data') if isinstance(result, dict) else None
+            if isinstance(data, dict) and 'updateListing' in data:
+                block = data['updateListing']
+                if block is None:
+                    raise Exception('updateListing returned null - likely server error')
+            elif isinstance(data, dict) and 'createListing' in data:
+                block = data['createListing']
+                if block is None:
+                    raise Exception('createListing returned null - likely server error')
+            elif isinstance(result, dict) and result.get('error'):
+                raise Exception(result.get('error'))
+            else:
+                raise Exception(f'Unexpected response from Gandalf: {result}')
+            gid = block.get('id')
+            errors = block.get('errors', [])
+        except Exception as e:
+            current_app.logger.exception(f"Error processing Gandalf response for property {prop.id}: {e}")
+            db.session.commit()
+            return 'error', str(e)
+
+        prop.updated_at = datetime.utcnow()
+        if errors:
+            current_app.logger.error(f"Gandalf returned errors during sync of prop {prop.id}: {errors}")
+            # Store error in property for user visibility
+            prop.error = json.dumps(errors) if isinstance(errors, list) else str(errors)
+            prop.status = 'error'
+            db.session.commit()
+            return 'error', prop.error
+
+        current_app.logger.info(f"Gandalf operation successful for property {prop.id}. remote_id={gid}")
+        prop.status = 'exported'
+        if gid:
+            prop.remote_id = gid
+        prop.error = None
+        payload_fingerprint.mark_pushed(prop, fingerprint)
+        db.session.commit()
+        payload_fingerprint.record('sent', tenant_id)
+        return 'synced', None
+
+
+@shared_task(name='canalpro_sync.push_property')
+def push_property(property_id: int, version: int):
+    """Envia a versão ``version`` do imóvel (no-op se já houver versão mais nova)."""
+    with worker_app_context():
+        return CanalProSyncService.run(property_id, version)
+
+
+@shared_task(name='canalpro_sync.sweep')
+def sweep_sync_intents():
+    """Reenfileira intenções de sync cuja task se perdeu."""
+    with worker_app_context():
+        return {'requeued': CanalProSyncService.sweep()}
@@ -0,0 +1,161 @@
+"""
+Importação do Gandalf em segundo plano
+Executa ImportService.import_all_from_gandalf em uma task Celery com registro de progresso
+(ImportJob), cancelamento e retomada a partir da última página gravada.
+"""
+
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from celery import shared_task
+
+from worker_app import worker_app_context
+from extensions import db
+from models import ImportJob
+from properties.services.import_service import ImportService
+from utils.timezone_utils import utcnow
+
+logger = logging.getLogger(__name__)
+
+
+class ImportJobService:
+    """Cria, acompanha, cancela e executa jobs de importação."""
+
+    FINISHED_STATUSES = ('completed', 'failed', 'cancelled')
+
+    @staticmethod
+    def start_import(tenant_id: int, user_id: Optional[int], options: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Cria o job e enfileira a task. Só um job ativo por tenant.
+
+        Returns:
+            (True, job) quando enfileirado; (False, {'error', 'job'?}) caso contrário
+        """
+        active = ImportJob.query.filter(
+            ImportJob.tenant_id == tenant_id,
+            ImportJob.provider == 'gandalf',
+            ImportJob.status.in_(ImportJob.ACTIVE_STATUSES)
+        ).order_by(ImportJob.id.desc()).first()
+        if active:
+            return False, {'error': 'Já existe uma importação em andamento', 'job': active.to_dict()}
+
+        job = ImportJob(tenant_id=tenant_id, user_id=user_id, provider='gandalf', options=options)
+        db.session.add(job)
+        db.session.commit()
+
+        try:
+            result = run_gandalf_import.delay(job.id)
+        except Exception as e:
+            logger.exception("Failed to enqueue import job %s", job.id)
+            job.status = 'failed'
+            job.error_message = f'Falha ao enfileirar importação: {e}'
+            job.completed_at = utcnow()
+            db.session.commit()
+            return False, {'error': job.error_message, 'job': job.to_dict()}
+
+        job.task_id = result.id
+        db.session.commit()
+        logger.info("Import job %s enqueued for tenant %s (task %s)", job.id, tenant_id, job.task_id)
+        return True, job.to_dict()
+
+    @staticmethod
+    def get_job(job_id: int, tenant_id: int) -> Optional[ImportJob]:
+        return ImportJob.query.filter_by(id=job_id, tenant_id=tenant_id).first()
+
+    @staticmethod
+    def cancel_job(job_id: int, tenant_id: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Solicita o cancelamento. Um job ainda na fila é cancelado na hora; um job em
+        execução para ao terminar a página atual.
+        """
+        job = ImportJobService.get_job(job_id, tenant_id)
+        if not job:
+            return False, {'error': 'Importação não encontrada'}
+        if job.status in ImportJobService.FINISHED_STATUSES:
+            return False, {'error': f'Importação já finalizada ({job.status})', 'job': job.to_dict()}
+
+        job.cancel_requested = True
+        if job.status == 'pending':
+            job.status = 'cancelled'
+            job.completed_at = utcnow()
+        db.session.commit()
+        logger.info("Cancellation requested for import job %s (status=%s)", job.id, job.status)
+        return True, job.to_dict()
+
+    @staticmethod
+    def run_job(job_id: int, task_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Executa (ou retoma) o job. Requer app context.
+
+        A cada página gravada o progresso é persistido; se o worker morrer, a task é
+        reentregue (acks_late) e a importação continua em ``last_completed_page + 1``.
+        """
+        job = db.session.get(ImportJob, job_id)
+        if not job:
+            return {'error': f'Import job {job_id} not found'}
+        if job.status in ImportJobService.FINISHED_STATUSES:
+            return job.to_dict()
+        if job.cancel_requested:
+            ImportJobService._finish(job, 'cancelled')
+            return job.to_dict()
+
+        resumed = job.last_completed_page > 0
+        job.status = 'running'
+        job.started_at = job.started_at or utcnow()
+        job.task_id = task_id or job.task_id
+        db.session.commit()
+
+        options = dict(job.options or {})
+        options['start_page'] = job.last_completed_page + 1
+        if resumed:
+            logger.info("Resuming import job %s from page %s", job.id, options['start_page'])
+
+        def on_page(page_number: int, page_stats: Dict[str, Any]) -> bool:
+            job.pages_fetched = page_number
+            job.last_completed_page = page_number
+            job.total_listings += page_stats['total_listings']
+            job.inserted += page_stats['inserted']
+            job.updated += page_stats['updated']
+            job.skipped += page_stats['skipped']
+            if page_stats['errors']:
+                job.error_count += len(page_stats['errors'])
+                stored = list(job.errors or [])
+                room = ImportJob.MAX_STORED_ERRORS - len(stored)
+                if room > 0:
+                    job.errors = stored + page_stats['errors'][:room]
+            db.session.commit()
+            # Após o commit os atributos expiram: cancel_requested é relido do banco
+            return not job.cancel_requested
+
+        try:
+            stats = ImportService.import_all_from_gandalf(job.tenant_id, options, on_page=on_page)
+        except Exception as e:
+            db.session.rollback()
+            logger.exception("Import job %s failed", job_id)
+            job = db.session.get(ImportJob, job_id)
+            job.error_message = str(e)
+            ImportJobService._finish(job, 'failed')
+            return job.to_dict()
+
+        ImportJobService._finish(job, 'cancelled' if stats.get('cancelled') else 'completed')
+        return job.to_dict()
+
+    @staticmethod
+    def _finish(job: ImportJob, status: str):
+        job.status = status
+        job.completed_at = utcnow()
+        db.session.commit()
+        logger.info(
+            "Import job %s %s: %s pages, %s inserted, %s updated, %s errors",
+            job.id, status, job.pages_fetched, job.inserted, job.updated, job.error_count
+        )
+
+
+@shared_task(bind=True, name='gandalf_import.run_import_job', acks_late=True, reject_on_worker_lost=True)
+def run_gandalf_import(self, job_id: int):
+    """
+    Task da importação do Gandalf. ``acks_late`` + ``reject_on_worker_lost`` fazem a
+    mensagem voltar para a fila se o worker cair no meio; o job retoma da última página.
+    """
+    with worker_app_context():
+        return ImportJobService.run_job(job_id, self.request.id)
@@ -2,33 +2,86 @@
 Import Service - Centraliza lógica de importação de propriedades
 """
 import logging
-from typing import Dict, List, Any, Tuple, Optional
+import queue
+import threading
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Any, Tuple, Optional
 from flask import current_app, g
+from sqlalchemy import select
 from sqlalchemy.exc import SQLAlchemyError
 
 from models import Property, IntegrationCredentials
 from extensions import db
+from utils import tenant_cache
 from utils.integration_tokens import get_valid_integration_headers
-from integrations.gandalf_service import list_listings
+from utils.upsert import supports_native_upsert, upsert
+from integrations.gandalf_service import iter_listing_pages
 from ..mappers.property_mapper import PropertyMapper
 from ..validators.import_validator import ImportValidator
+from .tenant_quota_service import TenantQuotaService, publication_key
 from ..monitoring import monitor_operation, track_database_operation, track_api_call
 
 logger = logging.getLogger(__name__)
 
+# Chave do upsert por página (dialetos sem ON CONFLICT caem no caminho por listing)
+_CONFLICT_KEYS = ('external_id', 'tenant_id')
+
+
+def _prefetch(iterable: Iterable, depth: int = 1) -> Iterator:
+    """Consome ``iterable`` em uma thread de fundo, mantendo até ``depth`` itens à frente.
+
+    Usado para buscar a página N+1 do Gandalf enquanto a página N é gravada.
+    Exceções do produtor são relançadas no consumidor.
+    """
+    buffer: queue.Queue = queue.Queue(maxsize=depth)
+    done = object()
+    stop = threading.Event()
+
+    def produce():
+        try:
+            for item in iterable:
+                while not stop.is_set():
+                    try:
+                        buffer.put(('item', item), timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+                if stop.is_set():
+                    return
+            buffer.put(('done', done))
+        except BaseException as e:  # repassado ao consumidor
+            buffer.put(('error', e))
+
+    worker = threading.Thread(target=produce, name='gandalf-prefetch', daemon=True)
+    worker.start()
+    try:
+        while True:
+            kind, value = buffer.get()
+            if kind == 'error':
+                raise value
+            if kind == 'done':
+                return
+            yield value
+    finally:
+        stop.set()
+
 
 class ImportService:
     """Serviço para importação de propriedades de fontes externas"""
 
     @staticmethod
     @monitor_operation("import_all_from_gandalf")
-    def import_all_from_gandalf(tenant_id: int, options: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    def import_all_from_gandalf(tenant_id: int, options: Optional[Dict[str, Any]] = None,
+                                on_page: Optional[Callable[[int, Dict[str, Any]], bool]] = None) -> Dict[str, Any]:
         """
         Importa todas as listagens do Gandalf para o tenant especificado
 
         Args:
             tenant_id: ID do tenant
-            options: Opções de importação (page_size, status_filter, etc.)
+            options: Opções de importação (page_size, status_filter, start_page, etc.)
+            on_page: Callback chamado após cada página gravada com ``(número da página, stats da página)``;
+                retornar False interrompe a importação (cancelamento)
 
         Returns:
             Dict com estatísticas da importação
@@ -36,17 +89,32 @@ class ImportService:
         options = options or {}
         page_size = options.get('page_size', 100)
         status_filter = options.get('status_filter', ['ACTIVE'])
+        start_page = options.get('start_page', 1)
 
         # Validar credenciais
         creds = ImportService._get_integration_credentials(tenant_id, 'gandalf')
         if not creds:
             raise ValueError('Integration credentials for gandalf not found')
 
-        # Obter listings
-        listings = ImportService._fetch_listings(creds, page_size, status_filter)
-
-        # Processar importação
-        return ImportService._process_listings_batch(tenant_id, listings)
+        # Páginas em streaming: a página N+1 é buscada enquanto a página N é gravada
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': [], 'total_listings': 0, 'pages': 0}
+        pages = _prefetch(ImportService._fetch_listing_pages(creds, page_size, status_filter, start_page))
+        for page_number, listings in enumerate(pages, start=start_page):
+            stats['pages'] += 1
+            page_stats = ImportService._process_listings_page(tenant_id, listings)
+            for key in ('inserted', 'updated', 'skipped', 'total_listings'):
+                stats[key] += page_stats[key]
+            stats['errors'].extend(page_stats['errors'])
+            if on_page is not None and on_page(page_number, page_stats) is False:
+                stats['cancelled'] = True
+                logger.info(f"Import for tenant {tenant_id} stopped after page {page_number}")
+                break
+
+        logger.info(
+            f"Import finished for tenant {tenant_id}: {stats['total_listings']} listings in {stats['pages']} pages "
+            f"({stats['inserted']} inserted, {stats['updated']} updated, {len(stats['errors'])} errors)"
+        )
+        return stats
 
     @staticmethod
     def import_single_payload(tenant_id: int, payload: Dict[str, Any], dry_run: bool = False) -> Dict[str, Any]:
@@ -90,19 +158,163 @@ class ImportService:
             raise
 
     @staticmethod
-    def _fetch_listings(creds: Any, page_size: int, status_filter: List[str]) -> List[Dict]:
-        """Busca listings da API externa"""
+    def _fetch_listing_pages(creds: Any, page_size: int, status_filter: List[str],
+                             start_page: int = 1) -> Iterator[List[Dict]]:
+        """Busca listings da API externa, uma página por vez"""
         try:
-            listings = list_listings(creds, page_size=page_size, status_filter=status_filter)
-            logger.info(f"Fetched {len(listings)} listings from external API")
-            return listings
+            for page_number, listings in enumerate(
+                    iter_listing_pages(creds, page_size=page_size, status_filter=status_filter,
+                                       start_page=start_page), start=start_page):
+                logger.info(f"Fetched page {page_number} with {len(listings)} listings from external API")
+                yield listings
         except Exception as e:
             logger.error(f"Failed to fetch listings: {e}")
             raise
 
+    @staticmethod
+    def _process_listings_page(tenant_id: int, listings: List[Dict]) -> Dict[str, Any]:
+        """Grava uma página de listings com um único SELECT e um único upsert.
+
+        Os registros existentes da página são lidos de uma vez, mapeados pelo
+        ``PropertyMapper`` (que mantém o valor atual quando o listing não traz o
+        campo) e gravados com ``INSERT ... ON CONFLICT (external_id, tenant_id)
+        DO UPDATE`` — um commit por página. Se o upsert falhar, a página é
+        reprocessada listing a listing para isolar o erro.
+        """
+        stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': [], 'total_listings': len(listings)}
+        if not supports_native_upsert(db.session):
+            return ImportService._process_listings_batch(tenant_id, listings)
+
+        # Último listing vence quando o mesmo external_id aparece duas vezes na página
+        by_external_id: Dict[str, Dict] = {}
+        for listing in listings:
+            external_id = listing.get('externalId') or listing.get('external_id')
+            if not external_id:
+                stats['errors'].append({'external_id': None, 'error': 'Missing external_id in listing'})
+                continue
+            if external_id in by_external_id:
+                stats['skipped'] += 1
+            by_external_id[external_id] = listing
+        if not by_external_id:
+            return stats
+
+        table = Property.__table__
+        existing = {
+            row['external_id']: dict(row)
+            for row in db.session.execute(
+                select(table).where(table.c.tenant_id == tenant_id,
+                                    table.c.external_id.in_(list(by_external_id)))
+            ).mappings()
+        }
+
+        mapped: List[Tuple[Property, Dict[str, Any], Dict]] = []
+        for external_id, listing in by_external_id.items():
+            try:
+                original = existing.get(external_id)
+                if original is not None:
+                    # Objeto transiente com os valores atuais: nunca entra na sessão
+                    prop = Property(**original)
+                else:
+                    prop = Property(
+                        external_id=external_id,
+                        tenant_id=tenant_id,
+                        title=listing.get('title', f'Imported {external_id}')
+                    )
+                PropertyMapper.map_listing_to_property(listing, prop)
+                mapped.append((prop, original, listing))
+            except Exception as e:
+                stats['errors'].append({'external_id': external_id, 'error': str(e)})
+                logger.error(f"Failed to map listing {external_id}: {e}")
+        if not mapped:
+            return stats
+
+        rows = ImportService._build_upsert_rows(table, mapped)
+        update_columns = [key for key in rows[0] if key not in _CONFLICT_KEYS and key != 'created_at']
+
+        try:
+            written = upsert(db.session, table, rows, _CONFLICT_KEYS,
+                             lambda incoming: {key: incoming[key] for key in update_columns},
+                             returning=[table.c.id, table.c.external_id])
+            ids = {external_id: prop_id for prop_id, external_id in written}
+            # Upsert em Core não passa pelos listeners de quota: contadores na mesma transação
+            quota_deltas = Counter()
+            for prop, original, _ in mapped:
+                if original is not None:
+                    quota_deltas[(tenant_id, publication_key(original.get('publication_type')))] -= 1
+                quota_deltas[(tenant_id, publication_key(prop.publication_type))] += 1
+            TenantQuotaService.record(quota_deltas)
+            db.session.commit()
+            # Upsert em Core não passa pelo flush: invalida o cache de estatísticas aqui
+            tenant_cache.bump_data_version([tenant_id])
+        except SQLAlchemyError as e:
+            db.session.rollback()
+            logger.warning(f"Bulk upsert failed for page ({len(rows)} rows), retrying per listing: {e}")
+            return ImportService._process_listings_batch(tenant_id, listings)
+
+        for prop, original, listing in mapped:
+            if original is None:
+                stats['inserted'] += 1
+            else:
+                stats['updated'] += 1
+            prop.id = ids.get(prop.external_id)
+            if prop.id:
+                ImportService._enqueue_image_downloads(prop, listing.get('images', []))
+
+        return stats
+
+    @staticmethod
+    def _build_upsert_rows(table, mapped: List[Tuple[Property, Optional[Dict[str, Any]], Dict]]) -> List[Dict[str, Any]]:
+        """Monta as linhas do upsert com o mesmo conjunto de colunas para toda a página.
+
+        Entram as colunas NOT NULL e as que o mapeamento alterou em algum
+        registro. Linhas novas recebem os defaults das colunas (o INSERT multi-linha não os aplica
+        a valores explícitos) e linhas existentes mantêm os valores atuais nas
+        colunas que não mudaram.
+        """
+        columns = [column for column in table.columns if column.key != 'id']
+        # NOT NULL é verificado antes do ON CONFLICT: essas colunas sempre vão no INSERT
+        keys = set(_CONFLICT_KEYS) | {column.key for column in columns if not column.nullable}
+        for prop, original, _ in mapped:
+            for column in columns:
+                value = getattr(prop, column.key)
+                if original is None:
+                    if value is not None:
+                        keys.add(column.key)
+                elif value != original.get(column.key):
+                    keys.add(column.key)
+        keys.add('updated_at')
+
+        now = datetime.now(timezone.utc)
+        rows = []
+        for prop, original, _ in mapped:
+            row = {}
+            for column in columns:
+                if column.key not in keys:
+                    continue
+                value = getattr(prop, column.key)
+                if original is not None and column.key == 'updated_at' and value == original.get('updated_at'):
+                    # Equivalente ao onupdate do ORM
+                    value = now
+                if value is None and original is None:
+                    value = ImportService._column_default(column)
+                row[column.key] = value
+            rows.append(row)
+        return rows
+
+    @staticmethod
+    def _column_default(column) -> Any:
+        """Default Python ou server_default literal de uma coluna (None quando não há)"""
+        if column.default is not None and column.default.is_scalar:
+            return column.default.arg
+        if column.default is not None and column.default.is_callable:
+            return column.default.arg(None)
+        if column.server_default is not None and isinstance(getattr(column.server_default, 'arg', None), str):
+            return column.server_default.arg
+        return None
+
     @staticmethod
     def _process_listings_batch(tenant_id: int, listings: List[Dict]) -> Dict[str, Any]:
-        """Processa um lote de listings"""
+        """Processa um lote de listings, um registro e um commit por listing"""
         stats = {'inserted': 0, 'updated': 0, 'skipped': 0, 'errors': []}
 
         for listing in listings:
@@ -1,7 +1,7 @@
 """Service for managing property partnerships and sharing."""
 from typing import Tuple, Dict, Any, List, Optional
 from flask import g, current_app
-from sqlalchemy import or_, and_
+from sqlalchemy import or_, and_, exists, func, select, union
 from extensions import db
 from models import Property, Tenant, TenantPartnership, PropertySharing, PropertySharingActivity
 from datetime import datetime
@@ -287,50 +287,61 @@ class PropertySharingService:
             return False, {'message': 'Error fetching shared properties', 'error': str(e), 'status': 500}
     
     @staticmethod
-    def get_property_ids_accessible_by_tenant(tenant_id: int) -> List[int]:
+    def accessible_property_ids_query(tenant_id: int):
         """
-        Get all property IDs that a tenant can access:
+        Build a SQL subquery selecting every property ID a tenant can access:
         1. Properties they own
         2. Properties shared with them specifically
         3. Properties shared with all partners (if they have an active partnership)
+
+        Expiry and partnership checks run in the database, so the result can be
+        embedded directly in ``Property.id.in_(...)`` without loading rows into Python.
+        """
+        not_expired = or_(
+            PropertySharing.expires_at.is_(None),
+            PropertySharing.expires_at > func.now()
+        )
+
+        own = select(Property.id.label('property_id')).where(Property.tenant_id == tenant_id)
+
+        specific = select(PropertySharing.property_id).where(
+            PropertySharing.shared_with_tenant_id == tenant_id,
+            PropertySharing.is_active == True,
+            not_expired
+        )
+
+        has_partnership = exists().where(
+            TenantPartnership.status == 'active',
+            or_(
+                TenantPartnership.owner_tenant_id == tenant_id,
+                TenantPartnership.partner_tenant_id == tenant_id
+            )
+        )
+        all_partners = select(PropertySharing.property_id).where(
+            PropertySharing.shared_with_tenant_id.is_(None),
+            PropertySharing.is_active == True,
+            not_expired,
+            has_partnership
+        )
+
+        return union(own, specific, all_partners)
+
+    @staticmethod
+    def accessible_properties_filter(tenant_id: int):
+        """Filter clause restricting a ``Property`` query to rows the tenant can access."""
+        return Property.id.in_(PropertySharingService.accessible_property_ids_query(tenant_id))
+
+    @staticmethod
+    def get_property_ids_accessible_by_tenant(tenant_id: int) -> List[int]:
+        """
+        Get all property IDs that a tenant can access (own + shared).
+
+        Prefer ``accessible_properties_filter`` when the IDs are only used to
+        filter another query; this materializes the full list.
         """
         try:
-            # 1. Own properties
-            own_property_ids = [p.id for p in Property.query.filter_by(tenant_id=tenant_id).all()]
-            
-            # 2. Properties shared specifically with this tenant
-            specific_sharings = PropertySharing.query.filter_by(
-                shared_with_tenant_id=tenant_id,
-                is_active=True
-            ).all()
-            specific_property_ids = [s.property_id for s in specific_sharings if not s.is_expired()]
-            
-            # 3. Properties shared with all partners (if tenant has active partnerships)
-            has_partnerships = TenantPartnership.query.filter(
-                or_(
-                    and_(
-                        TenantPartnership.owner_tenant_id == tenant_id,
-                        TenantPartnership.status == 'active'
-                    ),
-                    and_(
-                        TenantPartnership.partner_tenant_id == tenant_id,
-                        TenantPartnership.status == 'active'
-                    )
-                )
-            ).first()
-            
-            all_partners_property_ids = []
-            if has_partnerships:
-                all_partners_sharings = PropertySharing.query.filter_by(
-                    shared_with_tenant_id=None,
-                    is_active=True
-                ).all()
-                all_partners_property_ids = [s.property_id for s in all_partners_sharings if not s.is_expired()]
-            
-            # Combine and deduplicate
-            all_accessible_ids = list(set(own_property_ids + specific_property_ids + all_partners_property_ids))
-            
-            return all_accessible_ids
+            query = PropertySharingService.accessible_property_ids_query(tenant_id)
+            return [row[0] for row in db.session.execute(query)]
             
         except Exception as e:
             current_app.logger.error(f"❌ Error getting accessible properties: {str(e)}")
@@ -6,7 +6,6 @@ from flask import g, current_app
 from flask_jwt_extended import get_jwt_identity
 from sqlalchemy import func
 import random
-import json
 import traceback
 import unicodedata
 
@@ -18,6 +17,10 @@ from ..serializers.property_serializer import PropertySerializer
 from .empreendimento_helper import EmpreendimentoHelper
 from empreendimentos.models.empreendimento import Empreendimento
 from empreendimentos.models.audit_log import EmpreendimentoAuditLog
+from utils import tenant_cache
+from integrations import payload_fingerprint
+from utils.lazy_logging import preview
+from .canalpro_sync_service import CanalProSyncService
 
 
 class PropertyService:
@@ -255,17 +258,12 @@ class PropertyService:
     
     @staticmethod
     def update_property(property_id: int, data: Dict[str, Any]) -> Tuple[bool, Dict[str, Any]]:
-        """Update an existing property and sync to CanalPro (Gandalf).
+        """Update an existing property and schedule its sync to CanalPro (Gandalf).
         
-        This implementation aligns the on-update path with the exporter behaviour:
-        - commit local changes first
-        - convert to CanalPro payload and upload images via CanalProExporter
-        - try UPDATE by prop.remote_id
-        - if not found, try lookup by externalId and UPDATE
-        - if still not updated, CREATE listing
-        - persist remote_id and export status
-        
-        Any remote failures are logged and do not make the HTTP update fail.
+        The local write is committed together with a sync intent and the remote
+        push runs in the background (CanalProSyncService): consecutive saves are
+        coalesced and only the latest state is sent. The response carries the
+        intent under ``sync``; progress is served by the sync-status endpoint.
         """
         try:
             current_app.logger.info(f"🔍 DEBUG update_property: property_id={property_id}, tenant_id={g.tenant_id}")
@@ -326,202 +324,15 @@ class PropertyService:
                 except Exception as audit_err:
                     current_app.logger.warning(f"Falha ao auditar características: {audit_err}")
 
-            # Commit local changes ASAP so remote sync can read latest state
+            # Intenção de sync na mesma transação da edição; o envio ao CanalPro
+            # roda em segundo plano e só a versão mais recente é enviada
+            sync_version = CanalProSyncService.request_sync(prop.id, prop.tenant_id)
             db.session.commit()
+            CanalProSyncService.enqueue(prop.id, sync_version)
 
-            # Start remote sync using exporter-like steps (outside transaction scope)
-            try:
-                from utils.integration_tokens import get_valid_integration_headers
-                from integrations.gandalf_service import update_listing, create_listing, get_listing_by_external_id
-                from integrations.canalpro_exporter import CanalProExporter
-
-                # Attempt to obtain credentials for Gandalf/CanalPro
-                try:
-                    creds = get_valid_integration_headers(g.tenant_id, 'gandalf')
-                    current_app.logger.info(f"Property {property_id}: Credentials obtained: {list(creds.keys())}")
-                    current_app.logger.debug(f"Property {property_id}: Full credentials: {creds}")
-                except Exception as cred_error:
-                    error_msg = f"CanalPro credentials not available for tenant {g.tenant_id}: {str(cred_error)}"
-                    current_app.logger.info(error_msg)
-                    # Return local result; do not fail update if no integration configured
-                    return True, PropertySerializer.to_dict(prop, include_full_data=True)
-
-                # Local fallback: garantir que os headers obrigatórios estejam presentes
-                # (opção rápida — não substitui correção definitiva no utilitário de tokens)
-                import os
-                try:
-                    creds = creds.copy()
-                    env_map = {
-                        'publisher_id': 'GANDALF_PUBLISHER_ID',
-                        'odin_id': 'GANDALF_ODIN_ID',
-                        'contract_id': 'GANDALF_CONTRACT_ID',
-                        'client_id': 'GANDALF_CLIENT_ID',
-                        'company': 'GANDALF_COMPANY'
-                    }
-                    applied = []
-                    for k, env_name in env_map.items():
-                        v = os.getenv(env_name)
-                        if v:  # only apply when env var is set/truthy
-                            creds.setdefault(k, v)
-                            applied.append(k)
-                    current_app.logger.info(f"Property {property_id}: Credentials after local fallbacks keys={list(creds.keys())} applied={applied}")
-                except Exception:
-                    current_app.logger.warning(f"Property {property_id}: Failed to apply local credential fallbacks")
-
-                # Use exporter utilities to build payload and upload images consistently
-                exporter = CanalProExporter(tenant_id=g.tenant_id)
-                exporter.credentials = creds
-                listing_payload = exporter.convert_property_to_canalpro_format(prop)
-
-                # Ensure images are uploaded and payload contains valid URLs
-                if not listing_payload.get('images') or len(listing_payload.get('images')) == 0:
-                    try:
-                        uploaded = exporter.upload_property_images(prop)
-                        listing_payload['images'] = [{"imageUrl": u} for u in uploaded]
-                    except Exception as e:
-                        current_app.logger.warning(f"Image upload during update_property failed: {e}")
-
-                result = None
-
-                # 1) Try update by stored remote_id with retry logic
-                remote_id = getattr(prop, 'remote_id', None)
-                if remote_id:
-                    for attempt in range(3):  # Try up to 3 times
-                        try:
-                            listing_payload['id'] = str(remote_id)
-                            current_app.logger.info(f"Attempting Gandalf update by remote_id {remote_id} for property {prop.id} (attempt {attempt + 1}/3)")
-                            current_app.logger.debug("Update payload (truncated): %s", json.dumps(listing_payload, default=str)[:4000])
-                            result = update_listing(listing_payload, creds)
-                            current_app.logger.debug("Update response (truncated): %s", str(result)[:8000])
-                            break  # Success, exit retry loop
-                        except Exception as e:
-                            error_msg = str(e)
-                            # Check if it's a retryable error (500, transaction errors)
-                            is_retryable = ('500' in error_msg or 'TransactionSystemException' in error_msg or
-                                          'Could not commit' in error_msg or 'internal server error' in error_msg)
-
-                            if attempt < 2 and is_retryable:  # Retry if not last attempt and error is retryable
-                                import time
-                                wait_time = (attempt + 1) * 2  # 2s, 4s
-                                current_app.logger.warning(f"Retryable error on attempt {attempt + 1}, waiting {wait_time}s: {e}")
-                                time.sleep(wait_time)
-                                continue
-                            else:
-                                current_app.logger.warning(f"Failed to update listing {remote_id} after {attempt + 1} attempts, will attempt reconcile/create: {e}")
-                                current_app.logger.debug(traceback.format_exc())
-                                break
-
-                # 2) If no result, try reconcile by externalId and update
-                if result is None and listing_payload.get('externalId'):
-                    try:
-                        current_app.logger.info(f"Reconciling by externalId {listing_payload.get('externalId')} for property {prop.id}")
-                        found = get_listing_by_external_id(creds, listing_payload.get('externalId'))
-                        current_app.logger.debug("Reconcile found (truncated): %s", str(found)[:4000])
-                        if isinstance(found, list) and len(found) > 0:
-                            found_id = found[0].get('id')
-                            if found_id:
-                                current_app.logger.info(f"Found remote listing id {found_id}; attempting UPDATE")
-                                listing_payload['id'] = str(found_id)
-                                current_app.logger.debug("Update payload (reconciled) (truncated): %s", json.dumps(listing_payload, default=str)[:4000])
-                                result = update_listing(listing_payload, creds)
-                                current_app.logger.debug("Reconciled update response (truncated): %s", str(result)[:8000])
-                                # persist resolved remote_id
-                                prop.remote_id = found_id
-                    except Exception as e:
-                        current_app.logger.warning(f"Error reconciling by externalId during update_property: {e}")
-                        current_app.logger.debug(traceback.format_exc())
-
-                # 3) If still no result, create listing with retry
-                if result is None:
-                    for attempt in range(3):  # Try up to 3 times
-                        try:
-                            current_app.logger.info(f"No update result; attempting create for property {prop.id} (externalId={listing_payload.get('externalId')}) (attempt {attempt + 1}/3)")
-                            current_app.logger.debug("Create payload (truncated): %s", json.dumps(listing_payload, default=str)[:4000])
-                            result = create_listing(listing_payload, creds)
-                            current_app.logger.debug("Create response (truncated): %s", str(result)[:8000])
-                            break  # Success, exit retry loop
-                        except Exception as e:
-                            error_msg = str(e)
-                            # Check if it's a retryable error
-                            is_retryable = ('500' in error_msg or 'TransactionSystemException' in error_msg or
-                                          'Could not commit' in error_msg or 'internal server error' in error_msg)
-
-                            if attempt < 2 and is_retryable:  # Retry if not last attempt and error is retryable
-                                import time
-                                wait_time = (attempt + 1) * 2  # 2s, 4s
-                                current_app.logger.warning(f"Retryable error on create attempt {attempt + 1}, waiting {wait_time}s: {e}")
-                                time.sleep(wait_time)
-                                continue
-                            else:
-                                current_app.logger.exception(f"Error creating listing during update_property after {attempt + 1} attempts: {e}")
-                                current_app.logger.debug(traceback.format_exc())
-                                result = {'error': str(e)}
-                                break
-
-                # 4) Process response and persist remote_id/status
-                if result:
-                    try:
-                        current_app.logger.debug("Raw Gandalf result before processing: %s", str(result)[:12000])
-
-                        # Store original remote_id to avoid corruption
-                        original_remote_id = getattr(prop, 'remote_id', None)
-
-                        # Handle GraphQL errors (status 200 but with errors array)
-                        if isinstance(result, dict) and result.get('errors'):
-                            errors = result.get('errors', [])
-                            error_messages = [e.get('message', str(e)) for e in errors]
-                            raise Exception(f'Gandalf GraphQL errors: {error_messages}')
-
-                        # Handle successful responses
-                        if 'data' in result and 'updateListing' in result['data']:
-                            block = result['data']['updateListing']
-                            if block is None:
-                                raise Exception('updateListing returned null - likely server error')
-                            gid = block.get('id')
-                            errors = block.get('errors', [])
-                        elif 'data' in result and 'createListing' in result['data']:
-                            block = result['data']['createListing']
-                            if block is None:
-                                raise Exception('createListing returned null - likely server error')
-                            gid = block.get('id')
-                            errors = block.get('errors', [])
-                        elif isinstance(result, dict) and result.get('error'):
-                            raise Exception(result.get('error'))
-                        else:
-                            raise Exception(f'Unexpected response from Gandalf: {result}')
-
-                        if errors:
-                            current_app.logger.error(f"Gandalf returned errors during update_property for prop {prop.id}: {errors}")
-                            # Store error in property for user visibility
-                            prop.error = json.dumps(errors) if isinstance(errors, list) else str(errors)
-                            prop.status = 'error'
-                            # Update timestamp
-                            from datetime import datetime
-                            prop.updated_at = datetime.utcnow()
-                            db.session.commit()
-                        else:
-                            current_app.logger.info(f"Gandalf operation successful for property {prop.id}. remote_id={gid}")
-                            prop.status = 'exported'
-                            if gid:
-                                prop.remote_id = gid
-                                current_app.logger.info(f"Updated remote_id from {original_remote_id} to {gid} for property {prop.id}")
-                            prop.error = None
-                            # update timestamp and commit
-                            from datetime import datetime
-                            prop.updated_at = datetime.utcnow()
-                            db.session.commit()
-
-                    except Exception as e:
-                        current_app.logger.exception(f"Error processing Gandalf response during update_property: {e}")
-                        current_app.logger.debug(traceback.format_exc())
-                        # Don't rollback - let the outer exception handler deal with it
-
-            except Exception as e:
-                # Any unexpected errors during remote sync should be logged but not fail the API
-                current_app.logger.exception(f"Unexpected error while syncing to CanalPro in update_property: {e}")
-                current_app.logger.debug(traceback.format_exc())
-
-            return True, PropertySerializer.to_dict(prop, include_full_data=True)
+            result = PropertySerializer.to_dict(prop, include_full_data=True)
+            result['sync'] = {'status': 'pending', 'requested_version': sync_version}
+            return True, result
 
         except Exception as e:
             db.session.rollback()
@@ -934,7 +745,7 @@ class PropertyService:
                         result = bulk_delete_listing([str(remote_id)], creds)
                         canalpro_details['response'] = result
 
-                        current_app.logger.debug(f"Bulk delete response for property {prop.id}: {str(result)[:2000]}")
+                        current_app.logger.debug("Bulk delete response for property %s: %s", prop.id, preview(result))
 
                         # Handle GraphQL errors (status 200 but with errors array)
                         if isinstance(result, dict) and result.get('errors'):
@@ -1117,66 +928,12 @@ class PropertyService:
     
     @staticmethod
     def get_properties_stats() -> Tuple[bool, Dict[str, Any]]:
-        """Get property statistics."""
+        """Get property statistics (cache por tenant invalidado a cada escrita em Property)."""
         try:
-            # Total properties count
-            total_properties = Property.query.filter_by(tenant_id=g.tenant_id).count()
-            
-            # Status counts with summary
-            status_query = db.session.query(
-                Property.status,
-                func.count(Property.id)
-            ).filter_by(tenant_id=g.tenant_id).group_by(Property.status).all()
-
-            raw_status_counts = {status: count for status, count in status_query}
-            status_summary = aggregate_status_counts(raw_status_counts)
-            status_counts = status_summary['counts_by_key']
-            
-            # Average price
-            avg_price_query = db.session.query(
-                func.avg(Property.price)
-            ).filter(Property.tenant_id == g.tenant_id, Property.price.isnot(None)).scalar()
-            
-            avg_price = float(avg_price_query) if avg_price_query else 0
-            
-            # Recent properties
-            recent_properties = Property.query.filter_by(
-                tenant_id=g.tenant_id
-            ).order_by(Property.id.desc()).limit(5).all()
-            
-            recent_list = []
-            for prop in recent_properties:
-                recent_list.append({
-                    'id': prop.id,
-                    'title': prop.title,
-                    'external_id': prop.external_id,
-                    'status': prop.status,
-                    'price': prop.price
-                })
-            
-            # City distribution
-            city_counts = {}
-            city_query = db.session.query(
-                Property.address_city,
-                func.count(Property.id)
-            ).filter(
-                Property.tenant_id == g.tenant_id,
-                Property.address_city.isnot(None)
-            ).group_by(Property.address_city).all()
-            
-            for city, count in city_query:
-                if city:
-                    city_counts[city] = count
-            
-            stats = {
-                'total_properties': total_properties,
-                'status_counts': status_counts,
-                'status_summary': status_summary,
-                'average_price': avg_price,
-                'recent_properties': recent_list,
-                'city_distribution': city_counts
-            }
-            
+            stats = tenant_cache.cached(
+                g.tenant_id, 'properties_stats',
+                lambda: PropertyService._compute_properties_stats(g.tenant_id)
+            )
             return True, stats
             
         except Exception as e:
@@ -1184,6 +941,68 @@ class PropertyService:
                 'message': f'Error fetching stats: {str(e)}',
                 'status': 500
             }
+
+    @staticmethod
+    def _compute_properties_stats(tenant_id: int) -> Dict[str, Any]:
+        """Agregados de get_properties_stats direto do banco."""
+        # Total properties count
+        total_properties = Property.query.filter_by(tenant_id=tenant_id).count()
+        
+        # Status counts with summary
+        status_query = db.session.query(
+            Property.status,
+            func.count(Property.id)
+        ).filter_by(tenant_id=tenant_id).group_by(Property.status).all()
+
+        raw_status_counts = {status: count for status, count in status_query}
+        status_summary = aggregate_status_counts(raw_status_counts)
+        status_counts = status_summary['counts_by_key']
+        
+        # Average price
+        avg_price_query = db.session.query(
+            func.avg(Property.price)
+        ).filter(Property.tenant_id == tenant_id, Property.price.isnot(None)).scalar()
+        
+        avg_price = float(avg_price_query) if avg_price_query else 0
+        
+        # Recent properties
+        recent_properties = Property.query.filter_by(
+            tenant_id=tenant_id
+        ).order_by(Property.id.desc()).limit(5).all()
+        
+        recent_list = []
+        for prop in recent_properties:
+            recent_list.append({
+                'id': prop.id,
+                'title': prop.title,
+                'external_id': prop.external_id,
+                'status': prop.status,
+                'price': prop.price
+            })
+        
+        # City distribution
+        city_counts = {}
+        city_query = db.session.query(
+            Property.address_city,
+            func.count(Property.id)
+        ).filter(
+            Property.tenant_id == tenant_id,
+            Property.address_city.isnot(None)
+        ).group_by(Property.address_city).all()
+        
+        for city, count in city_query:
+            if city:
+                city_counts[city] = count
+        
+        stats = {
+            'total_properties': total_properties,
+            'status_counts': status_counts,
+            'status_summary': status_summary,
+            'average_price': avg_price,
+            'recent_properties': recent_list,
+            'city_distribution': city_counts
+        }
+        return stats
     
     @staticmethod
     def _generate_property_code(property_type: str, tenant_id: int) -> str:
@@ -1353,8 +1172,181 @@ class PropertyService:
             return False, {'message': 'Error duplicating property', 'error': str(e), 'status': 500}
     
     @staticmethod
+    def refresh_property(property_id: int, tenant_id: int = None,
+                         strategy: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Executa refresh de uma propriedade no CanalPro com a estratégia escolhida
+
+        Estratégias (models.REFRESH_STRATEGIES):
+        - recreate: exclui e recria o anúncio (novo remote_id, reenvia tudo)
+        - update: updateListing com os dados atuais (mantém remote_id)
+        - touch: só updateListingStatus(ACTIVE); cai para update se não houver remote_id
+
+        recreate/update viram touch quando o payload atual tem o mesmo fingerprint do
+        último envio bem-sucedido (integrations.payload_fingerprint): o anúncio publicado
+        já está em dia e só precisa ser reativado.
+
+        Args:
+            property_id: ID da propriedade
+            tenant_id: ID do tenant (opcional, será buscado da propriedade se não fornecido)
+            strategy: Estratégia (padrão REFRESH_DEFAULT_STRATEGY ou 'recreate')
+
+        Returns:
+            Tuple[bool, Dict[str, Any]]: (sucesso, resultado); ``refresh_details`` inclui
+            a estratégia usada, ``api_calls`` e ``api_latency_ms`` das chamadas ao Gandalf
+        """
+        from models import REFRESH_STRATEGIES, default_refresh_strategy
+        from integrations.gandalf_client import track_calls
+
+        strategy = strategy or default_refresh_strategy()
+        if strategy not in REFRESH_STRATEGIES:
+            return False, {'error': f'Invalid refresh strategy: {strategy}', 'status': 400}
+
+        handlers = {
+            'recreate': PropertyService._refresh_by_recreate,
+            'update': PropertyService._refresh_by_update,
+            'touch': PropertyService._refresh_by_touch,
+        }
+        with track_calls() as calls:
+            # O exporter autenticado para o fingerprint segue para a estratégia escolhida
+            target = PropertyService._unchanged_target(property_id, tenant_id) if strategy != 'touch' else None
+            prop, exporter, unchanged = target or (None, None, False)
+            handler = PropertyService._refresh_by_touch if unchanged else handlers[strategy]
+            success, result = handler(property_id, tenant_id, prop=prop, exporter=exporter)
+
+        details = result.setdefault('refresh_details', {})
+        details.setdefault('strategy', strategy)
+        if unchanged:
+            details['requested_strategy'] = strategy
+            if success and details['strategy'] == 'touch':
+                payload_fingerprint.record('touched', prop.tenant_id)
+        details.update(calls.as_dict())
+        return success, result
+
+    @staticmethod
+    def _unchanged_target(property_id: int, tenant_id: int = None):
+        """
+        (prop, exporter autenticado, unchanged): ``unchanged`` indica que o anúncio
+        publicado já tem o payload atual (mesmo fingerprint do último envio). None
+        quando não há fingerprint a comparar ou a autenticação falhou.
+        """
+        prop = PropertyService._load_refresh_property(property_id, tenant_id)
+        if not prop or not prop.canalpro_fingerprint or not prop.remote_id:
+            return None
+
+        # O payload depende das credenciais (mapeamento de amenities), como no export
+        prop, exporter, error = PropertyService._refresh_target(property_id, tenant_id, prop=prop)
+        if error:
+            return None
+        try:
+            payload = exporter.convert_property_to_canalpro_format(prop)
+        except Exception as e:
+            current_app.logger.warning(f"Property {property_id}: could not fingerprint payload ({e})")
+            return prop, exporter, False
+        return prop, exporter, payload_fingerprint.is_unchanged(prop, payload_fingerprint.fingerprint(payload))
+
+    @staticmethod
+    def _load_refresh_property(property_id: int, tenant_id: int = None) -> Optional[Property]:
+        """Propriedade alvo do refresh (restrita ao tenant, se informado)."""
+        query = Property.query.filter_by(id=property_id)
+        if tenant_id:
+            query = query.filter_by(tenant_id=tenant_id)
+        return query.first()
+
+    @staticmethod
+    def _refresh_target(property_id: int, tenant_id: int = None, prop: Optional[Property] = None):
+        """Carrega a propriedade (se não veio carregada) e um exporter autenticado (estratégias update/touch)."""
+        from integrations.canalpro_exporter import CanalProExporter
+
+        if prop is None:
+            prop = PropertyService._load_refresh_property(property_id, tenant_id)
+        if not prop:
+            return None, None, {'error': f'Property {property_id} not found', 'status': 404}
+
+        exporter = CanalProExporter(tenant_id=getattr(g, 'tenant_id', None) or prop.tenant_id)
+        if not exporter.authenticate():
+            return prop, None, {'error': 'Failed to authenticate with CanalPro', 'status': 500}
+        return prop, exporter, None
+
+    @staticmethod
+    def _refresh_by_update(property_id: int, tenant_id: int = None,
+                           prop=None, exporter=None, force: bool = False) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Refresh via updateListing: reenvia os dados sem excluir o anúncio (mantém remote_id).
+
+        ``force`` reenvia mesmo que o payload tenha o fingerprint do último envio.
+        """
+        if prop is None or exporter is None:
+            prop, exporter, error = PropertyService._refresh_target(property_id, tenant_id)
+            if error:
+                return False, error
+
+        refresh_details = {
+            'property_id': property_id,
+            'property_title': prop.title,
+            'strategy': 'update',
+            'original_remote_id': prop.remote_id,
+            'new_remote_id': None,
+            'errors': []
+        }
+        # Com remote_id o exporter usa updateListing; sem ele, busca por externalId ou cria
+        success = exporter.export_property(prop, is_refresh=True, force=force)
+        db.session.commit()
+        db.session.refresh(prop)
+        refresh_details['new_remote_id'] = prop.remote_id
+
+        if not success:
+            error_msg = f"Property {property_id} refresh (update) failed: {prop.error or 'Unknown error'}"
+            refresh_details['errors'].append(error_msg)
+            current_app.logger.error(error_msg)
+            return False, {'error': error_msg, 'status': 500, 'refresh_details': refresh_details}
+
+        message = f"Property {property_id} refreshed successfully (updated remote_id: {prop.remote_id})"
+        current_app.logger.info(message)
+        return True, {'message': message, 'status': 200, 'refresh_details': refresh_details}
+
+    @staticmethod
+    def _refresh_by_touch(property_id: int, tenant_id: int = None,
+                          prop=None, exporter=None) -> Tuple[bool, Dict[str, Any]]:
+        """Refresh via uma única mutation updateListingStatus(ACTIVE), sem reenviar o anúncio."""
+        from integrations.gandalf_service import activate_listing_status
+
+        if prop is None or exporter is None:
+            prop, exporter, error = PropertyService._refresh_target(property_id, tenant_id)
+            if error:
+                return False, error
+
+        if prop.remote_id:
+            try:
+                response = activate_listing_status(exporter.credentials, str(prop.remote_id), 'ACTIVE')
+                block = ((response or {}).get('data') or {}).get('updateListingStatus') or {}
+                if block.get('success') is True:
+                    message = f"Property {property_id} refreshed successfully (touched remote_id: {prop.remote_id})"
+                    current_app.logger.info(message)
+                    return True, {'message': message, 'status': 200, 'refresh_details': {
+                        'property_id': property_id,
+                        'property_title': prop.title,
+                        'strategy': 'touch',
+                        'original_remote_id': prop.remote_id,
+                        'new_remote_id': prop.remote_id,
+                        'errors': []
+                    }}
+                current_app.logger.warning(
+                    f"Property {property_id}: touch rejected ({block.get('errors') or response}), falling back to update"
+                )
+            except Exception as touch_error:
+                current_app.logger.warning(f"Property {property_id}: touch failed ({touch_error}), falling back to update")
+
+        # Sem remote_id (ou touch recusado): o anúncio precisa dos dados completos. O touch
+        # recusado indica que o publicado não corresponde ao fingerprint gravado: reenvia mesmo assim
+        success, result = PropertyService._refresh_by_update(property_id, tenant_id, prop=prop, exporter=exporter,
+                                                             force=True)
+        result.setdefault('refresh_details', {})['strategy'] = 'touch->update'
+        return success, result
+
     @staticmethod
-    def refresh_property(property_id: int, tenant_id: int = None) -> Tuple[bool, Dict[str, Any]]:
+    def _refresh_by_recreate(property_id: int, tenant_id: int = None,
+                             prop=None, exporter=None) -> Tuple[bool, Dict[str, Any]]:
         """
         Executa refresh de uma propriedade no CanalPro (delete + create)
         
@@ -1366,16 +1358,15 @@ class PropertyService:
         Args:
             property_id: ID da propriedade
             tenant_id: ID do tenant (opcional, será buscado da propriedade se não fornecido)
+            prop, exporter: propriedade e exporter já autenticado (opcionais)
             
         Returns:
             Tuple[bool, Dict[str, Any]]: (sucesso, resultado)
         """
         try:
-            # Buscar propriedade
-            if tenant_id:
-                prop = Property.query.filter_by(id=property_id, tenant_id=tenant_id).first()
-            else:
-                prop = Property.query.filter_by(id=property_id).first()
+            # Buscar propriedade (se não veio carregada)
+            if prop is None:
+                prop = PropertyService._load_refresh_property(property_id, tenant_id)
                 
             if not prop:
                 return False, {
@@ -1541,19 +1532,18 @@ class PropertyService:
             try:
                 from integrations.canalpro_exporter import CanalProExporter
                 
-                # Preparar exporter
-                exporter = CanalProExporter(tenant_id=g.tenant_id)
-                
-                # Autenticar para obter credenciais
-                if not exporter.authenticate():
-                    error_msg = "Failed to authenticate with CanalPro"
-                    refresh_details['errors'].append(error_msg)
-                    current_app.logger.error(f"Property {property_id}: {error_msg}")
-                    return False, {
-                        'error': error_msg,
-                        'status': 500,
-                        'refresh_details': refresh_details
-                    }
+                # Preparar e autenticar o exporter (se não veio um já autenticado)
+                if exporter is None:
+                    exporter = CanalProExporter(tenant_id=g.tenant_id)
+                    if not exporter.authenticate():
+                        error_msg = "Failed to authenticate with CanalPro"
+                        refresh_details['errors'].append(error_msg)
+                        current_app.logger.error(f"Property {property_id}: {error_msg}")
+                        return False, {
+                            'error': error_msg,
+                            'status': 500,
+                            'refresh_details': refresh_details
+                        }
                 
                 # Usar método export_property que já faz todo o processo
                 success = exporter.export_property(prop, is_refresh=True)
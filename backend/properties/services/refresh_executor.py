@@ -0,0 +1,300 @@
+"""
+Executor de RefreshJob baseado em claim (lease)
+
+O dispatcher reivindica jobs atomicamente com ``SELECT ... FOR UPDATE SKIP LOCKED``
+(dois beats sobrepostos nunca pegam o mesmo job) e distribui cada um como uma task
+na fila ``refresh_scheduler``; a vazão passa a escalar com a concorrência dos workers.
+
+Cada claim grava um lease (dono + expiração). O worker renova o lease por heartbeat
+enquanto o refresh roda; se o worker morrer, o lease vence e o job volta a ser
+reivindicado (até MAX_ATTEMPTS tentativas, depois é marcado como failed).
+
+PADRÃO GLOBAL: Todas as datas/hora do projeto são UTC offset-aware
+"""
+import logging
+import os
+import threading
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, func, or_, select, update
+
+from extensions import db
+from models import Property, PropertyRefreshHistory, RefreshJob
+from .refresh_kpi_service import JobTransition, RefreshKpiService, execution_seconds
+from .refresh_scheduler_service import RefreshSchedulerService
+
+logger = logging.getLogger(__name__)
+
+
+class RefreshJobExecutor:
+    """Claim, heartbeat e finalização de jobs de refresh."""
+
+    LEASE_SECONDS = int(os.getenv('REFRESH_JOB_LEASE_SECONDS', '300'))
+    HEARTBEAT_SECONDS = int(os.getenv('REFRESH_JOB_HEARTBEAT_SECONDS', '60'))
+    MAX_ATTEMPTS = int(os.getenv('REFRESH_JOB_MAX_ATTEMPTS', '3'))
+    # Jobs reivindicados ao mesmo tempo (na fila + executando); o dispatcher completa até esse limite
+    MAX_IN_FLIGHT = int(os.getenv('REFRESH_MAX_IN_FLIGHT', '100'))
+
+    @staticmethod
+    def new_lease_token() -> str:
+        return uuid.uuid4().hex
+
+    @staticmethod
+    def in_flight_count() -> int:
+        """Jobs com lease válido (reivindicados e ainda não finalizados)."""
+        now = datetime.now(timezone.utc)
+        return db.session.execute(
+            select(func.count()).select_from(RefreshJob.__table__).where(
+                RefreshJob.status == 'running',
+                RefreshJob.lease_expires_at >= now
+            )
+        ).scalar() or 0
+
+    @staticmethod
+    def claim_jobs(limit: int, lease_token: str, lease_seconds: Optional[int] = None) -> List[int]:
+        """
+        Reivindica até ``limit`` jobs prontos: pendentes já agendados ou com lease vencido.
+
+        ``SELECT ... FOR UPDATE SKIP LOCKED`` trava os candidatos (claims concorrentes pulam
+        as linhas travadas em vez de esperar) e o ``UPDATE`` grava o lease na mesma
+        transação. O status anterior lido no SELECT alimenta o rollup de KPIs.
+
+        Returns:
+            IDs reivindicados (lease_owner = lease_token)
+        """
+        if limit <= 0:
+            return []
+
+        candidates = db.session.execute(RefreshJobExecutor._candidates_statement(limit)).all()
+        if not candidates:
+            db.session.commit()
+            return []
+        stmt = RefreshJobExecutor._claim_statement([row.id for row in candidates], lease_token, lease_seconds)
+        job_ids = [row[0] for row in db.session.execute(stmt)]
+        claimed = set(job_ids)
+        RefreshKpiService.record(
+            JobTransition(row.tenant_id, row.refresh_schedule_id, row.created_at, row.status, 'running')
+            for row in candidates if row.id in claimed
+        )
+        db.session.commit()
+        return job_ids
+
+    @staticmethod
+    def _candidates_statement(limit: int):
+        now = datetime.now(timezone.utc)
+        table = RefreshJob.__table__
+        claimable = or_(
+            and_(table.c.status == 'pending',
+                 or_(table.c.scheduled_at.is_(None), table.c.scheduled_at <= now)),
+            and_(table.c.status == 'running',
+                 table.c.lease_expires_at < now,
+                 table.c.attempts < RefreshJobExecutor.MAX_ATTEMPTS),
+        )
+        return (
+            select(table.c.id, Property.tenant_id, table.c.refresh_schedule_id, table.c.created_at, table.c.status)
+            .join(Property.__table__, Property.id == table.c.property_id)
+            .where(claimable)
+            .order_by(table.c.scheduled_at.asc(), table.c.created_at.asc())
+            .limit(limit)
+            .with_for_update(of=table, skip_locked=True)
+        )
+
+    @staticmethod
+    def _claim_statement(job_ids: Sequence[int], lease_token: str, lease_seconds: Optional[int] = None):
+        now = datetime.now(timezone.utc)
+        table = RefreshJob.__table__
+        return (
+            update(table)
+            .where(table.c.id.in_(list(job_ids)))
+            .values(
+                status='running',
+                lease_owner=lease_token,
+                lease_expires_at=now + timedelta(seconds=lease_seconds or RefreshJobExecutor.LEASE_SECONDS),
+                heartbeat_at=now,
+                started_at=now,
+                attempts=table.c.attempts + 1,
+                updated_at=now,
+            )
+            .returning(table.c.id)
+        )
+
+    @staticmethod
+    def release_jobs(job_ids: Sequence[int], lease_token: str) -> int:
+        """Devolve jobs reivindicados e não despachados para ``pending``."""
+        if not job_ids:
+            return 0
+        table = RefreshJob.__table__
+        owned = RefreshKpiService.job_rows(job_ids, lease_owner=lease_token)
+        if not owned:
+            return 0
+        result = db.session.execute(
+            update(table)
+            .where(table.c.id.in_([row.id for row in owned]), table.c.lease_owner == lease_token)
+            .values(status='pending', lease_owner=None, lease_expires_at=None,
+                    attempts=table.c.attempts - 1, updated_at=datetime.now(timezone.utc))
+        )
+        RefreshKpiService.record(
+            JobTransition(row.tenant_id, row.refresh_schedule_id, row.created_at, row.status, 'pending')
+            for row in owned
+        )
+        db.session.commit()
+        return result.rowcount
+
+    @staticmethod
+    def reap_expired_leases() -> int:
+        """Marca como failed os jobs cujo lease venceu depois da última tentativa."""
+        now = datetime.now(timezone.utc)
+        table = RefreshJob.__table__
+        expired = db.session.execute(
+            select(table.c.id, Property.tenant_id, table.c.refresh_schedule_id, table.c.created_at,
+                   table.c.started_at)
+            .join(Property.__table__, Property.id == table.c.property_id)
+            .where(table.c.status == 'running',
+                   table.c.lease_expires_at < now,
+                   table.c.attempts >= RefreshJobExecutor.MAX_ATTEMPTS)
+            .with_for_update(of=table, skip_locked=True)
+        ).all()
+        if not expired:
+            db.session.commit()
+            return 0
+        result = db.session.execute(
+            update(table)
+            .where(table.c.id.in_([row.id for row in expired]), table.c.status == 'running')
+            .values(status='failed', completed_at=now, lease_owner=None, updated_at=now,
+                    error_message=f'Lease expired after {RefreshJobExecutor.MAX_ATTEMPTS} attempts')
+        )
+        RefreshKpiService.record(
+            JobTransition(row.tenant_id, row.refresh_schedule_id, row.created_at, 'running', 'failed',
+                          execution_seconds(row.started_at, now))
+            for row in expired
+        )
+        db.session.commit()
+        if result.rowcount:
+            logger.warning("Marked %d refresh jobs as failed after expired leases", result.rowcount)
+        return result.rowcount
+
+    @staticmethod
+    def heartbeat(engine, job_id: int, lease_token: str, lease_seconds: Optional[int] = None) -> bool:
+        """Renova o lease (conexão própria: chamado pela thread de heartbeat)."""
+        now = datetime.now(timezone.utc)
+        table = RefreshJob.__table__
+        with engine.begin() as conn:
+            result = conn.execute(
+                update(table)
+                .where(table.c.id == job_id, table.c.lease_owner == lease_token, table.c.status == 'running')
+                .values(heartbeat_at=now,
+                        lease_expires_at=now + timedelta(seconds=lease_seconds or RefreshJobExecutor.LEASE_SECONDS))
+            )
+        return result.rowcount == 1
+
+    @staticmethod
+    def run_job(job_id: int, lease_token: str) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Executa um job reivindicado. Só o dono do lease finaliza o job; se o lease foi
+        perdido (job reivindicado de novo após expirar) o resultado é descartado.
+        """
+        job = db.session.get(RefreshJob, job_id)
+        if not job:
+            return False, {'error': 'Job not found', 'job_id': job_id}
+        if job.status != 'running' or job.lease_owner != lease_token:
+            return False, {'error': 'Lease not held by this worker', 'job_id': job_id}
+
+        property_id = job.property_id
+        strategy = job.refresh_strategy
+        execution_type = job.refresh_type
+        schedule_id, created_at = job.refresh_schedule_id, job.created_at
+        tenant_id = db.session.execute(select(Property.tenant_id).where(Property.id == property_id)).scalar()
+        started_at = datetime.now(timezone.utc)
+        heartbeat = _LeaseHeartbeat(db.engine, job_id, lease_token)
+        heartbeat.start()
+        try:
+            success, details = RefreshSchedulerService._perform_property_refresh_with_details(property_id, strategy)
+        except Exception as e:  # pylint: disable=broad-except
+            db.session.rollback()
+            logger.exception("Refresh job %d raised", job_id)
+            success, details = False, {'error': str(e)}
+        finally:
+            heartbeat.stop()
+
+        error_message = None
+        if not success:
+            error_message = details.get('error', 'Refresh operation failed') if isinstance(details, dict) else 'Refresh operation failed'
+
+        now = datetime.now(timezone.utc)
+        table = RefreshJob.__table__
+        finished = db.session.execute(
+            update(table)
+            .where(table.c.id == job_id, table.c.lease_owner == lease_token)
+            .values(status='completed' if success else 'failed', completed_at=now, error_message=error_message,
+                    lease_owner=None, lease_expires_at=None, updated_at=now)
+        ).rowcount
+        if finished:
+            RefreshKpiService.record([JobTransition(
+                tenant_id, schedule_id, created_at, 'running', 'completed' if success else 'failed',
+                execution_seconds(started_at, now)
+            )])
+            RefreshJobExecutor._record_history(property_id, tenant_id, execution_type, started_at, now, success,
+                                               error_message, details)
+        db.session.commit()
+
+        if not finished:
+            logger.warning("Refresh job %d finished after losing its lease; result discarded", job_id)
+            return False, {'error': 'Lease lost before completion', 'job_id': job_id}
+
+        result = {'job_id': job_id, 'property_id': property_id, 'refresh_details': details}
+        if not success:
+            result['error'] = error_message
+        return success, result
+
+    @staticmethod
+    def _record_history(property_id: int, tenant_id: Optional[int], execution_type: str, started_at: datetime,
+                        completed_at: datetime, success: bool, error_message: Optional[str], details: Any) -> None:
+        """Registra a execução em PropertyRefreshHistory com o custo da estratégia (sem commit)."""
+        if tenant_id is None:
+            return
+        refresh = (details.get('refresh_details') or {}) if isinstance(details, dict) else {}
+        db.session.add(PropertyRefreshHistory(
+            property_id=property_id,
+            tenant_id=tenant_id,
+            status='success' if success else 'failed',
+            execution_type=execution_type or 'scheduled',
+            started_at=started_at,
+            completed_at=completed_at,
+            success=success,
+            error_message=error_message,
+            duration_seconds=(completed_at - started_at).total_seconds(),
+            old_remote_id=refresh.get('original_remote_id'),
+            new_remote_id=refresh.get('new_remote_id'),
+            refresh_strategy=refresh.get('strategy'),
+            api_calls=refresh.get('api_calls'),
+            api_latency_ms=refresh.get('api_latency_ms'),
+        ))
+
+
+class _LeaseHeartbeat:
+    """Thread que renova o lease enquanto o refresh roda."""
+
+    def __init__(self, engine, job_id: int, lease_token: str):
+        self._engine = engine
+        self._job_id = job_id
+        self._lease_token = lease_token
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name=f'refresh-heartbeat-{job_id}', daemon=True)
+
+    def _run(self):
+        while not self._stop.wait(RefreshJobExecutor.HEARTBEAT_SECONDS):
+            try:
+                if not RefreshJobExecutor.heartbeat(self._engine, self._job_id, self._lease_token):
+                    logger.warning("Refresh job %d lost its lease", self._job_id)
+                    return
+            except Exception:  # pylint: disable=broad-except
+                logger.exception("Heartbeat failed for refresh job %d", self._job_id)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=5)
@@ -0,0 +1,243 @@
+"""
+Rollup incremental dos KPIs de refresh (tabela refresh_kpi_rollup)
+
+Cada transição de status de um RefreshJob chama ``RefreshKpiService.record`` na mesma
+transação da mudança: a linha (tenant, schedule, hora de criação do job) tem uma unidade
+movida de jobs_<antigo> para jobs_<novo> com um único upsert. Os dashboards somam só as
+linhas do rollup, então o custo não cresce com o histórico de jobs.
+
+``rebuild`` recalcula uma janela a partir de refresh_jobs (backfill e correção de
+desvios, p.ex. jobs apagados em cascata com o imóvel); roda pela task
+``refresh_scheduler.reconcile_kpi_rollup``.
+
+PADRÃO GLOBAL: Todas as datas/hora do projeto são UTC offset-aware
+"""
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+from sqlalchemy import delete, func, select
+
+from extensions import db
+from models import Property, RefreshJob, RefreshKpiRollup, RefreshScheduleProperty
+from utils.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+_CONFLICT_KEYS = ('tenant_id', 'schedule_key', 'bucket_start')
+
+# Status de job com coluna no rollup (cancelled e outros só saem da coluna anterior)
+STATUS_COLUMNS = {
+    'pending': 'jobs_pending',
+    'running': 'jobs_running',
+    'completed': 'jobs_completed',
+    'failed': 'jobs_failed',
+}
+COUNTER_COLUMNS = ('jobs_created', 'jobs_pending', 'jobs_running', 'jobs_completed', 'jobs_failed',
+                   'duration_sum', 'duration_count')
+
+
+class JobTransition(NamedTuple):
+    """Mudança de status de ``count`` jobs do mesmo tenant/schedule/hora de criação.
+
+    ``old_status`` None = job criado; ``new_status`` None = job apagado.
+    """
+    tenant_id: Optional[int]
+    schedule_id: Optional[int]
+    created_at: Optional[datetime]
+    old_status: Optional[str]
+    new_status: Optional[str]
+    duration: Optional[float] = None
+    count: int = 1
+
+
+def bucket_start(value: Optional[datetime]) -> datetime:
+    """Hora cheia (UTC) de um instante; datas sem fuso vêm do SQLite e já são UTC."""
+    value = value or datetime.now(timezone.utc)
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc).replace(minute=0, second=0, microsecond=0)
+
+
+def execution_seconds(started_at: Optional[datetime], completed_at: datetime) -> Optional[float]:
+    if started_at is None:
+        return None
+    if started_at.tzinfo is None:
+        started_at = started_at.replace(tzinfo=timezone.utc)
+    return max((completed_at - started_at).total_seconds(), 0.0)
+
+
+class RefreshKpiService:
+    """Escrita incremental e leitura dos agregados de refresh."""
+
+    @staticmethod
+    def record(transitions: Iterable[JobTransition]) -> None:
+        """Aplica transições ao rollup (sem commit: entra na transação do chamador)."""
+        deltas: Dict[tuple, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+        for t in transitions:
+            if t.tenant_id is None or not t.count:
+                continue
+            row = deltas[(t.tenant_id, t.schedule_id or 0, bucket_start(t.created_at))]
+            if t.old_status is None and t.new_status is not None:
+                row['jobs_created'] += t.count
+            if t.old_status != t.new_status:
+                if t.old_status in STATUS_COLUMNS:
+                    row[STATUS_COLUMNS[t.old_status]] -= t.count
+                if t.new_status in STATUS_COLUMNS:
+                    row[STATUS_COLUMNS[t.new_status]] += t.count
+            if t.duration is not None:
+                row['duration_sum'] += t.duration * t.count
+                row['duration_count'] += t.count
+
+        rows = []
+        for (tenant_id, schedule_key, bucket), row in deltas.items():
+            if not any(row.values()):
+                continue
+            values = {'tenant_id': tenant_id, 'schedule_key': schedule_key, 'bucket_start': bucket}
+            for column in COUNTER_COLUMNS:
+                value = row.get(column, 0)
+                values[column] = value if column == 'duration_sum' else int(value)
+            rows.append(values)
+        if rows:
+            RefreshKpiService._apply(rows)
+
+    @staticmethod
+    def _apply(rows: List[Dict[str, Any]]) -> None:
+        table = RefreshKpiRollup.__table__
+        now = datetime.now(timezone.utc)
+        upsert(
+            db.session, table, [dict(row, updated_at=now) for row in rows], _CONFLICT_KEYS,
+            lambda incoming: {**{column: table.c[column] + incoming[column] for column in COUNTER_COLUMNS},
+                              'updated_at': now},
+        )
+
+    @staticmethod
+    def job_rows(job_ids: Optional[Sequence[int]], for_update: bool = False, **filters):
+        """Tenant, schedule, criação e status atual dos jobs (para montar transições).
+
+        ``job_ids`` None seleciona só pelos ``filters`` (ex.: todos os pendentes de um schedule).
+        """
+        table = RefreshJob.__table__
+        conditions = [table.c[key] == value for key, value in filters.items()]
+        if job_ids is not None:
+            conditions.append(table.c.id.in_(list(job_ids)))
+        stmt = (
+            select(table.c.id, Property.tenant_id, table.c.refresh_schedule_id, table.c.created_at,
+                   table.c.status, table.c.started_at)
+            .join(Property.__table__, Property.id == table.c.property_id)
+            .where(*conditions)
+        )
+        if for_update:
+            stmt = stmt.with_for_update(of=table, skip_locked=True)
+        return db.session.execute(stmt).all()
+
+    @staticmethod
+    def totals(tenant_id: int, since: Optional[datetime] = None,
+               schedule_id: Optional[int] = None) -> Dict[str, Any]:
+        """Soma do rollup do tenant a partir da hora de ``since`` (None = todo o período)."""
+        table = RefreshKpiRollup.__table__
+        stmt = select(*(func.coalesce(func.sum(table.c[column]), 0) for column in COUNTER_COLUMNS)).where(
+            table.c.tenant_id == tenant_id
+        )
+        if since is not None:
+            stmt = stmt.where(table.c.bucket_start >= bucket_start(since))
+        if schedule_id is not None:
+            stmt = stmt.where(table.c.schedule_key == schedule_id)
+        values = dict(zip(COUNTER_COLUMNS, db.session.execute(stmt).one()))
+        return RefreshKpiService._summarize(values)
+
+    @staticmethod
+    def totals_by_schedule(tenant_id: int, since: Optional[datetime] = None) -> Dict[int, Dict[str, Any]]:
+        """Como ``totals``, agrupado por schedule (chave 0 = jobs avulsos)."""
+        table = RefreshKpiRollup.__table__
+        stmt = select(
+            table.c.schedule_key, *(func.sum(table.c[column]) for column in COUNTER_COLUMNS)
+        ).where(table.c.tenant_id == tenant_id).group_by(table.c.schedule_key)
+        if since is not None:
+            stmt = stmt.where(table.c.bucket_start >= bucket_start(since))
+        return {
+            row[0]: RefreshKpiService._summarize(dict(zip(COUNTER_COLUMNS, row[1:])))
+            for row in db.session.execute(stmt)
+        }
+
+    @staticmethod
+    def schedule_property_counts(schedule_ids: Sequence[int]) -> Dict[int, int]:
+        """Quantidade de imóveis por schedule numa única consulta agrupada (evita N+1)."""
+        if not schedule_ids:
+            return {}
+        links = RefreshScheduleProperty.__table__
+        return dict(db.session.execute(
+            select(links.c.refresh_schedule_id, func.count())
+            .where(links.c.refresh_schedule_id.in_(list(schedule_ids)))
+            .group_by(links.c.refresh_schedule_id)
+        ).all())
+
+    @staticmethod
+    def _summarize(values: Dict[str, Any]) -> Dict[str, Any]:
+        created = int(values['jobs_created'] or 0)
+        completed = int(values['jobs_completed'] or 0)
+        failed = int(values['jobs_failed'] or 0)
+        duration_count = int(values['duration_count'] or 0)
+        return {
+            'total': created,
+            'pending': int(values['jobs_pending'] or 0),
+            'running': int(values['jobs_running'] or 0),
+            'completed': completed,
+            'failed': failed,
+            'avg_duration_seconds': round(float(values['duration_sum'] or 0) / duration_count, 2)
+            if duration_count else 0,
+            'failure_rate': round(failed / created * 100, 2) if created else 0,
+            'success_rate': round(completed / created * 100, 1) if created else 0,
+        }
+
+    @staticmethod
+    def rebuild(since: datetime, tenant_id: Optional[int] = None, batch_size: int = 5000) -> int:
+        """
+        Recalcula as horas a partir de ``since`` com base em refresh_jobs (com commit).
+
+        Jobs já removidos pela limpeza não existem mais: use uma janela menor que a
+        retenção de cleanup_old_jobs para não apagar histórico do rollup.
+
+        Returns:
+            int: jobs lidos
+        """
+        start = bucket_start(since)
+        rollup = RefreshKpiRollup.__table__
+        jobs = RefreshJob.__table__
+        purge = delete(rollup).where(rollup.c.bucket_start >= start)
+        source = (
+            select(Property.tenant_id, jobs.c.refresh_schedule_id, jobs.c.created_at, jobs.c.status,
+                   jobs.c.started_at, jobs.c.completed_at)
+            .join(Property.__table__, Property.id == jobs.c.property_id)
+            .where(jobs.c.created_at >= start)
+        )
+        if tenant_id is not None:
+            purge = purge.where(rollup.c.tenant_id == tenant_id)
+            source = source.where(Property.tenant_id == tenant_id)
+        db.session.execute(purge)
+
+        counter = {'jobs': 0}
+
+        def transitions():
+            # record agrega tudo em memória (uma entrada por hora/schedule) antes de gravar
+            for row_tenant, schedule_id, created_at, status, started_at, completed_at in \
+                    db.session.execute(source.execution_options(yield_per=batch_size)):
+                counter['jobs'] += 1
+                duration = None
+                if status in ('completed', 'failed') and completed_at is not None:
+                    if completed_at.tzinfo is None:
+                        completed_at = completed_at.replace(tzinfo=timezone.utc)
+                    duration = execution_seconds(started_at, completed_at)
+                yield JobTransition(row_tenant, schedule_id, created_at, None, status, duration)
+
+        RefreshKpiService.record(transitions())
+        total = counter['jobs']
+        db.session.commit()
+        logger.info("Rebuilt refresh KPI rollup from %s (%d jobs)", start.isoformat(), total)
+        return total
+
+    @staticmethod
+    def reconcile(hours: int = 25) -> int:
+        """Recalcula as últimas ``hours`` horas (corrige desvios das janelas dos dashboards)."""
+        return RefreshKpiService.rebuild(datetime.now(timezone.utc) - timedelta(hours=hours))
@@ -9,7 +9,7 @@ from datetime import datetime, timedelta
 from celery import shared_task, group
 from sqlalchemy import and_, or_
 
-from app import create_app
+from worker_app import worker_app_context
 from extensions import db
 from models import PropertyRefreshSchedule, PropertyRefreshHistory, Property
 from properties.services.property_service import PropertyService
@@ -164,8 +164,7 @@ def process_refresh_batch(self):
     Task principal que processa um lote de refresh automático.
     Executada periodicamente pelo Celery Beat.
     """
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             logger.info("Starting refresh batch processing at %s", utcnow())
 
@@ -194,8 +193,7 @@ def process_single_refresh(self, schedule_id: int):
     Processa um único agendamento de refresh.
     Chamada individualmente para cada imóvel no lote.
     """
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             logger.info("Processing single refresh for schedule %d", schedule_id)
 
@@ -226,15 +224,21 @@ def process_single_refresh(self, schedule_id: int):
             db.session.commit()
 
             # Executar refresh
-            success, result = PropertyService.refresh_property(schedule.property_id, schedule.tenant_id)
+            success, result = PropertyService.refresh_property(
+                schedule.property_id, schedule.tenant_id, strategy=schedule.refresh_strategy
+            )
 
             # Atualizar histórico
             history.completed_at = utcnow()
             history.duration_seconds = int((history.completed_at - history.started_at).total_seconds())
+            refresh_details = result.get('refresh_details') or {}
+            history.refresh_strategy = refresh_details.get('strategy', schedule.refresh_strategy)
+            history.api_calls = refresh_details.get('api_calls')
+            history.api_latency_ms = refresh_details.get('api_latency_ms')
 
             if success:
                 history.status = 'success'
-                history.new_remote_id = result.get('new_remote_id')
+                history.new_remote_id = result.get('new_remote_id') or refresh_details.get('new_remote_id')
                 schedule.successful_runs += 1
                 logger.info("Refresh successful for property %d", schedule.property_id)
             else:
@@ -274,6 +278,8 @@ def process_single_refresh(self, schedule_id: int):
                     schedule.is_running = False
                     schedule.failed_runs += 1
                     schedule.total_runs += 1
+                    # Adia a próxima tentativa (o timer wheel dispararia de novo na hora)
+                    schedule.next_run = utcnow() + timedelta(minutes=schedule.retry_delay_minutes or 5)
                     db.session.commit()
             except Exception:
                 pass
@@ -305,8 +311,7 @@ def cleanup_old_history(self, days_to_keep: int = 30):
 @shared_task(bind=True, name='refresh_scheduler.queue_health_check')
 def queue_health_check(self):
     """Verifica saúde da fila de processamento."""
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             status = RefreshQueueManager.get_queue_status()
 
@@ -5,11 +5,13 @@ import logging
 from datetime import datetime, time
 from typing import List, Dict, Any, Optional, Tuple
 import pytz  # pylint: disable=import-error
+from sqlalchemy import func
 
 from utils.schedule_utils import calculate_next_run
-from models import RefreshSchedule, RefreshScheduleProperty, RefreshJob, Property
+from models import RefreshSchedule, RefreshScheduleProperty, RefreshJob, Property, default_refresh_strategy
 from extensions import db
 from ..monitoring import monitor_operation, track_database_operation
+from .refresh_kpi_service import JobTransition, RefreshKpiService
 
 logger = logging.getLogger(__name__)
 
@@ -33,7 +35,8 @@ class RefreshScheduleService:
         time_slot: str,  # formato "HH:MM"
         frequency_days: int = 1,
         property_ids: Optional[List[int]] = None,
-        days_of_week: Optional[List[int]] = None
+        days_of_week: Optional[List[int]] = None,
+        refresh_strategy: Optional[str] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """
         Cria uma nova lista de refresh schedule
@@ -45,6 +48,8 @@ class RefreshScheduleService:
             frequency_days: Frequência em dias (1=diário, 7=semanal)
             property_ids: Lista OBRIGATÓRIA de IDs de imóveis
             days_of_week: Dias da semana em que o refresh deve ocorrer (1=segunda, 7=domingo)
+            refresh_strategy: Mutation usada no CanalPro (recreate, update ou touch);
+                padrão REFRESH_DEFAULT_STRATEGY
 
         Returns:
             Tuple[bool, dict]: (sucesso, dados/erro)
@@ -80,7 +85,8 @@ class RefreshScheduleService:
                 time_slot=time_obj,
                 frequency_days=frequency_days,
                 is_active=True,
-                days_of_week=days_of_week if days_of_week is not None else [1,2,3,4,5]
+                days_of_week=days_of_week if days_of_week is not None else [1,2,3,4,5],
+                refresh_strategy=refresh_strategy or default_refresh_strategy()
             )
 
             # Calcular e setar o próximo agendamento
@@ -288,7 +294,8 @@ class RefreshScheduleService:
         time_slot: Optional[str] = None,
         frequency_days: Optional[int] = None,
         is_active: Optional[bool] = None,
-        days_of_week: Optional[List[int]] = None
+        days_of_week: Optional[List[int]] = None,
+        refresh_strategy: Optional[str] = None
     ) -> Tuple[bool, Dict[str, Any]]:
         """Atualiza uma lista de refresh"""
         try:
@@ -320,6 +327,8 @@ class RefreshScheduleService:
                 schedule.is_active = is_active
             if days_of_week is not None:
                 schedule.days_of_week = days_of_week
+            if refresh_strategy is not None:
+                schedule.refresh_strategy = refresh_strategy
 
             # Calcular e atualizar o próximo agendamento
             schedule.next_run = calculate_next_run(schedule)  # Já retorna UTC correto
@@ -357,6 +366,13 @@ class RefreshScheduleService:
                 refresh_schedule_id=schedule_id
             ).delete()
 
+            RefreshKpiService.record(
+                JobTransition(schedule.tenant_id, schedule_id, created_at, 'pending', None, count=count)
+                for created_at, count in db.session.query(RefreshJob.created_at, func.count()).filter(
+                    RefreshJob.refresh_schedule_id == schedule_id,
+                    RefreshJob.status == 'pending'
+                ).group_by(RefreshJob.created_at)
+            )
             RefreshJob.query.filter(
                 RefreshJob.refresh_schedule_id == schedule_id,
                 RefreshJob.status == 'pending'
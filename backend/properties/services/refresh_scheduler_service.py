@@ -8,13 +8,15 @@ Ao serializar datas, sempre usar ISO 8601 com sufixo 'Z'
 """
 import logging
 from datetime import datetime, timedelta, timezone
-from typing import List, Dict, Any, Tuple
-from sqlalchemy import text
+from typing import List, Dict, Any, Optional, Tuple
+from sqlalchemy import exists, func, insert, literal, select
+from sqlalchemy.orm import aliased
 from flask import g
-from models import RefreshSchedule, RefreshJob, Property
+from models import RefreshSchedule, RefreshScheduleProperty, RefreshJob, Property
 from extensions import db
 from ..monitoring import monitor_operation
 from .property_service import PropertyService
+from .refresh_kpi_service import JobTransition, RefreshKpiService, execution_seconds
 
 logger = logging.getLogger(__name__)
 
@@ -67,6 +69,39 @@ class RefreshSchedulerService:
             logger.error("Error checking schedules to run: %s", str(e))
             return 0, []
 
+    @staticmethod
+    def execute_due_schedule(schedule_id: int) -> Tuple[bool, Dict[str, Any]]:
+        """
+        Executa um schedule disparado pelo timer wheel, revalidando no banco
+
+        Args:
+            schedule_id: ID do schedule vencido
+
+        Returns:
+            Tuple[bool, Dict]: (executou, resultado)
+        """
+        from .refresh_timer_wheel import RefreshTimerWheel, SCHEDULE_PREFIX
+
+        current_time = datetime.now(timezone.utc)
+        schedule = db.session.get(RefreshSchedule, schedule_id)
+        if not schedule or not schedule.is_active or not schedule.next_run:
+            return False, {'message': 'Schedule not found, inactive or without next run'}
+
+        next_run = schedule.next_run
+        if next_run.tzinfo is None:
+            next_run = next_run.replace(tzinfo=timezone.utc)
+        if next_run > current_time:
+            # Entrada antiga no índice: reagenda para o next_run atual
+            RefreshTimerWheel.schedule(f'{SCHEDULE_PREFIX}:{schedule_id}', next_run)
+            return False, {'message': 'Schedule not due yet', 'next_run': next_run.isoformat()}
+
+        if not RefreshSchedulerService._should_schedule_run(schedule, current_time):
+            # Mesma cadência do polling antigo: confere de novo em um minuto
+            RefreshTimerWheel.schedule(f'{SCHEDULE_PREFIX}:{schedule_id}', current_time + timedelta(minutes=1))
+            return False, {'message': 'Schedule frequency not reached'}
+
+        return RefreshSchedulerService._execute_schedule(schedule, current_time)
+
     @staticmethod
     def _should_schedule_run(schedule: RefreshSchedule, current_time: datetime) -> bool:
         """
@@ -117,42 +152,17 @@ class RefreshSchedulerService:
             Tuple[bool, Dict]: (sucesso, resultado)
         """
         try:
-            # Buscar propriedades do schedule
-            properties = schedule.properties.all()
+            jobs_created, total_properties = RefreshSchedulerService._materialize_schedule_jobs(
+                schedule.id, execution_time, 'scheduled'
+            )
 
-            if not properties:
+            if not total_properties:
                 return True, {
                     'message': f'Schedule "{schedule.name}" has no properties',
                     'jobs_created': 0
                 }
 
-            jobs_created = 0
-            jobs_skipped = 0
-
-            for prop in properties:
-                # Verificar se já tem job pendente para esta propriedade
-                existing_pending = RefreshJob.query.filter(
-                    RefreshJob.property_id == prop.id,
-                    RefreshJob.status == 'pending'
-                ).first()
-
-                if existing_pending:
-                    jobs_skipped += 1
-                    logger.debug(
-                        "Skipping property %d - already has pending job",
-                        prop.id
-                    )
-                    continue
-
-                # Criar job agendado
-                job = RefreshJob()
-                job.property_id = prop.id
-                job.refresh_schedule_id = schedule.id
-                job.scheduled_at = execution_time
-                job.refresh_type = 'scheduled'
-                job.status = 'pending'
-                db.session.add(job)
-                jobs_created += 1
+            jobs_skipped = total_properties - jobs_created
 
             # Atualizar next_run para o próximo agendamento usando função utilitária
             from utils.schedule_utils import calculate_next_run
@@ -164,12 +174,14 @@ class RefreshSchedulerService:
                 "Schedule %d (%s) executed: %d jobs created, %d skipped",
                 schedule.id, schedule.name, jobs_created, jobs_skipped
             )
+            if jobs_created:
+                RefreshSchedulerService._request_job_dispatch()
 
             return True, {
                 'message': f'Schedule "{schedule.name}" executed successfully',
                 'jobs_created': jobs_created,
                 'jobs_skipped': jobs_skipped,
-                'total_properties': len(properties)
+                'total_properties': total_properties
             }
 
         except Exception as e:  # pylint: disable=broad-except
@@ -179,6 +191,75 @@ class RefreshSchedulerService:
                 'error': f'Failed to execute schedule: {str(e)}'
             }
 
+    @staticmethod
+    def _request_job_dispatch() -> None:
+        """Acorda o dispatcher de jobs pendentes (após o commit dos jobs novos)."""
+        from .refresh_timer_wheel import RefreshTimerWheel
+        try:
+            RefreshTimerWheel.request_dispatch()
+        except Exception as e:  # pylint: disable=broad-except
+            # process_pending_jobs ainda roda periodicamente como rede de segurança
+            logger.warning("Could not request refresh job dispatch: %s", str(e))
+
+    @staticmethod
+    def _materialize_schedule_jobs(schedule_id: int, scheduled_at: datetime,
+                                   refresh_type: str) -> Tuple[int, int]:
+        """
+        Cria em lote os jobs pendentes de um schedule (sem commit).
+
+        Um único ``INSERT ... SELECT ... WHERE NOT EXISTS``: propriedades que já têm
+        job pendente são puladas pelo banco, sem uma consulta por propriedade.
+
+        Returns:
+            Tuple[int, int]: (jobs criados, total de propriedades do schedule)
+        """
+        jobs = RefreshJob.__table__
+        links = RefreshScheduleProperty.__table__
+        now = datetime.now(timezone.utc)
+
+        total_properties = db.session.execute(
+            select(func.count()).select_from(links).where(links.c.refresh_schedule_id == schedule_id)
+        ).scalar() or 0
+        if not total_properties:
+            return 0, 0
+
+        pending = aliased(jobs)
+        schedules = RefreshSchedule.__table__
+        strategy = (
+            select(schedules.c.refresh_strategy)
+            .where(schedules.c.id == schedule_id)
+            .scalar_subquery()
+        )
+        rows = select(
+            links.c.property_id,
+            literal(schedule_id),
+            literal('pending'),
+            literal(refresh_type),
+            strategy,
+            literal(scheduled_at, jobs.c.scheduled_at.type),
+            literal(0),
+            literal(now, jobs.c.created_at.type),
+            literal(now, jobs.c.updated_at.type),
+        ).where(
+            links.c.refresh_schedule_id == schedule_id,
+            ~exists().where(pending.c.property_id == links.c.property_id, pending.c.status == 'pending')
+        )
+        result = db.session.execute(
+            insert(jobs).from_select(
+                ['property_id', 'refresh_schedule_id', 'status', 'refresh_type', 'refresh_strategy',
+                 'scheduled_at', 'attempts', 'created_at', 'updated_at'],
+                rows
+            )
+        )
+        if result.rowcount:
+            tenant_id = db.session.execute(
+                select(schedules.c.tenant_id).where(schedules.c.id == schedule_id)
+            ).scalar()
+            RefreshKpiService.record([
+                JobTransition(tenant_id, schedule_id, now, None, 'pending', count=result.rowcount)
+            ])
+        return result.rowcount, total_properties
+
     @staticmethod
     def get_pending_jobs(limit: int = 50) -> List[RefreshJob]:
         """
@@ -225,12 +306,17 @@ class RefreshSchedulerService:
                 return False, {'error': f'Job status is {job.status}, expected pending'}
 
             # Marcar como executando
+            tenant_id = job.property.tenant_id if job.property else None
             job.status = 'running'
-            job.started_at = datetime.now(timezone.utc)
+            started_at = job.started_at = datetime.now(timezone.utc)
+            RefreshKpiService.record([JobTransition(tenant_id, job.refresh_schedule_id, job.created_at,
+                                                    'pending', 'running')])
             db.session.commit()
 
             # Executar refresh real
-            success, refresh_result = RefreshSchedulerService._perform_property_refresh_with_details(job.property_id)
+            success, refresh_result = RefreshSchedulerService._perform_property_refresh_with_details(
+                job.property_id, job.refresh_strategy
+            )
 
             if success:
                 job.status = 'completed'
@@ -265,6 +351,14 @@ class RefreshSchedulerService:
                     'refresh_details': refresh_result
                 }
 
+            RefreshKpiService.record([JobTransition(
+                tenant_id, job.refresh_schedule_id, job.created_at, 'running', job.status,
+                execution_seconds(job.started_at, job.completed_at)
+            )])
+            # Histórico com estratégia e custo em chamadas, como no executor por lease (/strategy-metrics)
+            from .refresh_executor import RefreshJobExecutor  # import local: refresh_executor importa este módulo
+            RefreshJobExecutor._record_history(job.property_id, tenant_id, job.refresh_type, started_at,
+                                               job.completed_at, success, job.error_message, refresh_result)
             db.session.commit()
             return success, result
 
@@ -272,9 +366,16 @@ class RefreshSchedulerService:
             # Marcar job como failed se houver erro
             try:
                 if 'job' in locals() and job:
+                    db.session.rollback()
+                    previous_status = job.status
                     job.status = 'failed'
                     job.completed_at = datetime.now(timezone.utc)
                     job.error_message = str(e)
+                    RefreshKpiService.record([JobTransition(
+                        job.property.tenant_id if job.property else None, job.refresh_schedule_id,
+                        job.created_at, previous_status, 'failed',
+                        execution_seconds(job.started_at, job.completed_at) if previous_status == 'running' else None
+                    )])
                     db.session.commit()
             except Exception:  # pylint: disable=broad-except
                 pass
@@ -283,12 +384,14 @@ class RefreshSchedulerService:
             return False, {'error': f'Failed to process job: {str(e)}'}
 
     @staticmethod
-    def _perform_property_refresh_with_details(property_id: int) -> Tuple[bool, Dict[str, Any]]:
+    def _perform_property_refresh_with_details(property_id: int,
+                                               strategy: Optional[str] = None) -> Tuple[bool, Dict[str, Any]]:
         """
         Executa o refresh de uma propriedade usando PropertyService com detalhes
 
         Args:
             property_id: ID da propriedade
+            strategy: Estratégia de refresh (recreate, update, touch); None usa o padrão
 
         Returns:
             Tuple[bool, Dict]: (sucesso, detalhes_da_execução)
@@ -305,10 +408,10 @@ class RefreshSchedulerService:
                 "Performing refresh for property %d (%s)", property_id, prop.title
             )
 
-            # Usar o método real de refresh que faz delete + create no CanalPro
+            # Usar o método real de refresh no CanalPro com a estratégia do schedule
             g.tenant_id = prop.tenant_id
 
-            success, result = PropertyService.refresh_property(property_id)
+            success, result = PropertyService.refresh_property(property_id, strategy=strategy)
 
             if success:
                 logger.info(
@@ -351,35 +454,19 @@ class RefreshSchedulerService:
                 is_active=False
             ).count()
 
-            # Jobs das últimas 24h
-            yesterday = datetime.utcnow() - timedelta(days=1)
-            recent_jobs = RefreshJob.query.join(RefreshSchedule).filter(
-                RefreshSchedule.tenant_id == tenant_id,
-                RefreshJob.created_at >= yesterday
-            ).all()
-
-            # Estatísticas dos jobs
-            jobs_completed = sum(1 for job in recent_jobs if job.status == 'completed')
-            jobs_failed = sum(1 for job in recent_jobs if job.status == 'failed')
-            jobs_pending = sum(1 for job in recent_jobs if job.status == 'pending')
-            # jobs_running = sum(1 for job in recent_jobs if job.status == 'running')
+            # Jobs das últimas 24h: somados do rollup (custo independe do histórico de jobs)
+            jobs_last_24h = RefreshKpiService.totals(tenant_id, datetime.now(timezone.utc) - timedelta(days=1))
 
             # Contar total de propriedades com schedules ativos
             total_properties = 0
             try:
-                active_schedule_ids = [s.id for s in RefreshSchedule.query.filter_by(
-                    tenant_id=tenant_id, is_active=True
-                ).all()]
-                if active_schedule_ids:
-                    # Contar propriedades únicas nos schedules ativos
-                    result = db.session.execute(text(
-                        """
-                        SELECT COUNT(DISTINCT rsp.property_id)
-                        FROM refresh_schedule_properties rsp
-                        WHERE rsp.refresh_schedule_id IN :schedule_ids
-                        """
-                    ), {"schedule_ids": tuple(active_schedule_ids)})
-                    total_properties = result.scalar() or 0
+                # Propriedades únicas nos schedules ativos, numa única consulta
+                links = RefreshScheduleProperty.__table__
+                total_properties = db.session.execute(
+                    select(func.count(func.distinct(links.c.property_id)))
+                    .join(RefreshSchedule.__table__, RefreshSchedule.id == links.c.refresh_schedule_id)
+                    .where(RefreshSchedule.tenant_id == tenant_id, RefreshSchedule.is_active.is_(True))
+                ).scalar() or 0
             except Exception as e:  # pylint: disable=broad-except
                 logger.warning(
                     "Error counting properties in active schedules: %s",
@@ -391,16 +478,18 @@ class RefreshSchedulerService:
                 'active_schedules': active_schedules,
                 'total_properties': total_properties,
                 'jobs_last_24h': {
-                    'total': len(recent_jobs),
-                    'completed': jobs_completed,
-                    'failed': jobs_failed,
-                    'pending': jobs_pending
+                    'total': jobs_last_24h['total'],
+                    'completed': jobs_last_24h['completed'],
+                    'failed': jobs_last_24h['failed'],
+                    'pending': jobs_last_24h['pending'],
+                    'running': jobs_last_24h['running']
                 },
                 'schedules_by_status': {
                     'active': active_schedules,
                     'inactive': inactive_schedules
                 },
-                'success_rate': round(jobs_completed / len(recent_jobs) * 100, 1) if recent_jobs else 0
+                'avg_duration_seconds': jobs_last_24h['avg_duration_seconds'],
+                'success_rate': jobs_last_24h['success_rate']
             }
 
         except Exception as e:  # pylint: disable=broad-except
@@ -447,52 +536,36 @@ class RefreshSchedulerService:
             if not schedule:
                 return False, {'error': 'Schedule not found or inactive'}
 
-            # Buscar propriedades do cronograma
-            properties = schedule.properties.all()
+            current_time = datetime.now(timezone.utc)
+            jobs_created, total_properties = RefreshSchedulerService._materialize_schedule_jobs(
+                schedule_id, current_time, 'manual'
+            )
             logger.info(
                 "Found %d properties in schedule %d",
-                len(properties), schedule_id
+                total_properties, schedule_id
             )
 
-            if not properties:
+            if not total_properties:
+                db.session.rollback()
                 logger.warning(
                     "No properties found in schedule %d",
                     schedule_id
                 )
                 return False, {'error': 'No properties in schedule'}
 
-            jobs_created = 0
-            current_time = datetime.utcnow()
-
-            # Criar jobs para todas as propriedades do cronograma
-            for property_obj in properties:
-                # Verificar se já existe um job pendente para esta propriedade
-                existing_job = RefreshJob.query.filter_by(
-                    property_id=property_obj.id,
-                    status='pending'
-                ).first()
-
-                if not existing_job:
-                    new_job = RefreshJob()
-                    new_job.property_id = property_obj.id
-                    new_job.refresh_schedule_id = schedule_id
-                    new_job.scheduled_at = current_time
-                    new_job.refresh_type = 'manual'
-                    new_job.status = 'pending'
-
-                    db.session.add(new_job)
-                    jobs_created += 1
-
             db.session.commit()
 
             logger.info(
-                "Manually executed schedule %d: %d jobs created",
-                schedule_id, jobs_created
+                "Manually executed schedule %d: %d jobs created, %d skipped",
+                schedule_id, jobs_created, total_properties - jobs_created
             )
+            if jobs_created:
+                RefreshSchedulerService._request_job_dispatch()
 
             return True, {
                 'jobs_created': jobs_created,
-                'properties_processed': len(properties),
+                'jobs_skipped': total_properties - jobs_created,
+                'properties_processed': total_properties,
                 'schedule_name': schedule.name,
                 'executed_at': current_time.isoformat()
             }
@@ -0,0 +1,312 @@
+"""
+Timer wheel dos refreshes agendados (índice de vencimentos + dispatcher)
+
+Em vez de o Celery beat varrer ``refresh_schedule``, ``property_refresh_schedules``
+e ``refresh_jobs`` a cada minuto, cada item agendado vira um membro de um sorted
+set no Redis com score = ``next_run`` (epoch UTC):
+
+- ``refresh_schedule:<id>``  -> task ``refresh_scheduler.run_due_schedule``
+- ``property_schedule:<id>`` -> task ``refresh_scheduler.process_single_refresh``
+- ``dispatch``               -> task ``refresh_scheduler.process_pending_jobs``
+
+O índice é mantido por listeners da sessão (após o commit de qualquer alteração
+em RefreshSchedule/PropertyRefreshSchedule) e reconstruído a partir do banco na
+inicialização do dispatcher e pela task de reconciliação.
+
+O dispatcher (``python scripts/run_refresh_timer_dispatcher.py``) dorme até o
+próximo vencimento com BLPOP numa lista de "wakeup" (acordado quando entra um item
+mais cedo): dispara em segundos após o horário e não consulta o banco enquanto
+não há nada vencido.
+
+Requer REDIS_URL: o índice precisa ser visto pelo processo web (que grava os
+agendamentos) e pelo dispatcher. Sem Redis o dispatcher se recusa a subir e o
+Celery beat volta a varrer as tabelas (``REFRESH_POLLING_BEAT_SCHEDULE`` em
+``properties.tasks.refresh_scheduler_config``); o fallback em memória por
+processo só mantém os listeners e a reconciliação funcionando sem erro.
+
+PADRÃO GLOBAL: Todas as datas/hora do projeto são UTC offset-aware
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import func, select
+
+from extensions import db, register_after_commit_collector
+from models import PropertyRefreshSchedule, RefreshJob, RefreshSchedule
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+TIMER_WHEEL_KEY = os.getenv('REFRESH_TIMER_WHEEL_KEY', 'refresh:timer_wheel')
+WAKEUP_KEY = f'{TIMER_WHEEL_KEY}:wakeup'
+# Teto do sono do dispatcher (revalida o índice mesmo sem wakeup)
+MAX_SLEEP_SECONDS = float(os.getenv('REFRESH_TIMER_MAX_SLEEP', '300'))
+# Atraso para tentar de novo quando o envio da task falha (broker fora do ar)
+DISPATCH_RETRY_SECONDS = 30
+
+SCHEDULE_PREFIX = 'refresh_schedule'
+PROPERTY_SCHEDULE_PREFIX = 'property_schedule'
+DISPATCH_MEMBER = 'dispatch'
+
+_memory_entries: Dict[str, float] = {}
+_memory_cond = threading.Condition()
+
+
+def _score(due_at: Optional[datetime]) -> float:
+    if due_at is None:
+        return time.time()
+    if due_at.tzinfo is None:
+        due_at = due_at.replace(tzinfo=timezone.utc)
+    return due_at.timestamp()
+
+
+class RefreshTimerWheel:
+    """Índice de vencimentos dos refreshes agendados."""
+
+    @staticmethod
+    def schedule(member: str, due_at: Optional[datetime]) -> None:
+        """Agenda (ou reagenda) ``member`` para ``due_at`` e acorda o dispatcher."""
+        RefreshTimerWheel.apply({member: _score(due_at)})
+
+    @staticmethod
+    def remove(member: str) -> None:
+        RefreshTimerWheel.apply({member: None})
+
+    @staticmethod
+    def request_dispatch(due_at: Optional[datetime] = None) -> None:
+        """
+        Pede ao dispatcher um ``process_pending_jobs`` (jobs novos prontos em ``due_at``).
+        Um pedido já agendado para mais cedo prevalece.
+        """
+        client = get_redis()
+        score = _score(due_at)
+        if client:
+            pipe = client.pipeline()
+            pipe.zadd(TIMER_WHEEL_KEY, {DISPATCH_MEMBER: score}, lt=True)
+            pipe.lpush(WAKEUP_KEY, 1)
+            pipe.ltrim(WAKEUP_KEY, 0, 0)
+            pipe.execute()
+            return
+        with _memory_cond:
+            current = _memory_entries.get(DISPATCH_MEMBER)
+            _memory_entries[DISPATCH_MEMBER] = score if current is None else min(current, score)
+            _memory_cond.notify_all()
+
+    @staticmethod
+    def apply(changes: Dict[str, Optional[float]]) -> None:
+        """Aplica ``{member: score}`` ao índice; score ``None`` remove o membro."""
+        if not changes:
+            return
+        client = get_redis()
+        to_add = {member: score for member, score in changes.items() if score is not None}
+        to_remove = [member for member, score in changes.items() if score is None]
+
+        if client:
+            pipe = client.pipeline()
+            if to_add:
+                pipe.zadd(TIMER_WHEEL_KEY, to_add)
+                # Um único sinal pendente basta para acordar o dispatcher
+                pipe.lpush(WAKEUP_KEY, 1)
+                pipe.ltrim(WAKEUP_KEY, 0, 0)
+            if to_remove:
+                pipe.zrem(TIMER_WHEEL_KEY, *to_remove)
+            pipe.execute()
+            return
+
+        with _memory_cond:
+            _memory_entries.update(to_add)
+            for member in to_remove:
+                _memory_entries.pop(member, None)
+            if to_add:
+                _memory_cond.notify_all()
+
+    @staticmethod
+    def next_due() -> Optional[float]:
+        """Epoch do próximo vencimento (``None`` se o índice está vazio)."""
+        client = get_redis()
+        if client:
+            head = client.zrange(TIMER_WHEEL_KEY, 0, 0, withscores=True)
+            return head[0][1] if head else None
+        with _memory_cond:
+            return min(_memory_entries.values()) if _memory_entries else None
+
+    @staticmethod
+    def pop_due(now: Optional[float] = None, limit: int = 500) -> List[str]:
+        """
+        Remove e retorna os membros vencidos. Com vários dispatchers, cada membro
+        fica com quem conseguiu o ZREM.
+        """
+        client = get_redis()
+        now = time.time() if now is None else now
+        if client:
+            candidates = client.zrangebyscore(TIMER_WHEEL_KEY, '-inf', now, start=0, num=limit)
+            if not candidates:
+                return []
+            pipe = client.pipeline()
+            for member in candidates:
+                pipe.zrem(TIMER_WHEEL_KEY, member)
+            return [member for member, removed in zip(candidates, pipe.execute()) if removed]
+
+        with _memory_cond:
+            due = sorted((score, member) for member, score in _memory_entries.items() if score <= now)[:limit]
+            for _, member in due:
+                del _memory_entries[member]
+            return [member for _, member in due]
+
+    @staticmethod
+    def wait_for_work(timeout: float) -> None:
+        """Dorme até ``timeout`` segundos ou até um item novo entrar no índice."""
+        if timeout <= 0:
+            return
+        client = get_redis()
+        if client:
+            # BLPOP aceita timeout fracionário (Redis >= 6); 0 significaria bloquear para sempre
+            client.blpop([WAKEUP_KEY], timeout=max(timeout, 0.01))
+            return
+        with _memory_cond:
+            _memory_cond.wait(timeout)
+
+    @staticmethod
+    def entries() -> List[Tuple[str, float]]:
+        """Conteúdo do índice em ordem de vencimento (monitoramento/testes)."""
+        client = get_redis()
+        if client:
+            return [(member, score) for member, score in
+                    client.zrange(TIMER_WHEEL_KEY, 0, -1, withscores=True)]
+        with _memory_cond:
+            return sorted(_memory_entries.items(), key=lambda item: item[1])
+
+    @staticmethod
+    def rebuild() -> int:
+        """
+        Reconstrói o índice a partir do banco (três consultas). Chamado na
+        inicialização do dispatcher e pela task de reconciliação.
+
+        Returns:
+            Número de itens no índice
+        """
+        entries: Dict[str, float] = {}
+
+        schedules = db.session.execute(
+            select(RefreshSchedule.id, RefreshSchedule.next_run).where(
+                RefreshSchedule.is_active.is_(True),
+                RefreshSchedule.next_run.isnot(None)
+            )
+        ).all()
+        for schedule_id, next_run in schedules:
+            entries[f'{SCHEDULE_PREFIX}:{schedule_id}'] = _score(next_run)
+
+        property_schedules = db.session.execute(
+            select(PropertyRefreshSchedule.id, PropertyRefreshSchedule.next_run).where(
+                PropertyRefreshSchedule.enabled.is_(True),
+                PropertyRefreshSchedule.is_running.is_(False),
+                PropertyRefreshSchedule.next_run.isnot(None)
+            )
+        ).all()
+        for schedule_id, next_run in property_schedules:
+            entries[f'{PROPERTY_SCHEDULE_PREFIX}:{schedule_id}'] = _score(next_run)
+
+        has_pending, first_pending = db.session.execute(
+            select(func.count(), func.min(RefreshJob.scheduled_at)).where(RefreshJob.status == 'pending')
+        ).one()
+        if has_pending:
+            entries[DISPATCH_MEMBER] = _score(first_pending)
+        db.session.rollback()
+
+        client = get_redis()
+        if client:
+            staging_key = f'{TIMER_WHEEL_KEY}:rebuild'
+            pipe = client.pipeline()
+            pipe.delete(staging_key)
+            if entries:
+                pipe.zadd(staging_key, entries)
+                pipe.rename(staging_key, TIMER_WHEEL_KEY)
+            else:
+                pipe.delete(TIMER_WHEEL_KEY)
+            pipe.lpush(WAKEUP_KEY, 1)
+            pipe.ltrim(WAKEUP_KEY, 0, 0)
+            pipe.execute()
+        else:
+            with _memory_cond:
+                _memory_entries.clear()
+                _memory_entries.update(entries)
+                _memory_cond.notify_all()
+
+        logger.info("Refresh timer wheel rebuilt with %d entries", len(entries))
+        return len(entries)
+
+    @staticmethod
+    def dispatch_due(now: Optional[float] = None) -> Dict[str, int]:
+        """
+        Envia as tasks dos itens vencidos. Não consulta o banco: cada task revalida
+        o próprio item. Se o envio falhar o item volta ao índice para nova tentativa.
+        """
+        from properties.tasks.refresh_scheduler_tasks import process_pending_jobs, run_due_schedule
+        from properties.services.refresh_queue_manager import process_single_refresh
+
+        sent = {'schedules': 0, 'property_schedules': 0, 'dispatches': 0, 'failed': 0}
+        for member in RefreshTimerWheel.pop_due(now):
+            kind, _, raw_id = member.partition(':')
+            try:
+                if kind == SCHEDULE_PREFIX:
+                    run_due_schedule.apply_async(args=[int(raw_id)])
+                    sent['schedules'] += 1
+                elif kind == PROPERTY_SCHEDULE_PREFIX:
+                    process_single_refresh.apply_async(args=[int(raw_id)], queue='refresh_scheduler')
+                    sent['property_schedules'] += 1
+                elif kind == DISPATCH_MEMBER:
+                    process_pending_jobs.apply_async()
+                    sent['dispatches'] += 1
+                else:
+                    logger.warning("Unknown refresh timer wheel member %r dropped", member)
+            except Exception as e:  # pylint: disable=broad-except
+                sent['failed'] += 1
+                logger.error("Failed to dispatch %s, retrying in %ds: %s", member, DISPATCH_RETRY_SECONDS, str(e))
+                RefreshTimerWheel.apply({member: time.time() + DISPATCH_RETRY_SECONDS})
+        return sent
+
+    @staticmethod
+    def run_dispatcher(stop_event: Optional[threading.Event] = None,
+                       max_sleep: float = MAX_SLEEP_SECONDS) -> None:
+        """Loop do dispatcher: reconstrói o índice e dorme até cada vencimento."""
+        stop_event = stop_event or threading.Event()
+        RefreshTimerWheel.rebuild()
+        logger.info("Refresh timer wheel dispatcher started")
+
+        while not stop_event.is_set():
+            try:
+                sent = RefreshTimerWheel.dispatch_due()
+                if any(sent.values()):
+                    logger.info("Refresh timer wheel dispatched: %s", sent)
+                next_due = RefreshTimerWheel.next_due()
+                timeout = max_sleep if next_due is None else min(max(next_due - time.time(), 0), max_sleep)
+                RefreshTimerWheel.wait_for_work(timeout)
+            except Exception as e:  # pylint: disable=broad-except
+                logger.exception("Refresh timer wheel dispatcher error: %s", str(e))
+                stop_event.wait(DISPATCH_RETRY_SECONDS)
+
+
+# ---------------------------------------------------------------------------
+# Listeners da sessão: mantêm o índice em dia com qualquer escrita nos schedules
+# ---------------------------------------------------------------------------
+
+def _index_entry(instance, deleted: bool) -> Tuple[str, Optional[float]]:
+    if isinstance(instance, RefreshSchedule):
+        member = f'{SCHEDULE_PREFIX}:{instance.id}'
+        due = None if deleted or not instance.is_active else instance.next_run
+    else:
+        member = f'{PROPERTY_SCHEDULE_PREFIX}:{instance.id}'
+        # Em execução: process_single_refresh recoloca no índice ao gravar o novo next_run
+        due = None if deleted or not instance.enabled or instance.is_running else instance.next_run
+    return member, (_score(due) if due else None)
+
+
+def register_session_listeners() -> None:
+    """Registra os listeners (idempotente). Falha ao aplicar fica para a reconciliação periódica."""
+    register_after_commit_collector(
+        'refresh_timer_wheel_changes', (RefreshSchedule, PropertyRefreshSchedule), _index_entry, RefreshTimerWheel.apply
+    )
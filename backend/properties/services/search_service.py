@@ -0,0 +1,78 @@
+"""
+Busca textual de imóveis (parâmetro ``q`` das listagens).
+
+Em PostgreSQL usa a coluna ``property.search_vector`` (tsvector com stemming em
+português + unaccent, mantida pelo banco) e índices GIN pg_trgm para códigos e
+trechos de endereço, com ordenação por relevância. Em outros bancos (SQLite de
+desenvolvimento/testes) mantém o ILIKE tradicional.
+"""
+from sqlalchemy import cast, func, literal_column, or_
+from sqlalchemy.dialects.postgresql import REGCONFIG
+
+from extensions import db
+from models import Property
+
+# Configuração criada pela migração 20251023_add_property_search
+SEARCH_CONFIG = 'portuguese_unaccent'
+
+
+class PropertySearchService:
+    """Monta filtros e ranking de busca textual sobre ``Property``."""
+
+    @staticmethod
+    def full_text_enabled() -> bool:
+        """True quando o banco suporta tsvector/pg_trgm (PostgreSQL)."""
+        return db.engine.dialect.name == 'postgresql'
+
+    @staticmethod
+    def _search_vector():
+        return literal_column('property.search_vector')
+
+    @staticmethod
+    def _tsquery(q: str):
+        return func.websearch_to_tsquery(cast(SEARCH_CONFIG, REGCONFIG), q)
+
+    @staticmethod
+    def _partial_match(q: str):
+        # Servido pelos índices GIN gin_trgm_ops em PostgreSQL
+        like = f"%{q}%"
+        return or_(
+            Property.title.ilike(like),
+            Property.external_id.ilike(like),
+            Property.property_code.ilike(like),
+            Property.address_neighborhood.ilike(like),
+            Property.address_street.ilike(like)
+        )
+
+    @staticmethod
+    def apply_search(query, q: str):
+        """Filtra ``query`` pelo termo ``q`` (sem efeito se ``q`` for vazio)."""
+        q = (q or '').strip()
+        if not q:
+            return query
+
+        if not PropertySearchService.full_text_enabled():
+            return query.filter(PropertySearchService._partial_match(q))
+
+        return query.filter(or_(
+            PropertySearchService._search_vector().op('@@')(PropertySearchService._tsquery(q)),
+            PropertySearchService._partial_match(q)
+        ))
+
+    @staticmethod
+    def rank_expression(q: str):
+        """Expressão de relevância para ``q`` ou ``None`` se não suportada.
+
+        Combina ``ts_rank_cd`` do texto com a similaridade trigram dos códigos,
+        para que buscas por código (ex.: ``AP2536``) fiquem no topo.
+        """
+        q = (q or '').strip()
+        if not q or not PropertySearchService.full_text_enabled():
+            return None
+
+        text_rank = func.ts_rank_cd(PropertySearchService._search_vector(), PropertySearchService._tsquery(q))
+        code_rank = func.greatest(
+            func.similarity(func.coalesce(Property.property_code, ''), q),
+            func.similarity(Property.external_id, q)
+        )
+        return text_rank + code_rank
@@ -0,0 +1,171 @@
+"""
+Uso das quotas de anúncios por tenant (tabela tenant_quota_usage)
+
+Cada linha conta os imóveis de um tenant com um publication_type. Os listeners da
+sessão calculam, no ``before_flush``, quanto cada flush move entre os contadores
+(imóveis criados, apagados, ou com publication_type/tenant_id alterados — os
+valores antigos vêm de um único SELECT em lote) e aplicam os deltas com um upsert
+no ``after_flush``, na mesma transação das escritas. Assim
+``bulk_update_publication_type``, ``update_property`` e os demais caminhos ORM
+mantêm o contador sem código próprio, e a checagem de quota lê uma linha.
+
+Escritas em Core (upsert da importação) chamam ``record`` diretamente;
+``rebuild`` recalcula a partir de property (backfill e correção de desvios).
+"""
+import logging
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from sqlalchemy import delete, func, inspect, select
+
+from extensions import db, register_session_collector
+from models import CanalProContract, Property, TenantQuotaUsage
+from utils.upsert import upsert
+
+logger = logging.getLogger(__name__)
+
+_CONFLICT_KEYS = ('tenant_id', 'publication_type')
+_UNCHANGED = object()
+
+
+def publication_key(value: Optional[str]) -> str:
+    """Chave do contador: vazio/NULL conta como STANDARD (como os relatórios de quota)."""
+    return (value or 'STANDARD').upper()
+
+
+class TenantQuotaService:
+    """Contadores de uso e checagem de quota por tenant."""
+
+    @staticmethod
+    def record(deltas: Dict[Tuple[int, str], int], connection=None) -> None:
+        """Soma ``deltas`` {(tenant_id, publication_type): n} aos contadores (sem commit)."""
+        rows = [
+            {'tenant_id': tenant_id, 'publication_type': publication_key(pub_type), 'property_count': count}
+            for (tenant_id, pub_type), count in deltas.items()
+            if tenant_id is not None and count
+        ]
+        if not rows:
+            return
+        connection = connection if connection is not None else db.session.connection()
+        table = TenantQuotaUsage.__table__
+        now = datetime.now(timezone.utc)
+        upsert(
+            connection, table, [dict(row, updated_at=now) for row in rows], _CONFLICT_KEYS,
+            lambda incoming: {'property_count': table.c.property_count + incoming['property_count'], 'updated_at': now},
+        )
+
+    @staticmethod
+    def usage(tenant_id: int) -> Dict[str, int]:
+        """Imóveis por publication_type do tenant."""
+        table = TenantQuotaUsage.__table__
+        return {
+            pub_type: count
+            for pub_type, count in db.session.execute(
+                select(table.c.publication_type, table.c.property_count).where(table.c.tenant_id == tenant_id)
+            )
+            if count
+        }
+
+    @staticmethod
+    def check(tenant_id: int, publication_type: Optional[str], additional: int = 1) -> Dict[str, Any]:
+        """
+        Verifica se ``additional`` imóveis cabem na quota de ``publication_type``.
+
+        Lê o contrato e os contadores do tenant (sem agrupar property).
+
+        Returns:
+            dict: used, limit, remaining (após a escrita) e allowed, para o tipo e para o total
+        """
+        key = publication_key(publication_type)
+        usage = TenantQuotaService.usage(tenant_id)
+        contract = CanalProContract.query.filter_by(tenant_id=tenant_id, provider='gandalf').first()
+        highlight_limits = (contract.highlight_limits if contract else None) or {}
+        max_listings = contract.max_listings if contract else None
+
+        def entry(used: int, limit: Optional[int]) -> Dict[str, Any]:
+            remaining = (limit - used - additional) if limit is not None else None
+            return {'used': used, 'limit': limit, 'remaining': remaining,
+                    'allowed': remaining is None or remaining >= 0}
+
+        by_type = entry(usage.get(key, 0), highlight_limits.get(key) if isinstance(highlight_limits, dict) else None)
+        total = entry(sum(usage.values()), max_listings if isinstance(max_listings, int) else None)
+        return {'publication_type': key, 'type': by_type, 'total': total,
+                'allowed': by_type['allowed'] and total['allowed']}
+
+    @staticmethod
+    def rebuild(tenant_id: Optional[int] = None) -> int:
+        """Recalcula os contadores a partir de property (com commit). Retorna linhas gravadas."""
+        table = TenantQuotaUsage.__table__
+        props = Property.__table__
+        key = func.upper(func.coalesce(func.nullif(props.c.publication_type, ''), 'STANDARD'))
+        source = select(props.c.tenant_id, key, func.count()).group_by(props.c.tenant_id, key)
+        purge = delete(table)
+        if tenant_id is not None:
+            source = source.where(props.c.tenant_id == tenant_id)
+            purge = purge.where(table.c.tenant_id == tenant_id)
+
+        now = datetime.now(timezone.utc)
+        rows = [
+            {'tenant_id': row_tenant, 'publication_type': pub_type, 'property_count': count, 'updated_at': now}
+            for row_tenant, pub_type, count in db.session.execute(source)
+        ]
+        db.session.execute(purge)
+        if rows:
+            db.session.execute(table.insert(), rows)
+        db.session.commit()
+        logger.info("Rebuilt tenant quota usage (%d rows)", len(rows))
+        return len(rows)
+
+
+# ---------------------------------------------------------------------------
+# Manutenção automática dos contadores pelas escritas ORM em Property
+# ---------------------------------------------------------------------------
+
+def _collect_deltas(session) -> Counter:
+    deltas = Counter()
+    # id -> (tenant_id novo, publication_type novo) ou None quando apagado
+    changed: Dict[int, Optional[Tuple[Any, Any]]] = {}
+    for instance in session.new:
+        if isinstance(instance, Property):
+            deltas[(instance.tenant_id, publication_key(instance.publication_type))] += 1
+    for instance in session.deleted:
+        state = inspect(instance)
+        if isinstance(instance, Property) and state.identity:
+            changed[state.identity[0]] = None
+    for instance in session.dirty:
+        state = inspect(instance)
+        if not isinstance(instance, Property) or not state.identity:
+            continue
+        # Histórico não dispara carga de atributos expirados
+        tenant_history = state.attrs.tenant_id.history
+        type_history = state.attrs.publication_type.history
+        if tenant_history.added or type_history.added:
+            changed[state.identity[0]] = (
+                tenant_history.added[0] if tenant_history.added else _UNCHANGED,
+                type_history.added[0] if type_history.added else _UNCHANGED,
+            )
+
+    if changed:
+        # Valores antigos direto do banco (o flush ainda não aconteceu), sem autoflush
+        props = Property.__table__
+        for prop_id, old_tenant, old_type in session.connection().execute(
+            select(props.c.id, props.c.tenant_id, props.c.publication_type).where(props.c.id.in_(list(changed)))
+        ):
+            deltas[(old_tenant, publication_key(old_type))] -= 1
+            new = changed[prop_id]
+            if new is not None:
+                new_tenant, new_type = new
+                deltas[(old_tenant if new_tenant is _UNCHANGED else new_tenant,
+                        publication_key(old_type if new_type is _UNCHANGED else new_type))] += 1
+
+    return Counter({key: count for key, count in deltas.items() if count})
+
+
+def register_session_listeners() -> None:
+    """Registra os listeners (idempotente): deltas no before_flush, upsert no after_flush (mesma transação)."""
+    register_session_collector(
+        'tenant_quota_deltas', _collect_deltas,
+        lambda session, deltas: TenantQuotaService.record(deltas, session.connection()),
+        collect_on='before_flush', apply_on='after_flush',
+    )
@@ -3,36 +3,45 @@ Configuração de tasks periódicas para o sistema de refresh schedule
 """
 from celery.schedules import crontab
 
+from utils.redis_client import REDIS_URL
+
 
 # Configurações de tasks periódicas para o Celery Beat
 REFRESH_SCHEDULER_BEAT_SCHEDULE = {
-    # Processar lote de refresh a cada 2 minutos (sistema individual)
-    'process-refresh-batch': {
-        'task': 'refresh_scheduler.process_refresh_batch',
-        'schedule': crontab(minute='*/2'),  # A cada 2 minutos
+    # Os refreshes disparam pelo timer wheel (scripts/run_refresh_timer_dispatcher.py) no
+    # horário de cada next_run; as tasks abaixo são só redes de segurança de baixa frequência.
+    # (Substituem process_refresh_batch a cada 2 min e check_and_execute_schedules a cada 1 min,
+    # que voltam ao beat quando não há REDIS_URL: ver REFRESH_POLLING_BEAT_SCHEDULE.)
+
+    # Reconstrói o índice do timer wheel a partir do banco e dispara o que estiver vencido
+    'refresh-timer-wheel-reconcile': {
+        'task': 'refresh_scheduler.reconcile_timer_wheel',
+        'schedule': crontab(minute='*/15'),  # A cada 15 minutos
         'options': {
-            'expires': 110,  # Expira em 110 segundos
+            'expires': 600,  # Expira em 10 minutos
         }
     },
-    
-    # Processar agendamentos de listas a cada 1 minuto (sistema de listas)
-    'process-refresh-schedules': {
-        'task': 'refresh_scheduler.check_and_execute_schedules',
-        'schedule': crontab(minute='*/1'),  # A cada 1 minuto
+
+    # Dispatcher de jobs pendentes (claim SKIP LOCKED + fan-out na fila refresh_scheduler).
+    # Normalmente acordado pelo timer wheel quando jobs são criados; aqui recupera leases vencidos
+    'process-pending-jobs': {
+        'task': 'refresh_scheduler.process_pending_jobs',
+        'schedule': crontab(minute='*/5'),  # A cada 5 minutos
         'options': {
-            'expires': 50,  # Expira em 50 segundos
+            'expires': 240,  # Expira em 4 minutos
         }
     },
     
-    # Processar jobs pendentes a cada 30 segundos (execução real dos jobs)
-    'process-pending-jobs': {
-        'task': 'refresh_scheduler.process_pending_jobs',
-        'schedule': 30.0,  # A cada 30 segundos
+    # Recalcula as últimas 25h do rollup de KPIs (dashboards leem só dele)
+    'refresh-kpi-rollup-reconcile': {
+        'task': 'refresh_scheduler.reconcile_kpi_rollup',
+        'schedule': crontab(minute=7),  # A cada hora
+        'kwargs': {'hours': 25},
         'options': {
-            'expires': 25,  # Expira em 25 segundos
+            'expires': 1800,  # Expira em 30 minutos
         }
     },
-    
+
     # Health check da fila a cada 5 minutos
     'queue-health-check': {
         'task': 'refresh_scheduler.queue_health_check',
@@ -50,6 +59,41 @@ REFRESH_SCHEDULER_BEAT_SCHEDULE = {
     },
 }
 
+# Sem REDIS_URL o índice do timer wheel fica em memória em cada processo: o web e o
+# dispatcher não compartilham estado e o dispatcher nem sobe. Nesse caso o beat volta
+# a varrer as tabelas como antes do timer wheel.
+REFRESH_POLLING_BEAT_SCHEDULE = {
+    # Processar lote de refresh a cada 2 minutos (sistema individual)
+    'process-refresh-batch': {
+        'task': 'refresh_scheduler.process_refresh_batch',
+        'schedule': crontab(minute='*/2'),  # A cada 2 minutos
+        'options': {
+            'expires': 110,  # Expira em 110 segundos
+        }
+    },
+
+    # Processar agendamentos de listas a cada 1 minuto (sistema de listas)
+    'process-refresh-schedules': {
+        'task': 'refresh_scheduler.check_and_execute_schedules',
+        'schedule': crontab(minute='*/1'),  # A cada 1 minuto
+        'options': {
+            'expires': 50,  # Expira em 50 segundos
+        }
+    },
+
+    # Sem o timer wheel ninguém acorda o dispatcher de jobs: volta a rodar a cada 30 segundos
+    'process-pending-jobs': {
+        'task': 'refresh_scheduler.process_pending_jobs',
+        'schedule': 30.0,  # A cada 30 segundos
+        'options': {
+            'expires': 25,  # Expira em 25 segundos
+        }
+    },
+}
+
+if not REDIS_URL:
+    REFRESH_SCHEDULER_BEAT_SCHEDULE.update(REFRESH_POLLING_BEAT_SCHEDULE)
+
 
 def register_refresh_scheduler_tasks(app):
     """
@@ -2,8 +2,9 @@
 Celery tasks for refresh scheduling system
 """
 import logging
-from datetime import datetime
+from datetime import datetime, timezone
 from celery import shared_task
+from sqlalchemy import or_
 
 # pylint: disable=import-error
 from properties.services.refresh_scheduler_service import RefreshSchedulerService
@@ -17,10 +18,9 @@ def check_and_execute_schedules(self):  # pylint: disable=unused-argument
     Task que roda periodicamente para verificar e executar schedules
     Deve ser executada a cada minuto via cron
     """
-    from app import create_app
+    from worker_app import worker_app_context
     
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             logger.info("Starting scheduled refresh check at %s", datetime.utcnow())
             # Verificar schedules que devem ser executados
@@ -60,84 +60,118 @@ def check_and_execute_schedules(self):  # pylint: disable=unused-argument
             raise
 
 
+@shared_task(bind=True, name='refresh_scheduler.run_due_schedule')
+def run_due_schedule(self, schedule_id):  # pylint: disable=unused-argument
+    """
+    Executa um schedule de lista no horário, disparado pelo timer wheel
+    Args:
+        schedule_id: ID do RefreshSchedule vencido
+    """
+    from worker_app import worker_app_context
+
+    with worker_app_context():
+        executed, result = RefreshSchedulerService.execute_due_schedule(schedule_id)
+        if executed:
+            logger.info("Schedule %d executed on time: %s", schedule_id, result.get('message', ''))
+        else:
+            logger.debug("Schedule %d not executed: %s", schedule_id, result.get('message') or result.get('error'))
+        return {'schedule_id': schedule_id, 'executed': executed, 'result': result}
+
+
+@shared_task(bind=True, name='refresh_scheduler.reconcile_timer_wheel')
+def reconcile_timer_wheel(self):  # pylint: disable=unused-argument
+    """
+    Reconstrói o índice do timer wheel a partir do banco e dispara o que venceu
+    Rede de segurança caso o dispatcher esteja parado ou o índice tenha perdido escritas
+    """
+    from worker_app import worker_app_context
+    from properties.services.refresh_timer_wheel import RefreshTimerWheel
+
+    with worker_app_context():
+        entries = RefreshTimerWheel.rebuild()
+        sent = RefreshTimerWheel.dispatch_due()
+        return {'entries': entries, 'dispatched': sent, 'timestamp': datetime.utcnow().isoformat()}
+
+
+# Enquanto houver backlog além das vagas livres, o dispatcher de jobs volta nesse intervalo
+BACKLOG_REDISPATCH_SECONDS = 30
+
+
+def _redispatch_backlog():
+    """Agenda um novo process_pending_jobs no timer wheel."""
+    from datetime import timedelta
+    from properties.services.refresh_timer_wheel import RefreshTimerWheel
+    try:
+        RefreshTimerWheel.request_dispatch(datetime.now(timezone.utc) + timedelta(seconds=BACKLOG_REDISPATCH_SECONDS))
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Could not schedule backlog dispatch: %s", str(e))
+
+
 @shared_task(bind=True, name='refresh_scheduler.process_pending_jobs')
-def process_pending_jobs(self, batch_size=10):  # pylint: disable=unused-argument
+def process_pending_jobs(self, batch_size=None):  # pylint: disable=unused-argument
     """
-    Task que processa jobs pendentes de refresh
+    Dispatcher dos jobs pendentes de refresh
+
+    Reivindica jobs com SELECT ... FOR UPDATE SKIP LOCKED (lease) até completar
+    REFRESH_MAX_IN_FLIGHT jobs em andamento e distribui cada um como
+    execute_refresh_job na fila refresh_scheduler; a execução escala com os workers.
+    Args:
+        batch_size: Limite de jobs reivindicados nesta execução (padrão: vagas livres)
     """
-    from app import create_app
-    from models import RefreshJob, Property
-    from extensions import db
-    from flask import g
-    
-    app = create_app()
-    with app.app_context():
+    from worker_app import worker_app_context
+    from properties.services.refresh_executor import RefreshJobExecutor
+
+    with worker_app_context():
+        leases_expired = RefreshJobExecutor.reap_expired_leases()
+        free_slots = RefreshJobExecutor.MAX_IN_FLIGHT - RefreshJobExecutor.in_flight_count()
+        limit = min(batch_size or free_slots, free_slots)
+        if limit <= 0:
+            _redispatch_backlog()
+            return {'jobs_dispatched': 0, 'leases_expired': leases_expired, 'message': 'Max in-flight reached'}
+
+        lease_token = RefreshJobExecutor.new_lease_token()
+        job_ids = RefreshJobExecutor.claim_jobs(limit, lease_token)
+        if not job_ids:
+            return {'jobs_dispatched': 0, 'leases_expired': leases_expired, 'message': 'No pending jobs'}
+        if len(job_ids) == limit:
+            # Provavelmente sobrou backlog: volta em BACKLOG_REDISPATCH_SECONDS
+            _redispatch_backlog()
+
+        dispatched = 0
         try:
-            # Buscar jobs pendentes
-            pending_jobs = RefreshJob.query.filter(
-                RefreshJob.status == 'pending'
-            ).order_by(
-                RefreshJob.scheduled_at.asc(),
-                RefreshJob.created_at.asc()
-            ).limit(batch_size).all()
-            
-            if not pending_jobs:
-                return {'jobs_processed': 0, 'message': 'No pending jobs'}
-                
-            jobs_successful = 0
-            jobs_failed = 0
-            
-            for job in pending_jobs:
-                try:
-                    # Marcar como running
-                    job.status = 'running'
-                    job.started_at = datetime.utcnow()
-                    db.session.commit()
-                    
-                    # Obter propriedade e tenant_id
-                    property_obj = Property.query.get(job.property_id)
-                    if not property_obj:
-                        raise Exception(f"Property {job.property_id} not found")
-                    
-                    # CRÍTICO: Importar PropertyService ANTES de definir contexto
-                    from properties.services.property_service import PropertyService
-                    
-                    # Definir tenant_id no contexto Flask
-                    g.tenant_id = property_obj.tenant_id
-                    
-                    # Log para debug
-                    logger.info(f"Job {job.id}: Contexto definido - tenant_id={g.tenant_id}, property_id={job.property_id}")
-                    
-                    # Chamar refresh com contexto correto
-                    success, result = PropertyService.refresh_property(job.property_id)
-                    
-                    if success:
-                        job.status = 'completed'
-                        job.completed_at = datetime.utcnow()
-                        job.error_message = None
-                        jobs_successful += 1
-                    else:
-                        job.status = 'failed'
-                        job.completed_at = datetime.utcnow()
-                        job.error_message = str(result) if result else 'Refresh failed'
-                        jobs_failed += 1
-                    
-                    db.session.commit()
-                    
-                except Exception as e:  # pylint: disable=broad-except
-                    job.status = 'failed'
-                    job.completed_at = datetime.utcnow()
-                    job.error_message = str(e)
-                    db.session.commit()
-                    jobs_failed += 1
-                    
-            return {
-                'jobs_processed': len(pending_jobs),
-                'jobs_successful': jobs_successful,
-                'jobs_failed': jobs_failed
-            }
+            for job_id in job_ids:
+                execute_refresh_job.apply_async(args=[job_id, lease_token])
+                dispatched += 1
         except Exception as e:  # pylint: disable=broad-except
-            raise
+            released = RefreshJobExecutor.release_jobs(job_ids[dispatched:], lease_token)
+            logger.error("Failed to dispatch refresh jobs (%d released): %s", released, str(e))
+
+        logger.info("Dispatched %d refresh jobs (lease %s)", dispatched, lease_token)
+        return {
+            'jobs_dispatched': dispatched,
+            'leases_expired': leases_expired,
+            'lease_token': lease_token
+        }
+
+
+@shared_task(bind=True, name='refresh_scheduler.execute_refresh_job')
+def execute_refresh_job(self, job_id, lease_token):  # pylint: disable=unused-argument
+    """
+    Executa um job reivindicado pelo dispatcher (mantém o lease por heartbeat)
+    Args:
+        job_id: ID do job
+        lease_token: Token do claim; só o dono do lease finaliza o job
+    """
+    from worker_app import worker_app_context
+    from properties.services.refresh_executor import RefreshJobExecutor
+
+    with worker_app_context():
+        success, result = RefreshJobExecutor.run_job(job_id, lease_token)
+        if success:
+            logger.info("Refresh job %d completed", job_id)
+        else:
+            logger.error("Refresh job %d failed: %s", job_id, result.get('error', 'Unknown error'))
+        return {'job_id': job_id, 'success': success, 'result': result}
 
 
 @shared_task(bind=True, name='refresh_scheduler.process_single_job')
@@ -217,6 +251,22 @@ def cleanup_old_jobs(self, days_to_keep=30):  # pylint: disable=unused-argument
         raise
 
 
+@shared_task(bind=True, name='refresh_scheduler.reconcile_kpi_rollup')
+def reconcile_kpi_rollup(self, hours=25):  # pylint: disable=unused-argument
+    """
+    Recalcula as últimas horas do rollup de KPIs a partir de refresh_jobs
+    (corrige desvios, p.ex. jobs apagados em cascata junto com o imóvel)
+    Args:
+        hours: Janela recalculada; use a retenção de cleanup_old_jobs para o backfill inicial
+    """
+    from worker_app import worker_app_context
+    from properties.services.refresh_kpi_service import RefreshKpiService
+
+    with worker_app_context():
+        jobs = RefreshKpiService.reconcile(hours)
+        return {'jobs_scanned': jobs, 'hours': hours, 'timestamp': datetime.utcnow().isoformat()}
+
+
 @shared_task(bind=True, name='refresh_scheduler.health_check')
 def health_check(self):  # pylint: disable=unused-argument
     """
@@ -228,23 +278,32 @@ def health_check(self):  # pylint: disable=unused-argument
         from models import RefreshJob, RefreshSchedule
         from datetime import timedelta
         logger.info("Starting refresh scheduler health check")
-        # Verificar jobs "running" há muito tempo (mais de 1 hora)
-        stale_threshold = datetime.utcnow() - timedelta(hours=1)
+        # Verificar jobs "running" há muito tempo (mais de 1 hora); colunas timestamptz: agora em UTC aware
+        now = datetime.now(timezone.utc)
+        stale_threshold = now - timedelta(hours=1)
+        # Jobs com lease válido estão sendo renovados por heartbeat: não são "presos"
         stale_jobs = RefreshJob.query.filter(
             RefreshJob.status == 'running',
-            RefreshJob.started_at < stale_threshold
+            RefreshJob.started_at < stale_threshold,
+            or_(RefreshJob.lease_expires_at.is_(None), RefreshJob.lease_expires_at < now)
         ).all()
         if stale_jobs:
             logger.warning(
                 "Found %d stale jobs running for more than 1 hour", len(stale_jobs)
             )
             # Marcar como failed
+            from properties.services.refresh_kpi_service import JobTransition, RefreshKpiService
             for job in stale_jobs:
                 job.status = 'failed'
-                job.completed_at = datetime.utcnow()
+                job.completed_at = now
                 job.error_message = (
                     'Job timed out - marked as failed by health check'
                 )
+            RefreshKpiService.record(
+                JobTransition(job.property.tenant_id if job.property else None, job.refresh_schedule_id,
+                              job.created_at, 'running', 'failed')
+                for job in stale_jobs
+            )
             # pylint: disable=import-error,import-outside-toplevel
             from extensions import db
             db.session.commit()
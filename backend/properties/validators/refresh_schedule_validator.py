@@ -4,6 +4,8 @@ Validators para refresh schedule requests
 import re
 from typing import Tuple, Dict, Any
 
+from models import REFRESH_STRATEGIES
+
 
 class RefreshScheduleValidator:
     """Validadores para requisições de refresh schedule"""
@@ -45,6 +47,10 @@ class RefreshScheduleValidator:
             if not isinstance(freq, int) or freq < 1 or freq > 365:
                 return False, 'frequency_days must be an integer between 1 and 365'
         
+        # refresh_strategy opcional: recreate, update ou touch
+        if 'refresh_strategy' in data and data['refresh_strategy'] not in REFRESH_STRATEGIES:
+            return False, f'refresh_strategy must be one of {list(REFRESH_STRATEGIES)}'
+        
         # property_ids OBRIGATÓRIO - seleção de imóveis é obrigatória
         if 'property_ids' not in data:
             return False, 'É necessário selecionar ao menos um imóvel para o agendamento'
@@ -92,7 +98,7 @@ class RefreshScheduleValidator:
             return False, 'Request body is required'
         
         # Pelo menos um campo deve ser fornecido
-        allowed_fields = ['name', 'time_slot', 'frequency_days', 'is_active']
+        allowed_fields = ['name', 'time_slot', 'frequency_days', 'is_active', 'refresh_strategy']
         if not any(field in data for field in allowed_fields):
             return False, f'At least one of {allowed_fields} must be provided'
         
@@ -120,6 +126,10 @@ class RefreshScheduleValidator:
             if not isinstance(freq, int) or freq < 1 or freq > 365:
                 return False, 'frequency_days must be an integer between 1 and 365'
         
+        # refresh_strategy opcional: recreate, update ou touch
+        if 'refresh_strategy' in data and data['refresh_strategy'] not in REFRESH_STRATEGIES:
+            return False, f'refresh_strategy must be one of {list(REFRESH_STRATEGIES)}'
+        
         # Validar is_active se fornecido
         if 'is_active' in data:
             if not isinstance(data['is_active'], bool):
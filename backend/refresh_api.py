@@ -6,8 +6,10 @@ import logging
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt
 from datetime import datetime, timedelta
+from sqlalchemy.orm import joinedload
 from extensions import db
 from models import RefreshSchedule, RefreshJob, Property
+from properties.services.refresh_kpi_service import RefreshKpiService
 from properties.services.refresh_scheduler_service import RefreshSchedulerService
 
 logger = logging.getLogger(__name__)
@@ -48,21 +50,22 @@ def get_refresh_data():
                 'jobs_last_24h': {'total': 0, 'completed': 0, 'failed': 0, 'pending': 0}
             }
         
-        # Obter cronogramas do tenant
+        # Obter cronogramas do tenant (contagem de imóveis numa única consulta agrupada)
         schedules = RefreshSchedule.query.filter_by(tenant_id=tenant_id).all()
         active_schedules = [s for s in schedules if s.is_active]
+        properties_count = RefreshKpiService.schedule_property_counts([s.id for s in schedules])
         
-        # Obter jobs recentes (últimas 24h)
+        # Últimos jobs (só a lista exibida; os agregados vêm do rollup)
         last_24h = datetime.utcnow() - timedelta(hours=24)
-        recent_jobs_query = db.session.query(RefreshJob).join(Property).filter(
+        recent_jobs = db.session.query(RefreshJob).join(Property).options(
+            joinedload(RefreshJob.property), joinedload(RefreshJob.schedule)
+        ).filter(
             Property.tenant_id == tenant_id,
             RefreshJob.created_at >= last_24h
-        ).order_by(RefreshJob.created_at.desc()).limit(50)
-        
-        recent_jobs = recent_jobs_query.all()
+        ).order_by(RefreshJob.created_at.desc()).limit(20).all()
         
         # Calcular KPIs
-        total_properties = sum(s.properties.count() for s in active_schedules)
+        total_properties = sum(properties_count.get(s.id, 0) for s in active_schedules)
         success_rate = 0
         if stats['jobs_last_24h']['total'] > 0:
             success_rate = round(
@@ -74,7 +77,7 @@ def get_refresh_data():
             efficiency = round((len(active_schedules) / len(schedules)) * 100)
         
         # Status do sistema
-        system_status = determine_system_status(stats, recent_jobs)
+        system_status = determine_system_status(stats)
         
         # Próximas execuções
         next_executions = []
@@ -84,7 +87,7 @@ def get_refresh_data():
                     'schedule_id': schedule.id,
                     'schedule_name': schedule.name,
                     'next_execution': schedule.next_run.isoformat(),
-                    'properties_count': schedule.properties.count()
+                    'properties_count': properties_count.get(schedule.id, 0)
                 })
         
         next_executions.sort(key=lambda x: x['next_execution'])
@@ -103,7 +106,7 @@ def get_refresh_data():
                 'success_rate': success_rate,
                 'efficiency': efficiency,
                 'jobs_last_24h': stats['jobs_last_24h'],
-                'pending_jobs': len([j for j in recent_jobs if j.status == 'pending'])
+                'pending_jobs': stats['jobs_last_24h']['pending']
             },
             
             # Estatísticas detalhadas
@@ -118,7 +121,7 @@ def get_refresh_data():
                     'id': s.id,
                     'name': s.name,
                     'is_active': s.is_active,
-                    'properties_count': s.properties.count(),
+                    'properties_count': properties_count.get(s.id, 0),
                     'next_run': s.next_run.isoformat() if s.next_run else None,
                     'last_run': s.last_run.isoformat() if s.last_run else None,
                     'time_slot': s.time_slot.strftime('%H:%M') if s.time_slot else None,
@@ -143,14 +146,14 @@ def get_refresh_data():
                     'completed_at': j.completed_at.isoformat() if j.completed_at else None,
                     'error_message': j.error_message
                 }
-                for j in recent_jobs[:20]
+                for j in recent_jobs
             ],
             
             # Métricas de performance
             'performance': {
-                'avg_execution_time': calculate_avg_execution_time(recent_jobs),
-                'failure_rate': calculate_failure_rate(recent_jobs),
-                'most_active_schedule': get_most_active_schedule(active_schedules) if active_schedules else None,
+                'avg_execution_time': stats.get('avg_duration_seconds', 0),
+                'failure_rate': calculate_failure_rate(stats['jobs_last_24h']),
+                'most_active_schedule': get_most_active_schedule(active_schedules, properties_count) if active_schedules else None,
                 'properties_per_schedule': round(total_properties / len(active_schedules)) if active_schedules else 0
             }
         }
@@ -295,11 +298,8 @@ def get_health():
         except Exception as e:
             logger.warning(f"Celery check failed: {e}")
         
-        # Verificar jobs pendentes
-        pending_jobs = RefreshJob.query.join(Property).filter(
-            Property.tenant_id == tenant_id,
-            RefreshJob.status == 'pending'
-        ).count()
+        # Verificar jobs pendentes (rollup de KPIs)
+        pending_jobs = RefreshKpiService.totals(tenant_id)['pending']
         
         # Verificar cronogramas ativos
         active_schedules = RefreshSchedule.query.filter_by(
@@ -345,7 +345,7 @@ def get_health():
         }), 500
 
 
-def determine_system_status(stats, recent_jobs):
+def determine_system_status(stats):
     """Determina o status geral do sistema baseado nas estatísticas"""
     status = 'healthy'
     issues = []
@@ -380,38 +380,21 @@ def determine_system_status(stats, recent_jobs):
     }
 
 
-def calculate_avg_execution_time(jobs):
-    """Calcula tempo médio de execução dos jobs"""
-    completed_jobs = [j for j in jobs if j.status == 'completed' and j.completed_at and j.created_at]
-    
-    if not completed_jobs:
+def calculate_failure_rate(jobs_summary):
+    """Calcula taxa de falha a partir dos contadores do rollup"""
+    if not jobs_summary.get('total'):
         return 0
-    
-    total_time = 0
-    for job in completed_jobs:
-        duration = (job.completed_at - job.created_at).total_seconds()
-        total_time += duration
-    
-    return round(total_time / len(completed_jobs), 2)
+    return round((jobs_summary.get('failed', 0) / jobs_summary['total']) * 100, 2)
 
 
-def calculate_failure_rate(jobs):
-    """Calcula taxa de falha dos jobs"""
-    if not jobs:
-        return 0
-    
-    failed_jobs = len([j for j in jobs if j.status == 'failed'])
-    return round((failed_jobs / len(jobs)) * 100, 2)
-
-
-def get_most_active_schedule(schedules):
+def get_most_active_schedule(schedules, properties_count):
     """Encontra o cronograma mais ativo"""
     if not schedules:
         return None
     
-    most_active = max(schedules, key=lambda s: s.properties.count())
+    most_active = max(schedules, key=lambda s: properties_count.get(s.id, 0))
     return {
         'id': most_active.id,
         'name': most_active.name,
-        'properties_count': most_active.properties.count()
-    }
\ No newline at end of file
+        'properties_count': properties_count.get(most_active.id, 0)
+    }
@@ -6,15 +6,27 @@ Rotas para o painel administrativo do dono do CRM
 from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from sqlalchemy import func, desc, text
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
 from models import db, Tenant, User, Property
 from utils.auth import admin_required
+from tasks.admin_dashboard_rollup import AdminDashboardRollup
 import logging
 
 logger = logging.getLogger(__name__)
 
 admin_dashboard_bp = Blueprint('admin_dashboard', __name__)
 
+
+def _staleness(refreshed_at):
+    """Instante do último cálculo do rollup e idade em segundos."""
+    if refreshed_at is None:
+        return {'refreshed_at': None, 'stale_seconds': None}
+    return {
+        'refreshed_at': refreshed_at.isoformat(),
+        'stale_seconds': int((datetime.now(timezone.utc) - refreshed_at).total_seconds()),
+    }
+
+
 @admin_dashboard_bp.route('/api/admin/dashboard/overview', methods=['GET'])
 @jwt_required()
 @admin_required
@@ -26,22 +38,19 @@ def dashboard_overview():
         logger.debug('dashboard_overview headers: %s', dict(request.headers))
         logger.debug('dashboard_overview cookies: %s', request.cookies)
 
-        total_tenants = db.session.query(func.count(Tenant.id)).scalar() or 0
-        active_tenants = db.session.query(func.count(Tenant.id)).filter(Tenant.is_active.is_(True)).scalar() or 0
-        new_tenants_30d = db.session.query(func.count(Tenant.id)).filter(
-            Tenant.created_at >= datetime.utcnow() - timedelta(days=30)
-        ).scalar() or 0
-
-        total_users = db.session.query(func.count(User.id)).scalar() or 0
-        total_properties = db.session.query(func.count(Property.id)).scalar() or 0
+        # Totais pré-calculados por tasks.admin_dashboard_rollup (custo fixo por requisição)
+        totals, new_30d, refreshed_at = AdminDashboardRollup.overview()
+        total_tenants = totals.get('tenants_total', 0)
+        total_users = totals.get('users_total', 0)
+        total_properties = totals.get('properties_total', 0)
 
         return jsonify({
             'success': True,
             'data': {
                 'tenants': {
                     'total': total_tenants,
-                    'active': active_tenants,
-                    'new_30d': new_tenants_30d,
+                    'active': totals.get('tenants_active', 0),
+                    'new_30d': new_30d.get('tenants', 0),
                     'growth_rate': 0.0,
                 },
                 'users': {
@@ -53,14 +62,15 @@ def dashboard_overview():
                 'properties': {
                     'total': total_properties,
                     'active': total_properties,
-                    'new_30d': 0,
+                    'new_30d': new_30d.get('properties', 0),
                     'avg_per_tenant': round(total_properties / max(total_tenants, 1), 2) if total_tenants else 0,
                 },
                 'tenant_distribution': {
-                    'PF': db.session.query(func.count(Tenant.id)).filter(Tenant.tenant_type == 'PF').scalar() or 0,
-                    'PJ': db.session.query(func.count(Tenant.id)).filter(Tenant.tenant_type == 'PJ').scalar() or 0,
+                    'PF': totals.get('tenants_pf', 0),
+                    'PJ': totals.get('tenants_pj', 0),
                 },
-            }
+            },
+            **_staleness(refreshed_at),
         })
 
     except Exception as e:
@@ -218,58 +228,12 @@ def dashboard_growth_stats():
     - Propriedades por mês
     """
     try:
-        # Dados dos últimos 12 meses
-        twelve_months_ago = datetime.utcnow() - timedelta(days=365)
-        
-        # Growth de tenants por mês
-        tenant_growth = db.session.query(
-            func.date_trunc('month', Tenant.created_at).label('month'),
-            func.count(Tenant.id).label('count')
-        ).filter(
-            Tenant.created_at >= twelve_months_ago
-        ).group_by(func.date_trunc('month', Tenant.created_at))\
-         .order_by(func.date_trunc('month', Tenant.created_at)).all()
-        
-        # Growth de usuários por mês
-        user_growth = db.session.query(
-            func.date_trunc('month', User.created_at).label('month'),
-            func.count(User.id).label('count')
-        ).filter(
-            User.created_at >= twelve_months_ago
-        ).group_by(func.date_trunc('month', User.created_at))\
-         .order_by(func.date_trunc('month', User.created_at)).all()
-        
-        # Growth de propriedades por mês
-        property_growth = db.session.query(
-            func.date_trunc('month', Property.created_at).label('month'),
-            func.count(Property.id).label('count')
-        ).filter(
-            Property.created_at >= twelve_months_ago
-        ).group_by(func.date_trunc('month', Property.created_at))\
-         .order_by(func.date_trunc('month', Property.created_at)).all()
-        
+        # Séries mensais somadas do rollup diário (tasks.admin_dashboard_rollup)
+        refreshed_at = AdminDashboardRollup.ensure_refreshed()
         return jsonify({
             'success': True,
-            'data': {
-                'tenants': [
-                    {
-                        'month': growth.month.isoformat() if growth.month else None,
-                        'count': growth.count
-                    } for growth in tenant_growth
-                ],
-                'users': [
-                    {
-                        'month': growth.month.isoformat() if growth.month else None,
-                        'count': growth.count
-                    } for growth in user_growth
-                ],
-                'properties': [
-                    {
-                        'month': growth.month.isoformat() if growth.month else None,
-                        'count': growth.count
-                    } for growth in property_growth
-                ]
-            }
+            'data': AdminDashboardRollup.growth(days=365),
+            **_staleness(refreshed_at),
         })
         
     except Exception as e:
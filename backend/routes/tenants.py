@@ -4,12 +4,12 @@ Permite criar e gerenciar múltiplas imobiliárias/empresas
 """
 from flask import Blueprint, request, jsonify, g
 from extensions import db
-from models import User, Tenant, Property, CanalProContract, IntegrationCredentials
+from models import User, Tenant, Property, CanalProContract, IntegrationCredentials, TenantQuotaUsage
 from auth import tenant_required
 from werkzeug.security import generate_password_hash
 from flask_jwt_extended import jwt_required, get_jwt, get_jwt_identity
 from datetime import datetime, timezone
-from sqlalchemy import func
+from sqlalchemy import and_, func, select
 import re
 from properties.utils.status_catalog import aggregate_status_counts
 
@@ -621,36 +621,29 @@ def get_tenant_token_status(tenant_id):
 def get_all_tenants_quotas():
     """Retorna quotas e uso de TODOS os tenants (Business Center)"""
     try:
-        tenants = Tenant.query.all()
+        # Uma consulta: tenants + contrato + contadores de quota (+ usuários em subconsulta)
+        users_count = select(func.count(User.id)).where(User.tenant_id == Tenant.id).scalar_subquery()
+        rows = db.session.execute(
+            select(Tenant, CanalProContract, users_count, TenantQuotaUsage.publication_type,
+                   TenantQuotaUsage.property_count)
+            .outerjoin(CanalProContract, and_(CanalProContract.tenant_id == Tenant.id,
+                                              CanalProContract.provider == 'gandalf'))
+            .outerjoin(TenantQuotaUsage, TenantQuotaUsage.tenant_id == Tenant.id)
+            .order_by(Tenant.id)
+        ).all()
+
+        tenants = {}
+        for tenant, contract, tenant_users, pub_type, count in rows:
+            entry = tenants.setdefault(tenant.id, (tenant, contract, tenant_users, {}))
+            if pub_type is not None and count:
+                entry[3][pub_type] = count
+
         quotas_data = []
-        
-        for tenant in tenants:
-            # Contagens básicas
-            users_count = User.query.filter_by(tenant_id=tenant.id).count()
-            properties_count = Property.query.filter_by(tenant_id=tenant.id).count()
-            
-            # Buscar configuração de contrato
-            contract = CanalProContract.query.filter_by(
-                tenant_id=tenant.id, 
-                provider='gandalf'
-            ).first()
-            
+        for tenant, contract, users_count, pub_counts in tenants.values():
+            properties_count = sum(pub_counts.values())
             max_listings = contract.max_listings if contract else None
             highlight_limits = contract.highlight_limits if contract else {}
             
-            # Contagem por publication_type
-            pub_counts = {}
-            pub_query = db.session.query(
-                Property.publication_type,
-                func.count(Property.id)
-            ).filter(
-                Property.tenant_id == tenant.id
-            ).group_by(Property.publication_type).all()
-            
-            for pub_type, count in pub_query:
-                key = (pub_type or 'STANDARD').upper()
-                pub_counts[key] = count
-            
             # Calcular uso de destaques
             highlights_usage = {}
             for pub_type in ['STANDARD', 'PREMIUM', 'SUPER_PREMIUM', 'PREMIERE_1', 'PREMIERE_2', 'TRIPLE']:
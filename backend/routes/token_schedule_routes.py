@@ -190,6 +190,7 @@ def delete_schedule_config():
         # Desabilitar
         config.enabled = False
         config.next_execution = None
+        config.next_fire_at = None
         db.session.commit()
         
         logger.info(f"✅ Configuração desabilitada para tenant {tenant_id}")
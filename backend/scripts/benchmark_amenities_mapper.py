@@ -0,0 +1,130 @@
+"""Benchmark do mapeamento de amenities para N exportações de imóveis.
+
+Gera um catálogo sintético no formato da query ``amenities`` do Gandalf (os
+códigos de ``DIRECT_MAPPINGS`` + itens extras) e listas de amenities por imóvel
+misturando rótulos diretos (com variações de caixa/acentos), nomes do catálogo,
+rótulos parciais e rótulos desconhecidos. Compara:
+
+- legado: dicionário de mapeamentos recriado a cada amenity + varredura linear
+  do catálogo (implementação anterior, reproduzida aqui);
+- resolver: ``map_amenities_list`` com o catálogo em cache e o ``AmenityResolver``
+  compilado (``get_amenities`` substituído por um stub com latência artificial,
+  contando quantas vezes a API seria chamada).
+
+Uso:
+    python scripts/benchmark_amenities_mapper.py --exports 10000 --amenities 12
+"""
+
+import argparse
+import logging
+import random
+import sys
+import time
+import unicodedata
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+from integrations import amenities_mapper  # noqa: E402
+from integrations.amenities_mapper import DIRECT_MAPPINGS  # noqa: E402
+
+
+def _catalog(extra):
+    items = [{'name': code, 'singular': label.capitalize(), 'plural': f'{label.capitalize()}s'}
+             for label, code in DIRECT_MAPPINGS.items()]
+    items += [{'name': f'EXTRA_{i}', 'singular': f'Item extra {i}', 'plural': f'Itens extras {i}'}
+              for i in range(extra)]
+    return items
+
+
+def _unaccent(text):
+    return ''.join(ch for ch in unicodedata.normalize('NFKD', text) if not unicodedata.combining(ch))
+
+
+def _workload(exports, per_export, catalog, rng):
+    labels = list(DIRECT_MAPPINGS)
+    pool = (
+        labels
+        + [label.upper() for label in labels]
+        + [_unaccent(label) for label in labels]
+        + [item['singular'] for item in catalog[-50:]]
+        + [f'{label} privativa' for label in labels[:30]]
+        + [f'Recurso desconhecido {i}' for i in range(20)]
+    )
+    return [rng.sample(pool, per_export) for _ in range(exports)]
+
+
+def _legacy_map(amenity_name, canalpro_amenities):
+    """Implementação anterior de map_amenity_to_canalpro (dict por chamada + varredura)."""
+    if not amenity_name or not isinstance(amenity_name, str):
+        return None
+    amenity_lower = amenity_name.lower().strip()
+    direct_mappings = dict(DIRECT_MAPPINGS)
+    canalpro_code = direct_mappings.get(amenity_lower)
+    if canalpro_code:
+        return canalpro_code
+    for canalpro_amenity in canalpro_amenities:
+        canalpro_name_lower = canalpro_amenity['singular'].lower()
+        if amenity_lower in canalpro_name_lower or canalpro_name_lower in amenity_lower:
+            return canalpro_amenity['name']
+        if canalpro_amenity.get('plural'):
+            canalpro_plural_lower = canalpro_amenity['plural'].lower()
+            if amenity_lower in canalpro_plural_lower or canalpro_plural_lower in amenity_lower:
+                return canalpro_amenity['name']
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark amenity mapping for CanalPro exports")
+    parser.add_argument("--exports", type=int, default=10000)
+    parser.add_argument("--amenities", type=int, default=12, help="amenities por imóvel")
+    parser.add_argument("--extra-catalog", type=int, default=150, help="itens extras no catálogo sintético")
+    parser.add_argument("--api-latency-ms", type=float, default=300)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    # O mapeamento loga cada amenity não mapeada; silenciar para não distorcer a medição
+    logging.disable(logging.CRITICAL)
+
+    rng = random.Random(args.seed)
+    catalog = _catalog(args.extra_catalog)
+    workload = _workload(args.exports, args.amenities, catalog, rng)
+    total = args.exports * args.amenities
+    fetches = []
+
+    def fake_get_amenities(creds, unit_type='APARTMENT', listing_type='USED', glossary_version='V4', **kwargs):
+        fetches.append(unit_type)
+        time.sleep(args.api_latency_ms / 1000)
+        return catalog
+
+    amenities_mapper.get_amenities = fake_get_amenities
+    amenities_mapper.reset_cache()
+
+    print(f"{args.exports} exportações x {args.amenities} amenities ({total} mapeamentos), "
+          f"catálogo com {len(catalog)} itens")
+    print(f"{'método':>10} | {'tempo (s)':>10} | {'mapeamentos/s':>14} | {'µs/amenity':>10} | {'chamadas API':>12}")
+    print("-" * 70)
+
+    start = time.perf_counter()
+    legacy_results = [[_legacy_map(a, catalog) for a in amenities] for amenities in workload]
+    elapsed = time.perf_counter() - start
+    # O legado buscava o catálogo uma vez por processo (cache global sem TTL)
+    print(f"{'legado':>10} | {elapsed:>10.3f} | {total / elapsed:>14.0f} | {elapsed / total * 1e6:>10.2f} | {1:>12}")
+
+    start = time.perf_counter()
+    resolver_results = [amenities_mapper.map_amenities_list(amenities, {'authorization': 'bench'})
+                        for amenities in workload]
+    elapsed = time.perf_counter() - start
+    print(f"{'resolver':>10} | {elapsed:>10.3f} | {total / elapsed:>14.0f} | {elapsed / total * 1e6:>10.2f} | "
+          f"{len(fetches):>12}")
+
+    mapped_legacy = sum(1 for result in legacy_results for code in result if code)
+    mapped_resolver = sum(len(result) for result in resolver_results)
+    print(f"\nmapeadas: legado {mapped_legacy}, resolver {mapped_resolver} (após dedupe por imóvel); "
+          f"inclui {args.api_latency_ms:.0f}ms da primeira busca do catálogo")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,175 @@
+"""Benchmark de throughput da exportação Canal Pro contra um stub local da API Gandalf.
+
+Sobe um servidor HTTP local que responde às operações GraphQL usadas pelo
+exportador (uploadImage, listings, createListing, updateListingPublicationType,
+updateListingStatus) com latência artificial, aponta ``GANDALF_URL`` para ele e
+mede ``CanalProExporter.run_export(..., activate=True)`` para cada combinação de
+concorrência. A linha "legado" estima o loop serial antigo (mesmo tempo por
+imóvel com concorrência 1, mais a pausa fixa de 2s entre imóveis).
+
+Uso:
+    python scripts/benchmark_canalpro_export.py --properties 200 --concurrency 1 4 8 --rate 0
+
+Sempre usa um SQLite temporário (os workers fazem commit por imóvel).
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+_tmp_db = os.path.join(tempfile.mkdtemp(), "bench_export.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from integrations import gandalf_service  # noqa: E402
+from integrations.canalpro_exporter import CanalProExporter  # noqa: E402
+from models import IntegrationCredentials, Property, Tenant  # noqa: E402
+
+LEGACY_PAUSE_SECONDS = 2
+
+
+def _make_handler(latency):
+    class GandalfStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def log_message(self, *args):
+            pass
+
+        def _reply(self, payload, content_type='application/json'):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            # Download das imagens de origem
+            time.sleep(latency)
+            self._reply(b'\xff\xd8\xff' + b'0' * 2048, 'image/jpeg')
+
+        def do_POST(self):
+            raw = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+            time.sleep(latency)
+            if 'multipart/form-data' in self.headers.get('Content-Type', ''):
+                return self._reply({'data': {'uploadImage': {'urlImage': f'https://stub/{uuid.uuid4()}.jpg'}}})
+
+            operation = json.loads(raw or b'{}').get('operationName')
+            if operation == 'listings':
+                return self._reply({'data': {'listings': {'listListing': []}}})
+            if operation in ('createListing', 'updateListing'):
+                return self._reply({'data': {operation: {'id': str(uuid.uuid4()), 'errors': []}}})
+            if operation in ('updateListingPublicationType', 'updateListingStatus'):
+                return self._reply({'data': {operation: {'success': True, 'errors': []}}})
+            return self._reply({'errors': [{'message': f'unknown operation {operation}'}]})
+
+    return GandalfStub
+
+
+class _StubExporter(CanalProExporter):
+    """Exportador com credenciais fixas (o stub não valida tokens)."""
+
+    def authenticate(self, app_context=None) -> bool:
+        self.credentials = {'authorization': 'bench-token'}
+        return True
+
+
+def _seed(count, images, base_url):
+    tenant = Tenant(name=f"bench-export-{time.time_ns()}", tenant_type='PJ')
+    db.session.add(tenant)
+    db.session.flush()
+    db.session.add(IntegrationCredentials(tenant_id=tenant.id, provider='gandalf', token_encrypted='-', metadata_json={}))
+    db.session.execute(insert(Property), [
+        {
+            'title': f'Apartamento {i}',
+            'external_id': f'BENCH-EXP-{tenant.id}-{i}',
+            'tenant_id': tenant.id,
+            'status': 'pending',
+            'property_type': 'APARTMENT',
+            'price': 350000,
+            'image_urls': [f'{base_url}img/{i}/{n}.jpg' for n in range(images)],
+        }
+        for i in range(count)
+    ])
+    db.session.commit()
+    ids = [pid for (pid,) in db.session.query(Property.id).filter_by(tenant_id=tenant.id)]
+    return tenant.id, ids
+
+
+def _configure(tenant_id, concurrency, rate):
+    cred = IntegrationCredentials.query.filter_by(tenant_id=tenant_id, provider='gandalf').first()
+    cred.metadata_json = {'export_concurrency': concurrency, 'export_rate_per_second': rate, 'export_burst': max(concurrency, 1)}
+    db.session.commit()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark CanalPro export throughput against a local Gandalf stub")
+    parser.add_argument("--properties", type=int, default=100)
+    parser.add_argument("--images", type=int, default=3)
+    parser.add_argument("--latency-ms", type=float, default=80)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 6])
+    parser.add_argument("--rate", type=float, default=0, help="requisições/s por tenant (0 = sem limite)")
+    args = parser.parse_args(argv)
+
+    # O exportador loga cada etapa em INFO; silenciar para não distorcer a medição
+    logging.disable(logging.INFO)
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f'http://127.0.0.1:{server.server_address[1]}/'
+    gandalf_service.GANDALF_URL = base_url
+
+    app = create_app()
+    try:
+        with app.app_context():
+            db.engine.echo = False
+            db.create_all()
+            tenant_id, ids = _seed(args.properties, args.images, base_url)
+
+            print(f"{args.properties} imóveis, {args.images} imagens cada, latência do stub {args.latency_ms:.0f}ms, "
+                  f"taxa {args.rate or 'sem limite'}/s")
+            print(f"{'concorrência':>12} | {'tempo (s)':>10} | {'imóveis/s':>10} | {'ok':>5} | {'falhas':>6}")
+            print("-" * 56)
+
+            serial_seconds = None
+            for concurrency in args.concurrency:
+                _configure(tenant_id, concurrency, args.rate)
+                Property.query.filter(Property.id.in_(ids)).update(
+                    {'status': 'pending', 'remote_id': None}, synchronize_session=False
+                )
+                db.session.commit()
+
+                exporter = _StubExporter(tenant_id)
+                start = time.perf_counter()
+                stats = exporter.run_export(ids, app.app_context(), activate=True)
+                elapsed = time.perf_counter() - start
+                if concurrency == 1:
+                    serial_seconds = elapsed
+                print(f"{concurrency:>12} | {elapsed:>10.2f} | {len(ids) / elapsed:>10.1f} | "
+                      f"{stats['successful']:>5} | {stats['failed']:>6}")
+
+            if serial_seconds is not None:
+                legacy = serial_seconds + LEGACY_PAUSE_SECONDS * len(ids)
+                print(f"{'legado*':>12} | {legacy:>10.2f} | {len(ids) / legacy:>10.1f} |")
+                print(f"* concorrência 1 + pausa fixa de {LEGACY_PAUSE_SECONDS}s por imóvel (loop serial anterior)")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
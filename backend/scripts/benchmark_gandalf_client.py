@@ -0,0 +1,139 @@
+"""Benchmark do cliente HTTP compartilhado do Gandalf contra um stub TLS local.
+
+Sobe um servidor HTTPS local (certificado autoassinado gerado na hora) que
+responde como o endpoint GraphQL e compara, para N chamadas sequenciais de
+``activate_listing_status``:
+
+- ``requests.post`` avulso (nova conexão TCP + handshake TLS por chamada — comportamento anterior);
+- ``gandalf_service`` roteado pelo ``GandalfHTTPClient`` (pool + keep-alive).
+
+Uso:
+    python scripts/benchmark_gandalf_client.py --calls 300
+"""
+
+import argparse
+import datetime
+import ipaddress
+import json
+import os
+import ssl
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+import requests  # noqa: E402
+from cryptography import x509  # noqa: E402
+from cryptography.hazmat.primitives import hashes, serialization  # noqa: E402
+from cryptography.hazmat.primitives.asymmetric import ec  # noqa: E402
+from cryptography.x509.oid import NameOID  # noqa: E402
+
+from integrations import gandalf_service  # noqa: E402
+from integrations.gandalf_client import get_gandalf_client  # noqa: E402
+
+
+class GraphQLStub(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    # Evita o atraso Nagle/delayed-ACK entre cabeçalhos e corpo
+    disable_nagle_algorithm = True
+    connections = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        GraphQLStub.connections.add(self.client_address)
+        self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        body = json.dumps({'data': {'updateListingStatus': {'success': True, 'errors': []}}}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _self_signed_cert(directory):
+    key = ec.generate_private_key(ec.SECP256R1())
+    name = x509.Name([x509.NameAttribute(NameOID.COMMON_NAME, 'localhost')])
+    now = datetime.datetime.now(datetime.timezone.utc)
+    cert = (
+        x509.CertificateBuilder()
+        .subject_name(name).issuer_name(name)
+        .public_key(key.public_key())
+        .serial_number(x509.random_serial_number())
+        .not_valid_before(now - datetime.timedelta(minutes=1))
+        .not_valid_after(now + datetime.timedelta(hours=1))
+        .add_extension(x509.SubjectAlternativeName([
+            x509.DNSName('localhost'), x509.IPAddress(ipaddress.ip_address('127.0.0.1'))
+        ]), critical=False)
+        .sign(key, hashes.SHA256())
+    )
+    cert_path, key_path = os.path.join(directory, 'cert.pem'), os.path.join(directory, 'key.pem')
+    with open(cert_path, 'wb') as f:
+        f.write(cert.public_bytes(serialization.Encoding.PEM))
+    with open(key_path, 'wb') as f:
+        f.write(key.private_bytes(serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8,
+                                  serialization.NoEncryption()))
+    return cert_path, key_path
+
+
+def _measure(fn, calls):
+    samples = []
+    start = time.perf_counter()
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+    samples.sort()
+    return total, statistics.median(samples), samples[max(int(len(samples) * 0.95) - 1, 0)]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pooled Gandalf HTTP client vs bare requests.post over TLS")
+    parser.add_argument("--calls", type=int, default=200)
+    args = parser.parse_args(argv)
+
+    cert_path, key_path = _self_signed_cert(tempfile.mkdtemp())
+    # requests (avulso e Session) confia no certificado do stub via REQUESTS_CA_BUNDLE
+    os.environ['REQUESTS_CA_BUNDLE'] = cert_path
+
+    context = ssl.SSLContext(ssl.PROTOCOL_TLS_SERVER)
+    context.load_cert_chain(cert_path, key_path)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), GraphQLStub)
+    server.socket = context.wrap_socket(server.socket, server_side=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f'https://127.0.0.1:{server.server_address[1]}/'
+    gandalf_service.GANDALF_URL = url
+
+    creds = {'authorization': 'bench-token'}
+    body = {'operationName': 'updateListingStatus', 'variables': {'listingId': '1', 'status': 'ACTIVE'}, 'query': '...'}
+
+    try:
+        GraphQLStub.connections.clear()
+        bare = _measure(lambda: requests.post(url, json=body, timeout=30), args.calls)
+        bare_connections = len(GraphQLStub.connections)
+
+        GraphQLStub.connections.clear()
+        pooled = _measure(lambda: gandalf_service.activate_listing_status(creds, '1', 'ACTIVE'), args.calls)
+        pooled_connections = len(GraphQLStub.connections)
+
+        print(f"{args.calls} chamadas sequenciais (TLS local)")
+        print(f"{'cliente':<26} | {'total (s)':>9} | {'p50 (ms)':>8} | {'p95 (ms)':>8} | conexões")
+        print("-" * 70)
+        print(f"{'requests.post avulso':<26} | {bare[0]:>9.2f} | {bare[1]:>8.2f} | {bare[2]:>8.2f} | {bare_connections}")
+        print(f"{'GandalfHTTPClient (pool)':<26} | {pooled[0]:>9.2f} | {pooled[1]:>8.2f} | {pooled[2]:>8.2f} | {pooled_connections}")
+        print(f"\nmétricas do cliente: {get_gandalf_client().metrics()}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Benchmark da importação do Gandalf: caminho por listing vs upsert por página.
+
+Gera listings sintéticos no formato ``listListing`` e mede, em um SQLite
+temporário, duas passadas (inserção e reimportação) de:
+
+- ``_process_listings_batch``: um SELECT + um commit por listing (comportamento anterior);
+- ``_process_listings_page``: um SELECT + um ``INSERT ... ON CONFLICT`` por página.
+
+Uso:
+    python scripts/benchmark_gandalf_import.py --listings 2000 --page-size 100
+"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+_tmp_db = os.path.join(tempfile.mkdtemp(), "bench_import.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Tenant  # noqa: E402
+from properties.services.import_service import ImportService  # noqa: E402
+
+
+def _listing(prefix, i):
+    return {
+        'externalId': f'{prefix}-{i}', 'title': f'Imóvel {i}', 'status': 'ACTIVE',
+        'bedrooms': i % 5, 'bathrooms': 1 + i % 3, 'usableAreas': [40 + i % 200],
+        'address': {'city': 'Curitiba', 'neighborhood': f'Bairro {i % 30}', 'zipCode': '80000-000'},
+        'pricingInfos': [{'price': str(150000 + i * 10), 'businessType': 'SALE'}],
+        'unitTypes': ['APARTMENT'], 'usageTypes': ['RESIDENTIAL'],
+    }
+
+
+def _run(tenant_id, pages, process):
+    statements = []
+
+    def count(*args):
+        statements.append(1)
+
+    event.listen(db.engine, 'before_cursor_execute', count)
+    start = time.perf_counter()
+    for page in pages:
+        process(tenant_id, page)
+    elapsed = time.perf_counter() - start
+    event.remove(db.engine, 'before_cursor_execute', count)
+    return elapsed, len(statements)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-listing vs per-page Gandalf import")
+    parser.add_argument("--listings", type=int, default=1000)
+    parser.add_argument("--page-size", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.INFO)
+    app = create_app()
+    with app.app_context():
+        db.engine.echo = False
+        db.create_all()
+        tenant = Tenant(name="Benchmark Import")
+        db.session.add(tenant)
+        db.session.commit()
+        ImportService._enqueue_image_downloads = staticmethod(lambda prop, images: None)
+
+        results = []
+        for label, process, prefix in (
+            ('por listing (anterior)', ImportService._process_listings_batch, 'OLD'),
+            ('upsert por página', ImportService._process_listings_page, 'NEW'),
+        ):
+            listings = [_listing(prefix, i) for i in range(args.listings)]
+            pages = [listings[i:i + args.page_size] for i in range(0, len(listings), args.page_size)]
+            for phase in ('inserção', 'reimportação'):
+                elapsed, statements = _run(tenant.id, pages, process)
+                results.append((label, phase, elapsed, statements))
+
+        print(f"{args.listings} listings, páginas de {args.page_size} (SQLite)")
+        print(f"{'caminho':<24} | {'fase':<13} | {'tempo (s)':>9} | {'listings/s':>10} | statements")
+        print("-" * 78)
+        for label, phase, elapsed, statements in results:
+            print(f"{label:<24} | {phase:<13} | {elapsed:>9.2f} | {args.listings / elapsed:>10.0f} | {statements}")
+
+
+if __name__ == "__main__":
+    main()
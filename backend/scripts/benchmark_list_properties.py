@@ -0,0 +1,159 @@
+"""Benchmark da listagem de imóveis acessíveis (próprios + compartilhados) por tamanho de tenant.
+
+Compara a estratégia antiga (materializar IDs em Python e usar ``IN (...)``) com o
+subquery SQL de ``PropertySharingService.accessible_properties_filter``.
+
+Uso:
+    DATABASE_URL=postgresql://... python scripts/benchmark_list_properties.py --sizes 1000 10000 50000
+
+Sem ``DATABASE_URL`` usa um SQLite temporário. Todos os dados sintéticos são
+removidos (rollback) ao final.
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+if not os.getenv("DATABASE_URL"):
+    _tmp_db = os.path.join(tempfile.mkdtemp(), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Property, PropertySharing, Tenant, TenantPartnership  # noqa: E402
+from properties.services.partnership_service import PropertySharingService  # noqa: E402
+
+
+def _legacy_accessible_ids(tenant_id):
+    """Implementação anterior: carrega todas as linhas no ORM e devolve a lista de IDs."""
+    own = [p.id for p in Property.query.filter_by(tenant_id=tenant_id).all()]
+    specific = [
+        s.property_id
+        for s in PropertySharing.query.filter_by(shared_with_tenant_id=tenant_id, is_active=True).all()
+        if not s.is_expired()
+    ]
+    partner_wide = []
+    has_partnership = TenantPartnership.query.filter(
+        ((TenantPartnership.owner_tenant_id == tenant_id) | (TenantPartnership.partner_tenant_id == tenant_id)),
+        TenantPartnership.status == 'active'
+    ).first()
+    if has_partnership:
+        partner_wide = [
+            s.property_id
+            for s in PropertySharing.query.filter_by(shared_with_tenant_id=None, is_active=True).all()
+            if not s.is_expired()
+        ]
+    return list(set(own + specific + partner_wide))
+
+
+def _list_page(query, page_size):
+    total = query.count()
+    items = query.order_by(Property.updated_at.desc()).limit(page_size).all()
+    return total, items
+
+
+def _time(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return statistics.median(samples)
+
+
+def _seed(size, share_every=10):
+    owner = Tenant(name=f"bench-owner-{size}-{time.time_ns()}", tenant_type='PJ')
+    partner = Tenant(name=f"bench-partner-{size}-{time.time_ns()}", tenant_type='PJ')
+    db.session.add_all([owner, partner])
+    db.session.flush()
+
+    rows = [
+        {
+            'title': f'Imóvel {i}',
+            'external_id': f'BENCH-{owner.id}-{i}',
+            'tenant_id': owner.id,
+            'status': 'synced',
+        }
+        for i in range(size)
+    ]
+    db.session.execute(insert(Property), rows)
+
+    partner_rows = [
+        {
+            'title': f'Parceiro {i}',
+            'external_id': f'BENCH-{partner.id}-{i}',
+            'tenant_id': partner.id,
+            'status': 'synced',
+        }
+        for i in range(max(size // share_every, 1))
+    ]
+    db.session.execute(insert(Property), partner_rows)
+
+    db.session.add(TenantPartnership(owner_tenant_id=partner.id, partner_tenant_id=owner.id, status='active'))
+    partner_ids = [pid for (pid,) in db.session.query(Property.id).filter_by(tenant_id=partner.id)]
+    db.session.execute(insert(PropertySharing), [
+        {
+            'property_id': pid,
+            'owner_tenant_id': partner.id,
+            'shared_with_tenant_id': owner.id if idx % 2 else None,
+            'is_active': True,
+        }
+        for idx, pid in enumerate(partner_ids)
+    ])
+    db.session.flush()
+    return owner.id
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark list_properties accessible filter")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000])
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--page-size", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    app = create_app()
+    with app.app_context():
+        db.engine.echo = False
+        if db.engine.dialect.name == 'sqlite':
+            db.create_all()
+
+        print(f"{'tenant size':>12} | {'legacy (ms)':>12} | {'subquery (ms)':>14} | speedup")
+        print("-" * 56)
+        try:
+            for size in args.sizes:
+                tenant_id = _seed(size)
+                expected = set(_legacy_accessible_ids(tenant_id))
+                resolved = set(PropertySharingService.get_property_ids_accessible_by_tenant(tenant_id))
+                assert expected == resolved, "subquery and legacy ID sets diverge"
+
+                def legacy():
+                    ids = _legacy_accessible_ids(tenant_id)
+                    _list_page(Property.query.filter(Property.id.in_(ids)), args.page_size)
+
+                def subquery():
+                    _list_page(
+                        Property.query.filter(PropertySharingService.accessible_properties_filter(tenant_id)),
+                        args.page_size
+                    )
+
+                legacy_ms = _time(legacy, args.repeat)
+                subquery_ms = _time(subquery, args.repeat)
+                speedup = legacy_ms / subquery_ms if subquery_ms else float('inf')
+                print(f"{size:>12} | {legacy_ms:>12.1f} | {subquery_ms:>14.1f} | {speedup:.1f}x")
+        finally:
+            db.session.rollback()
+
+
+if __name__ == "__main__":
+    main()
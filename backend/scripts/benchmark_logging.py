@@ -0,0 +1,163 @@
+"""Microbenchmark do custo por chamada de log nos caminhos quentes das integrações.
+
+Mede, na thread que loga (µs por chamada):
+
+- payload em DEBUG desabilitado: ``json.dumps(payload)[:4000]`` avaliado como
+  argumento (antes) vs ``preview(payload, 4000)`` (serializa só se o nível estiver ativo);
+- resposta do ``list_listings``: headers + ``resp.text[:4000]`` em INFO a cada página
+  (antes) vs linha de status em INFO + corpo amostrado com ``log_sampled`` (DEBUG
+  desligado e ligado, 1 a cada ``--sample-every``);
+- handler: ``StreamHandler`` síncrono vs o mesmo handler atrás de ``async_handler``
+  (QueueHandler/QueueListener), gravando em arquivo local e em um destino lento
+  (``--slow-sink-ms`` por escrita, como um pipe de console/coletor congestionado).
+
+Uso:
+    python scripts/benchmark_logging.py --calls 20000 --sample-every 20
+"""
+
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+from utils import lazy_logging  # noqa: E402
+from utils.lazy_logging import async_handler, log_sampled, preview  # noqa: E402
+
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def _listing():
+    return {
+        'externalId': 'AP2536-1',
+        'title': 'Apartamento 3 quartos com varanda gourmet',
+        'description': 'Descrição longa do imóvel. ' * 40,
+        'amenities': ['POOL', 'GYM', 'BARBECUE_GRILL', 'PARTY_HALL', 'ELEVATOR'] * 4,
+        'images': [{'imageUrl': f'https://cdn.example.com/img/{i}.jpg'} for i in range(10)],
+        'address': {'street': 'Rua Exemplo', 'number': '123', 'city': 'Santos', 'state': 'SP', 'zipCode': '11000-000'},
+        'pricingInfos': [{'businessType': 'SALE', 'price': 850000, 'monthlyCondoFee': 900}],
+    }
+
+
+class _Response:
+    """Imitação de requests.Response com corpo de uma página de listings."""
+
+    status_code = 200
+
+    def __init__(self, body):
+        self.text = body
+        self.headers = {'Content-Type': 'application/json', 'X-Request-Id': 'bench', 'Content-Length': str(len(body))}
+
+
+class _SlowStream:
+    """Destino que bloqueia a cada escrita."""
+
+    def __init__(self, target, delay):
+        self.target = target
+        self.delay = delay
+
+    def write(self, text):
+        time.sleep(self.delay)
+        return self.target.write(text)
+
+    def flush(self):
+        self.target.flush()
+
+
+def _logger(name, handler, level):
+    logger = logging.getLogger(f'bench.{name}')
+    logger.handlers = [handler] if handler else []
+    logger.propagate = False
+    logger.setLevel(level)
+    return logger
+
+
+def _per_call(fn, calls):
+    start = time.perf_counter()
+    for i in range(calls):
+        fn(i)
+    return (time.perf_counter() - start) / calls * 1e6
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Microbenchmark per-call logging overhead")
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--sample-every", type=int, default=20)
+    parser.add_argument("--slow-sink-ms", type=float, default=0.2)
+    parser.add_argument("--slow-calls", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    payload = _listing()
+    response = _Response(json.dumps({'data': {'listings': {'listListing': [payload] * 25}}}))
+    log_path = os.path.join(tempfile.mkdtemp(), 'bench_logging.log')
+    stream = open(log_path, 'a', encoding='utf-8')
+    sync_handler = logging.StreamHandler(stream)
+    sync_handler.setFormatter(logging.Formatter(FORMAT))
+    queued_target = logging.StreamHandler(stream)
+    queued_target.setFormatter(logging.Formatter(FORMAT))
+    queued_handler = async_handler(queued_target)
+
+    info_sync = _logger('info_sync', sync_handler, logging.INFO)
+    info_queued = _logger('info_queued', queued_handler, logging.INFO)
+    slow = _SlowStream(stream, args.slow_sink_ms / 1000)
+    slow_sync_handler = logging.StreamHandler(slow)
+    slow_sync_handler.setFormatter(logging.Formatter(FORMAT))
+    slow_target = logging.StreamHandler(slow)
+    slow_target.setFormatter(logging.Formatter(FORMAT))
+    slow_sync = _logger('slow_sync', slow_sync_handler, logging.INFO)
+    slow_queued = _logger('slow_queued', async_handler(slow_target), logging.INFO)
+    debug_sync = _logger('debug_sync', sync_handler, logging.DEBUG)
+    every = args.sample_every
+
+    cases = [
+        ("payload DEBUG off: json.dumps eager", lambda i: info_sync.debug(
+            'update_listing payload (truncated): %s', json.dumps(payload, default=str)[:4000])),
+        ("payload DEBUG off: preview", lambda i: info_sync.debug(
+            'update_listing payload (truncated): %s', preview(payload, 4000))),
+        ("list_listings: INFO headers+body", lambda i: info_sync.info(
+            'list_listings response status=%s headers=%s body_trunc=%s',
+            response.status_code, dict(response.headers), (response.text or '')[:4000])),
+        ("list_listings: status + sampled (DEBUG off)", lambda i: (
+            info_sync.info('list_listings response page=%s status=%s', i, response.status_code),
+            log_sampled(info_sync, logging.DEBUG, 'bench_off', 'list_listings response page=%s headers=%s body_trunc=%s',
+                        i, response.headers, preview(response.text, 4000), every=every))),
+        (f"list_listings: status + sampled 1/{every} (DEBUG on)", lambda i: (
+            debug_sync.info('list_listings response page=%s status=%s', i, response.status_code),
+            log_sampled(debug_sync, logging.DEBUG, 'bench_on', 'list_listings response page=%s headers=%s body_trunc=%s',
+                        i, response.headers, preview(response.text, 4000), every=every))),
+        ("handler: StreamHandler síncrono (arquivo)", lambda i: info_sync.info(
+            'Imóvel %s exportado com sucesso (remote_id=%s)', i, 'abc-123')),
+        ("handler: QueueHandler (arquivo)", lambda i: info_queued.info(
+            'Imóvel %s exportado com sucesso (remote_id=%s)', i, 'abc-123')),
+    ]
+    slow_cases = [
+        ("handler: StreamHandler síncrono (destino lento)", lambda i: slow_sync.info(
+            'Imóvel %s exportado com sucesso (remote_id=%s)', i, 'abc-123')),
+        ("handler: QueueHandler (destino lento)", lambda i: slow_queued.info(
+            'Imóvel %s exportado com sucesso (remote_id=%s)', i, 'abc-123')),
+    ]
+
+    print(f"{args.calls} chamadas por caso; arquivo de log em {log_path}")
+    print(f"{'caso':>48} | {'µs/chamada':>10}")
+    print("-" * 62)
+    try:
+        for name, fn in cases:
+            print(f"{name:>48} | {_per_call(fn, args.calls):>10.2f}")
+        for name, fn in slow_cases:
+            print(f"{name:>48} | {_per_call(fn, args.slow_calls):>10.2f}")
+        print(f"(destino lento: {args.slow_sink_ms}ms por escrita, {args.slow_calls} chamadas; "
+              f"a fila é drenada ao sair)")
+    finally:
+        lazy_logging._stop_listeners()
+        stream.close()
+
+
+if __name__ == "__main__":
+    main()
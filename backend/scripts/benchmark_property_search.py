@@ -0,0 +1,163 @@
+"""Benchmark da busca ``q=`` de imóveis: ILIKE de cinco colunas vs. tsvector + pg_trgm.
+
+Cria uma tabela sintética (padrão 500k linhas) em PostgreSQL, mede a latência
+(p50/p95) da busca antiga sem índices e, depois de criar a configuração
+``portuguese_unaccent``, a coluna ``search_vector`` e os índices GIN da migração
+20251023_add_property_search, mede a busca nova. A tabela é removida ao final.
+
+Uso:
+    DATABASE_URL=postgresql://... python scripts/benchmark_property_search.py --rows 500000
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+TABLE = "bench_property_search"
+
+TERMS = [
+    "apartamento", "casa setor bueno", "goiania", "AP25", "CA10", "jardim",
+    "Rua 9", "marista", "cobertura", "sobrado", "T-63", "oeste",
+]
+
+TRIGRAM_COLUMNS = ("title", "property_code", "external_id", "address_neighborhood", "address_street")
+
+LEGACY_SQL = f"""
+    SELECT id FROM {TABLE}
+    WHERE title ILIKE :like OR external_id ILIKE :like OR property_code ILIKE :like
+       OR address_neighborhood ILIKE :like OR address_street ILIKE :like
+    ORDER BY updated_at DESC LIMIT 20
+"""
+
+SEARCH_SQL = f"""
+    SELECT id FROM {TABLE}
+    WHERE search_vector @@ websearch_to_tsquery('portuguese_unaccent'::regconfig, :q)
+       OR title ILIKE :like OR external_id ILIKE :like OR property_code ILIKE :like
+       OR address_neighborhood ILIKE :like OR address_street ILIKE :like
+    ORDER BY ts_rank_cd(search_vector, websearch_to_tsquery('portuguese_unaccent'::regconfig, :q))
+           + greatest(similarity(coalesce(property_code, ''), :q), similarity(external_id, :q)) DESC,
+             updated_at DESC
+    LIMIT 20
+"""
+
+
+def _seed(conn, rows):
+    conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+    conn.execute(text(f"""
+        CREATE TABLE {TABLE} (
+            id serial PRIMARY KEY,
+            title varchar(255) NOT NULL,
+            description text,
+            external_id varchar(100) NOT NULL,
+            property_code varchar(50),
+            address_street varchar(255),
+            address_neighborhood varchar(255),
+            address_city varchar(255),
+            updated_at timestamptz NOT NULL DEFAULT now()
+        )
+    """))
+    conn.execute(text(f"""
+        INSERT INTO {TABLE} (title, description, external_id, property_code,
+                             address_street, address_neighborhood, address_city, updated_at)
+        SELECT
+            (ARRAY['Apartamento','Casa','Cobertura','Sobrado','Kitnet','Sala comercial'])[1 + (i % 6)]
+                || ' ' || (1 + i % 5) || ' quartos no '
+                || (ARRAY['Setor Bueno','Setor Marista','Jardim Goiás','Setor Oeste','Park Lozandes'])[1 + (i % 5)],
+            'Imóvel com ' || (ARRAY['piscina','churrasqueira','academia','varanda gourmet'])[1 + (i % 4)],
+            'EXT-' || i,
+            (ARRAY['AP','CA','CO','SO','KI','SA'])[1 + (i % 6)] || (i % 9973) || '-' || (i % 7),
+            (ARRAY['Rua ','Avenida T-','Alameda '])[1 + (i % 3)] || (i % 120),
+            (ARRAY['Setor Bueno','Setor Marista','Jardim Goiás','Setor Oeste','Park Lozandes'])[1 + (i % 5)],
+            (ARRAY['Goiânia','Aparecida de Goiânia','Anápolis'])[1 + (i % 3)],
+            now() - (i || ' minutes')::interval
+        FROM generate_series(1, :rows) AS s(i)
+    """), {"rows": rows})
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def _install_search(conn):
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS unaccent"))
+    conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    conn.execute(text("""
+        DO $$
+        BEGIN
+            IF NOT EXISTS (SELECT 1 FROM pg_ts_config WHERE cfgname = 'portuguese_unaccent') THEN
+                CREATE TEXT SEARCH CONFIGURATION portuguese_unaccent (COPY = portuguese);
+                ALTER TEXT SEARCH CONFIGURATION portuguese_unaccent
+                    ALTER MAPPING FOR hword, hword_part, word WITH unaccent, portuguese_stem;
+            END IF;
+        END
+        $$;
+    """))
+    conn.execute(text(f"""
+        ALTER TABLE {TABLE} ADD COLUMN search_vector tsvector
+        GENERATED ALWAYS AS (
+            setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(title, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig,
+                coalesce(property_code, '') || ' ' || coalesce(external_id, '')), 'A') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig,
+                coalesce(address_neighborhood, '') || ' ' || coalesce(address_street, '') || ' ' ||
+                coalesce(address_city, '')), 'B') ||
+            setweight(to_tsvector('portuguese_unaccent'::regconfig, coalesce(description, '')), 'C')
+        ) STORED
+    """))
+    conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin (search_vector)"))
+    for column in TRIGRAM_COLUMNS:
+        conn.execute(text(f"CREATE INDEX ON {TABLE} USING gin ({column} gin_trgm_ops)"))
+    conn.execute(text(f"ANALYZE {TABLE}"))
+
+
+def _measure(conn, sql, repeat):
+    samples = []
+    for _ in range(repeat):
+        for term in TERMS:
+            start = time.perf_counter()
+            conn.execute(text(sql), {"q": term, "like": f"%{term}%"}).fetchall()
+            samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    p95 = samples[max(int(len(samples) * 0.95) - 1, 0)]
+    return statistics.median(samples), p95
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark property search (ILIKE vs full-text + trigram)")
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    database_url = os.getenv("DATABASE_URL", "")
+    if not database_url.startswith("postgresql"):
+        print("❌ Este benchmark requer PostgreSQL (defina DATABASE_URL=postgresql://...)")
+        sys.exit(1)
+
+    engine = create_engine(database_url)
+    with engine.connect() as conn:
+        try:
+            print(f"🧱 Gerando {args.rows} imóveis sintéticos em {TABLE}...")
+            _seed(conn, args.rows)
+            conn.commit()
+
+            before = _measure(conn, LEGACY_SQL, args.repeat)
+
+            print("🔎 Criando tsvector + índices GIN (pg_trgm)...")
+            _install_search(conn)
+            conn.commit()
+
+            after = _measure(conn, SEARCH_SQL, args.repeat)
+
+            print(f"{'cenário':<28} | {'p50 (ms)':>9} | {'p95 (ms)':>9}")
+            print("-" * 53)
+            print(f"{'ILIKE sem índice (antes)':<28} | {before[0]:>9.1f} | {before[1]:>9.1f}")
+            print(f"{'tsvector + trigram (depois)':<28} | {after[0]:>9.1f} | {after[1]:>9.1f}")
+        finally:
+            conn.rollback()
+            conn.execute(text(f"DROP TABLE IF EXISTS {TABLE}"))
+            conn.commit()
+
+
+if __name__ == "__main__":
+    main()
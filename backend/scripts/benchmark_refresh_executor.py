@@ -0,0 +1,172 @@
+"""Teste de carga do executor de refresh (claim/lease + fan-out) contra um Gandalf stub.
+
+Sobe um stub HTTP local da API GraphQL com latência artificial e troca o refresh
+real por um equivalente que faz as duas chamadas do refresh (bulkDeleteListing +
+createListing) contra o stub. Depois:
+
+- dispatcher: ``RefreshJobExecutor.claim_jobs`` (lease) alimenta uma fila em memória,
+  como a fila ``refresh_scheduler`` do Celery;
+- N "workers" (threads com app context próprio) consomem a fila e executam
+  ``RefreshJobExecutor.run_job``.
+
+Mede jobs/minuto para cada quantidade de workers. A linha "legado" é o teto do
+``process_pending_jobs`` antigo: 10 jobs sequenciais por beat de 30s.
+
+Uso:
+    python scripts/benchmark_refresh_executor.py --jobs 120 --workers 1 2 4 8 --latency 0.1
+
+Sempre usa um SQLite temporário (em PostgreSQL o claim usa FOR UPDATE SKIP LOCKED).
+"""
+
+import argparse
+import json
+import logging
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+_tmp_db = os.path.join(tempfile.mkdtemp(), "bench_refresh.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import delete, insert  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from integrations import gandalf_service  # noqa: E402
+from models import Property, RefreshJob, Tenant  # noqa: E402
+from properties.services.refresh_executor import RefreshJobExecutor  # noqa: E402
+from properties.services.refresh_scheduler_service import RefreshSchedulerService  # noqa: E402
+
+LEGACY_BATCH = 10
+LEGACY_BEAT_SECONDS = 30
+
+
+def _make_handler(latency):
+    class GandalfStub(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+            time.sleep(latency)
+            operation = payload.get('operationName')
+            body = json.dumps({'data': {operation: {'id': '1', 'success': True, 'errors': []}}}).encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    return GandalfStub
+
+
+def _stub_refresh(property_id, strategy=None):
+    creds = {'authorization': 'bench-token'}
+    gandalf_service.bulk_delete_listing([str(property_id)], creds)
+    gandalf_service.create_listing({'externalId': str(property_id)}, creds)
+    return True, {'message': 'refreshed'}
+
+
+def _seed_jobs(property_ids, count):
+    db.session.execute(delete(RefreshJob.__table__))
+    now = datetime.now(timezone.utc) - timedelta(seconds=1)
+    db.session.execute(insert(RefreshJob.__table__), [
+        {'property_id': property_ids[i % len(property_ids)], 'status': 'pending', 'refresh_type': 'scheduled',
+         'scheduled_at': now, 'attempts': 0, 'created_at': now, 'updated_at': now}
+        for i in range(count)
+    ])
+    db.session.commit()
+
+
+def _run(app, workers, jobs):
+    work = queue.Queue()
+    done = []
+    lock = threading.Lock()
+
+    def worker():
+        with app.app_context():
+            while True:
+                item = work.get()
+                if item is None:
+                    return
+                ok, _ = RefreshJobExecutor.run_job(*item)
+                with lock:
+                    done.append(ok)
+                db.session.remove()
+
+    threads = [threading.Thread(target=worker, daemon=True) for _ in range(workers)]
+    for t in threads:
+        t.start()
+
+    start = time.perf_counter()
+    # Dispatcher: mantém até MAX_IN_FLIGHT jobs reivindicados, como o beat de process_pending_jobs
+    while len(done) < jobs:
+        free = RefreshJobExecutor.MAX_IN_FLIGHT - RefreshJobExecutor.in_flight_count()
+        token = RefreshJobExecutor.new_lease_token()
+        for job_id in RefreshJobExecutor.claim_jobs(free, token):
+            work.put((job_id, token))
+        time.sleep(0.05)
+    elapsed = time.perf_counter() - start
+
+    for _ in threads:
+        work.put(None)
+    for t in threads:
+        t.join()
+    return elapsed, sum(done)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load test for the claim-based refresh executor")
+    parser.add_argument("--jobs", type=int, default=120)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    parser.add_argument("--latency", type=float, default=0.1, help="Latência por chamada do Gandalf stub (s)")
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _make_handler(args.latency))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    gandalf_service.GANDALF_URL = f'http://127.0.0.1:{server.server_address[1]}/'
+    RefreshSchedulerService._perform_property_refresh_with_details = staticmethod(_stub_refresh)
+
+    app = create_app()
+    try:
+        with app.app_context():
+            db.engine.echo = False
+            db.create_all()
+            tenant = Tenant(name="Benchmark Refresh")
+            db.session.add(tenant)
+            db.session.flush()
+            props = [Property(title=f'Imóvel {i}', external_id=f'BR-{i}', tenant_id=tenant.id) for i in range(50)]
+            db.session.add_all(props)
+            db.session.commit()
+            property_ids = [p.id for p in props]
+
+            per_job = 2 * args.latency
+            legacy_rate = min(LEGACY_BATCH * 60 / LEGACY_BEAT_SECONDS, 60 / per_job)
+            print(f"{args.jobs} jobs, Gandalf stub com {args.latency * 1000:.0f}ms por chamada (2 chamadas por refresh)")
+            print(f"{'executor':<22} | {'workers':>7} | {'tempo (s)':>9} | {'jobs/min':>9} | ok")
+            print("-" * 64)
+            print(f"{'legado (10/beat 30s)':<22} | {1:>7} | {'-':>9} | {legacy_rate:>9.0f} | -")
+            for workers in args.workers:
+                _seed_jobs(property_ids, args.jobs)
+                elapsed, ok = _run(app, workers, args.jobs)
+                print(f"{'claim + fan-out':<22} | {workers:>7} | {elapsed:>9.2f} | {args.jobs / elapsed * 60:>9.0f} | {ok}")
+    finally:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
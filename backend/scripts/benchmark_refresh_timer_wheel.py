@@ -0,0 +1,152 @@
+"""Benchmark do timer wheel de refresh vs polling do Celery beat.
+
+Cria N schedules de lista e N agendamentos individuais (nenhum vencido) e mede:
+
+- polling antigo: instruções SQL de um ciclo ocioso de cada poll
+  (check_and_execute_schedules a cada 1 min, process_refresh_batch a cada 2 min,
+  process_pending_jobs a cada 30 s) extrapoladas para uma hora; atraso de disparo
+  até o próximo tick (média = metade do intervalo);
+- timer wheel: roda o dispatcher por ``--seconds`` com ``--due`` itens vencendo em
+  instantes aleatórios, contando as instruções SQL depois da reconstrução inicial
+  e o atraso real entre o vencimento e o envio da task.
+
+O envio das tasks é registrado em memória (sem broker). Sempre usa SQLite temporário
+e o índice em memória (o caminho Redis é o mesmo, com BLPOP no lugar da Condition).
+
+Uso:
+    python scripts/benchmark_refresh_timer_wheel.py --schedules 500 --seconds 20 --due 20
+"""
+
+import argparse
+import logging
+import os
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+_tmp_db = os.path.join(tempfile.mkdtemp(), "bench_timer_wheel.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+os.environ.pop("REDIS_URL", None)
+
+from celery import Task  # noqa: E402
+from sqlalchemy import event  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from models import Property, PropertyRefreshSchedule, RefreshSchedule, Tenant  # noqa: E402
+from properties.services.refresh_executor import RefreshJobExecutor  # noqa: E402
+from properties.services.refresh_queue_manager import RefreshQueueManager  # noqa: E402
+from properties.services.refresh_scheduler_service import RefreshSchedulerService  # noqa: E402
+from properties.services.refresh_timer_wheel import RefreshTimerWheel  # noqa: E402
+
+LEGACY_POLLS_PER_HOUR = {'check_and_execute_schedules': 60, 'process_refresh_batch': 30, 'process_pending_jobs': 120}
+
+_statements = []
+_sent = []
+
+
+def _record_send(self, args=None, **kwargs):
+    _sent.append((time.time(), self.name, args))
+
+
+def _seed(count):
+    tenant = Tenant(name="Benchmark Timer Wheel")
+    db.session.add(tenant)
+    db.session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'TW-{i}', tenant_id=tenant.id) for i in range(count)]
+    db.session.add_all(props)
+    db.session.flush()
+    future = datetime.now(timezone.utc) + timedelta(days=1)
+    for i, prop in enumerate(props):
+        db.session.add(RefreshSchedule(name=f'Lista {i}', tenant_id=tenant.id, time_slot=dt_time(9, 0), next_run=future))
+        db.session.add(PropertyRefreshSchedule(property_id=prop.id, tenant_id=tenant.id, next_run=future))
+    db.session.commit()
+    return tenant.id, [p.id for p in props]
+
+
+def _legacy_idle_cycle():
+    counts = {}
+    for name, poll in (
+        ('check_and_execute_schedules', RefreshSchedulerService.check_schedules_to_run),
+        ('process_refresh_batch', RefreshQueueManager.get_pending_schedules),
+        ('process_pending_jobs', lambda: (RefreshJobExecutor.reap_expired_leases(),
+                                          RefreshJobExecutor.in_flight_count(),
+                                          RefreshJobExecutor.claim_jobs(100, 'bench'))),
+    ):
+        _statements.clear()
+        poll()
+        db.session.remove()
+        counts[name] = len(_statements)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark refresh timer wheel vs beat polling")
+    parser.add_argument("--schedules", type=int, default=500)
+    parser.add_argument("--seconds", type=float, default=20)
+    parser.add_argument("--due", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    Task.apply_async = _record_send
+    app = create_app()
+    with app.app_context():
+        db.engine.echo = False
+        db.create_all()
+        _, property_ids = _seed(args.schedules)
+        event.listen(db.engine, 'before_cursor_execute', lambda *a: _statements.append(1))
+
+        legacy = _legacy_idle_cycle()
+        legacy_per_hour = sum(legacy[name] * LEGACY_POLLS_PER_HOUR[name] for name in legacy)
+
+        stop = threading.Event()
+
+        def run():
+            with app.app_context():
+                RefreshTimerWheel.run_dispatcher(stop)
+
+        dispatcher = threading.Thread(target=run, daemon=True)
+        _statements.clear()
+        dispatcher.start()
+        time.sleep(0.5)
+        rebuild_statements = len(_statements)
+        _statements.clear()
+
+        start = time.time()
+        due_times = {}
+        for i in range(args.due):
+            due_at = start + random.uniform(0.5, args.seconds - 1)
+            member_id = 10_000_000 + i
+            due_times[member_id] = due_at
+            RefreshTimerWheel.schedule(f'property_schedule:{member_id}', datetime.fromtimestamp(due_at, timezone.utc))
+        while time.time() - start < args.seconds:
+            time.sleep(0.1)
+        idle_statements = len(_statements)
+        stop.set()
+        RefreshTimerWheel.request_dispatch(datetime.now(timezone.utc) + timedelta(hours=1))
+        dispatcher.join(timeout=5)
+
+        lateness = [(sent_at - due_times[task_args[0]]) * 1000 for sent_at, _, task_args in _sent
+                    if task_args and task_args[0] in due_times]
+
+    print(f"{args.schedules} schedules de lista + {args.schedules} agendamentos individuais (nenhum vencido)")
+    print(f"{'modo':<26} | {'SQL/hora ocioso':>15} | {'atraso médio':>12} | {'atraso máx':>10}")
+    print("-" * 74)
+    print(f"{'polling beat (1m/2m/30s)':<26} | {legacy_per_hour:>15} | {'30 s':>12} | {'60 s':>10}")
+    print(f"{'timer wheel':<26} | {idle_statements * 3600 / args.seconds:>15.0f} | "
+          f"{statistics.mean(lateness):>9.1f} ms | {max(lateness):>7.1f} ms")
+    print(f"polling: instruções por ciclo {legacy}; timer wheel: {rebuild_statements} na reconstrução, "
+          f"{len(lateness)}/{args.due} itens disparados")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark do overhead por task Celery: create_app() por execução vs app por processo.
+
+Executa N vezes o corpo típico de uma task (app context + uma consulta simples)
+de duas formas:
+
+- ``create_app()`` a cada execução (comportamento anterior das tasks);
+- ``FlaskTask`` / ``worker_app_context()`` reaproveitando o app do processo.
+
+Mede tempo por task e quantos engines/conexões novas foram abertos.
+
+Uso:
+    python scripts/benchmark_worker_app.py --tasks 200
+"""
+
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+_tmp_db = os.path.join(tempfile.mkdtemp(), "bench_worker.db")
+os.environ["DATABASE_URL"] = f"sqlite:///{_tmp_db}"
+
+from sqlalchemy import event, text  # noqa: E402
+from sqlalchemy.engine import Engine  # noqa: E402
+
+from app import create_app  # noqa: E402
+from extensions import db  # noqa: E402
+from worker_app import get_worker_app, worker_app_context  # noqa: E402
+
+_connections = []
+event.listen(Engine, 'connect', lambda *args: _connections.append(1))
+
+
+def _task_body():
+    db.session.execute(text("SELECT 1")).scalar()
+    db.session.remove()
+
+
+def _per_task_app():
+    app = create_app()
+    app.config['SQLALCHEMY_ECHO'] = False
+    with app.app_context():
+        db.engine.echo = False
+        _task_body()
+
+
+def _worker_app():
+    with worker_app_context():
+        _task_body()
+
+
+def _measure(fn, tasks):
+    _connections.clear()
+    samples = []
+    for _ in range(tasks):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.mean(samples), statistics.median(samples), len(_connections)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark per-task create_app() vs one app per worker process")
+    parser.add_argument("--tasks", type=int, default=100)
+    args = parser.parse_args(argv)
+
+    logging.disable(logging.WARNING)
+    # Primeira criação (imports, app do processo) fora da medição
+    with get_worker_app().app_context():
+        db.engine.echo = False
+
+    before = _measure(_per_task_app, args.tasks)
+    after = _measure(_worker_app, args.tasks)
+
+    print(f"{args.tasks} execuções do corpo de uma task (app context + SELECT 1, SQLite)")
+    print(f"{'modo':<28} | {'média (ms)':>10} | {'p50 (ms)':>8} | conexões abertas")
+    print("-" * 70)
+    print(f"{'create_app() por task':<28} | {before[0]:>10.2f} | {before[1]:>8.2f} | {before[2]}")
+    print(f"{'app por processo (worker)':<28} | {after[0]:>10.2f} | {after[1]:>8.2f} | {after[2]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,40 @@
+"""Dispatcher do timer wheel de refresh (processo dedicado, uma instância basta).
+
+Reconstrói o índice de vencimentos a partir do banco e envia as tasks de refresh
+assim que cada ``next_run`` vence. Ver ``properties.services.refresh_timer_wheel``.
+
+Exige REDIS_URL: o índice precisa ser compartilhado com os processos web e workers
+que criam/alteram agendamentos. Sem Redis o script sai com erro e os refreshes
+ficam com o polling do Celery beat (``REFRESH_POLLING_BEAT_SCHEDULE``).
+
+Uso:
+    python scripts/run_refresh_timer_dispatcher.py
+"""
+import logging
+import sys
+from pathlib import Path
+
+BACKEND_ROOT = Path(__file__).resolve().parents[1]
+if str(BACKEND_ROOT) not in sys.path:
+    sys.path.append(str(BACKEND_ROOT))
+
+import celery_app  # noqa: E402,F401  registra as tasks no app Celery (broker e rotas)
+from properties.services.refresh_timer_wheel import RefreshTimerWheel  # noqa: E402
+from utils.redis_client import is_available  # noqa: E402
+from worker_app import worker_app_context  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+
+def main():
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    if not is_available():
+        logger.error('Refresh timer dispatcher requires a reachable Redis (REDIS_URL); '
+                     'refreshes fall back to Celery beat polling without it.')
+        return 1
+    with worker_app_context():
+        RefreshTimerWheel.run_dispatcher()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Rollup do dashboard administrativo (séries de crescimento e contadores globais)
+
+As rotas de ``routes/admin_dashboard.py`` leem só estas tabelas, com custo fixo
+independente do tamanho de tenant/user/property:
+
+- ``admin_growth_rollup``: registros criados por dia e entidade (tenants, imóveis);
+  as séries mensais e os "novos em 30 dias" são somas dessas linhas;
+- ``admin_overview_snapshot``: totais (tenants, ativos, PF/PJ, usuários, imóveis)
+  com o instante do cálculo, devolvido no payload como ``refreshed_at``.
+
+``admin_dashboard.refresh_rollup`` (a cada 15 min) recalcula só os dias desde a
+última atualização; ``admin_dashboard.rebuild_rollup`` (diário) recalcula tudo,
+corrigindo dias antigos afetados por exclusões.
+
+O modelo User não tem ``created_at``: a série de usuários fica vazia.
+"""
+import logging
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from celery import shared_task
+from sqlalchemy import Date, delete, func, select
+
+from extensions import db
+from models import AdminGrowthRollup, AdminOverviewSnapshot, Property, Tenant, User
+
+logger = logging.getLogger(__name__)
+
+GROWTH_SOURCES = {
+    'tenants': Tenant.created_at,
+    'properties': Property.created_at,
+}
+# Dias recalculados antes da última atualização (linhas gravadas com atraso)
+INCREMENTAL_OVERLAP_DAYS = 1
+
+
+def _overview_statement():
+    """Todos os totais numa única instrução (subconsultas escalares)."""
+    def count(model, *criteria):
+        return select(func.count(model.id)).where(*criteria).scalar_subquery()
+
+    return select(
+        count(Tenant).label('tenants_total'),
+        count(Tenant, Tenant.is_active.is_(True)).label('tenants_active'),
+        count(Tenant, Tenant.tenant_type == 'PF').label('tenants_pf'),
+        count(Tenant, Tenant.tenant_type == 'PJ').label('tenants_pj'),
+        count(User).label('users_total'),
+        count(Property).label('properties_total'),
+    )
+
+
+class AdminDashboardRollup:
+    """Escrita e leitura dos agregados do dashboard administrativo."""
+
+    @staticmethod
+    def refresh(full: bool = False) -> Dict[str, Any]:
+        """
+        Atualiza as séries de crescimento e os totais (com commit).
+
+        Incremental por padrão: recalcula os dias a partir da última atualização
+        (menos ``INCREMENTAL_OVERLAP_DAYS``); ``full`` ou rollup vazio recalcula tudo.
+        """
+        refreshed_at = AdminDashboardRollup.refreshed_at()
+        since: Optional[date] = None
+        if not full and refreshed_at is not None:
+            since = refreshed_at.date() - timedelta(days=INCREMENTAL_OVERLAP_DAYS)
+
+        rollup = AdminGrowthRollup.__table__
+        days_written = 0
+        for entity, column in GROWTH_SOURCES.items():
+            day = func.date(column, type_=Date)
+            source = select(day, func.count()).where(column.isnot(None)).group_by(day)
+            purge = delete(rollup).where(rollup.c.entity == entity)
+            if since is not None:
+                start = datetime.combine(since, time.min, tzinfo=timezone.utc)
+                if not column.type.timezone:
+                    start = start.replace(tzinfo=None)
+                source = source.where(column >= start)
+                purge = purge.where(rollup.c.day >= since)
+            rows = [
+                {'entity': entity, 'day': row_day, 'created_count': count}
+                for row_day, count in db.session.execute(source)
+                if row_day is not None
+            ]
+            db.session.execute(purge)
+            if rows:
+                db.session.execute(rollup.insert(), rows)
+            days_written += len(rows)
+
+        now = datetime.now(timezone.utc)
+        totals = db.session.execute(_overview_statement()).mappings().one()
+        snapshot = AdminOverviewSnapshot.__table__
+        db.session.execute(delete(snapshot))
+        db.session.execute(snapshot.insert(), [
+            {'metric': metric, 'value': int(value or 0), 'refreshed_at': now} for metric, value in totals.items()
+        ])
+        db.session.commit()
+        logger.info("Admin dashboard rollup refreshed (%s, %d days)", 'full' if since is None else since, days_written)
+        return {'mode': 'full' if since is None else 'incremental', 'since': since.isoformat() if since else None,
+                'days': days_written, 'refreshed_at': now.isoformat()}
+
+    @staticmethod
+    def refreshed_at() -> Optional[datetime]:
+        value = db.session.execute(select(func.min(AdminOverviewSnapshot.refreshed_at))).scalar()
+        if value is not None and value.tzinfo is None:
+            value = value.replace(tzinfo=timezone.utc)
+        return value
+
+    @staticmethod
+    def ensure_refreshed() -> datetime:
+        """Instante da última atualização; calcula na hora se a task ainda não rodou."""
+        refreshed_at = AdminDashboardRollup.refreshed_at()
+        if refreshed_at is None:
+            AdminDashboardRollup.refresh(full=True)
+            refreshed_at = AdminDashboardRollup.refreshed_at()
+        return refreshed_at
+
+    @staticmethod
+    def overview() -> Tuple[Dict[str, int], Dict[str, int], Optional[datetime]]:
+        """Totais, criados nos últimos 30 dias por entidade e instante do cálculo."""
+        refreshed_at = AdminDashboardRollup.ensure_refreshed()
+        totals = dict(db.session.execute(select(AdminOverviewSnapshot.metric, AdminOverviewSnapshot.value)).all())
+
+        since = datetime.now(timezone.utc).date() - timedelta(days=30)
+        recent = dict(db.session.execute(
+            select(AdminGrowthRollup.entity, func.sum(AdminGrowthRollup.created_count))
+            .where(AdminGrowthRollup.day >= since)
+            .group_by(AdminGrowthRollup.entity)
+        ).all())
+        return totals, {entity: int(count or 0) for entity, count in recent.items()}, refreshed_at
+
+    @staticmethod
+    def growth(days: int = 365) -> Dict[str, List[Dict[str, Any]]]:
+        """Séries mensais dos últimos ``days`` dias (mês como datetime ISO do dia 1)."""
+        since = datetime.now(timezone.utc).date() - timedelta(days=days)
+        by_month: Dict[str, Dict[date, int]] = defaultdict(lambda: defaultdict(int))
+        for entity, day, count in db.session.execute(
+            select(AdminGrowthRollup.entity, AdminGrowthRollup.day, AdminGrowthRollup.created_count)
+            .where(AdminGrowthRollup.day >= since)
+        ):
+            by_month[entity][day.replace(day=1)] += count
+
+        series = {'tenants': [], 'users': [], 'properties': []}
+        for entity, months in by_month.items():
+            series[entity] = [
+                {'month': datetime.combine(month, time.min).isoformat(), 'count': months[month]}
+                for month in sorted(months)
+            ]
+        return series
+
+
+@shared_task(name='admin_dashboard.refresh_rollup')
+def refresh_rollup():
+    """Atualização incremental (dias desde a última execução e totais)."""
+    from worker_app import worker_app_context
+    with worker_app_context():
+        return AdminDashboardRollup.refresh()
+
+
+@shared_task(name='admin_dashboard.rebuild_rollup')
+def rebuild_rollup():
+    """Recalcula todo o histórico (corrige dias antigos afetados por exclusões)."""
+    from worker_app import worker_app_context
+    with worker_app_context():
+        return AdminDashboardRollup.refresh(full=True)
@@ -24,11 +24,10 @@ def canalpro_auto_renewal_task():
         
         # Importar dependências dentro da função para evitar problemas de import circular
         from models import IntegrationCredentials
-        from app import create_app
+        from worker_app import worker_app_context
         from extensions import db
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             # Buscar credenciais do CanalpPro que precisam renovação
             creds = IntegrationCredentials.query.filter_by(
                 tenant_id=1,
@@ -23,12 +23,11 @@ class SimpleCanalpProRenewal:
     def execute_auto_renewal(self, tenant_id: int):
         """Executa renovação automática para um tenant específico"""
         from models import IntegrationCredentials
-        from app import create_app
+        from worker_app import worker_app_context
         from extensions import db
         from integrations.encryption_utils import decrypt_token, encrypt_token
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             try:
                 # Get credentials for specific tenant
                 cred = db.session.query(IntegrationCredentials).filter_by(
@@ -66,12 +65,11 @@ class SimpleCanalpProRenewal:
     def renew_all_credentials(self):
         """Renova todas as credenciais que precisam de renovação"""
         from models import IntegrationCredentials
-        from app import create_app
+        from worker_app import worker_app_context
         from extensions import db
         from integrations.encryption_utils import decrypt_token, encrypt_token
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             try:
                 # Get all CanalPro credentials
                 credentials = db.session.query(IntegrationCredentials).filter_by(
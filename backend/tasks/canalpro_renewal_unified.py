@@ -12,17 +12,33 @@ Características:
 - Logging detalhado
 - Retry com backoff exponencial
 - Métricas de performance
+
+Renovação em paralelo (todos os tenants):
+- ``plan_renewals`` ordena os tokens a renovar pela expiração (mais próxima
+  primeiro) e os distribui em ``CANALPRO_RENEWAL_CONCURRENCY`` faixas ao longo de
+  ``CANALPRO_RENEWAL_WINDOW_SECONDS``, com jitter por tenant dentro de cada slot;
+- cada tenant vira uma ``canalpro.renew_tenant_token`` com ``countdown`` próprio,
+  todas num chord cujo callback (``canalpro.summarize_renewal``) agrega o resultado.
 """
 
 import logging
-from celery import shared_task
+import math
+import os
+import random
+from celery import chord, shared_task
 from datetime import datetime, timedelta
 import pytz
-from typing import Dict, Any, List, Optional, cast
+from typing import Dict, Any, List, Optional, Sequence, Tuple, cast
 from requests.exceptions import RequestException, Timeout, ConnectionError
 
 logger = logging.getLogger(__name__)
 
+# Janela em que as renovações de uma execução são espalhadas e nº de renovações simultâneas
+RENEWAL_WINDOW_SECONDS = int(os.getenv('CANALPRO_RENEWAL_WINDOW_SECONDS', '1800'))
+RENEWAL_CONCURRENCY = int(os.getenv('CANALPRO_RENEWAL_CONCURRENCY', '4'))
+# Margem antes da expiração: o jitter nunca empurra a renovação para depois dela
+RENEWAL_EXPIRY_MARGIN_SECONDS = 300
+
 
 class CanalpProRenewalError(Exception):
     """Exceção base para erros de renovação CanalPro"""
@@ -44,44 +60,54 @@ class NetworkError(CanalpProRenewalError):
     pass
 
 
-def get_active_automation_tenants() -> List[int]:
+def get_active_automation_credentials() -> List[Any]:
     """
-    Retorna lista de tenant IDs com automação ativa.
+    Retorna as credenciais CanalPro dos tenants com automação ativa.
     
     Returns:
-        Lista de tenant IDs com automação habilitada
+        Lista de IntegrationCredentials (uma consulta para todos os tenants)
     """
     from models import IntegrationCredentials
     from utils.secure_credential_storage import get_secure_storage
     
     try:
         storage = get_secure_storage()
-        active_tenants = []
         
         # Buscar todas as credenciais CanalPro
         creds_list = IntegrationCredentials.query.filter_by(provider='gandalf').all()
         
-        for cred in creds_list:
-            # Verificar se automação está ativa para este tenant
-            status = storage.get_automation_status(cred.tenant_id)
-            if status and status.get('enabled'):
-                active_tenants.append(cred.tenant_id)
+        # Verificar se automação está ativa para cada tenant (sem nova consulta)
+        active = [
+            cred for cred in creds_list
+            if storage.automation_status_from_credential(cred).get('enabled')
+        ]
         
-        logger.info(f"✅ Encontrados {len(active_tenants)} tenants com automação ativa")
-        return active_tenants
+        logger.info(f"✅ Encontrados {len(active)} tenants com automação ativa")
+        return active
         
     except Exception as e:
         logger.exception(f"❌ Erro ao buscar tenants ativos: {e}")
         return []
 
 
-def should_renew_token(cred, threshold_hours: int = 24) -> bool:
+def get_active_automation_tenants() -> List[int]:
+    """
+    Retorna lista de tenant IDs com automação ativa.
+    
+    Returns:
+        Lista de tenant IDs com automação habilitada
+    """
+    return [cred.tenant_id for cred in get_active_automation_credentials()]
+
+
+def should_renew_token(cred, threshold_hours: int = 24, now: Optional[datetime] = None) -> bool:
     """
     Verifica se um token precisa ser renovado.
     
     Args:
         cred: Credencial de integração
         threshold_hours: Horas antes da expiração para renovar
+        now: Instante de referência (padrão: agora)
         
     Returns:
         True se o token precisa renovação
@@ -90,8 +116,11 @@ def should_renew_token(cred, threshold_hours: int = 24) -> bool:
         logger.warning(f"Token do tenant {cred.tenant_id} sem data de expiração")
         return False
     
-    now = datetime.now(pytz.utc)
-    time_until_expiry = cred.expires_at - now
+    now = now or datetime.now(pytz.utc)
+    expires_at = cred.expires_at
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=pytz.utc)
+    time_until_expiry = expires_at - now
     
     if time_until_expiry.total_seconds() < 0:
         logger.warning(f"⚠️ Token do tenant {cred.tenant_id} JÁ EXPIRADO")
@@ -387,65 +416,183 @@ def renew_token_for_tenant(tenant_id: int) -> Dict[str, Any]:
         }
 
 
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=pytz.utc)
+    return value
+
+
+def plan_renewals(
+    credentials: Sequence[Any],
+    now: Optional[datetime] = None,
+    window_seconds: int = RENEWAL_WINDOW_SECONDS,
+    concurrency: int = RENEWAL_CONCURRENCY,
+    rng: Optional[random.Random] = None,
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Planeja a renovação das credenciais ao longo da janela.
+    
+    Tokens ainda válidos saem como ``skipped`` sem gerar task. Os demais são
+    ordenados pela expiração (mais próxima primeiro) e distribuídos em
+    ``concurrency`` faixas: o i-ésimo token ocupa o slot ``i // concurrency``
+    (cada slot dura ``window_seconds / nº de slots``) com um jitter uniforme
+    dentro do slot, limitado à expiração menos ``RENEWAL_EXPIRY_MARGIN_SECONDS``.
+    
+    Args:
+        credentials: IntegrationCredentials dos tenants com automação ativa
+        now: Instante de referência (padrão: agora)
+        window_seconds: Janela em que as renovações são espalhadas
+        concurrency: Renovações simultâneas por slot
+        rng: Gerador aleatório (testes usam semente fixa)
+        
+    Returns:
+        (plano com tenant_id, countdown, expires_at e lane, resultados ``skipped``)
+    """
+    now = now or datetime.now(pytz.utc)
+    rng = rng or random.Random()
+    concurrency = max(1, concurrency)
+
+    due, skipped = [], []
+    for cred in credentials:
+        if should_renew_token(cred, now=now):
+            due.append(cred)
+        else:
+            expires_at = _as_utc(cred.expires_at)
+            skipped.append({
+                'tenant_id': cred.tenant_id,
+                'status': 'skipped',
+                'reason': 'Token ainda válido' if expires_at else 'Token sem data de expiração',
+                'expires_at': expires_at.isoformat() if expires_at else None,
+                'timestamp': now.isoformat()
+            })
+
+    # Sem expiração conhecida vai para o fim
+    due.sort(key=lambda cred: (cred.expires_at is None, _as_utc(cred.expires_at) or now))
+
+    plan = []
+    slots = math.ceil(len(due) / concurrency) if due else 0
+    spacing = window_seconds / slots if slots else 0
+    for position, cred in enumerate(due):
+        slot, lane = divmod(position, concurrency)
+        countdown = slot * spacing + rng.uniform(0, spacing)
+        expires_at = _as_utc(cred.expires_at)
+        if expires_at is not None:
+            deadline = (expires_at - now).total_seconds() - RENEWAL_EXPIRY_MARGIN_SECONDS
+            countdown = min(countdown, max(0.0, deadline))
+        plan.append({
+            'tenant_id': cred.tenant_id,
+            'countdown': round(countdown, 1),
+            'expires_at': expires_at.isoformat() if expires_at else None,
+            'lane': lane
+        })
+    return plan, skipped
+
+
+def summarize_renewal_results(results: Sequence[Dict[str, Any]],
+                              started_at: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Agrega os resultados das renovações (contagens por status e durações).
+    
+    Args:
+        results: Resultados de ``renew_token_for_tenant`` (e ``skipped`` do plano)
+        started_at: Início da execução (ISO), para o tempo total
+        
+    Returns:
+        Dict com o resumo da execução
+    """
+    results = [result for result in results if result]
+    by_status: Dict[str, int] = {}
+    for result in results:
+        status = result.get('status', 'error')
+        by_status[status] = by_status.get(status, 0) + 1
+
+    success_count = by_status.get('success', 0)
+    skipped_count = by_status.get('skipped', 0)
+    error_count = len(results) - success_count - skipped_count
+    durations = [r['duration_seconds'] for r in results if r.get('duration_seconds') is not None]
+    now = datetime.now(pytz.utc)
+    elapsed = None
+    if started_at:
+        elapsed = round((now - _as_utc(datetime.fromisoformat(started_at))).total_seconds(), 1)
+
+    logger.info(f"✅ Renovação concluída: {success_count} sucesso, {error_count} erros, {skipped_count} ignorados")
+
+    return {
+        'status': 'completed',
+        'total_tenants': len(results),
+        'success_count': success_count,
+        'error_count': error_count,
+        'skipped_count': skipped_count,
+        'by_status': by_status,
+        'avg_duration_seconds': round(sum(durations) / len(durations), 3) if durations else None,
+        'max_duration_seconds': max(durations) if durations else None,
+        'elapsed_seconds': elapsed,
+        'results': results,
+        'timestamp': now.isoformat()
+    }
+
+
 @shared_task(name='canalpro.unified_auto_renewal')
 def unified_auto_renewal_task(tenant_id: Optional[int] = None):
     """
     Task principal de renovação automática unificada.
     
+    Com ``tenant_id`` renova só aquele tenant, de forma síncrona. Sem ele,
+    planeja todos os tenants ativos (``plan_renewals``) e despacha um chord de
+    ``canalpro.renew_tenant_token`` com o resumo em ``canalpro.summarize_renewal``.
+    
     Args:
         tenant_id: ID específico do tenant (opcional). Se None, processa todos os tenants ativos.
         
     Returns:
-        Dict com resultados da renovação
+        Dict com resultados da renovação (ou com o plano despachado)
     """
-    from app import create_app
+    from worker_app import worker_app_context
     
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             logger.info("🔄 INICIANDO RENOVAÇÃO AUTOMÁTICA UNIFICADA CANALPRO")
+            started_at = datetime.now(pytz.utc)
             
             if tenant_id:
                 # Renovar apenas um tenant específico
                 logger.info(f"🎯 Renovação específica para tenant {tenant_id}")
-                tenants = [tenant_id]
-            else:
-                # Renovar todos os tenants com automação ativa
-                logger.info("🌐 Renovação para todos os tenants ativos")
-                tenants = get_active_automation_tenants()
+                return summarize_renewal_results([renew_token_for_tenant(tenant_id)], started_at.isoformat())
+
+            # Renovar todos os tenants com automação ativa
+            logger.info("🌐 Renovação para todos os tenants ativos")
+            credentials = get_active_automation_credentials()
             
-            if not tenants:
+            if not credentials:
                 logger.info("ℹ️ Nenhum tenant com automação ativa encontrado")
                 return {
                     'status': 'no_active_tenants',
                     'timestamp': datetime.now(pytz.utc).isoformat()
                 }
             
-            results = []
-            success_count = 0
-            error_count = 0
-            skipped_count = 0
-            
-            for tid in tenants:
-                result = renew_token_for_tenant(tid)
-                results.append(result)
-                
-                if result['status'] == 'success':
-                    success_count += 1
-                elif result['status'] == 'skipped':
-                    skipped_count += 1
-                else:
-                    error_count += 1
-            
-            logger.info(f"✅ Renovação concluída: {success_count} sucesso, {error_count} erros, {skipped_count} ignorados")
-            
+            plan, skipped = plan_renewals(credentials, now=started_at)
+            if not plan:
+                return summarize_renewal_results(skipped, started_at.isoformat())
+
+            header = [
+                renew_tenant_token_task.s(item['tenant_id']).set(countdown=item['countdown'])
+                for item in plan
+            ]
+            summary = chord(header)(summarize_renewal_task.s(skipped, started_at.isoformat()))
+
+            logger.info(
+                f"📤 {len(plan)} renovações despachadas em {RENEWAL_WINDOW_SECONDS}s "
+                f"({RENEWAL_CONCURRENCY} simultâneas), {len(skipped)} ignoradas"
+            )
             return {
-                'status': 'completed',
-                'total_tenants': len(tenants),
-                'success_count': success_count,
-                'error_count': error_count,
-                'skipped_count': skipped_count,
-                'results': results,
+                'status': 'dispatched',
+                'total_tenants': len(credentials),
+                'scheduled_count': len(plan),
+                'skipped_count': len(skipped),
+                'window_seconds': RENEWAL_WINDOW_SECONDS,
+                'concurrency': RENEWAL_CONCURRENCY,
+                'summary_task_id': summary.id,
+                'plan': plan,
                 'timestamp': datetime.now(pytz.utc).isoformat()
             }
             
@@ -458,6 +605,34 @@ def unified_auto_renewal_task(tenant_id: Optional[int] = None):
             }
 
 
+@shared_task(name='canalpro.renew_tenant_token')
+def renew_tenant_token_task(tenant_id: int):
+    """
+    Renova o token de um tenant (membro do chord da renovação unificada).
+    
+    Args:
+        tenant_id: ID do tenant
+    """
+    from worker_app import worker_app_context
+    
+    with worker_app_context():
+        return renew_token_for_tenant(tenant_id)
+
+
+@shared_task(name='canalpro.summarize_renewal')
+def summarize_renewal_task(results: List[Dict[str, Any]], skipped: Optional[List[Dict[str, Any]]] = None,
+                           started_at: Optional[str] = None):
+    """
+    Callback do chord: agrega os resultados das renovações e os tenants ignorados.
+    
+    Args:
+        results: Resultados das tasks ``canalpro.renew_tenant_token``
+        skipped: Tenants com token ainda válido (não despachados)
+        started_at: Início da execução (ISO)
+    """
+    return summarize_renewal_results(list(results or []) + list(skipped or []), started_at)
+
+
 @shared_task(name='canalpro.schedule_retry')
 def schedule_retry_task(tenant_id: int):
     """
@@ -466,18 +641,20 @@ def schedule_retry_task(tenant_id: int):
     Args:
         tenant_id: ID do tenant
     """
+    from worker_app import worker_app_context
+    
     logger.info(f"🔄 Executando retry de renovação para tenant {tenant_id}")
-    return renew_token_for_tenant(tenant_id)
+    with worker_app_context():
+        return renew_token_for_tenant(tenant_id)
 
 
 @shared_task(name='canalpro.health_check')
 def health_check_task():
     """Task de verificação de saúde do sistema"""
-    from app import create_app
+    from worker_app import worker_app_context
     from models import IntegrationCredentials
     
-    app = create_app()
-    with app.app_context():
+    with worker_app_context():
         try:
             now = datetime.now(pytz.utc)
             
@@ -525,5 +702,7 @@ if __name__ == '__main__':
     print("✅ Sistema Unificado de Renovação CanalPro")
     print("📋 Tasks disponíveis:")
     print("  - canalpro.unified_auto_renewal")
+    print("  - canalpro.renew_tenant_token")
+    print("  - canalpro.summarize_renewal")
     print("  - canalpro.schedule_retry")
     print("  - canalpro.health_check")
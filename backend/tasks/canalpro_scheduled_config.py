@@ -36,6 +36,7 @@ def register_scheduled_tasks(celery_app):
     # Importar as tasks para registrá-las
     from tasks.canalpro_scheduled_monitor import (
         monitor_and_execute_scheduled,
+        execute_scheduled_renewal,
         check_expired_schedules
     )
     
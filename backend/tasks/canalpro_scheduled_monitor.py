@@ -1,163 +1,226 @@
 """
 Task de monitoramento com suporte a agendamento manual
+
+A cada minuto o monitor reivindica as configurações vencidas com uma única
+consulta pelo índice de ``TokenScheduleConfig.next_fire_at`` (``SELECT ... FOR
+UPDATE SKIP LOCKED`` + ``UPDATE`` que adia o disparo por um lease) e despacha uma
+``canalpro-scheduled-execute`` por tenant. A task do tenant executa o modo
+configurado e grava o próximo disparo; se o worker morrer, o lease vence e a
+configuração volta a ser reivindicada.
 """
 import logging
+import os
 from celery import shared_task
 from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
 import pytz
 
 logger = logging.getLogger(__name__)
 
+# Antecedência com que um disparo é considerado vencido (o beat roda a cada minuto)
+CLAIM_HORIZON_SECONDS = 60
+# Adiamento gravado no claim: se a task do tenant não concluir, é disparada de novo depois disso
+CLAIM_LEASE_SECONDS = int(os.getenv('TOKEN_SCHEDULE_CLAIM_LEASE_SECONDS', '600'))
+CLAIM_BATCH_SIZE = int(os.getenv('TOKEN_SCHEDULE_CLAIM_BATCH_SIZE', '500'))
+
+
+def _as_utc(value: Optional[datetime]) -> Optional[datetime]:
+    if value is not None and value.tzinfo is None:
+        return value.replace(tzinfo=pytz.utc)
+    return value
+
+
+def claim_due_schedules(now: Optional[datetime] = None, limit: int = CLAIM_BATCH_SIZE) -> List[int]:
+    """
+    Reivindica as configurações com ``next_fire_at`` vencido (com commit).
+
+    Args:
+        now: Datetime atual (opcional, para testes)
+        limit: Máximo de configurações por tick
+
+    Returns:
+        IDs reivindicados (next_fire_at adiado por CLAIM_LEASE_SECONDS)
+    """
+    from sqlalchemy import select, update
+    from models import TokenScheduleConfig
+    from extensions import db
+
+    now = now or datetime.now(pytz.utc)
+    horizon = now + timedelta(seconds=CLAIM_HORIZON_SECONDS)
+    table = TokenScheduleConfig.__table__
+    due = (table.c.enabled.is_(True), table.c.next_fire_at <= horizon)
+
+    candidates = [
+        row.id for row in db.session.execute(
+            select(table.c.id)
+            .where(*due)
+            .order_by(table.c.next_fire_at.asc())
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+    ]
+    if not candidates:
+        db.session.commit()
+        return []
+
+    claimed = [
+        row[0] for row in db.session.execute(
+            update(table)
+            .where(table.c.id.in_(candidates), *due)
+            .values(next_fire_at=now + timedelta(seconds=CLAIM_LEASE_SECONDS))
+            .returning(table.c.id)
+        )
+    ]
+    db.session.commit()
+    return claimed
+
 
 @shared_task(name='canalpro-scheduled-monitor')
 def monitor_and_execute_scheduled():
     """
-    Monitora tokens e executa renovação baseado em agendamento configurado
-    
-    Suporta 3 modos:
+    Despacha a renovação dos tenants cujo agendamento venceu
+
+    Suporta 3 modos (executados por ``execute_scheduled_renewal``):
     - automatic: Verifica expiração e renova automaticamente
     - manual_once: Executa uma vez no horário configurado
     - manual_recurring: Executa diariamente no horário configurado
     """
+    try:
+        from worker_app import worker_app_context
+
+        with worker_app_context():
+            claimed = claim_due_schedules()
+
+            if not claimed:
+                logger.debug("⏰ Nenhum agendamento vencido")
+                return {'status': 'no_due_schedules'}
+
+            for config_id in claimed:
+                execute_scheduled_renewal.apply_async(args=[config_id])
+
+            logger.info(f"⏰ {len(claimed)} agendamento(s) vencido(s) despachado(s)")
+            return {
+                'status': 'dispatched',
+                'count': len(claimed),
+                'config_ids': claimed
+            }
+
+    except Exception as e:
+        logger.exception(f"❌ Erro no monitoramento agendado: {e}")
+        return {'status': 'error', 'error': str(e)}
+
+
+def _run_schedule(config, creds, now: datetime) -> Dict[str, Any]:
+    """Executa o modo da configuração de um tenant (sem commit)."""
+    from tasks.canalpro_renewal_unified import renew_token_for_tenant
+    from tasks.token_scheduler import calculate_next_execution
+
+    # ============================================
+    # MODO MANUAL: Horário de execução atingido
+    # ============================================
+    if config.schedule_mode in ['manual_once', 'manual_recurring']:
+        logger.info(f"⏰ Horário de execução manual atingido: {config.next_execution} (tenant {config.tenant_id})")
+        result = renew_token_for_tenant(config.tenant_id)
+        config.last_execution = now
+
+        if config.schedule_mode == 'manual_recurring':
+            # Recorrente: próximo dia no mesmo horário local
+            config.next_execution = calculate_next_execution(
+                'manual_recurring', config.schedule_hour, config.schedule_minute, now
+            )
+            logger.info(f"📅 Próxima execução recorrente: {config.next_execution}")
+        else:
+            # Execução única: desabilitar após executar
+            config.enabled = False
+            config.next_execution = None
+            logger.info("✅ Execução única concluída - agendamento desabilitado")
+
+        return {
+            'status': 'executed',
+            'mode': config.schedule_mode,
+            'result': result
+        }
+
+    # ============================================
+    # MODO AUTOMÁTICO: Verificar expiração
+    # ============================================
+    if config.schedule_mode == 'automatic':
+        if not creds:
+            logger.warning(f"⚠️ Credenciais não encontradas (tenant {config.tenant_id})")
+            return {'status': 'no_credentials'}
+
+        if not creds.expires_at:
+            logger.warning(f"⚠️ Data de expiração não definida (tenant {config.tenant_id})")
+            return {'status': 'no_expiry_date'}
+
+        minutes_remaining = (_as_utc(creds.expires_at) - now).total_seconds() / 60
+
+        # Token renovado por outro caminho desde o agendamento: só reagendar
+        if minutes_remaining * 60 > CLAIM_HORIZON_SECONDS:
+            return {
+                'status': 'token_valid',
+                'minutes_remaining': round(minutes_remaining, 0)
+            }
+
+        minutes_expired = max(0.0, -minutes_remaining)
+        logger.warning(f"🚨 Token do tenant {config.tenant_id} expirado há {minutes_expired:.1f} min - Renovando automaticamente!")
+        result = renew_token_for_tenant(config.tenant_id)
+        config.last_execution = now
+
+        return {
+            'status': 'auto_renewed',
+            'was_expired_for_minutes': round(minutes_expired, 1),
+            'result': result
+        }
+
+    # Modo desconhecido
+    logger.error(f"❌ Modo de agendamento desconhecido: {config.schedule_mode}")
+    return {'status': 'unknown_mode', 'mode': config.schedule_mode}
+
+
+@shared_task(name='canalpro-scheduled-execute')
+def execute_scheduled_renewal(config_id: int):
+    """
+    Executa o agendamento reivindicado de um tenant e grava o próximo disparo
+
+    Args:
+        config_id: ID da TokenScheduleConfig
+    """
     try:
         from models import TokenScheduleConfig, IntegrationCredentials
-        from app import create_app
+        from worker_app import worker_app_context
         from extensions import db
-        
-        app = create_app()
-        with app.app_context():
-            # Buscar configuração de agendamento
-            config = TokenScheduleConfig.query.filter_by(
-                tenant_id=1,
-                provider='gandalf',
-                enabled=True
-            ).first()
-            
-            if not config:
-                logger.info("⚠️ Sem configuração de agendamento ativa")
-                return {'status': 'no_config'}
-            
+        from tasks.token_scheduler import AUTOMATIC_RECHECK_MINUTES, calculate_next_fire_at
+
+        with worker_app_context():
+            config = db.session.get(TokenScheduleConfig, config_id)
+            if not config or not config.enabled:
+                return {'status': 'no_config', 'config_id': config_id}
+
             now = datetime.now(pytz.utc)
-            
-            # ============================================
-            # MODO MANUAL: Verificar se é hora de executar
-            # ============================================
-            if config.schedule_mode in ['manual_once', 'manual_recurring']:
-                if not config.next_execution:
-                    logger.warning("⚠️ Agendamento manual sem próxima execução definida")
-                    return {'status': 'no_next_execution'}
-                
-                # Verificar se chegou a hora (com margem de 1 minuto)
-                time_until = (config.next_execution - now).total_seconds()
-                
-                if time_until <= 60:  # Dentro de 1 minuto
-                    logger.info(f"⏰ Horário de execução manual atingido: {config.next_execution}")
-                    
-                    # Executar renovação
-                    from tasks.canalpro_auto_renewal_final import canalpro_auto_renewal_task
-                    result = canalpro_auto_renewal_task()
-                    
-                    # Atualizar última execução
-                    config.last_execution = now
-                    
-                    # Calcular próxima execução
-                    if config.schedule_mode == 'manual_recurring':
-                        # Recorrente: agendar para amanhã no mesmo horário
-                        next_run = now.replace(
-                            hour=int(config.schedule_hour),
-                            minute=int(config.schedule_minute),
-                            second=0,
-                            microsecond=0
-                        ) + timedelta(days=1)
-                        
-                        config.next_execution = next_run
-                        logger.info(f"📅 Próxima execução recorrente: {next_run}")
-                    else:
-                        # Execução única: desabilitar após executar
-                        config.enabled = False
-                        config.next_execution = None
-                        logger.info("✅ Execução única concluída - agendamento desabilitado")
-                    
-                    db.session.commit()
-                    
-                    return {
-                        'status': 'executed',
-                        'mode': config.schedule_mode,
-                        'result': result
-                    }
-                else:
-                    # Ainda não é hora
-                    minutes_until = time_until / 60
-                    logger.debug(f"⏰ Aguardando execução em {minutes_until:.1f} minutos")
-                    return {
-                        'status': 'waiting',
-                        'minutes_until': round(minutes_until, 1),
-                        'next_execution': config.next_execution.isoformat()
-                    }
-            
-            # ============================================
-            # MODO AUTOMÁTICO: Verificar expiração
-            # ============================================
-            elif config.schedule_mode == 'automatic':
-                creds = IntegrationCredentials.query.filter_by(
-                    tenant_id=1,
-                    provider='gandalf'
-                ).first()
-                
-                if not creds:
-                    logger.warning("⚠️ Credenciais não encontradas")
-                    return {'status': 'no_credentials'}
-                
-                if not creds.expires_at:
-                    logger.warning("⚠️ Data de expiração não definida")
-                    return {'status': 'no_expiry_date'}
-                
-                # Calcular tempo até expiração
-                time_until_expiry = creds.expires_at - now
-                minutes_remaining = time_until_expiry.total_seconds() / 60
-                
-                # Token expirado - renovar imediatamente
-                if minutes_remaining <= 0:
-                    minutes_expired = abs(minutes_remaining)
-                    logger.warning(f"🚨 Token expirado há {minutes_expired:.1f} min - Renovando automaticamente!")
-                    
-                    from tasks.canalpro_auto_renewal_final import canalpro_auto_renewal_task
-                    result = canalpro_auto_renewal_task()
-                    
-                    # Atualizar última execução
-                    config.last_execution = now
-                    db.session.commit()
-                    
-                    return {
-                        'status': 'auto_renewed',
-                        'was_expired_for_minutes': round(minutes_expired, 1),
-                        'result': result
-                    }
-                
-                # Token próximo de expirar (< 10 min) - alertar
-                elif minutes_remaining < 10:
-                    logger.info(f"⏰ Token expira em {minutes_remaining:.1f} min - Aguardando...")
-                    return {
-                        'status': 'expiring_soon',
-                        'minutes_remaining': round(minutes_remaining, 1)
-                    }
-                
-                # Token válido
-                else:
-                    logger.debug(f"✅ Token válido por {minutes_remaining:.0f} min")
-                    return {
-                        'status': 'token_valid',
-                        'minutes_remaining': round(minutes_remaining, 0)
-                    }
-            
-            # Modo desconhecido
-            else:
-                logger.error(f"❌ Modo de agendamento desconhecido: {config.schedule_mode}")
-                return {'status': 'unknown_mode', 'mode': config.schedule_mode}
-                
+            creds = IntegrationCredentials.query.filter_by(
+                tenant_id=config.tenant_id,
+                provider=config.provider
+            ).first()
+
+            response = _run_schedule(config, creds, now)
+
+            next_fire = _as_utc(calculate_next_fire_at(config, creds.expires_at if creds else None, now))
+            if next_fire is not None and next_fire <= now:
+                # Renovação não resolveu (erro/rate limit): nova tentativa depois do intervalo
+                next_fire = now + timedelta(minutes=AUTOMATIC_RECHECK_MINUTES)
+            config.next_fire_at = next_fire
+            db.session.commit()
+
+            response.update({
+                'tenant_id': config.tenant_id,
+                'next_fire_at': next_fire.isoformat() if next_fire else None
+            })
+            return response
+
     except Exception as e:
-        logger.exception(f"❌ Erro no monitoramento agendado: {e}")
-        return {'status': 'error', 'error': str(e)}
+        logger.exception(f"❌ Erro ao executar agendamento {config_id}: {e}")
+        return {'status': 'error', 'config_id': config_id, 'error': str(e)}
 
 
 @shared_task(name='canalpro-check-expired-schedules')
@@ -167,11 +230,10 @@ def check_expired_schedules():
     """
     try:
         from models import TokenScheduleConfig
-        from app import create_app
+        from worker_app import worker_app_context
         from extensions import db
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             now = datetime.now(pytz.utc)
             
             # Buscar agendamentos únicos que já passaram
@@ -187,6 +249,7 @@ def check_expired_schedules():
                 for config in expired:
                     config.enabled = False
                     config.next_execution = None
+                    config.next_fire_at = None
                 
                 db.session.commit()
                 
@@ -47,10 +47,8 @@ class CanalpProScheduleManager:
         @celery_app.task(name='canalpro.check_renewal_needed', bind=True)
         def check_canalpro_renewal_needed(task_self):
             """Verifica se há tokens CanalpPro que precisam renovação automática"""
-            from app import create_app
-            app = create_app()
-            
-            with app.app_context():
+            from worker_app import worker_app_context
+            with worker_app_context():
                 try:
                     # Usar a instância do manager, não da task
                     manager = canalpro_schedule_manager
@@ -65,10 +63,9 @@ class CanalpProScheduleManager:
         def execute_canalpro_auto_renewal(task_self, tenant_id: int):
             """Executa renovação automática para um tenant específico"""
             from tasks.canalpro_auto_renewal_simple import simple_canalpro_renewal
-            from app import create_app
+            from worker_app import worker_app_context
             
-            app = create_app()
-            with app.app_context():
+            with worker_app_context():
                 try:
                     return simple_canalpro_renewal.execute_auto_renewal(tenant_id)
                 except Exception as e:
@@ -1,5 +1,5 @@
 from celery_app import make_celery
-from app import create_app
+from worker_app import get_worker_app
 from extensions import db
 from models import Property
 import requests
@@ -15,11 +15,11 @@ try:
 except Exception:
     _HAS_BOTO3 = False
 
-app = create_app()
 celery = make_celery()
 
 @celery.task(name='download_and_attach')
 def download_and_attach(property_id, urls):
+    app = get_worker_app()
     with app.app_context():
         prop = Property.query.get(property_id)
         if not prop:
@@ -1,6 +1,7 @@
 from celery_app import make_celery
-from app import create_app
+from worker_app import get_worker_app
 from integrations.gandalf_service import upload_image, create_listing, GandalfError
+from integrations.image_transfer import transfer_images
 from properties.mapper import map_property_to_listing
 from extensions import db
 from models import Property
@@ -8,11 +9,11 @@ from models import Property
 import os
 import base64
 
-app = create_app()
 celery = make_celery()
 
 @celery.task(name='process_listing')
 def process_listing(property_id, publication_type=None):
+    app = get_worker_app()
     with app.app_context():
         prop = Property.query.get(property_id)
         if not prop:
@@ -32,63 +33,51 @@ def process_listing(property_id, publication_type=None):
             return {'status': 'error', 'exception': str(e)}
 
         # Preparar e fazer upload automático de imagens do S3 para Gandalf
+        # (em paralelo; imagens inalteradas reaproveitam o urlImage já enviado)
         final_images = []
         try:
-            raw_images = prop.image_urls or []
+            raw_images = [img for img in (prop.image_urls or []) if img and isinstance(img, str)]
+            s3_images = [img for img in raw_images if img.lower().startswith('https://quadra-fotos.s3.')]
+            prop_id = prop.id
+
+            def upload(file_bytes, idx, content_type):
+                # Determinar extensão do arquivo
+                ext = 'jpg'  # padrão
+                content_type = (content_type or '').lower()
+                if 'png' in content_type:
+                    ext = 'png'
+                elif 'gif' in content_type:
+                    ext = 'gif'
+                elif 'webp' in content_type:
+                    ext = 'webp'
+
+                filename = f'property_{prop_id}_{idx}.{ext}'
+                resp = upload_image(file_bytes, filename, creds)
+                return (resp.get('data') or {}).get('uploadImage', {}).get('urlImage') if isinstance(resp, dict) else None
+
+            uploaded = dict(zip(s3_images, transfer_images(prop.tenant_id, s3_images, upload)))
+
             for idx, img in enumerate(raw_images):
-                if not img or not isinstance(img, str):
-                    continue
                 lower = img.lower()
-                
-                # Se já é uma URL do nosso S3, fazer download e upload para Gandalf
-                if lower.startswith('https://quadra-fotos.s3.'):
-                    try:
-                        import requests
-                        # Download da imagem do S3
-                        response = requests.get(img, timeout=30)
-                        response.raise_for_status()
-                        file_bytes = response.content
-                        
-                        # Determinar extensão do arquivo
-                        ext = 'jpg'  # padrão
-                        if 'content-type' in response.headers:
-                            content_type = response.headers['content-type'].lower()
-                            if 'png' in content_type:
-                                ext = 'png'
-                            elif 'gif' in content_type:
-                                ext = 'gif'
-                            elif 'webp' in content_type:
-                                ext = 'webp'
-                        
-                        filename = f'property_{prop.id}_{idx}.{ext}'
-                        
-                        # Upload para Gandalf
-                        resp = upload_image(file_bytes, filename, creds)
-                        gandalf_url = (resp.get('data') or {}).get('uploadImage', {}).get('urlImage') if isinstance(resp, dict) else None
-                        
-                        if gandalf_url:
-                            final_images.append({'imageUrl': gandalf_url})
-                            app.logger.info('Imagem %d do imóvel %s enviada do S3 para Gandalf: %s', idx, prop.id, gandalf_url)
-                        else:
-                            app.logger.warning('Falha ao enviar imagem %d do imóvel %s para Gandalf', idx, prop.id)
-                            # Fallback: usar URL original do S3
-                            final_images.append({'imageUrl': img})
-                            
-                    except Exception as e:
-                        app.logger.warning('Erro ao processar imagem S3 %s para imóvel %s: %s', img, prop.id, str(e))
-                        # Fallback: manter URL original
+
+                # Se já é uma URL do nosso S3, usar a URL enviada para Gandalf
+                if img in uploaded:
+                    gandalf_url = uploaded[img]
+                    if gandalf_url:
+                        final_images.append({'imageUrl': gandalf_url})
+                        app.logger.info('Imagem %d do imóvel %s enviada do S3 para Gandalf: %s', idx, prop.id, gandalf_url)
+                    else:
+                        app.logger.warning('Falha ao enviar imagem %d do imóvel %s para Gandalf', idx, prop.id)
+                        # Fallback: usar URL original do S3
                         final_images.append({'imageUrl': img})
-                        continue
-                
+
                 # URLs externas (não S3) - manter como estão
                 elif lower.startswith('http://') or lower.startswith('https://'):
                     final_images.append({'imageUrl': img})
-                    continue
 
                 # Qualquer outro formato (data URIs, paths locais) - pular
                 else:
                     app.logger.info('Ignorando imagem não suportada para imóvel %s: %s', prop.id, img)
-                    continue
         except Exception as e:
             app.logger.exception('Unexpected error while processing images for property %s: %s', prop.id if prop else 'unknown', str(e))
 
@@ -17,10 +17,9 @@ def check_expiring_tokens():
     """
     try:
         from models import IntegrationCredentials
-        from app import create_app
+        from worker_app import worker_app_context
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             now = datetime.now(pytz.utc)
             expiry_threshold = now + timedelta(hours=4)  # 4 horas antes de expirar
             
@@ -66,10 +65,9 @@ def renew_token(tenant_id: int, provider: str):
         if provider == 'gandalf':
             # Usar sistema específico do CanalpPro
             from fix_token_renewal import main as renew_canalpro_token
-            from app import create_app
+            from worker_app import worker_app_context
             
-            app = create_app()
-            with app.app_context():
+            with worker_app_context():
                 # Executar renovação CanalpPro
                 result = renew_canalpro_token()
                 return {
@@ -103,10 +101,9 @@ def cleanup_expired_tokens():
     """
     try:
         from models import IntegrationCredentials, db
-        from app import create_app
+        from worker_app import worker_app_context
         
-        app = create_app()
-        with app.app_context():
+        with worker_app_context():
             cutoff_date = datetime.now(pytz.utc) - timedelta(days=7)
             
             expired_count = IntegrationCredentials.query.filter(
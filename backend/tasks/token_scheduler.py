@@ -3,12 +3,16 @@ Lógica de agendamento dinâmico para renovação de tokens
 """
 import logging
 from datetime import datetime, timedelta
+from typing import Optional
 import pytz
 from celery import current_app
 from celery.schedules import crontab
 
 logger = logging.getLogger(__name__)
 
+# Intervalo de verificação do modo automático quando não há expiração a esperar
+AUTOMATIC_RECHECK_MINUTES = 15
+
 
 def calculate_next_execution(schedule_mode: str, schedule_hour: str, schedule_minute: str, now: datetime = None) -> datetime:
     """
@@ -59,6 +63,37 @@ def calculate_next_execution(schedule_mode: str, schedule_hour: str, schedule_mi
     return target
 
 
+def calculate_next_fire_at(config, expires_at: Optional[datetime] = None,
+                           now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    Calcula quando o monitor deve disparar a configuração (coluna next_fire_at)
+    
+    Args:
+        config: TokenScheduleConfig
+        expires_at: Expiração atual do token (modo automático)
+        now: Datetime atual (opcional, para testes)
+    
+    Returns:
+        datetime: Próximo disparo, ou None se a configuração está desabilitada
+    """
+    if not config.enabled:
+        return None
+    
+    if config.schedule_mode in ['manual_once', 'manual_recurring']:
+        return config.next_execution
+    if config.schedule_mode != 'automatic':
+        return None
+    
+    # Automático: dispara quando o token expira; sem expiração conhecida, verifica de novo em 15 min
+    if now is None:
+        now = datetime.now(pytz.utc)
+    if expires_at is None:
+        return now + timedelta(minutes=AUTOMATIC_RECHECK_MINUTES)
+    if expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=pytz.utc)
+    return expires_at
+
+
 def schedule_one_time_task(hour: str, minute: str, tenant_id: int = 1):
     """
     Agenda execução única para o horário especificado
@@ -151,7 +186,7 @@ def update_schedule_config(tenant_id: int, provider: str, schedule_mode: str,
     Returns:
         TokenScheduleConfig: Configuração atualizada
     """
-    from models import TokenScheduleConfig
+    from models import IntegrationCredentials, TokenScheduleConfig
     from extensions import db
     
     # Buscar ou criar configuração
@@ -183,6 +218,12 @@ def update_schedule_config(tenant_id: int, provider: str, schedule_mode: str,
             'automatic', '00', '00'
         )
     
+    creds = IntegrationCredentials.query.filter_by(
+        tenant_id=tenant_id,
+        provider=provider
+    ).first()
+    config.next_fire_at = calculate_next_fire_at(config, creds.expires_at if creds else None)
+    
     db.session.commit()
     
     logger.info(f"✅ Configuração de agendamento atualizada: {config.to_dict()}")
@@ -0,0 +1,29 @@
+"""
+Fixtures compartilhadas dos testes do backend
+"""
+import pytest
+
+from app import create_app
+from extensions import db
+
+
+@pytest.fixture
+def app_ctx(tmp_path, monkeypatch):
+    """App isolado com SQLite temporário, todas as tabelas do metadata e contexto de requisição ativo."""
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'test.db'}")
+    app = create_app()
+    ctx = app.test_request_context()
+    ctx.push()
+    db.engine.echo = False
+    db.create_all()
+    try:
+        yield app
+    finally:
+        db.session.remove()
+        ctx.pop()
+
+
+@pytest.fixture
+def db_session(app_ctx):
+    """Sessão do Flask-SQLAlchemy ligada ao app de ``app_ctx``."""
+    return db.session
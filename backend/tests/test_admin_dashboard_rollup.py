@@ -0,0 +1,83 @@
+"""
+Testes do rollup do dashboard administrativo (tasks.admin_dashboard_rollup)
+"""
+import inspect
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import AdminGrowthRollup, Property, Tenant, User
+from routes.admin_dashboard import dashboard_growth_stats, dashboard_overview
+from tasks.admin_dashboard_rollup import AdminDashboardRollup
+
+
+@pytest.fixture
+def app_context(db_session):
+    now = datetime.now(timezone.utc)
+    old = Tenant(name='Antiga', tenant_type='PF', created_at=(now - timedelta(days=90)).replace(tzinfo=None))
+    new = Tenant(name='Nova', tenant_type='PJ', created_at=now.replace(tzinfo=None), is_active=False)
+    db_session.add_all([old, new])
+    db_session.flush()
+    db_session.add(User(username='admin', email='admin@example.com', password='x', tenant_id=old.id))
+    db_session.add_all(
+        Property(title=f'Imóvel {i}', external_id=f'ADM-{i}', tenant_id=old.id,
+                 created_at=now - timedelta(days=90 if i < 3 else 0))
+        for i in range(5)
+    )
+    db_session.commit()
+    yield old, new
+
+
+def _call(view):
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response = inspect.unwrap(view)()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return response.get_json(), statements
+
+
+def test_endpoints_read_only_the_rollup(app_context):
+    AdminDashboardRollup.refresh(full=True)
+
+    overview, statements = _call(dashboard_overview)
+    data = overview['data']
+    assert data['tenants'] == {'total': 2, 'active': 1, 'new_30d': 1, 'growth_rate': 0.0}
+    assert data['properties']['total'] == 5 and data['properties']['new_30d'] == 2
+    assert data['users']['total'] == 1
+    assert data['tenant_distribution'] == {'PF': 1, 'PJ': 1}
+    assert overview['refreshed_at'] and overview['stale_seconds'] >= 0
+    assert len(statements) == 3
+    assert not any(table in sql for sql in statements for table in ('FROM tenant', 'FROM property', 'FROM user'))
+
+    growth, statements = _call(dashboard_growth_stats)
+    assert [point['count'] for point in growth['data']['properties']] == [3, 2]
+    assert [point['count'] for point in growth['data']['tenants']] == [1, 1]
+    assert growth['data']['users'] == [] and growth['refreshed_at']
+    assert len(statements) == 2
+
+
+def test_incremental_refresh_only_touches_recent_days(app_context):
+    old, _ = app_context
+    AdminDashboardRollup.refresh(full=True)
+    old_rows = {(row.entity, row.day): row.id for row in AdminGrowthRollup.query.all()
+                if row.day < datetime.now(timezone.utc).date() - timedelta(days=2)}
+
+    db.session.add(Property(title='Recente', external_id='ADM-new', tenant_id=old.id))
+    db.session.commit()
+    result = AdminDashboardRollup.refresh()
+
+    assert result['mode'] == 'incremental'
+    kept = {(row.entity, row.day): row.id for row in AdminGrowthRollup.query.all() if (row.entity, row.day) in old_rows}
+    assert kept == old_rows
+    totals, recent, _ = AdminDashboardRollup.overview()
+    assert totals['properties_total'] == 6 and recent['properties'] == 3
+
+
+def test_first_read_bootstraps_the_rollup(app_context):
+    overview, _ = _call(dashboard_overview)
+    assert overview['data']['tenants']['total'] == 2 and overview['refreshed_at']
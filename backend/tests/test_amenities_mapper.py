@@ -0,0 +1,75 @@
+"""
+Testes do catálogo de amenities em cache e do resolver compilado (integrations.amenities_mapper)
+"""
+import pytest
+
+from integrations import amenities_mapper
+from integrations.amenities_mapper import AmenityResolver
+from integrations.gandalf_service import GandalfError
+
+CATALOG = [
+    {'name': 'POOL', 'singular': 'Piscina', 'plural': 'Piscinas'},
+    {'name': 'HEATED_POOL', 'singular': 'Piscina aquecida', 'plural': 'Piscinas aquecidas'},
+    {'name': 'SOLAR_ENERGY', 'singular': 'Energia solar', 'plural': None},
+    {'name': 'SPA', 'singular': 'Spa', 'plural': 'Spas'},
+]
+
+
+@pytest.fixture
+def fetches(monkeypatch):
+    calls = []
+
+    def fake_get_amenities(creds, unit_type='APARTMENT', listing_type='USED', glossary_version='V4', **kwargs):
+        calls.append(unit_type)
+        if creds.get('fail'):
+            raise GandalfError('boom')
+        return CATALOG
+
+    monkeypatch.setattr(amenities_mapper, 'get_amenities', fake_get_amenities)
+    amenities_mapper.reset_cache()
+    yield calls
+    amenities_mapper.reset_cache()
+
+
+def test_resolver_maps_labels_without_scanning():
+    resolver = AmenityResolver(CATALOG)
+
+    assert resolver.resolve('Salão de Festas') == 'PARTY_HALL'
+    assert resolver.resolve('  SALAO  DE   FESTAS ') == 'PARTY_HALL'
+    assert resolver.resolve('piscinas aquecidas') == 'HEATED_POOL'
+    assert resolver.resolve('energia solar fotovoltaica') == 'SOLAR_ENERGY'
+    assert resolver.resolve('solar') == 'SOLAR_ENERGY'
+    assert resolver.resolve('SPA') == 'SPA'
+    # Palavras inteiras: 'spa' não casa com 'espaço' nem rótulo parcial de palavra
+    assert resolver.resolve('espacinho') is None
+    assert resolver.resolve('') is None and resolver.resolve(None) is None
+
+
+def test_catalog_is_cached_per_unit_type(fetches):
+    creds = {'authorization': 't'}
+    assert amenities_mapper.map_amenities_list(['Piscina', 'Spa', 'Piscina'], creds) == ['POOL', 'SPA']
+    assert amenities_mapper.map_amenities_list(['Energia solar'], creds) == ['SOLAR_ENERGY']
+    assert amenities_mapper.validate_amenities(['POOL', 'NOPE'], creds) == ['POOL']
+    assert fetches == ['APARTMENT']
+
+    amenities_mapper.map_amenities_list(['Piscina'], creds, unit_type='HOME')
+    assert fetches == ['APARTMENT', 'HOME']
+
+
+def test_refresh_ahead_renews_before_expiry_and_keeps_stale_on_error(fetches, monkeypatch):
+    creds = {'authorization': 't'}
+    monkeypatch.setattr(amenities_mapper, 'LOCAL_TTL', 0)
+    amenities_mapper.get_amenity_resolver(creds)
+    key = amenities_mapper._catalog_key('APARTMENT', 'V4', 'USED')
+
+    # Dentro da janela de refresh-ahead: o próximo acesso (fora do cache local) busca de novo
+    entry = amenities_mapper._load_catalog(key)
+    entry['fetched_at'] -= amenities_mapper.CATALOG_TTL - amenities_mapper.CATALOG_REFRESH_AHEAD
+    amenities_mapper._store_catalog(key, entry)
+    amenities_mapper.get_amenity_resolver(creds)
+    assert len(fetches) == 2
+
+    # Catálogo expirado e API fora do ar: continua servindo o último catálogo do processo
+    amenities_mapper._memory_catalogs.clear()
+    resolver = amenities_mapper.get_amenity_resolver({'fail': True})
+    assert len(fetches) == 3 and resolver.resolve('Piscina') == 'POOL'
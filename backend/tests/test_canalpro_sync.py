@@ -0,0 +1,104 @@
+"""
+Testes do sync write-behind com o CanalPro (properties.services.canalpro_sync_service)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from celery import Task
+from flask import g
+
+from extensions import db
+from models import Property, PropertySyncState, Tenant
+from properties.services.canalpro_sync_service import CanalProSyncService
+from properties.services.property_service import PropertyService
+
+
+@pytest.fixture
+def env(db_session, monkeypatch):
+    tenant = Tenant(name='Tenant Sync')
+    db_session.add(tenant)
+    db_session.flush()
+    prop = Property(title='Apartamento', external_id='SYNC-1', tenant_id=tenant.id)
+    db_session.add(prop)
+    db_session.commit()
+    g.tenant_id = tenant.id
+
+    sent = []
+    monkeypatch.setattr(Task, 'apply_async', lambda self, args=None, **kwargs: sent.append((self.name, args, kwargs)))
+    pushed = []
+
+    def fake_push(prop):
+        pushed.append(prop.title)
+        return 'synced', None
+
+    monkeypatch.setattr(CanalProSyncService, 'push', staticmethod(fake_push))
+    yield prop.id, sent, pushed
+
+
+def _state(property_id):
+    db.session.expire_all()
+    return PropertySyncState.query.filter_by(property_id=property_id).one()
+
+
+def test_consecutive_saves_are_coalesced_into_one_push(env):
+    property_id, sent, pushed = env
+    for i in range(3):
+        ok, result = PropertyService.update_property(property_id, {'title': f'Apartamento v{i + 1}'})
+        assert ok and result['sync'] == {'status': 'pending', 'requested_version': i + 1}
+
+    assert [(name, args) for name, args, _ in sent] == [('canalpro_sync.push_property', [property_id, v])
+                                                        for v in (1, 2, 3)]
+    assert all(kwargs['countdown'] == CanalProSyncService.DEBOUNCE_SECONDS for _, _, kwargs in sent)
+    assert _state(property_id).status == 'pending'
+
+    results = [CanalProSyncService.run(property_id, version)['status'] for version in (1, 2, 3)]
+
+    assert results == ['superseded', 'superseded', 'synced']
+    assert pushed == ['Apartamento v3']
+    state = _state(property_id)
+    assert (state.status, state.synced_version, state.attempts) == ('synced', 3, 1)
+
+
+def test_edit_during_push_keeps_the_intent_pending(env, monkeypatch):
+    property_id, sent, _ = env
+    version = CanalProSyncService.request_sync(property_id, g.tenant_id)
+    db.session.commit()
+
+    def push_with_concurrent_edit(prop):
+        assert CanalProSyncService.run(property_id, version)['status'] == 'busy'
+        CanalProSyncService.request_sync(prop.id, prop.tenant_id)
+        db.session.commit()
+        return 'synced', None
+
+    monkeypatch.setattr(CanalProSyncService, 'push', staticmethod(push_with_concurrent_edit))
+    assert CanalProSyncService.run(property_id, version)['status'] == 'synced'
+
+    state = _state(property_id)
+    assert (state.status, state.synced_version, state.requested_version) == ('pending', 1, 2)
+    assert sent[-1][1] == [property_id, version]  # tentativa "busy" reagendada
+
+
+def test_sweep_requeues_lost_intents(env):
+    property_id, sent, _ = env
+    CanalProSyncService.request_sync(property_id, g.tenant_id)
+    db.session.commit()
+    assert CanalProSyncService.sweep() == 0
+
+    state = _state(property_id)
+    state.requested_at = datetime.now(timezone.utc) - timedelta(hours=1)
+    db.session.commit()
+    assert CanalProSyncService.sweep() == 1
+    assert sent[-1][1] == [property_id, 1] and sent[-1][2]['countdown'] == 0
+
+
+def test_duplicate_task_for_a_synced_version_does_not_push_again(env):
+    property_id, _, pushed = env
+    version = CanalProSyncService.request_sync(property_id, g.tenant_id)
+    db.session.commit()
+
+    assert CanalProSyncService.run(property_id, version)['status'] == 'synced'
+    # Segunda task da mesma versão (varredura ou reagendamento "busy")
+    result = CanalProSyncService.run(property_id, version)
+
+    assert result['status'] == 'synced' and result['duplicate']
+    assert len(pushed) == 1 and _state(property_id).attempts == 1
@@ -0,0 +1,77 @@
+"""
+Testes do cache de headers de integração descriptografados (utils.credential_cache)
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import IntegrationCredentials, Tenant
+from utils import credential_cache
+from utils.crypto import encrypt_token
+from utils.integration_tokens import get_valid_integration_headers
+
+
+@pytest.fixture
+def tenant_id(db_session):
+    tenant = Tenant(name='Tenant Credenciais')
+    db_session.add(tenant)
+    db_session.flush()
+    db_session.add(IntegrationCredentials(
+        tenant_id=tenant.id, provider='gandalf', token_encrypted=encrypt_token('tok-1'),
+        metadata_json={'publisher_id': '42'}, expires_at=datetime.now(timezone.utc) + timedelta(hours=1),
+    ))
+    db_session.commit()
+    credential_cache.reset()
+    try:
+        yield tenant.id
+    finally:
+        credential_cache.reset()
+
+
+def _count_statements(fn):
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    return result, len(statements)
+
+
+def test_headers_are_served_from_cache(tenant_id):
+    first, queries = _count_statements(lambda: get_valid_integration_headers(tenant_id, 'gandalf'))
+    assert first == {'authorization': 'tok-1', 'publisher_id': '42'} and queries == 1
+
+    first['authorization'] = 'mutated-by-caller'
+    second, queries = _count_statements(lambda: get_valid_integration_headers(tenant_id, 'gandalf'))
+    assert second == {'authorization': 'tok-1', 'publisher_id': '42'} and queries == 0
+    assert (credential_cache.metrics()['hits'], credential_cache.metrics()['misses']) == (1, 1)
+
+
+def test_rotation_invalidates_after_commit(tenant_id):
+    get_valid_integration_headers(tenant_id, 'gandalf')
+    cred = IntegrationCredentials.query.filter_by(tenant_id=tenant_id).one()
+    cred.token_encrypted = encrypt_token('tok-2')
+    db.session.flush()
+    # Ainda não commitado: outros leitores seguem com o token anterior
+    assert credential_cache.get(tenant_id, 'gandalf')['authorization'] == 'tok-1'
+    db.session.commit()
+
+    assert get_valid_integration_headers(tenant_id, 'gandalf')['authorization'] == 'tok-2'
+    assert credential_cache.metrics()['invalidations'] == 1
+
+
+def test_remote_invalidation_and_stale_loads_are_dropped(tenant_id):
+    get_valid_integration_headers(tenant_id, 'gandalf')
+    # Aviso publicado por outro processo (Redis pub/sub)
+    credential_cache._on_message({'type': 'message', 'data': f'{tenant_id}:gandalf'})
+    assert credential_cache.get(tenant_id, 'gandalf') is None
+
+    # Carga iniciada antes de uma invalidação não entra no cache
+    loaded_generation = credential_cache.generation(tenant_id, 'gandalf')
+    credential_cache.invalidate(tenant_id, 'gandalf')
+    credential_cache.put(tenant_id, 'gandalf', {'authorization': 'old'}, None, loaded_generation)
+    assert credential_cache.get(tenant_id, 'gandalf') is None
@@ -0,0 +1,127 @@
+"""
+Testes do pipeline concorrente de exportação Canal Pro (sem rede: funções Gandalf substituídas)
+"""
+import threading
+import time
+import uuid
+
+from extensions import db
+from models import IntegrationCredentials, Property, Tenant
+from integrations import canalpro_exporter
+from integrations.canalpro_exporter import CanalProExporter
+from integrations.export_pipeline import (
+    MAX_EXPORT_CONCURRENCY, TokenBucket, get_active_export, resolve_export_settings
+)
+
+
+class _FakeGandalf:
+    """Substitui as chamadas à API registrando a concorrência máxima observada."""
+
+    def __init__(self, fail_external_ids=()):
+        self.fail_external_ids = set(fail_external_ids)
+        self.lock = threading.Lock()
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.calls = []
+
+    def _call(self, name):
+        with self.lock:
+            self.calls.append(name)
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(0.02)
+        with self.lock:
+            self.in_flight -= 1
+
+    def get_listing_by_external_id(self, creds, external_id):
+        self._call('listings')
+        return []
+
+    def create_listing(self, listing, creds):
+        self._call('createListing')
+        if listing['externalId'] in self.fail_external_ids:
+            return {'data': {'createListing': {'id': None, 'errors': [{'message': 'inválido'}]}}}
+        return {'data': {'createListing': {'id': str(uuid.uuid4()), 'errors': []}}}
+
+    def activate_listing(self, creds, listing_id, publication_type='STANDARD'):
+        self._call('updateListingPublicationType')
+        return {'data': {'updateListingPublicationType': {'success': True}}}
+
+    def activate_listing_status(self, creds, listing_id, status='ACTIVE'):
+        self._call('updateListingStatus')
+        return {'data': {'updateListingStatus': {'success': True}}}
+
+
+class _Exporter(CanalProExporter):
+    def authenticate(self, app_context=None):
+        self.credentials = {'authorization': 'test'}
+        return True
+
+
+def _seed(total, metadata):
+    tenant = Tenant(name="Tenant Export", tenant_type="PJ")
+    db.session.add(tenant)
+    db.session.flush()
+    db.session.add(IntegrationCredentials(
+        tenant_id=tenant.id, provider='gandalf', token_encrypted='-', metadata_json=metadata
+    ))
+    for i in range(total):
+        db.session.add(Property(
+            title=f"Imóvel {i}", external_id=f"EXP-{i}", tenant_id=tenant.id,
+            property_type='APARTMENT', image_urls=['https://img/1.jpg']
+        ))
+    db.session.commit()
+    ids = [p.id for p in Property.query.filter_by(tenant_id=tenant.id)]
+    return tenant.id, ids
+
+
+def test_token_bucket_limits_rate_after_burst():
+    bucket = TokenBucket(rate=50, burst=5)
+    start = time.monotonic()
+    for _ in range(15):
+        bucket.acquire()
+    # 5 tokens imediatos + 10 a 50/s ≈ 0.2s
+    assert time.monotonic() - start >= 0.18
+
+    unlimited = TokenBucket(rate=0)
+    start = time.monotonic()
+    for _ in range(1000):
+        unlimited.acquire()
+    assert time.monotonic() - start < 0.5
+
+
+def test_resolve_export_settings_reads_tenant_metadata(app_ctx):
+    tenant_id, _ = _seed(0, {'export_concurrency': 99, 'export_rate_per_second': '7.5', 'export_burst': 'x'})
+    settings = resolve_export_settings(tenant_id)
+    assert settings['concurrency'] == MAX_EXPORT_CONCURRENCY
+    assert settings['rate_per_second'] == 7.5
+    assert settings['burst'] >= 1
+
+
+def test_run_export_is_concurrent_and_streams_stats(app_ctx, monkeypatch):
+    fake = _FakeGandalf(fail_external_ids={'EXP-3'})
+    for name in ('get_listing_by_external_id', 'create_listing', 'activate_listing', 'activate_listing_status'):
+        monkeypatch.setattr(canalpro_exporter, name, getattr(fake, name))
+
+    tenant_id, ids = _seed(12, {'export_concurrency': 4, 'export_rate_per_second': 0})
+
+    stats = _Exporter(tenant_id).run_export(ids + [999999], app_ctx.app_context(), activate=True)
+
+    assert stats['status'] == 'completed'
+    assert stats['total'] == 12
+    assert stats['processed'] == 12
+    assert stats['successful'] == 11
+    assert stats['failed'] == 1
+    assert stats['in_progress'] == 0
+    assert [e['external_id'] for e in stats['errors']] == ['EXP-3']
+    assert get_active_export(tenant_id) is stats
+    assert 1 < fake.max_in_flight <= 4
+
+    results = {r['property_id']: r for r in stats['activation_results']}
+    assert results[999999]['error'] == 'property_not_found'
+    assert sum(1 for r in results.values() if r.get('activated')) == 11
+
+    db.session.expire_all()
+    statuses = {p.external_id: p.status for p in Property.query.filter(Property.id.in_(ids))}
+    assert statuses.pop('EXP-3') == 'error'
+    assert set(statuses.values()) == {'exported'}
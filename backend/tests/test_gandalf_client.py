@@ -0,0 +1,83 @@
+"""
+Testes do cliente HTTP compartilhado do Gandalf: keep-alive, retry unificado e métricas
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from integrations import gandalf_client, gandalf_service
+from integrations.gandalf_client import GandalfHTTPClient
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    failures_left = 0
+    requests = []
+    connections = set()
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        payload = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))
+        _Stub.requests.append(payload['operationName'])
+        _Stub.connections.add(self.client_address)
+        if _Stub.failures_left:
+            _Stub.failures_left -= 1
+            status, body = 503, b'unavailable'
+        else:
+            operation = payload['operationName']
+            status, body = 200, json.dumps({'data': {operation: {'id': '1', 'success': True, 'errors': []}}}).encode()
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    _Stub.failures_left = 0
+    _Stub.requests = []
+    _Stub.connections = set()
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(gandalf_service, 'GANDALF_URL', f'http://127.0.0.1:{server.server_address[1]}/')
+    client = GandalfHTTPClient(pool_size=2, max_retries=2, backoff=0)
+    monkeypatch.setattr(gandalf_client, 'get_gandalf_client', lambda: client)
+    monkeypatch.setattr(gandalf_service, 'get_gandalf_client', lambda: client)
+    try:
+        yield client
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_calls_reuse_one_connection_and_record_metrics(client):
+    for _ in range(5):
+        gandalf_service.activate_listing_status({'authorization': 't'}, '1', 'ACTIVE')
+
+    assert len(_Stub.connections) == 1
+    metrics = client.metrics()['updateListingStatus']
+    assert metrics['calls'] == 5
+    assert metrics['errors'] == 0
+
+
+def test_idempotent_operations_retry_server_errors(client):
+    _Stub.failures_left = 2
+    result = gandalf_service.bulk_delete_listing(['1'], {'authorization': 't'})
+
+    assert result['data']['bulkDeleteListing']['success'] is True
+    assert _Stub.requests == ['bulkDeleteListing'] * 3
+    assert client.metrics()['bulkDeleteListing']['retries'] == 2
+
+
+def test_create_listing_is_not_retried(client):
+    _Stub.failures_left = 1
+    with pytest.raises(gandalf_service.GandalfError):
+        gandalf_service.create_listing({'externalId': 'X'}, {'authorization': 't'})
+
+    assert _Stub.requests == ['createListing']
+    assert client.metrics()['createListing']['errors'] == 1
@@ -0,0 +1,95 @@
+"""
+Testes do cache de transferência de imagens: imagens inalteradas não são reenviadas ao Gandalf
+"""
+import hashlib
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from integrations import image_transfer
+from integrations.image_transfer import transfer_images
+
+
+class _ImageServer(BaseHTTPRequestHandler):
+    images = {}
+    downloads = []
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        body = self.images[self.path]
+        etag = '"%s"' % hashlib.md5(body).hexdigest()
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.end_headers()
+            return
+        self.downloads.append(self.path)
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/jpeg')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+@pytest.fixture
+def image_server(monkeypatch):
+    monkeypatch.setattr(image_transfer, 'get_redis', lambda: None)
+    monkeypatch.setattr(image_transfer, '_memory_store', {})
+    _ImageServer.images = {f'/{i}.jpg': f'foto-{i}'.encode() for i in range(4)}
+    _ImageServer.downloads = []
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _ImageServer)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield f'http://127.0.0.1:{server.server_address[1]}'
+    finally:
+        server.shutdown()
+
+
+def _uploader():
+    uploads = []
+    lock = threading.Lock()
+
+    def upload(data, index, content_type):
+        with lock:
+            uploads.append(data)
+            return f'https://gandalf/{hashlib.sha256(data).hexdigest()[:8]}.jpg'
+
+    return upload, uploads
+
+
+def test_unchanged_images_are_not_uploaded_again(image_server):
+    urls = [f'{image_server}/{i}.jpg' for i in range(4)]
+    upload, uploads = _uploader()
+
+    first = transfer_images(1, urls, upload)
+    assert len(uploads) == 4
+    assert all(first)
+
+    second = transfer_images(1, urls, upload)
+    assert second == first
+    assert len(uploads) == 4
+    # Revalidação com ETag: nenhum download completo na segunda vez
+    assert len(_ImageServer.downloads) == 4
+
+
+def test_changed_and_duplicated_content(image_server):
+    upload, uploads = _uploader()
+    transfer_images(1, [f'{image_server}/0.jpg', f'{image_server}/1.jpg'], upload)
+
+    # Mesma foto publicada sob outra URL: reaproveitada pelo hash do conteúdo
+    _ImageServer.images['/copia.jpg'] = _ImageServer.images['/0.jpg']
+    # Foto substituída na mesma URL: novo upload
+    _ImageServer.images['/1.jpg'] = b'foto-nova'
+
+    result = transfer_images(1, [f'{image_server}/copia.jpg', f'{image_server}/1.jpg'], upload)
+    assert len(uploads) == 3
+    assert uploads[-1] == b'foto-nova'
+    assert result[0] is not None and result[1] is not None
+
+    # Cache separado por tenant
+    transfer_images(2, [f'{image_server}/0.jpg'], upload)
+    assert len(uploads) == 4
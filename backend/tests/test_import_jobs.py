@@ -0,0 +1,114 @@
+"""
+Testes do job de importação do Gandalf: progresso por página, cancelamento e retomada
+"""
+import pytest
+from sqlalchemy import update
+
+from extensions import db
+from models import ImportJob, Property, Tenant
+from properties.services import import_job_service, import_service
+from properties.services.import_job_service import ImportJobService
+from properties.services.import_service import ImportService
+
+
+@pytest.fixture
+def tenant_id(db_session, monkeypatch):
+    """Tenant vazio e importação sem credenciais/downloads reais."""
+    monkeypatch.setattr(ImportService, '_get_integration_credentials', staticmethod(lambda *a: {'authorization': 't'}))
+    monkeypatch.setattr(ImportService, '_enqueue_image_downloads', staticmethod(lambda prop, images: None))
+    tenant = Tenant(name='Tenant Job')
+    db_session.add(tenant)
+    db_session.commit()
+    yield tenant.id
+
+
+def _pages(total_pages, per_page=5, requested=None, on_page=None):
+    """Fonte falsa de páginas do Gandalf que respeita start_page."""
+    def fake_pages(creds, page_size=50, status_filter=None, start_page=1):
+        for number in range(start_page, total_pages + 1):
+            if requested is not None:
+                requested.append(number)
+            if on_page:
+                on_page(number)
+            yield [{'externalId': f'EXT-{number}-{i}', 'title': f'Imóvel {number}-{i}'} for i in range(per_page)]
+    return fake_pages
+
+
+def _create_job(tenant_id):
+    job = ImportJob(tenant_id=tenant_id, options={'status_filter': ['ACTIVE']})
+    db.session.add(job)
+    db.session.commit()
+    return job.id
+
+
+def test_job_records_progress_per_page(tenant_id, monkeypatch):
+    monkeypatch.setattr(import_service, 'iter_listing_pages', _pages(3))
+    job_id = _create_job(tenant_id)
+
+    result = ImportJobService.run_job(job_id, 'task-1')
+
+    assert result['status'] == 'completed'
+    assert result['pages_fetched'] == 3 and result['last_completed_page'] == 3
+    assert result['inserted'] == 15 and result['total_listings'] == 15
+    assert result['completed_at'] is not None
+
+
+def test_cancel_stops_after_current_page(tenant_id, monkeypatch):
+    job_id = _create_job(tenant_id)
+    engine = db.engine
+
+    # Cancelamento vindo de outra conexão (requisição HTTP) enquanto a página 2 é buscada
+    def cancel_on_page_two(number):
+        if number == 2:
+            with engine.begin() as conn:
+                conn.execute(update(ImportJob.__table__).where(ImportJob.id == job_id).values(cancel_requested=True))
+
+    monkeypatch.setattr(import_service, 'iter_listing_pages', _pages(5, on_page=cancel_on_page_two))
+    result = ImportJobService.run_job(job_id)
+
+    assert result['status'] == 'cancelled'
+    assert result['last_completed_page'] in (1, 2)
+    assert Property.query.filter_by(tenant_id=tenant_id).count() == result['inserted']
+
+
+def test_job_resumes_from_last_completed_page(tenant_id, monkeypatch):
+    job_id = _create_job(tenant_id)
+
+    # Primeira execução "morre" ao buscar a página 3 (worker reiniciado)
+    def crash_on_page_three(number):
+        if number == 3:
+            raise SystemExit('worker lost')
+
+    monkeypatch.setattr(import_service, 'iter_listing_pages', _pages(4, on_page=crash_on_page_three))
+    with pytest.raises(SystemExit):
+        ImportJobService.run_job(job_id)
+    db.session.rollback()
+    job = db.session.get(ImportJob, job_id)
+    assert job.status == 'running' and job.last_completed_page == 2
+
+    requested = []
+    monkeypatch.setattr(import_service, 'iter_listing_pages', _pages(4, requested=requested))
+    result = ImportJobService.run_job(job_id)
+
+    assert requested == [3, 4]
+    assert result['status'] == 'completed'
+    assert result['inserted'] == 20 and result['pages_fetched'] == 4
+
+
+def test_start_import_allows_one_active_job_per_tenant(tenant_id, monkeypatch):
+    enqueued = []
+
+    class _Result:
+        id = 'task-123'
+
+    monkeypatch.setattr(import_job_service.run_gandalf_import, 'delay', lambda job_id: enqueued.append(job_id) or _Result())
+
+    ok, job = ImportJobService.start_import(tenant_id, None, {'status_filter': None})
+    assert ok and job['status'] == 'pending' and enqueued == [job['id']]
+    assert db.session.get(ImportJob, job['id']).task_id == 'task-123'
+
+    ok, result = ImportJobService.start_import(tenant_id, None, {'status_filter': None})
+    assert not ok and result['job']['id'] == job['id']
+
+    ok, cancelled = ImportJobService.cancel_job(job['id'], tenant_id)
+    assert ok and cancelled['status'] == 'cancelled'
@@ -0,0 +1,89 @@
+"""
+Testes da importação em streaming do Gandalf: upsert em lote por página
+"""
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import Property, Tenant
+from properties.services import import_service
+from properties.services.import_service import ImportService
+
+
+@pytest.fixture
+def app_context(db_session, monkeypatch):
+    """Importação sem credenciais reais; devolve os downloads de imagem enfileirados."""
+    monkeypatch.setattr(ImportService, '_get_integration_credentials', staticmethod(lambda *a: {'authorization': 't'}))
+    enqueued = []
+    monkeypatch.setattr(ImportService, '_enqueue_image_downloads',
+                        staticmethod(lambda prop, images: enqueued.append((prop.id, images))))
+    yield enqueued
+
+
+def _listing(i, **extra):
+    listing = {
+        'externalId': f'EXT-{i}', 'title': f'Imóvel {i}', 'status': 'ACTIVE', 'bedrooms': i % 4,
+        'address': {'city': 'Curitiba', 'neighborhood': 'Centro'},
+        'pricingInfos': [{'price': str(100000 + i), 'businessType': 'SALE'}],
+        'images': [f'https://img/{i}.jpg'],
+    }
+    listing.update(extra)
+    return listing
+
+
+def _serve_pages(monkeypatch, pages):
+    def fake_pages(creds, page_size=50, status_filter=None, start_page=1):
+        yield from pages
+    monkeypatch.setattr(import_service, 'iter_listing_pages', fake_pages)
+
+
+def _count_statements():
+    statements = []
+    event.listen(db.engine, 'before_cursor_execute', lambda *args: statements.append(args[2]))
+    return statements
+
+
+def test_round_trips_scale_with_pages_not_listings(app_context, monkeypatch):
+    tenant = Tenant(name='Tenant Import')
+    db.session.add(tenant)
+    db.session.commit()
+    _serve_pages(monkeypatch, [[_listing(i) for i in range(p * 20, p * 20 + 20)] for p in range(3)])
+
+    statements = _count_statements()
+    stats = ImportService.import_all_from_gandalf(tenant.id)
+
+    assert stats['inserted'] == 60 and stats['updated'] == 0 and stats['pages'] == 3
+    assert stats['total_listings'] == 60 and not stats['errors']
+    # Contadores de quota: um upsert por página, contado à parte
+    quota_statements = [s for s in statements if 'tenant_quota_usage' in s]
+    import_statements = [s for s in statements if 'tenant_quota_usage' not in s]
+    assert len(quota_statements) == 3
+    # Um SELECT dos existentes + um INSERT ... ON CONFLICT por página
+    assert sum(1 for s in import_statements if 'ON CONFLICT' in s) == 3
+    assert len(import_statements) <= 3 * 2 + 2
+    assert len(app_context) == 60 and all(prop_id for prop_id, _ in app_context)
+
+    prop = Property.query.filter_by(tenant_id=tenant.id, external_id='EXT-5').one()
+    assert prop.status == 'ACTIVE' and prop.publication_type == 'STANDARD'
+    assert prop.address_city == 'Curitiba' and float(prop.price) == 100005
+
+
+def test_reimport_updates_and_keeps_fields_missing_from_listing(app_context, monkeypatch):
+    tenant = Tenant(name='Tenant Import')
+    db.session.add(tenant)
+    db.session.commit()
+    _serve_pages(monkeypatch, [[_listing(1), _listing(2)]])
+    ImportService.import_all_from_gandalf(tenant.id)
+
+    # Segunda importação: listing sem endereço mantém o valor gravado
+    changed = _listing(1, title='Novo título', address={})
+    _serve_pages(monkeypatch, [[changed, _listing(3), {'title': 'sem id'}], [_listing(3, bedrooms=9)]])
+    stats = ImportService.import_all_from_gandalf(tenant.id)
+
+    assert stats['inserted'] == 1 and stats['updated'] == 2
+    assert len(stats['errors']) == 1
+    db.session.expire_all()
+    prop = Property.query.filter_by(tenant_id=tenant.id, external_id='EXT-1').one()
+    assert prop.title == 'Novo título' and prop.address_city == 'Curitiba'
+    assert Property.query.filter_by(tenant_id=tenant.id, external_id='EXT-3').one().bedrooms == 9
+    assert Property.query.filter_by(tenant_id=tenant.id).count() == 3
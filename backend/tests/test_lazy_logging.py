@@ -0,0 +1,112 @@
+"""
+Testes do logging preguiçoso/amostrado e dos handlers em fila (utils.lazy_logging)
+"""
+import logging
+import threading
+import time
+
+import pytest
+
+from utils import lazy_logging
+from utils.lazy_logging import async_handler, log_sampled, preview
+
+
+class _Payload:
+    """Payload que conta quantas vezes foi serializado."""
+
+    def __init__(self):
+        self.renders = 0
+
+    def __str__(self):
+        self.renders += 1
+        return 'x' * 5000
+
+
+class _ListHandler(logging.Handler):
+    def __init__(self, delay=0.0):
+        super().__init__()
+        self.messages = []
+        self.delay = delay
+        self.received = threading.Event()
+
+    def emit(self, record):
+        time.sleep(self.delay)
+        self.messages.append(record.getMessage())
+        self.received.set()
+
+
+@pytest.fixture
+def logger():
+    logger = logging.getLogger('tests.lazy_logging')
+    logger.propagate = False
+    handler = _ListHandler()
+    logger.addHandler(handler)
+    lazy_logging._sample_counters.clear()
+    try:
+        yield logger, handler
+    finally:
+        logger.removeHandler(handler)
+        logger.setLevel(logging.NOTSET)
+        lazy_logging._sample_counters.clear()
+
+
+def test_preview_renders_only_when_level_is_enabled(logger):
+    logger, handler = logger
+    payload = _Payload()
+    logger.setLevel(logging.INFO)
+    logger.debug('payload=%s', preview(payload, 100))
+    assert payload.renders == 0 and handler.messages == []
+
+    logger.setLevel(logging.DEBUG)
+    logger.debug('payload=%s', preview(payload, 100))
+    logger.debug('json=%s', preview({'b': 1, 'a': [1, 2]}))
+    assert payload.renders == 1
+    assert handler.messages == ['payload=' + 'x' * 100, 'json={"b": 1, "a": [1, 2]}']
+
+
+def test_large_bodies_are_sampled_per_key(logger):
+    logger, handler = logger
+    logger.setLevel(logging.INFO)
+    for i in range(7):
+        log_sampled(logger, logging.INFO, 'listings', 'page %s', i, every=3)
+        log_sampled(logger, logging.DEBUG, 'disabled', 'page %s', i, every=3)
+    log_sampled(logger, logging.INFO, 'other', 'other page')
+
+    assert handler.messages == ['page 0', 'page 3', 'page 6', 'other page']
+    assert 'disabled' not in lazy_logging._sample_counters
+
+
+def test_async_handler_moves_io_off_the_caller_thread():
+    slow = _ListHandler(delay=0.3)
+    logger = logging.getLogger('tests.lazy_logging.async')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = async_handler(slow)
+    logger.addHandler(handler)
+    try:
+        start = time.perf_counter()
+        logger.info('exported %s', 42)
+        assert time.perf_counter() - start < 0.1
+        assert slow.received.wait(2) and slow.messages == ['exported 42']
+    finally:
+        logger.removeHandler(handler)
+
+
+def test_listener_is_replaced_after_fork():
+    target = _ListHandler()
+    logger = logging.getLogger('tests.lazy_logging.fork')
+    logger.propagate = False
+    logger.setLevel(logging.INFO)
+    handler = async_handler(target)
+    logger.addHandler(handler)
+    old = next(listener for h, listener in lazy_logging._listeners if h is handler)
+    try:
+        lazy_logging._restart_listeners_after_fork()
+        old.stop()
+        new = next(listener for h, listener in lazy_logging._listeners if h is handler)
+        assert new is not old and new.handlers == (target,) and new.queue is handler.queue
+
+        logger.info('after fork')
+        assert target.received.wait(2) and target.messages == ['after fork']
+    finally:
+        logger.removeHandler(handler)
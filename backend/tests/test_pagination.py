@@ -0,0 +1,73 @@
+"""
+Testes da paginação por cursor (keyset) em utils.pagination
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from extensions import db
+from models import Property, Tenant
+from utils.pagination import InvalidCursorError, decode_cursor, encode_cursor, paginate_keyset
+
+
+def test_cursor_round_trip_and_signature():
+    values = [datetime(2025, 1, 1, tzinfo=timezone.utc), 42]
+    cursor = encode_cursor(values, 'updated_at:desc')
+
+    assert decode_cursor(cursor, 'updated_at:desc') == values
+    with pytest.raises(InvalidCursorError):
+        decode_cursor(cursor, 'updated_at:asc')
+    with pytest.raises(InvalidCursorError):
+        decode_cursor('not-a-cursor', 'updated_at:desc')
+
+
+@pytest.mark.parametrize("column", ["updated_at", "price"])
+@pytest.mark.parametrize("descending", [True, False])
+def test_keyset_walk_visits_every_row_once(app_ctx, column, descending):
+    tenant = Tenant(name="Tenant Pagination")
+    db.session.add(tenant)
+    db.session.flush()
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(23):
+        db.session.add(Property(
+            title=f"Imóvel {i}", external_id=f"PAG-{i}", tenant_id=tenant.id,
+            price=(i % 4) * 100 if i % 3 else None,  # empates e NULLs
+            updated_at=base + timedelta(minutes=i // 3),
+        ))
+    db.session.commit()
+
+    keys = [(getattr(Property, column), descending), (Property.id, descending)]
+    seen, cursor = [], None
+    while True:
+        items, cursor, has_more = paginate_keyset(Property.query, keys, 5, cursor, column)
+        seen.extend(p.id for p in items)
+        if not has_more:
+            break
+
+    assert len(seen) == 23
+    assert len(set(seen)) == 23
+
+
+def test_keyset_walk_on_computed_expression(app_ctx):
+    tenant = Tenant(name="Tenant Relevância")
+    db.session.add(tenant)
+    db.session.flush()
+    base = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    for i in range(17):
+        db.session.add(Property(title=f"Imóvel {i}", external_id=f"REL-{i}", tenant_id=tenant.id,
+                                bedrooms=i % 5, updated_at=base + timedelta(minutes=i % 2)))
+    db.session.commit()
+
+    # Como a relevância da busca: expressão sem atributo na entidade, com empates
+    score = Property.bedrooms * 0.5
+    keys = [(score, True), (Property.updated_at, True), (Property.id, True)]
+    seen, cursor = [], None
+    while True:
+        items, cursor, has_more = paginate_keyset(Property.query, keys, 4, cursor, 'relevance:desc')
+        assert all(isinstance(p, Property) for p in items)
+        seen.extend(items)
+        if not has_more:
+            break
+
+    assert len({p.id for p in seen}) == len(seen) == 17
+    assert [p.bedrooms for p in seen] == sorted((p.bedrooms for p in seen), reverse=True)
@@ -0,0 +1,150 @@
+"""
+Testes do fingerprint de payload do CanalPro (integrations.payload_fingerprint)
+"""
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from integrations import gandalf_service, payload_fingerprint
+from integrations.canalpro_exporter import CanalProExporter
+from models import Property, Tenant
+from properties.services.canalpro_sync_service import CanalProSyncService
+from properties.services.property_service import PropertyService
+from utils import integration_tokens
+
+
+@pytest.fixture
+def prop(db_session):
+    tenant = Tenant(name='Tenant Fingerprint')
+    db_session.add(tenant)
+    db_session.flush()
+    prop = Property(title='Casa', external_id='FP-1', tenant_id=tenant.id, status='exported', remote_id='R-1',
+                    image_urls=['https://img/1.jpg', 'https://img/2.jpg'])
+    db_session.add(prop)
+    db_session.commit()
+    payload_fingerprint.reset()
+    try:
+        yield prop
+    finally:
+        payload_fingerprint.reset()
+
+
+def test_fingerprint_is_canonical():
+    payload = {'title': 'Casa', 'images': [{'imageUrl': 'a'}], 'pricingInfos': {'price': 1, 'type': 'SALE'}}
+    reordered = {'pricingInfos': {'type': 'SALE', 'price': 1}, 'images': [{'imageUrl': 'a'}], 'title': 'Casa'}
+
+    assert payload_fingerprint.fingerprint(payload) == payload_fingerprint.fingerprint(reordered)
+    assert payload_fingerprint.fingerprint(payload) == payload_fingerprint.fingerprint({**payload, 'id': 'R-9'})
+    assert payload_fingerprint.fingerprint(payload) != payload_fingerprint.fingerprint(
+        {**payload, 'images': [{'imageUrl': 'b'}]})
+
+
+def test_sync_push_skips_unchanged_payload(prop, monkeypatch):
+    updates = []
+
+    def fake_update(payload, creds):
+        updates.append(payload['title'])
+        return {'data': {'updateListing': {'id': 'R-1', 'errors': []}}}
+
+    monkeypatch.setattr(integration_tokens, 'get_valid_integration_headers', lambda tenant_id, provider: {})
+    monkeypatch.setattr(gandalf_service, 'update_listing', fake_update)
+
+    assert CanalProSyncService.push(prop) == ('synced', None)
+    assert prop.canalpro_fingerprint and prop.canalpro_pushed_at is not None
+    assert CanalProSyncService.push(prop) == ('synced', None)
+    assert len(updates) == 1
+
+    prop.image_urls = ['https://img/1.jpg']
+    db.session.commit()
+    assert CanalProSyncService.push(prop) == ('synced', None)
+    assert len(updates) == 2
+    assert payload_fingerprint.metrics(prop.tenant_id) == {'sent': 2, 'skipped': 1, 'touched': 0,
+                                                             'avoided_ratio': 0.3333}
+
+
+def test_export_skips_unchanged_payload(prop, monkeypatch):
+    exporter = CanalProExporter(tenant_id=prop.tenant_id)
+    exporter.credentials = {}
+    payload = exporter.convert_property_to_canalpro_format(prop)
+    payload_fingerprint.mark_pushed(prop, payload_fingerprint.fingerprint(payload))
+    db.session.commit()
+
+    monkeypatch.setattr(exporter, 'upload_property_images', lambda *a: pytest.fail('unchanged payload must not upload'))
+    for name in ('update_listing', 'create_listing', 'get_listing_by_external_id'):
+        monkeypatch.setattr(f'integrations.canalpro_exporter.{name}',
+                            lambda *a, name=name: pytest.fail(f'unchanged payload must not call {name}'))
+
+    assert exporter.export_property(prop, is_refresh=True) is True
+    assert payload_fingerprint.metrics(prop.tenant_id)['skipped'] == 1
+
+
+def test_refresh_downgrades_unchanged_recreate_to_touch(prop, monkeypatch):
+    exporter = CanalProExporter(tenant_id=prop.tenant_id)
+    exporter.credentials = {}
+    payload = exporter.convert_property_to_canalpro_format(prop)
+    payload_fingerprint.mark_pushed(prop, payload_fingerprint.fingerprint(payload))
+    db.session.commit()
+
+    touched = []
+    monkeypatch.setattr(PropertyService, '_refresh_target',
+                        staticmethod(lambda property_id, tenant_id=None, prop=prop: (prop, exporter, None)))
+    monkeypatch.setattr(PropertyService, '_refresh_by_recreate',
+                        staticmethod(lambda *args: pytest.fail('unchanged payload must not be recreated')))
+    monkeypatch.setattr(gandalf_service, 'activate_listing_status', lambda creds, remote_id, status: touched.append(
+        remote_id) or {'data': {'updateListingStatus': {'success': True}}})
+
+    success, result = PropertyService.refresh_property(prop.id, prop.tenant_id, strategy='recreate')
+
+    assert success and touched == ['R-1']
+    assert result['refresh_details']['strategy'] == 'touch'
+    assert result['refresh_details']['requested_strategy'] == 'recreate'
+    assert payload_fingerprint.metrics(prop.tenant_id)['touched'] == 1
+
+
+def test_rejected_touch_of_unchanged_payload_resends_listing(prop, monkeypatch):
+    exporter = CanalProExporter(tenant_id=prop.tenant_id)
+    exporter.credentials = {}
+    payload = exporter.convert_property_to_canalpro_format(prop)
+    payload_fingerprint.mark_pushed(prop, payload_fingerprint.fingerprint(payload))
+    db.session.commit()
+
+    updates = []
+    monkeypatch.setattr(PropertyService, '_refresh_target',
+                        staticmethod(lambda property_id, tenant_id=None, prop=prop: (prop, exporter, None)))
+    monkeypatch.setattr(gandalf_service, 'activate_listing_status', lambda creds, remote_id, status: {
+        'data': {'updateListingStatus': {'success': False, 'errors': ['listing not found']}}})
+    monkeypatch.setattr('integrations.canalpro_exporter.update_listing', lambda payload, creds: updates.append(
+        payload['id']) or {'data': {'updateListing': {'id': 'R-1', 'errors': []}}})
+
+    success, result = PropertyService.refresh_property(prop.id, prop.tenant_id, strategy='recreate')
+
+    assert success and updates == ['R-1']
+    assert result['refresh_details']['strategy'] == 'touch->update'
+    assert payload_fingerprint.metrics(prop.tenant_id)['skipped'] == 0
+
+
+def test_changed_payload_reuses_the_authenticated_exporter(prop, monkeypatch):
+    payload_fingerprint.mark_pushed(prop, 'fingerprint-do-envio-anterior')
+    db.session.commit()
+
+    authenticated, handled, selects = [], [], []
+
+    def fake_authenticate(self, app_context=None):
+        authenticated.append(self)
+        self.credentials = {}
+        return True
+
+    monkeypatch.setattr(CanalProExporter, 'authenticate', fake_authenticate)
+    monkeypatch.setattr(PropertyService, '_refresh_by_recreate', staticmethod(
+        lambda property_id, tenant_id=None, prop=None, exporter=None: handled.append(exporter) or (True, {})))
+    # Consultas da propriedade por id + tenant (o reload de atributos expirados não conta)
+    listener = lambda conn, cursor, sql, *args: selects.append(sql) if 'property.tenant_id = ?' in sql else None  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        success, result = PropertyService.refresh_property(prop.id, prop.tenant_id, strategy='recreate')
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert success and result['refresh_details']['strategy'] == 'recreate'
+    assert len(authenticated) == 1 and handled == authenticated
+    assert len(selects) == 1
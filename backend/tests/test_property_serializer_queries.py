@@ -0,0 +1,84 @@
+"""
+Testes de regressão: serialização de listagens não deve gerar N+1 consultas de empreendimento
+"""
+from sqlalchemy import event
+
+from extensions import db
+from models import Property, Tenant
+from empreendimentos.models.empreendimento import Empreendimento
+from properties.serializers.property_serializer import PropertySerializer
+
+
+def _seed(total_properties, total_empreendimentos=10):
+    tenant = Tenant(name="Tenant Serializer", tenant_type="PJ")
+    db.session.add(tenant)
+    db.session.flush()
+
+    empreendimentos = [
+        Empreendimento(
+            nome=f"Residencial {i}", cep="74000000", endereco="Rua A", bairro="Centro",
+            cidade="Goiânia", estado="GO", tenant_id=tenant.id, ativo=(i != 0)
+        )
+        for i in range(total_empreendimentos)
+    ]
+    db.session.add_all(empreendimentos)
+    db.session.flush()
+
+    for i in range(total_properties):
+        db.session.add(Property(
+            title=f"Imóvel {i}",
+            external_id=f"SER-{i}",
+            tenant_id=tenant.id,
+            empreendimento_id=empreendimentos[i % total_empreendimentos].id if i % 3 else None,
+        ))
+    db.session.commit()
+    db.session.expunge_all()
+
+
+def _count_selects(fn):
+    statements = []
+
+    def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith("SELECT"):
+            statements.append(statement)
+
+    event.listen(db.engine, "before_cursor_execute", _before_cursor_execute)
+    try:
+        result = fn()
+    finally:
+        event.remove(db.engine, "before_cursor_execute", _before_cursor_execute)
+    return result, len(statements)
+
+
+def _serialize_page(page_size):
+    items = Property.query.order_by(Property.id).limit(page_size).all()
+    return PropertySerializer.to_list_response(items, page_size, 1, page_size)
+
+
+def test_list_response_issues_constant_selects(app_ctx):
+    _seed(100)
+
+    small, small_selects = _count_selects(lambda: _serialize_page(10))
+    db.session.expunge_all()
+    large, large_selects = _count_selects(lambda: _serialize_page(100))
+
+    assert len(small['data']) == 10
+    assert len(large['data']) == 100
+    assert large_selects == small_selects
+    assert large_selects <= 2
+
+
+def test_list_response_keeps_condominium_payload(app_ctx):
+    _seed(30)
+
+    response = _serialize_page(30)
+    by_id = {item['id']: item for item in response['data']}
+
+    for prop in Property.query.all():
+        condominium = by_id[prop.id]['condominium']
+        if prop.empreendimento_id is None:
+            assert condominium is None
+        elif prop.empreendimento.ativo:
+            assert condominium['id'] == prop.empreendimento_id
+        else:
+            assert condominium is None
@@ -0,0 +1,54 @@
+"""
+Testes do cliente Redis compartilhado (utils.redis_client)
+"""
+import pytest
+import redis
+
+from utils import redis_client
+
+
+class _FakeRedis:
+    def __init__(self, healthy=True):
+        self.healthy = healthy
+
+    def ping(self):
+        if not self.healthy:
+            raise redis.ConnectionError('down')
+        return True
+
+
+@pytest.fixture
+def connections(monkeypatch):
+    created = []
+
+    def fake_from_url(url, **kwargs):
+        created.append(kwargs)
+        return _FakeRedis(healthy=not url.endswith('/down'))
+
+    monkeypatch.setattr(redis, 'from_url', fake_from_url)
+    monkeypatch.setattr(redis_client, 'REDIS_URL', 'redis://cache:6379/0')
+    monkeypatch.setattr(redis_client, '_client', None)
+    monkeypatch.setattr(redis_client, '_client_pid', None)
+    return created
+
+
+def test_one_lazy_client_per_process(connections, monkeypatch):
+    assert connections == []
+    client = redis_client.get_redis()
+    assert redis_client.get_redis() is client
+    assert connections == [{'decode_responses': True}]
+
+    # Após fork o filho abre o próprio pool
+    monkeypatch.setattr(redis_client.os, 'getpid', lambda: -1)
+    child = redis_client.get_redis()
+    assert child is not client and len(connections) == 2
+
+
+def test_memory_fallback_without_url_or_when_unreachable(connections, monkeypatch):
+    monkeypatch.setattr(redis_client, 'REDIS_URL', 'redis://cache:6379/down')
+    assert redis_client.get_redis() is None and not redis_client.is_available()
+    assert len(connections) == 1
+
+    monkeypatch.setattr(redis_client, 'REDIS_URL', None)
+    monkeypatch.setattr(redis_client, '_client_pid', None)
+    assert redis_client.get_redis() is None and len(connections) == 1
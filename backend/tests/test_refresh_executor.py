@@ -0,0 +1,87 @@
+"""
+Testes do executor de refresh baseado em claim/lease
+"""
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from extensions import db
+from models import Property, RefreshJob, Tenant
+from properties.services.refresh_executor import RefreshJobExecutor
+from properties.services.refresh_scheduler_service import RefreshSchedulerService
+
+
+@pytest.fixture
+def property_ids(db_session):
+    """6 imóveis e um job pendente para cada."""
+    tenant = Tenant(name='Tenant Executor')
+    db_session.add(tenant)
+    db_session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'EXE-{i}', tenant_id=tenant.id) for i in range(6)]
+    db_session.add_all(props)
+    db_session.flush()
+    now = datetime.now(timezone.utc)
+    for prop in props:
+        db_session.add(RefreshJob(property_id=prop.id, status='pending', scheduled_at=now - timedelta(minutes=1)))
+    db_session.commit()
+    yield [prop.id for prop in props]
+
+
+def test_concurrent_claims_never_overlap(property_ids):
+    first = RefreshJobExecutor.claim_jobs(4, 'worker-a')
+    second = RefreshJobExecutor.claim_jobs(4, 'worker-b')
+
+    assert len(first) == 4 and len(second) == 2
+    assert not set(first) & set(second)
+    assert RefreshJobExecutor.claim_jobs(4, 'worker-c') == []
+    assert RefreshJobExecutor.in_flight_count() == 6
+
+    job = db.session.get(RefreshJob, first[0])
+    assert job.status == 'running' and job.lease_owner == 'worker-a' and job.attempts == 1
+
+
+def test_claim_query_uses_skip_locked():
+    sql = str(RefreshJobExecutor._candidates_statement(5).compile(dialect=postgresql.dialect()))
+    assert 'FOR UPDATE OF refresh_jobs SKIP LOCKED' in sql
+    sql = str(RefreshJobExecutor._claim_statement([1, 2], 'worker-a').compile(dialect=postgresql.dialect()))
+    assert 'RETURNING' in sql
+
+
+def test_expired_lease_is_reclaimed_then_failed(property_ids, monkeypatch):
+    monkeypatch.setattr(RefreshJobExecutor, 'MAX_ATTEMPTS', 2)
+    job_id = RefreshJobExecutor.claim_jobs(1, 'dead-worker', lease_seconds=-1)[0]
+
+    reclaimed = RefreshJobExecutor.claim_jobs(10, 'worker-b', lease_seconds=-1)
+    assert job_id in reclaimed
+    assert db.session.get(RefreshJob, job_id).attempts == 2
+
+    # Só o job que já esgotou as tentativas é marcado como failed
+    assert RefreshJobExecutor.reap_expired_leases() == 1
+    db.session.expire_all()
+    job = db.session.get(RefreshJob, job_id)
+    assert job.status == 'failed' and 'Lease expired' in job.error_message
+
+
+def test_run_job_honours_lease(property_ids, monkeypatch):
+    calls = []
+    monkeypatch.setattr(RefreshSchedulerService, '_perform_property_refresh_with_details',
+                        staticmethod(lambda property_id, strategy=None: calls.append(property_id) or (True, {'message': 'ok'})))
+    job_id, other_id = RefreshJobExecutor.claim_jobs(2, 'worker-a')
+
+    ok, result = RefreshJobExecutor.run_job(job_id, 'not-the-owner')
+    assert not ok and calls == []
+
+    ok, result = RefreshJobExecutor.run_job(job_id, 'worker-a')
+    assert ok and result['job_id'] == job_id
+    db.session.expire_all()
+    job = db.session.get(RefreshJob, job_id)
+    assert job.status == 'completed' and job.lease_owner is None
+
+    # Lease perdido durante a execução: resultado descartado, job segue com o novo dono
+    def steal_lease(property_id, strategy=None):
+        db.session.execute(db.update(RefreshJob).where(RefreshJob.id == other_id).values(lease_owner='worker-b'))
+        return True, {}
+    monkeypatch.setattr(RefreshSchedulerService, '_perform_property_refresh_with_details', staticmethod(steal_lease))
+    ok, result = RefreshJobExecutor.run_job(other_id, 'worker-a')
+    assert not ok and 'Lease lost' in result['error']
@@ -0,0 +1,101 @@
+"""
+Testes do rollup incremental de KPIs de refresh
+"""
+from datetime import datetime, time, timedelta, timezone
+
+import pytest
+from flask import current_app
+from flask_jwt_extended import create_access_token
+from sqlalchemy import event
+
+from extensions import db
+from models import Property, RefreshKpiRollup, RefreshSchedule, RefreshScheduleProperty, Tenant
+from properties.services.refresh_executor import RefreshJobExecutor
+from properties.services.refresh_kpi_service import RefreshKpiService
+from properties.services.refresh_scheduler_service import RefreshSchedulerService
+
+
+@pytest.fixture
+def schedule(db_session, monkeypatch):
+    """Schedule com 4 imóveis, sem jobs."""
+    tenant = Tenant(name='Tenant KPIs')
+    db_session.add(tenant)
+    db_session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'KPI-{i}', tenant_id=tenant.id) for i in range(4)]
+    db_session.add_all(props)
+    sched = RefreshSchedule(name='Lista KPIs', tenant_id=tenant.id, time_slot=time(8, 0), is_active=True)
+    db_session.add(sched)
+    db_session.flush()
+    db_session.add_all(RefreshScheduleProperty(refresh_schedule_id=sched.id, property_id=p.id) for p in props)
+    db_session.commit()
+    monkeypatch.setattr(RefreshSchedulerService, '_perform_property_refresh_with_details',
+                        staticmethod(lambda property_id, strategy=None: (property_id % 2 == 0, {'error': 'x'})))
+    yield sched
+
+
+def _rollup_rows():
+    return sorted(
+        (row.schedule_key, row.jobs_created, row.jobs_pending, row.jobs_running, row.jobs_completed,
+         row.jobs_failed, row.duration_count)
+        for row in RefreshKpiRollup.query.all()
+    )
+
+
+def test_job_lifecycle_updates_rollup_incrementally(schedule):
+    tenant_id = schedule.tenant_id
+    RefreshSchedulerService._materialize_schedule_jobs(schedule.id, datetime.now(timezone.utc), 'scheduled')
+    db.session.commit()
+    assert RefreshKpiService.totals(tenant_id)['pending'] == 4
+
+    claimed = RefreshJobExecutor.claim_jobs(3, 'worker-a')
+    totals = RefreshKpiService.totals(tenant_id)
+    assert (totals['pending'], totals['running']) == (1, 3)
+
+    for job_id in claimed[:2]:
+        RefreshJobExecutor.run_job(job_id, 'worker-a')
+    RefreshJobExecutor.release_jobs(claimed[2:], 'worker-a')
+
+    totals = RefreshKpiService.totals(tenant_id, datetime.now(timezone.utc) - timedelta(hours=24))
+    assert totals['total'] == 4
+    assert totals['pending'] == 2 and totals['running'] == 0
+    assert totals['completed'] + totals['failed'] == 2
+    assert totals['failure_rate'] == totals['failed'] / 4 * 100
+
+    # O rollup incremental bate com a reconstrução a partir de refresh_jobs
+    incremental = _rollup_rows()
+    RefreshKpiService.rebuild(datetime.now(timezone.utc) - timedelta(hours=2))
+    assert _rollup_rows() == incremental
+
+
+def test_dashboard_statistics_do_not_scan_jobs(schedule):
+    RefreshSchedulerService._materialize_schedule_jobs(schedule.id, datetime.now(timezone.utc), 'scheduled')
+    db.session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        stats = RefreshSchedulerService.get_schedule_statistics(schedule.tenant_id)
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert stats['jobs_last_24h']['pending'] == 4
+    assert stats['total_properties'] == 4
+    assert not any('refresh_jobs' in sql for sql in statements)
+
+
+def test_stopping_schedule_jobs_updates_rollup(schedule):
+    RefreshSchedulerService._materialize_schedule_jobs(schedule.id, datetime.now(timezone.utc), 'scheduled')
+    db.session.commit()
+    RefreshJobExecutor.claim_jobs(1, 'worker-a')
+    token = create_access_token(identity='1', additional_claims={'tenant_id': schedule.tenant_id})
+
+    response = current_app.test_client().post(f'/api/refresh-monitor/schedules/{schedule.id}/stop',
+                                              headers={'Authorization': f'Bearer {token}'})
+
+    assert response.status_code == 200 and response.get_json()['jobs_stopped'] == 3
+    totals = RefreshKpiService.totals(schedule.tenant_id)
+    assert (totals['pending'], totals['running']) == (0, 1)
+    incremental = _rollup_rows()
+    RefreshKpiService.rebuild(datetime.now(timezone.utc) - timedelta(hours=2))
+    assert _rollup_rows() == incremental
@@ -0,0 +1,67 @@
+"""
+Testes da criação em lote de jobs de refresh a partir de um schedule
+"""
+from datetime import datetime, time, timezone
+
+import pytest
+from sqlalchemy import event
+
+from extensions import db
+from models import Property, RefreshJob, RefreshSchedule, RefreshScheduleProperty, Tenant
+from properties.services.refresh_scheduler_service import RefreshSchedulerService
+
+
+@pytest.fixture
+def schedule(db_session):
+    """Schedule com 20 imóveis; 5 deles já têm job pendente."""
+    tenant = Tenant(name='Tenant Lista VIP')
+    db_session.add(tenant)
+    db_session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'VIP-{i}', tenant_id=tenant.id) for i in range(20)]
+    db_session.add_all(props)
+    sched = RefreshSchedule(name='Lista VIP', tenant_id=tenant.id, time_slot=time(8, 0))
+    db_session.add(sched)
+    db_session.flush()
+    db_session.add_all(RefreshScheduleProperty(refresh_schedule_id=sched.id, property_id=p.id) for p in props)
+    db_session.add_all(RefreshJob(property_id=p.id, status='pending') for p in props[:5])
+    # Job já concluído não impede um novo
+    db_session.add(RefreshJob(property_id=props[5].id, status='completed'))
+    db_session.commit()
+    yield sched
+
+
+def _pending_count():
+    return RefreshJob.query.filter_by(status='pending').count()
+
+
+def test_execute_schedule_creates_jobs_in_one_statement(schedule):
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        ok, result = RefreshSchedulerService._execute_schedule(schedule, datetime.now(timezone.utc))
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert ok, result
+    assert result['jobs_created'] == 15 and result['jobs_skipped'] == 5 and result['total_properties'] == 20
+    assert _pending_count() == 20
+    assert sum('INSERT INTO refresh_jobs' in sql for sql in statements) == 1
+    assert not any('FROM refresh_jobs' in sql and 'INSERT' not in sql for sql in statements)
+
+    created = RefreshJob.query.filter_by(refresh_schedule_id=schedule.id).all()
+    assert len(created) == 15
+    assert all(job.refresh_type == 'scheduled' and job.attempts == 0 for job in created)
+
+    # Rodar de novo não duplica
+    ok, result = RefreshSchedulerService._execute_schedule(schedule, datetime.now(timezone.utc))
+    assert ok and result['jobs_created'] == 0 and result['jobs_skipped'] == 20
+
+
+def test_execute_schedule_manually_uses_bulk_path(schedule):
+    ok, result = RefreshSchedulerService.execute_schedule_manually(schedule.id, schedule.tenant_id)
+
+    assert ok, result
+    assert result['jobs_created'] == 15 and result['jobs_skipped'] == 5 and result['properties_processed'] == 20
+    assert RefreshJob.query.filter_by(refresh_schedule_id=schedule.id, refresh_type='manual').count() == 15
+    assert _pending_count() == 20
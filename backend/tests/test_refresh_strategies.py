@@ -0,0 +1,177 @@
+"""
+Testes das estratégias de refresh (recreate, update, touch) e da contagem de chamadas ao Gandalf
+"""
+import json
+import threading
+from datetime import datetime, time, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from extensions import db
+from integrations import gandalf_client, gandalf_service
+from integrations.gandalf_client import GandalfHTTPClient, track_calls
+from models import Property, PropertyRefreshHistory, RefreshJob, RefreshSchedule, RefreshScheduleProperty, Tenant
+from properties.services.property_service import PropertyService
+from properties.services.refresh_schedule_service import RefreshScheduleService
+from properties.services.refresh_scheduler_service import RefreshSchedulerService
+
+
+class _Stub(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    disable_nagle_algorithm = True
+    requests = []
+    status_success = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        operation = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))))['operationName']
+        _Stub.requests.append(operation)
+        body = json.dumps({'data': {operation: {'id': '1', 'success': _Stub.status_success, 'errors': []}}}).encode()
+        self.send_response(200)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Exporter:
+    """Exporter já autenticado; export_property simula o updateListing."""
+
+    credentials = {'authorization': 't'}
+
+    def __init__(self):
+        self.exported = []
+
+    def export_property(self, prop, is_refresh=False, force=False):
+        self.exported.append((prop.id, is_refresh))
+        gandalf_service.update_listing({'id': str(prop.remote_id or prop.id), 'externalId': prop.external_id},
+                                       self.credentials)
+        prop.remote_id = prop.remote_id or 'NEW-1'
+        return True
+
+
+@pytest.fixture
+def env(db_session, monkeypatch):
+    """Gandalf stub local e um schedule de 3 imóveis."""
+    _Stub.requests = []
+    _Stub.status_success = True
+    server = ThreadingHTTPServer(('127.0.0.1', 0), _Stub)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    monkeypatch.setattr(gandalf_service, 'GANDALF_URL', f'http://127.0.0.1:{server.server_address[1]}/')
+    client = GandalfHTTPClient(pool_size=2, max_retries=0, backoff=0)
+    monkeypatch.setattr(gandalf_client, 'get_gandalf_client', lambda: client)
+    monkeypatch.setattr(gandalf_service, 'get_gandalf_client', lambda: client)
+
+    tenant = Tenant(name='Tenant Estratégias')
+    db_session.add(tenant)
+    db_session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'STR-{i}', tenant_id=tenant.id,
+                      remote_id=f'R-{i}' if i else None) for i in range(3)]
+    db_session.add_all(props)
+    sched = RefreshSchedule(name='Lista touch', tenant_id=tenant.id, time_slot=time(8, 0), refresh_strategy='touch')
+    db_session.add(sched)
+    db_session.flush()
+    db_session.add_all(RefreshScheduleProperty(refresh_schedule_id=sched.id, property_id=p.id) for p in props)
+    db_session.commit()
+
+    exporter = _Exporter()
+    monkeypatch.setattr(PropertyService, '_refresh_target', staticmethod(
+        lambda property_id, tenant_id=None, prop=None: (prop or db_session.get(Property, property_id), exporter, None)
+    ))
+    try:
+        yield {'props': props, 'schedule': sched, 'exporter': exporter}
+    finally:
+        client.close()
+        server.shutdown()
+
+
+def test_touch_uses_one_status_mutation(env):
+    prop = env['props'][1]
+    ok, result = PropertyService.refresh_property(prop.id, strategy='touch')
+
+    assert ok
+    assert _Stub.requests == ['updateListingStatus']
+    assert env['exporter'].exported == []
+    details = result['refresh_details']
+    assert details['strategy'] == 'touch' and details['api_calls'] == 1
+    assert details['new_remote_id'] == 'R-1'
+
+
+def test_touch_without_remote_id_falls_back_to_update(env):
+    prop = env['props'][0]
+    ok, result = PropertyService.refresh_property(prop.id, strategy='touch')
+
+    assert ok
+    assert _Stub.requests == ['updateListing']
+    assert result['refresh_details']['strategy'] == 'touch->update'
+    assert result['refresh_details']['api_calls'] == 1
+
+
+def test_rejected_touch_falls_back_to_update(env):
+    _Stub.status_success = False
+    ok, result = PropertyService.refresh_property(env['props'][2].id, strategy='touch')
+
+    assert ok
+    assert _Stub.requests == ['updateListingStatus', 'updateListing']
+    assert result['refresh_details']['api_calls'] == 2
+
+
+def test_invalid_strategy_is_rejected(env):
+    ok, result = PropertyService.refresh_property(env['props'][1].id, strategy='nuke')
+    assert not ok and result['status'] == 400
+    assert _Stub.requests == []
+
+
+def test_track_calls_sees_worker_threads(env):
+    # Threads que rodam no contexto copiado (como transfer_images) entram na contagem
+    import contextvars
+    with track_calls() as calls:
+        ctx = contextvars.copy_context()
+        worker = threading.Thread(target=ctx.run, args=(
+            gandalf_service.activate_listing_status, {'authorization': 't'}, '1', 'ACTIVE'))
+        worker.start()
+        worker.join()
+    gandalf_service.activate_listing_status({'authorization': 't'}, '1', 'ACTIVE')
+
+    assert calls.as_dict()['api_calls'] == 1
+    assert calls.as_dict()['operations'] == {'updateListingStatus': 1}
+
+
+def test_materialized_jobs_inherit_schedule_strategy(env):
+    created, total = RefreshSchedulerService._materialize_schedule_jobs(
+        env['schedule'].id, datetime.now(timezone.utc), 'scheduled'
+    )
+    db.session.commit()
+
+    assert created == total == 3
+    assert {job.refresh_strategy for job in RefreshJob.query.all()} == {'touch'}
+
+
+def test_legacy_job_path_records_strategy_history(env):
+    RefreshSchedulerService._materialize_schedule_jobs(env['schedule'].id, datetime.now(timezone.utc), 'scheduled')
+    db.session.commit()
+    job = RefreshJob.query.filter_by(property_id=env['props'][1].id).one()
+
+    ok, _ = RefreshSchedulerService.process_refresh_job(job.id)
+
+    assert ok
+    history = PropertyRefreshHistory.query.filter_by(property_id=env['props'][1].id).one()
+    assert history.success and history.refresh_strategy == 'touch' and history.api_calls == 1
+
+
+def test_new_schedules_default_to_configured_strategy(env, monkeypatch):
+    monkeypatch.setenv('REFRESH_DEFAULT_STRATEGY', 'update')
+    props = env['props']
+
+    ok, _ = RefreshScheduleService.create_schedule(props[0].tenant_id, 'Lista padrão', '09:30',
+                                                   property_ids=[p.id for p in props])
+    assert ok
+    assert RefreshSchedule.query.filter_by(name='Lista padrão').one().refresh_strategy == 'update'
+
+    monkeypatch.setenv('REFRESH_DEFAULT_STRATEGY', 'inexistente')
+    ok, _ = RefreshScheduleService.create_schedule(props[0].tenant_id, 'Lista inválida', '10:30',
+                                                   property_ids=[p.id for p in props])
+    assert ok
+    assert RefreshSchedule.query.filter_by(name='Lista inválida').one().refresh_strategy == 'recreate'
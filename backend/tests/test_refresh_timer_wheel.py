@@ -0,0 +1,152 @@
+"""
+Testes do timer wheel de refresh (índice de vencimentos + dispatcher)
+"""
+import importlib
+import threading
+import time
+from datetime import datetime, time as dt_time, timedelta, timezone
+
+import pytest
+from celery import Task
+from flask import current_app
+
+from extensions import db
+from models import Property, PropertyRefreshSchedule, RefreshJob, RefreshSchedule, RefreshScheduleProperty, Tenant
+from properties.services import refresh_timer_wheel
+from properties.services.refresh_scheduler_service import RefreshSchedulerService
+from properties.services.refresh_timer_wheel import RefreshTimerWheel
+from properties.tasks import refresh_scheduler_config
+from utils import redis_client
+
+
+@pytest.fixture
+def tenant_id(db_session, monkeypatch):
+    """Tenant vazio e índice em memória vazio."""
+    monkeypatch.setattr(refresh_timer_wheel, 'get_redis', lambda: None)
+    monkeypatch.setattr(refresh_timer_wheel, '_memory_entries', {})
+    tenant = Tenant(name='Tenant Timer Wheel')
+    db_session.add(tenant)
+    db_session.commit()
+    yield tenant.id
+
+
+@pytest.fixture
+def sent_tasks(monkeypatch):
+    """Registra os envios em vez de publicar no broker (vale para qualquer thread/app Celery)."""
+    sent = []
+    monkeypatch.setattr(Task, 'apply_async', lambda self, args=None, **kwargs: sent.append((self.name, args)))
+    return sent
+
+
+def _members():
+    return dict(RefreshTimerWheel.entries())
+
+
+def test_committed_schedule_changes_update_the_index(tenant_id):
+    due = datetime.now(timezone.utc) + timedelta(hours=1)
+    schedule = RefreshSchedule(name='Lista 01', tenant_id=tenant_id, time_slot=dt_time(9, 30), next_run=due)
+    db.session.add(schedule)
+    db.session.commit()
+    assert _members() == {f'refresh_schedule:{schedule.id}': pytest.approx(due.timestamp())}
+
+    # Alteração desfeita não chega ao índice
+    schedule.next_run = due + timedelta(days=1)
+    db.session.flush()
+    db.session.rollback()
+    assert _members()[f'refresh_schedule:{schedule.id}'] == pytest.approx(due.timestamp())
+
+    schedule.is_active = False
+    db.session.commit()
+    assert _members() == {}
+
+
+def test_rebuild_and_dispatch_due_items(tenant_id, sent_tasks):
+    now = datetime.now(timezone.utc)
+    prop = Property(title='Imóvel', external_id='TW-1', tenant_id=tenant_id)
+    db.session.add(prop)
+    db.session.flush()
+    due = RefreshSchedule(name='Vencido', tenant_id=tenant_id, time_slot=dt_time(8, 0), next_run=now - timedelta(seconds=5))
+    later = RefreshSchedule(name='Depois', tenant_id=tenant_id, time_slot=dt_time(8, 0), next_run=now + timedelta(hours=2))
+    running = PropertyRefreshSchedule(property_id=prop.id, tenant_id=tenant_id, is_running=True,
+                                      next_run=now - timedelta(minutes=1))
+    db.session.add_all([due, later, running, RefreshJob(property_id=prop.id, status='pending', scheduled_at=now)])
+    db.session.commit()
+
+    refresh_timer_wheel._memory_entries.clear()
+    assert RefreshTimerWheel.rebuild() == 3
+    assert f'property_schedule:{running.id}' not in _members()
+
+    sent = RefreshTimerWheel.dispatch_due()
+    assert sent['schedules'] == 1 and sent['dispatches'] == 1
+    assert ('refresh_scheduler.run_due_schedule', [due.id]) in sent_tasks
+    # Itens vencidos saem do índice; o futuro continua
+    assert list(_members()) == [f'refresh_schedule:{later.id}']
+    assert RefreshTimerWheel.dispatch_due() == {'schedules': 0, 'property_schedules': 0, 'dispatches': 0, 'failed': 0}
+
+
+def test_due_schedule_creates_jobs_and_is_rescheduled(tenant_id, sent_tasks):
+    prop = Property(title='Imóvel', external_id='TW-2', tenant_id=tenant_id)
+    schedule = RefreshSchedule(name='Lista VIP', tenant_id=tenant_id, time_slot=dt_time(9, 0),
+                               days_of_week=[1, 2, 3, 4, 5, 6, 7],
+                               next_run=datetime.now(timezone.utc) - timedelta(seconds=1))
+    db.session.add_all([prop, schedule])
+    db.session.flush()
+    db.session.add(RefreshScheduleProperty(refresh_schedule_id=schedule.id, property_id=prop.id))
+    db.session.commit()
+
+    executed, result = RefreshSchedulerService.execute_due_schedule(schedule.id)
+
+    assert executed and result['jobs_created'] == 1
+    members = _members()
+    assert members[f'refresh_schedule:{schedule.id}'] > time.time()
+    assert members['dispatch'] <= time.time()
+
+
+def test_dispatcher_fires_within_a_second_of_due_time(tenant_id, sent_tasks):
+    stop = threading.Event()
+    app = current_app._get_current_object()
+
+    def run():
+        with app.app_context():
+            RefreshTimerWheel.run_dispatcher(stop, max_sleep=5)
+
+    dispatcher = threading.Thread(target=run)
+    dispatcher.start()
+    try:
+        time.sleep(0.2)
+        due_at = time.time() + 0.5
+        RefreshTimerWheel.schedule('property_schedule:42', datetime.fromtimestamp(due_at, timezone.utc))
+        deadline = time.time() + 3
+        while not sent_tasks and time.time() < deadline:
+            time.sleep(0.01)
+        fired_at = time.time()
+    finally:
+        stop.set()
+        RefreshTimerWheel.request_dispatch(datetime.now(timezone.utc) + timedelta(hours=1))
+        dispatcher.join(timeout=5)
+
+    assert sent_tasks == [('refresh_scheduler.process_single_refresh', [42])]
+    assert 0 <= fired_at - due_at < 1
+
+
+@pytest.mark.parametrize('redis_url', [None, 'redis://redis:6379/0'])
+def test_beat_keeps_polling_only_without_redis(monkeypatch, redis_url):
+    monkeypatch.setattr(redis_client, 'REDIS_URL', redis_url)
+    try:
+        schedule = importlib.reload(refresh_scheduler_config).REFRESH_SCHEDULER_BEAT_SCHEDULE
+    finally:
+        monkeypatch.undo()
+        importlib.reload(refresh_scheduler_config)
+
+    tasks = {entry['task'] for entry in schedule.values()}
+    polling = {'refresh_scheduler.check_and_execute_schedules', 'refresh_scheduler.process_refresh_batch'}
+    assert polling <= tasks if redis_url is None else not polling & tasks
+    assert 'refresh_scheduler.reconcile_timer_wheel' in tasks
+
+
+def test_dispatcher_refuses_to_start_without_redis(monkeypatch):
+    from scripts import run_refresh_timer_dispatcher
+
+    monkeypatch.setattr(run_refresh_timer_dispatcher, 'is_available', lambda: False)
+    monkeypatch.setattr(RefreshTimerWheel, 'run_dispatcher', staticmethod(lambda *a, **k: pytest.fail('started')))
+    assert run_refresh_timer_dispatcher.main() == 1
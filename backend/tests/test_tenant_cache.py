@@ -0,0 +1,79 @@
+"""
+Testes do cache de estatísticas por tenant (utils.tenant_cache + listeners de extensions.py)
+"""
+import pytest
+from flask import g
+from sqlalchemy import event
+
+from extensions import db
+from models import Property, Tenant
+from properties.services.property_service import PropertyService
+from utils import tenant_cache
+
+
+@pytest.fixture
+def tenants(db_session):
+    """Dois tenants com imóveis e contexto de requisição no primeiro."""
+    first, second = Tenant(name='Tenant A'), Tenant(name='Tenant B')
+    db_session.add_all([first, second])
+    db_session.flush()
+    db_session.add_all([
+        Property(title='Casa A', external_id='TC-A1', tenant_id=first.id, address_city='Santos', status='active'),
+        Property(title='Casa B', external_id='TC-B1', tenant_id=second.id, address_city='Campinas'),
+    ])
+    db_session.commit()
+    tenant_cache.reset()
+    g.tenant_id = first.id
+    try:
+        yield first.id, second.id
+    finally:
+        tenant_cache.reset()
+
+
+def _stats_with_statements():
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        ok, stats = PropertyService.get_properties_stats()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+    assert ok
+    return stats, len(statements)
+
+
+def test_stats_are_served_from_cache_until_a_write(tenants):
+    tenant_id, _ = tenants
+    first, first_queries = _stats_with_statements()
+    second, second_queries = _stats_with_statements()
+
+    assert first_queries > 0 and second_queries == 0
+    assert second == first and second['total_properties'] == 1
+
+    db.session.add(Property(title='Casa A2', external_id='TC-A2', tenant_id=tenant_id, address_city='Santos'))
+    db.session.commit()
+
+    third, third_queries = _stats_with_statements()
+    assert third_queries > 0
+    assert third['total_properties'] == 2
+    assert third['city_distribution'] == {'Santos': 2}
+
+    metrics = tenant_cache.metrics()['caches']['properties_stats']
+    assert (metrics['hits'], metrics['misses']) == (1, 2)
+
+
+def test_version_bumps_only_for_committed_writes_of_the_tenant(tenants):
+    tenant_id, other_id = tenants
+    other = Property.query.filter_by(tenant_id=other_id).one()
+
+    g.tenant_id = other_id
+    other.title = 'Casa B editada'
+    db.session.flush()
+    db.session.rollback()
+    assert tenant_cache.data_version(other_id) == 0
+
+    other = Property.query.filter_by(tenant_id=other_id).one()
+    other.title = 'Casa B editada'
+    db.session.commit()
+    assert tenant_cache.data_version(other_id) == 1
+    assert tenant_cache.data_version(tenant_id) == 0
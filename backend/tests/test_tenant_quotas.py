@@ -0,0 +1,81 @@
+"""
+Testes dos contadores de quota por tenant (tenant_quota_usage) e da rota /api/tenants/quotas
+"""
+from sqlalchemy import event
+
+from extensions import db
+from models import CanalProContract, Property, Tenant, User
+from properties.services.bulk_service import BulkService
+from properties.services.tenant_quota_service import TenantQuotaService
+from routes.tenants import get_all_tenants_quotas
+
+
+def _counters(tenant_id):
+    return TenantQuotaService.usage(tenant_id)
+
+
+def test_counters_follow_orm_writes_and_match_rebuild(app_ctx):
+    tenant = Tenant(name='Tenant Quotas')
+    db.session.add(tenant)
+    db.session.flush()
+    props = [Property(title=f'Imóvel {i}', external_id=f'Q-{i}', tenant_id=tenant.id) for i in range(4)]
+    props.append(Property(title='Destaque', external_id='Q-P', tenant_id=tenant.id, publication_type='PREMIUM'))
+    db.session.add_all(props)
+    db.session.commit()
+    assert _counters(tenant.id) == {'STANDARD': 4, 'PREMIUM': 1}
+
+    db.session.add(CanalProContract(tenant_id=tenant.id, max_listings=10, highlight_limits={'PREMIUM': 2}))
+    db.session.commit()
+    result = BulkService.bulk_update_publication_type(tenant.id, [props[0].id, props[1].id], 'destaque')
+    assert result['updated'] == 2
+    assert _counters(tenant.id) == {'STANDARD': 2, 'PREMIUM': 3}
+    assert result['quota']['type'] == {'used': 3, 'limit': 2, 'remaining': -1, 'allowed': False}
+
+    # Rollback não mexe no contador; delete sim
+    db.session.get(Property, props[2].id).publication_type = 'TRIPLE'
+    db.session.flush()
+    db.session.rollback()
+    db.session.delete(db.session.get(Property, props[3].id))
+    db.session.commit()
+    assert _counters(tenant.id) == {'STANDARD': 1, 'PREMIUM': 3}
+
+    check = TenantQuotaService.check(tenant.id, 'STANDARD')
+    assert check['allowed'] and check['total'] == {'used': 4, 'limit': 10, 'remaining': 5, 'allowed': True}
+
+    incremental = _counters(tenant.id)
+    TenantQuotaService.rebuild(tenant.id)
+    assert _counters(tenant.id) == incremental
+
+
+def test_all_tenants_quotas_use_a_single_query(app_ctx):
+    for i in range(5):
+        tenant = Tenant(name=f'Imobiliária {i}')
+        db.session.add(tenant)
+        db.session.flush()
+        db.session.add(User(username=f'user{i}', email=f'user{i}@example.com', password='x', tenant_id=tenant.id))
+        db.session.add_all(
+            Property(title=f'Imóvel {j}', external_id=f'T{i}-{j}', tenant_id=tenant.id,
+                     publication_type='PREMIUM' if j == 0 else None)
+            for j in range(i + 1)
+        )
+        if i % 2 == 0:
+            db.session.add(CanalProContract(tenant_id=tenant.id, max_listings=2, highlight_limits={'PREMIUM': 1}))
+    db.session.commit()
+
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        response, status = get_all_tenants_quotas.__wrapped__()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert status == 200 and len(statements) == 1
+    tenants = response.get_json()['tenants']
+    assert [t['usage']['properties'] for t in tenants] == [1, 2, 3, 4, 5]
+    assert all(t['usage']['users'] == 1 for t in tenants)
+    last = tenants[4]
+    assert last['contract']['max_listings'] == 2 and last['alert']['level'] == 'critical'
+    assert last['usage']['highlights']['PREMIUM']['used'] == 1
+    assert last['usage']['highlights']['STANDARD']['used'] == 4
+    assert tenants[1]['contract']['has_contract'] is False
@@ -0,0 +1,85 @@
+"""
+Testes da renovação paralela de tokens CanalPro (tasks.canalpro_renewal_unified)
+"""
+import random
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from extensions import db
+from models import IntegrationCredentials, Tenant
+from tasks import canalpro_renewal_unified as renewal
+
+NOW = datetime(2025, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _cred(tenant_id, hours):
+    expires_at = None if hours is None else NOW + timedelta(hours=hours)
+    return SimpleNamespace(tenant_id=tenant_id, expires_at=expires_at)
+
+
+def test_plan_orders_by_expiry_and_spreads_lanes_over_the_window():
+    creds = [_cred(1, 20), _cred(2, 72), _cred(3, 2), _cred(4, -1), _cred(5, 10), _cred(6, None), _cred(7, 0.1)]
+    plan, skipped = renewal.plan_renewals(creds, now=NOW, window_seconds=1800, concurrency=2,
+                                          rng=random.Random(7))
+
+    assert [item['tenant_id'] for item in plan] == [4, 7, 3, 5, 1]
+    assert sorted(result['tenant_id'] for result in skipped) == [2, 6]
+    assert [item['lane'] for item in plan] == [0, 1, 0, 1, 0]
+
+    # 5 tokens em 2 faixas -> 3 slots de 600s; jitter dentro do slot, nunca após a expiração
+    for position, item in enumerate(plan):
+        slot = position // 2
+        assert item['countdown'] <= slot * 600 + 600
+    assert plan[0]['countdown'] == 0  # já expirado: imediato
+    assert plan[1]['countdown'] <= 60  # expira em 6 min: margem de 5 min
+    assert 600 <= plan[2]['countdown'] < 1200
+    assert plan[4]['countdown'] >= 1200
+
+
+def test_summary_aggregates_results_and_skipped():
+    summary = renewal.summarize_renewal_task.run(
+        [{'tenant_id': 1, 'status': 'success', 'duration_seconds': 2.0},
+         {'tenant_id': 2, 'status': 'rate_limited'},
+         {'tenant_id': 3, 'status': 'success', 'duration_seconds': 4.0}],
+        [{'tenant_id': 4, 'status': 'skipped'}],
+        NOW.isoformat(),
+    )
+    assert (summary['success_count'], summary['error_count'], summary['skipped_count']) == (2, 1, 1)
+    assert summary['by_status'] == {'success': 2, 'rate_limited': 1, 'skipped': 1}
+    assert summary['avg_duration_seconds'] == 3.0 and summary['max_duration_seconds'] == 4.0
+    assert summary['total_tenants'] == 4 and summary['elapsed_seconds'] > 0
+
+
+def test_unified_task_dispatches_a_chord_for_due_tenants(app_ctx, monkeypatch):
+    now = datetime.now(timezone.utc)
+    for i, (hours, enabled) in enumerate([(1, True), (48, True), (-2, True), (1, False)]):
+        tenant = Tenant(name=f'Imobiliária {i}')
+        db.session.add(tenant)
+        db.session.flush()
+        db.session.add(IntegrationCredentials(
+            tenant_id=tenant.id, provider='gandalf', token_encrypted='x',
+            expires_at=now + timedelta(hours=hours),
+            metadata_json={'automation_enabled': enabled, 'device_id': 'dev'},
+        ))
+    db.session.commit()
+
+    dispatched = {}
+
+    def fake_chord(header):
+        dispatched['header'] = list(header)
+
+        def apply(body):
+            dispatched['body'] = body
+            return SimpleNamespace(id='summary-id')
+        return apply
+
+    monkeypatch.setattr(renewal, 'chord', fake_chord)
+    result = renewal.unified_auto_renewal_task.run()
+
+    assert result['status'] == 'dispatched' and result['summary_task_id'] == 'summary-id'
+    assert (result['total_tenants'], result['scheduled_count'], result['skipped_count']) == (3, 2, 1)
+    # Mais próximo de expirar (já expirado) primeiro
+    assert [sig.args[0] for sig in dispatched['header']] == [3, 1]
+    assert [sig.options['countdown'] for sig in dispatched['header']] == [item['countdown'] for item in result['plan']]
+    assert dispatched['body'].task == 'canalpro.summarize_renewal'
+    assert [skip['tenant_id'] for skip in dispatched['body'].args[0]] == [2]
@@ -0,0 +1,94 @@
+"""
+Testes do monitor de agendamento de tokens (next_fire_at indexado + claim)
+"""
+from datetime import datetime, timedelta, timezone
+
+from celery import Task
+from sqlalchemy import event
+
+from extensions import db
+from models import IntegrationCredentials, Tenant, TokenScheduleConfig
+from tasks import canalpro_renewal_unified, canalpro_scheduled_monitor as monitor
+
+
+def _schedule(mode, fire_in_minutes, enabled=True, expires_in_hours=None):
+    now = datetime.now(timezone.utc)
+    tenant = Tenant(name=f'Imobiliária {Tenant.query.count()}')
+    db.session.add(tenant)
+    db.session.flush()
+    if expires_in_hours is not None:
+        db.session.add(IntegrationCredentials(
+            tenant_id=tenant.id, provider='gandalf', token_encrypted='x',
+            expires_at=now + timedelta(hours=expires_in_hours),
+        ))
+    fire_at = None if fire_in_minutes is None else now + timedelta(minutes=fire_in_minutes)
+    config = TokenScheduleConfig(
+        tenant_id=tenant.id, provider='gandalf', schedule_mode=mode, schedule_hour='09', schedule_minute='00',
+        enabled=enabled, next_execution=fire_at if mode != 'automatic' else None, next_fire_at=fire_at,
+    )
+    db.session.add(config)
+    db.session.commit()
+    return config.id
+
+
+def test_monitor_claims_only_due_schedules_in_one_query(app_ctx, monkeypatch):
+    due_manual = _schedule('manual_recurring', -1)
+    due_auto = _schedule('automatic', 0.5, expires_in_hours=0)
+    _schedule('manual_once', 30)
+    _schedule('automatic', 600, expires_in_hours=10)
+    _schedule('manual_recurring', None, enabled=False)
+
+    sent = []
+    monkeypatch.setattr(Task, 'apply_async', lambda self, args=None, **kwargs: sent.append((self.name, args)))
+    statements = []
+    listener = lambda conn, cursor, sql, *args: statements.append(sql)  # noqa: E731
+    event.listen(db.engine, 'before_cursor_execute', listener)
+    try:
+        result = monitor.monitor_and_execute_scheduled.run()
+    finally:
+        event.remove(db.engine, 'before_cursor_execute', listener)
+
+    assert result['status'] == 'dispatched' and sorted(result['config_ids']) == [due_manual, due_auto]
+    assert sorted(sent) == sorted(('canalpro-scheduled-execute', [i]) for i in (due_manual, due_auto))
+    assert [sql.split()[0] for sql in statements] == ['SELECT', 'UPDATE']
+
+    # Claim adia o disparo: o próximo tick não pega as mesmas linhas
+    assert monitor.monitor_and_execute_scheduled.run() == {'status': 'no_due_schedules'}
+
+
+def test_execute_runs_the_mode_and_reschedules(app_ctx, monkeypatch):
+    renewed = []
+
+    def fake_renew(tenant_id):
+        renewed.append(tenant_id)
+        cred = IntegrationCredentials.query.filter_by(tenant_id=tenant_id).first()
+        if cred:
+            cred.expires_at = datetime.now(timezone.utc) + timedelta(hours=24)
+            db.session.commit()
+        return {'tenant_id': tenant_id, 'status': 'success'}
+
+    monkeypatch.setattr(canalpro_renewal_unified, 'renew_token_for_tenant', fake_renew)
+    recurring = _schedule('manual_recurring', -1)
+    once = _schedule('manual_once', -1)
+    automatic = _schedule('automatic', -5, expires_in_hours=-0.1)
+    renewed_elsewhere = _schedule('automatic', -5, expires_in_hours=5)
+
+    now = datetime.now(timezone.utc)
+    result = monitor.execute_scheduled_renewal.run(recurring)
+    config = db.session.get(TokenScheduleConfig, recurring)
+    assert result['status'] == 'executed' and config.last_execution is not None
+    assert config.next_fire_at == config.next_execution
+    assert timedelta(0) < config.next_fire_at.replace(tzinfo=timezone.utc) - now <= timedelta(days=1)
+
+    assert monitor.execute_scheduled_renewal.run(once)['next_fire_at'] is None
+    config = db.session.get(TokenScheduleConfig, once)
+    assert config.enabled is False and config.next_fire_at is None
+
+    result = monitor.execute_scheduled_renewal.run(automatic)
+    assert result['status'] == 'auto_renewed'
+    cred_expiry = IntegrationCredentials.query.filter_by(tenant_id=result['tenant_id']).one().expires_at
+    assert db.session.get(TokenScheduleConfig, automatic).next_fire_at == cred_expiry
+
+    result = monitor.execute_scheduled_renewal.run(renewed_elsewhere)
+    assert result['status'] == 'token_valid'
+    assert renewed == [db.session.get(TokenScheduleConfig, i).tenant_id for i in (recurring, once, automatic)]
@@ -0,0 +1,36 @@
+"""
+Testes do upsert portável (utils.upsert): ON CONFLICT e fallback UPDATE-então-INSERT
+"""
+import pytest
+from sqlalchemy import select
+
+from models import Tenant, TenantQuotaUsage
+from utils import upsert as upsert_module
+from utils.upsert import upsert
+
+TABLE = TenantQuotaUsage.__table__
+
+
+def _increment(incoming):
+    return {'property_count': TABLE.c.property_count + incoming['property_count']}
+
+
+@pytest.mark.parametrize('native', [True, False])
+def test_upsert_inserts_then_increments(db_session, monkeypatch, native):
+    if not native:
+        monkeypatch.setattr(upsert_module, '_DIALECT_INSERTS', {})
+    tenant = Tenant(name='Tenant Upsert')
+    db_session.add(tenant)
+    db_session.flush()
+    rows = [{'tenant_id': tenant.id, 'publication_type': 'STANDARD', 'property_count': 2},
+            {'tenant_id': tenant.id, 'publication_type': 'PREMIUM', 'property_count': 1}]
+
+    assert upsert(db_session, TABLE, rows, ['tenant_id', 'publication_type'], _increment) == []
+    written = upsert(db_session, TABLE, rows[:1], ['tenant_id', 'publication_type'], _increment,
+                     returning=[TABLE.c.publication_type, TABLE.c.property_count])
+    db_session.commit()
+
+    assert [tuple(row) for row in written] == [('STANDARD', 4)]
+    assert dict(db_session.execute(select(TABLE.c.publication_type, TABLE.c.property_count)).all()) == {
+        'STANDARD': 4, 'PREMIUM': 1
+    }
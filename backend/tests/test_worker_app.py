@@ -0,0 +1,42 @@
+"""
+Testes do app Flask por processo usado pelas tasks Celery
+"""
+import pytest
+from celery import Celery
+from flask import current_app, has_app_context
+
+import worker_app
+from worker_app import FlaskTask, get_worker_app
+
+
+@pytest.fixture
+def fresh_worker_app(tmp_path, monkeypatch):
+    monkeypatch.setenv("DATABASE_URL", f"sqlite:///{tmp_path / 'worker.db'}")
+    monkeypatch.setattr(worker_app, '_app', None)
+    monkeypatch.setattr(worker_app, '_app_pid', None)
+    celery = Celery('test_worker_app', task_cls=FlaskTask, set_as_current=False)
+    celery.conf.task_always_eager = True
+    yield celery
+
+
+def test_tasks_share_one_app_and_get_a_context(fresh_worker_app):
+    @fresh_worker_app.task
+    def which_app():
+        assert has_app_context()
+        return id(current_app._get_current_object())
+
+    first = which_app.apply().get()
+    second = which_app.apply().get()
+
+    assert first == second == id(get_worker_app())
+    assert not has_app_context()
+
+
+def test_app_is_rebuilt_after_fork(fresh_worker_app, monkeypatch):
+    parent = get_worker_app()
+    assert get_worker_app() is parent
+
+    monkeypatch.setattr(worker_app.os, 'getpid', lambda: -1)
+    child = get_worker_app()
+    assert child is not parent
+    assert get_worker_app() is child
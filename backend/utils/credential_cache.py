@@ -0,0 +1,153 @@
+"""
+Cache por processo dos headers de integração já descriptografados
+
+``utils.integration_tokens.get_valid_integration_headers`` consulta
+``IntegrationCredentials`` e descriptografa o token (Fernet) a cada chamada; em
+exportações, refresh, exclusões e importações isso se repete por imóvel. Este
+módulo guarda os headers prontos por (tenant, provider) por até
+``INTEGRATION_HEADERS_CACHE_TTL`` segundos, nunca além da margem de 60s antes do
+vencimento do token.
+
+Invalidação: os listeners da sessão em ``extensions.py`` chamam ``invalidate``
+após o commit de qualquer alteração em ``IntegrationCredentials`` (rotação em
+``update_token_in_database``, ``/admin/integrations/gandalf``, refresh etc.).
+Com REDIS_URL o aviso é publicado no canal ``integration_headers:invalidate`` e
+cada processo (gunicorn, workers Celery) assina o canal em uma thread e descarta a
+entrada. Se uma mensagem se perder, o TTL limita a defasagem. Sem REDIS_URL a
+invalidação vale só para o processo atual, como o fallback de
+``utils.tenant_cache``.
+"""
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_TTL = int(os.getenv('INTEGRATION_HEADERS_CACHE_TTL', '300'))
+CHANNEL = 'integration_headers:invalidate'
+# Mesma margem de get_valid_integration_headers para considerar o token válido
+EXPIRY_MARGIN = timedelta(seconds=60)
+
+_lock = threading.Lock()
+_entries: Dict[Tuple[int, str], Tuple[float, Dict[str, Any]]] = {}
+# Geração por chave: uma carga do banco só entra no cache se nada mudou enquanto lia
+_generations: Dict[Tuple[int, str], int] = {}
+_metrics = {'hits': 0, 'misses': 0, 'invalidations': 0}
+_subscriber = None
+_subscriber_pid = None
+
+
+def _drop(tenant_id: int, provider: str) -> None:
+    key = (tenant_id, provider)
+    with _lock:
+        _entries.pop(key, None)
+        _generations[key] = _generations.get(key, 0) + 1
+        _metrics['invalidations'] += 1
+
+
+def _on_message(message) -> None:
+    try:
+        tenant_id, provider = message['data'].split(':', 1)
+        _drop(int(tenant_id), provider)
+    except Exception:  # pylint: disable=broad-except
+        logger.warning("Invalid integration headers invalidation message: %r", message)
+
+
+def _ensure_subscriber() -> None:
+    """Assina o canal de invalidação (uma thread por processo, refeita após fork)."""
+    global _subscriber, _subscriber_pid
+    client = get_redis()
+    if not client:
+        return
+    pid = os.getpid()
+    if _subscriber_pid == pid and _subscriber is not None and _subscriber.is_alive():
+        return
+    with _lock:
+        if _subscriber_pid == pid and _subscriber is not None and _subscriber.is_alive():
+            return
+        try:
+            pubsub = client.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{CHANNEL: _on_message})
+            _subscriber = pubsub.run_in_thread(sleep_time=1.0, daemon=True)
+            _subscriber_pid = pid
+            # Entradas de antes da assinatura podem ter perdido avisos
+            _entries.clear()
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Could not subscribe to %s: %s", CHANNEL, str(e))
+            _subscriber = None
+
+
+def generation(tenant_id: int, provider: str) -> int:
+    """Marca a ser passada para ``put`` (lida antes de consultar o banco)."""
+    _ensure_subscriber()
+    with _lock:
+        return _generations.get((tenant_id, provider), 0)
+
+
+def get(tenant_id: int, provider: str) -> Optional[Dict[str, Any]]:
+    """Cópia dos headers em cache, ou None."""
+    _ensure_subscriber()
+    now = time.monotonic()
+    with _lock:
+        entry = _entries.get((tenant_id, provider))
+        if entry and entry[0] > now:
+            _metrics['hits'] += 1
+            return dict(entry[1])
+        if entry:
+            del _entries[(tenant_id, provider)]
+        _metrics['misses'] += 1
+    return None
+
+
+def put(tenant_id: int, provider: str, headers: Dict[str, Any], expires_at: Optional[datetime],
+        loaded_generation: int) -> None:
+    """Guarda os headers até o TTL ou até 60s antes de ``expires_at`` (o que vier antes)."""
+    ttl = CACHE_TTL
+    if expires_at is not None:
+        if expires_at.tzinfo is None:
+            expires_at = expires_at.replace(tzinfo=timezone.utc)
+        ttl = min(ttl, (expires_at - EXPIRY_MARGIN - datetime.now(timezone.utc)).total_seconds())
+    if ttl <= 0:
+        return
+    key = (tenant_id, provider)
+    with _lock:
+        if _generations.get(key, 0) != loaded_generation:
+            return  # credencial mudou durante a leitura
+        _entries[key] = (time.monotonic() + ttl, dict(headers))
+
+
+def invalidate(tenant_id: int, provider: str) -> None:
+    """Descarta os headers no processo atual e avisa os demais (após o commit)."""
+    client = get_redis()
+    _drop(tenant_id, provider)
+    if client:
+        try:
+            client.publish(CHANNEL, f'{tenant_id}:{provider}')
+        except Exception as e:  # pylint: disable=broad-except
+            logger.warning("Could not publish integration headers invalidation: %s", str(e))
+
+
+def metrics() -> Dict[str, Any]:
+    """Hits/misses do processo atual."""
+    with _lock:
+        values = dict(_metrics)
+        values['entries'] = len(_entries)
+    lookups = values['hits'] + values['misses']
+    values['hit_rate'] = round(values['hits'] / lookups * 100, 1) if lookups else 0
+    values['backend'] = 'redis' if get_redis() else 'memory'
+    values['ttl_seconds'] = CACHE_TTL
+    return values
+
+
+def reset() -> None:
+    """Zera o cache e as métricas (testes/benchmarks)."""
+    with _lock:
+        _entries.clear()
+        _generations.clear()
+        for name in _metrics:
+            _metrics[name] = 0
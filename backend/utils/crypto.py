@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 from cryptography.fernet import Fernet, InvalidToken
 
 def get_fernet_key():
@@ -16,7 +17,13 @@ def get_fernet():
     if not key:
         raise RuntimeError('FERNET_KEY not set in config or environment')
     
-    return Fernet(key.encode() if isinstance(key, str) else key)
+    return _fernet_for(key.encode() if isinstance(key, str) else key)
+
+
+@lru_cache(maxsize=4)
+def _fernet_for(key: bytes) -> Fernet:
+    # Uma instância por chave (a chave só muda entre configurações/testes)
+    return Fernet(key)
 
 
 def encrypt_token(token: str) -> str:
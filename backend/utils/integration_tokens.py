@@ -4,6 +4,7 @@ import requests
 from extensions import db
 from models import IntegrationCredentials
 from utils.crypto import encrypt_token, decrypt_token
+from utils import credential_cache
 import logging
 import pytz
 
@@ -63,6 +64,23 @@ def _post_token_refresh(refresh_token: str, meta: dict):
 
 
 def get_valid_integration_headers(tenant_id: int, provider: str):
+    """
+    Headers prontos para a API do provider (token descriptografado + metadados).
+
+    Servidos do cache por processo (utils.credential_cache) enquanto o token for
+    válido; a rotação da credencial invalida o cache após o commit.
+    """
+    cached = credential_cache.get(tenant_id, provider)
+    if cached is not None:
+        return cached
+
+    loaded_generation = credential_cache.generation(tenant_id, provider)
+    header, expires_at = _load_integration_headers(tenant_id, provider)
+    credential_cache.put(tenant_id, provider, header, expires_at, loaded_generation)
+    return header
+
+
+def _load_integration_headers(tenant_id: int, provider: str):
     creds = IntegrationCredentials.query.filter_by(tenant_id=tenant_id, provider=provider).first()
     if not creds:
         raise RuntimeError(f'Integration credentials not found for tenant {tenant_id} provider {provider}')
@@ -78,6 +96,8 @@ def get_valid_integration_headers(tenant_id: int, provider: str):
 
     now = datetime.now(pytz.utc)
     expires_at = creds.expires_at
+    if expires_at is not None and expires_at.tzinfo is None:
+        expires_at = expires_at.replace(tzinfo=pytz.utc)
 
     # if we have a token and it's not expiring within 60s, return headers
     if token and (not expires_at or expires_at > now + timedelta(seconds=60)):
@@ -92,7 +112,7 @@ def get_valid_integration_headers(tenant_id: int, provider: str):
             # Log token in development only
             logging.getLogger('integration_tokens').debug('INTEGRATION TOKEN (existing) tenant=%s provider=%s token=%s', tenant_id, provider, token[-10:])
 
-        return header
+        return header, expires_at
 
     # token missing or expired -> try refresh
     logging.getLogger('integration_tokens').debug('Token expired or missing for tenant %s, attempting refresh', tenant_id)
@@ -137,7 +157,7 @@ def get_valid_integration_headers(tenant_id: int, provider: str):
                 if DEBUG_TOKENS:
                     logging.getLogger('integration_tokens').debug('INTEGRATION TOKEN (refreshed) tenant=%s provider=%s token=%s', tenant_id, provider, access[-10:])
 
-                return header
+                return header, creds.expires_at
             else:
                 logging.getLogger('integration_tokens').warning('Refresh token request failed for tenant %s - no valid response', tenant_id)
         else:
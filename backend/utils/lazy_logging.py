@@ -0,0 +1,110 @@
+"""
+Logging barato para os caminhos quentes das integrações
+
+- ``preview(obj, limit)`` adia a serialização de payloads (``json.dumps``/``str`` +
+  truncamento) para quando o record for formatado, ou seja, só se o nível estiver
+  habilitado: ``logger.debug('payload=%s', preview(listing, 4000))``.
+- ``log_sampled`` loga corpos grandes em 1 a cada ``LOG_PAYLOAD_SAMPLE_EVERY``
+  chamadas com a mesma chave.
+- ``async_handler`` coloca handlers atrás de um ``QueueHandler``/``QueueListener``
+  (usado por ``utils.logging_config``); a thread é recriada após fork.
+
+Sem efeitos colaterais na importação (diferente de ``utils.logging_config``).
+"""
+import atexit
+import itertools
+import json
+import logging
+import os
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any, Dict, List, Optional, Tuple
+
+PAYLOAD_SAMPLE_EVERY = int(os.getenv('LOG_PAYLOAD_SAMPLE_EVERY', '20'))
+
+_listeners: List[Tuple[QueueHandler, QueueListener]] = []
+_sample_counters: Dict[str, Any] = {}
+
+
+class LazyPreview:
+    """Prévia truncada de um payload, renderizada só quando o record é formatado."""
+
+    __slots__ = ('value', 'limit', 'indent')
+
+    def __init__(self, value: Any, limit: Optional[int] = 2000, indent: Optional[int] = None):
+        self.value = value
+        self.limit = limit
+        self.indent = indent
+
+    def __str__(self) -> str:
+        value = self.value
+        try:
+            if isinstance(value, (bytes, bytearray)):
+                text = value.decode('utf-8', 'replace')
+            elif isinstance(value, str):
+                text = value
+            elif isinstance(value, (dict, list, tuple)):
+                text = json.dumps(value, default=str, indent=self.indent)
+            else:
+                text = str(value)
+        except Exception:
+            return '<non-serializable>'
+        return text if not self.limit else text[:self.limit]
+
+    __repr__ = __str__
+
+
+def preview(value: Any, limit: Optional[int] = 2000, indent: Optional[int] = None) -> LazyPreview:
+    """Argumento de log para payloads: ``logger.debug('body=%s', preview(resp.text, 4000))``."""
+    return LazyPreview(value, limit, indent)
+
+
+def sample(key: str, every: Optional[int] = None) -> bool:
+    """True para 1 a cada ``every`` chamadas com a mesma chave (a primeira inclusa)."""
+    every = PAYLOAD_SAMPLE_EVERY if every is None else every
+    if every <= 1:
+        return True
+    counter = _sample_counters.get(key)
+    if counter is None:
+        counter = _sample_counters.setdefault(key, itertools.count())
+    return next(counter) % every == 0
+
+
+def log_sampled(logger: logging.Logger, level: int, key: str, msg: str, *args, every: Optional[int] = None) -> None:
+    """``logger.log`` amostrado por ``key``; não conta chamadas com o nível desabilitado."""
+    if logger.isEnabledFor(level) and sample(key, every):
+        logger.log(level, msg, *args, stacklevel=2)
+
+
+def async_handler(*handlers: logging.Handler) -> QueueHandler:
+    """QueueHandler que entrega os records aos ``handlers`` em uma thread própria."""
+    log_queue = queue.SimpleQueue()
+    handler = QueueHandler(log_queue)
+    listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    _listeners.append((handler, listener))
+    return handler
+
+
+def _stop_listeners() -> None:
+    # Esvazia as filas antes de o processo sair
+    for _, listener in _listeners:
+        try:
+            listener.stop()
+        except Exception:
+            pass
+
+
+def _restart_listeners_after_fork() -> None:
+    # A thread do listener não sobrevive ao fork (gunicorn/Celery prefork): fila e listener novos
+    for i, (handler, listener) in enumerate(_listeners):
+        log_queue = queue.SimpleQueue()
+        handler.queue = log_queue
+        fresh = QueueListener(log_queue, *listener.handlers, respect_handler_level=listener.respect_handler_level)
+        fresh.start()
+        _listeners[i] = (handler, fresh)
+
+
+atexit.register(_stop_listeners)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listeners_after_fork)
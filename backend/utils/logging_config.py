@@ -1,25 +1,34 @@
 """
 Configuração de logging otimizada para produção.
+
+Os handlers (console/arquivo) rodam atrás de um ``QueueHandler``
+(``utils.lazy_logging.async_handler``): quem loga só enfileira o record e uma
+thread faz a escrita. ``LOG_ASYNC=false`` volta a escrever direto no handler.
 """
 
 import logging
 import os
 from logging.handlers import RotatingFileHandler
 
+from utils.lazy_logging import async_handler
+
+LOG_ASYNC = os.getenv('LOG_ASYNC', 'true').lower() != 'false'
+
+_file_handler = None
+
+
 def configure_logging():
     """Configura o sistema de logging com níveis apropriados."""
     
     # Nível base baseado no ambiente
     log_level = os.getenv('LOG_LEVEL', 'INFO').upper()
     
-    # Configuração básica
-    logging.basicConfig(
-        level=getattr(logging, log_level, logging.INFO),
-        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-        handlers=[
-            logging.StreamHandler(),  # Console
-        ]
-    )
+    # Configuração básica (como basicConfig: só se o root ainda não tiver handlers)
+    root = logging.getLogger()
+    if not root.handlers:
+        console_handler = logging.StreamHandler()  # Console
+        console_handler.setFormatter(logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s'))
+        root.addHandler(async_handler(console_handler) if LOG_ASYNC else console_handler)
     
     # Configurar loggers específicos com níveis apropriados
     loggers_config = {
@@ -46,7 +55,8 @@ def configure_logging():
         logger.setLevel(level)
     
     # Adicionar handler de arquivo rotativo para logs importantes
-    if os.getenv('LOG_TO_FILE', 'false').lower() == 'true':
+    global _file_handler
+    if os.getenv('LOG_TO_FILE', 'false').lower() == 'true' and _file_handler is None:
         file_handler = RotatingFileHandler(
             'logs/application.log', 
             maxBytes=10*1024*1024,  # 10MB
@@ -56,11 +66,12 @@ def configure_logging():
             logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
         )
         file_handler.setLevel(logging.INFO)
+        _file_handler = async_handler(file_handler) if LOG_ASYNC else file_handler
         
         # Adicionar apenas aos loggers importantes
         for logger_name in ['gandalf_service', 'integration_tokens', 'token_renewal']:
             logger = logging.getLogger(logger_name)
-            logger.addHandler(file_handler)
+            logger.addHandler(_file_handler)
     
     # Log de inicialização
     logger = logging.getLogger('logging_config')
@@ -0,0 +1,178 @@
+"""
+Utilitários de paginação por cursor (keyset) e contagem total em cache.
+
+A paginação por cursor evita ``OFFSET``: cada página filtra a partir da última
+linha vista usando a coluna de ordenação + ``id`` como desempate, então o custo
+por página fica O(page_size) independentemente da profundidade.
+
+Uso típico::
+
+    keys = [(Property.updated_at, True), (Property.id, True)]
+    items, next_cursor, has_more = paginate_keyset(query, keys, 20, cursor, 'updated_at:desc')
+    total, cached = cached_count(query, f'properties:{tenant_id}')
+
+Chaves podem ser expressões calculadas (ex.: relevância da busca); o valor da
+última linha é selecionado junto para montar o cursor.
+"""
+import base64
+import json
+import threading
+import time
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from sqlalchemy import and_, false, or_
+from sqlalchemy.orm.attributes import QueryableAttribute
+
+# Tempo de vida da contagem total em cache (segundos)
+COUNT_CACHE_TTL_SECONDS = 60
+# Número máximo de chaves mantidas no cache de contagem
+COUNT_CACHE_MAX_ENTRIES = 1024
+
+_count_cache: Dict[str, Tuple[float, int]] = {}
+_count_cache_lock = threading.Lock()
+
+
+class InvalidCursorError(ValueError):
+    """Cursor malformado ou gerado para outra ordenação."""
+
+
+def _dump_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, Decimal):
+        return {'dec': str(value)}
+    return value
+
+
+def _load_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if 'dt' in value:
+            return datetime.fromisoformat(value['dt'])
+        if 'd' in value:
+            return date.fromisoformat(value['d'])
+        if 'dec' in value:
+            return Decimal(value['dec'])
+        raise InvalidCursorError('Invalid cursor')
+    return value
+
+
+def encode_cursor(values: Sequence[Any], signature: str = '') -> str:
+    """Codifica os valores da última linha em um cursor opaco (base64 url-safe)."""
+    payload = json.dumps(
+        {'v': [_dump_value(v) for v in values], 's': signature},
+        separators=(',', ':')
+    )
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, signature: str = '') -> List[Any]:
+    """Decodifica um cursor gerado por ``encode_cursor``.
+
+    Raises:
+        InvalidCursorError: se o cursor for inválido ou a assinatura não bater.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+        values = [_load_value(v) for v in payload['v']]
+    except (ValueError, KeyError, TypeError) as e:
+        raise InvalidCursorError('Invalid cursor') from e
+
+    if payload.get('s', '') != signature:
+        raise InvalidCursorError('Cursor does not match the requested sort order')
+    return values
+
+
+def keyset_order_by(keys: Sequence[Tuple[Any, bool]]) -> list:
+    """Cláusulas ORDER BY para as chaves ``(coluna, descendente)``; NULLs sempre no fim."""
+    return [(col.desc() if descending else col.asc()).nulls_last() for col, descending in keys]
+
+
+def _after(col, descending: bool, value):
+    # Com NULLS LAST, nada vem "depois" de um NULL além de empates
+    if value is None:
+        return false()
+    return or_(col < value if descending else col > value, col.is_(None))
+
+
+def _equals(col, value):
+    return col.is_(None) if value is None else col == value
+
+
+def keyset_filter(keys: Sequence[Tuple[Any, bool]], values: Sequence[Any]):
+    """Predicado que seleciona as linhas estritamente após ``values`` na ordenação de ``keys``."""
+    if len(keys) != len(values):
+        raise InvalidCursorError('Invalid cursor')
+
+    clauses = []
+    for i, (col, descending) in enumerate(keys):
+        prefix = [_equals(c, v) for (c, _), v in zip(keys[:i], values[:i])]
+        clauses.append(and_(*prefix, _after(col, descending, values[i])))
+    return or_(*clauses)
+
+
+def paginate_keyset(query, keys: Sequence[Tuple[Any, bool]], limit: int,
+                    cursor: Optional[str] = None, signature: str = '') -> Tuple[list, Optional[str], bool]:
+    """Executa uma página keyset.
+
+    ``keys`` deve terminar em uma coluna única (normalmente ``Model.id``) para
+    garantir ordenação total. Um cursor vazio/``None`` retorna a primeira página.
+
+    Returns:
+        (itens, próximo cursor ou None, has_more)
+    """
+    if cursor:
+        query = query.filter(keyset_filter(keys, decode_cursor(cursor, signature)))
+
+    # Expressões calculadas não são atributos da entidade: vêm como colunas extras
+    computed = {i: col.label(f'keyset_{i}') for i, (col, _) in enumerate(keys)
+                if not isinstance(col, QueryableAttribute)}
+    if computed:
+        query = query.add_columns(*computed.values())
+
+    rows = query.order_by(*keyset_order_by(keys)).limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        last = rows[-1]
+        entity = last[0] if computed else last
+        next_cursor = encode_cursor(
+            [getattr(last, computed[i].name) if i in computed else getattr(entity, col.key)
+             for i, (col, _) in enumerate(keys)],
+            signature
+        )
+    if computed:
+        rows = [row[0] for row in rows]
+    return rows, next_cursor, has_more
+
+
+def cached_count(query, cache_key: str, ttl: int = COUNT_CACHE_TTL_SECONDS) -> Tuple[int, bool]:
+    """Contagem total com cache por processo.
+
+    O COUNT é refeito no máximo uma vez a cada ``ttl`` segundos por ``cache_key``,
+    então o total pode ficar levemente defasado entre páginas.
+
+    Returns:
+        (total, veio_do_cache)
+    """
+    now = time.monotonic()
+    with _count_cache_lock:
+        entry = _count_cache.get(cache_key)
+    if entry and now - entry[0] < ttl:
+        return entry[1], True
+
+    total = query.order_by(None).count()
+
+    with _count_cache_lock:
+        if len(_count_cache) >= COUNT_CACHE_MAX_ENTRIES:
+            oldest = min(_count_cache, key=lambda k: _count_cache[k][0])
+            _count_cache.pop(oldest, None)
+        _count_cache[cache_key] = (now, total)
+    return total, False
+
@@ -0,0 +1,52 @@
+"""
+Cliente Redis compartilhado pelos caches e índices do backend
+
+Os caches (imagens, catálogo de amenities, estatísticas por tenant, headers de
+integração, fingerprints de payload) e o timer wheel de refresh usam o mesmo
+cliente: um pool de conexões por processo, criado no primeiro uso (não no
+import) e refeito após fork (gunicorn/Celery prefork). Sem REDIS_URL, ou se o
+Redis não responder ao ping, ``get_redis`` devolve None e cada módulo usa o seu
+fallback em memória por processo.
+"""
+import logging
+import os
+import threading
+
+logger = logging.getLogger(__name__)
+
+REDIS_URL = os.getenv('REDIS_URL')
+
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+
+def get_redis():
+    """Cliente Redis (``decode_responses=True``) do processo atual, ou None."""
+    if _client_pid == os.getpid():
+        return _client
+    return _connect()
+
+
+def _connect():
+    global _client, _client_pid
+    with _lock:
+        pid = os.getpid()
+        if _client_pid == pid:
+            return _client
+        client = None
+        if REDIS_URL:
+            try:
+                import redis
+                client = redis.from_url(REDIS_URL, decode_responses=True)
+                client.ping()
+            except Exception as e:  # pylint: disable=broad-except
+                logger.warning(f'Could not initialize Redis client: {e}. Using memory fallback.')
+                client = None
+        _client, _client_pid = client, pid
+        return client
+
+
+def is_available() -> bool:
+    """True se o processo atual tem um cliente Redis utilizável."""
+    return get_redis() is not None
@@ -260,12 +260,25 @@ class SecureCredentialStorage:
             Status detalhado da automação
         """
         
-        try:
-            cred = self.IntegrationCredentials.query.filter_by(
-                tenant_id=tenant_id,
-                provider='gandalf'
-            ).first()
+        cred = self.IntegrationCredentials.query.filter_by(
+            tenant_id=tenant_id,
+            provider='gandalf'
+        ).first()
+        return self.automation_status_from_credential(cred)
+
+    def automation_status_from_credential(self, cred) -> Dict[str, Any]:
+        """
+        Status da automação a partir de uma credencial já carregada
+        (permite avaliar vários tenants com uma única consulta)
+        
+        Args:
+            cred: IntegrationCredentials do provider 'gandalf' (ou None)
             
+        Returns:
+            Status detalhado da automação
+        """
+        
+        try:
             if not cred:
                 return {
                     'enabled': False,
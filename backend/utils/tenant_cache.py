@@ -0,0 +1,147 @@
+"""
+Cache read-through por tenant com versionamento de dados
+
+Cada tenant tem uma "versão de dados" (contador ``tenant_cache:<tenant>:version``)
+incrementada pelos listeners da sessão em ``extensions.py`` após o commit de
+qualquer alteração em ``Property``. As chaves de cache incluem essa versão
+(``tenant_cache:<tenant>:<nome>:v<versão>``), então uma escrita real invalida
+todas as estatísticas do tenant de uma vez, sem varrer chaves; entradas de versões
+antigas expiram pelo TTL.
+
+Escritas feitas por UPDATE/DELETE em massa (``Query.update``) não passam pelo
+flush e não incrementam a versão: nesses casos o TTL limita a defasagem ou o
+chamador usa ``bump_data_version`` explicitamente.
+
+Sem REDIS_URL usa um fallback em memória por processo, como
+``integrations.session_store``.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+from config import CACHE_DEFAULT_TIMEOUT
+from utils.redis_client import get_redis
+
+logger = logging.getLogger(__name__)
+
+CACHE_PREFIX = os.getenv('TENANT_CACHE_PREFIX', 'tenant_cache')
+CACHE_TTL = int(os.getenv('TENANT_CACHE_TTL', str(CACHE_DEFAULT_TIMEOUT)))
+# A versão vive mais que os valores para não "voltar" a uma versão já usada
+VERSION_TTL = 7 * 24 * 3600
+
+_lock = threading.Lock()
+_memory_values: Dict[str, Tuple[float, str]] = {}
+_memory_versions: Dict[int, int] = {}
+_metrics: Dict[str, Dict[str, int]] = defaultdict(lambda: {'hits': 0, 'misses': 0, 'errors': 0})
+
+
+def _version_key(tenant_id: int) -> str:
+    return f'{CACHE_PREFIX}:{tenant_id}:version'
+
+
+def _count(name: str, field: str) -> None:
+    with _lock:
+        _metrics[name][field] += 1
+
+
+def data_version(tenant_id: int) -> int:
+    """Versão atual dos dados do tenant (0 se nunca houve escrita)."""
+    client = get_redis()
+    if client:
+        return int(client.get(_version_key(tenant_id)) or 0)
+    with _lock:
+        return _memory_versions.get(tenant_id, 0)
+
+
+def bump_data_version(tenant_ids: Iterable[int]) -> None:
+    """Invalida o cache dos tenants (chamado após o commit de escritas em Property)."""
+    client = get_redis()
+    tenant_ids = sorted({tenant_id for tenant_id in tenant_ids if tenant_id is not None})
+    if not tenant_ids:
+        return
+    if client:
+        pipe = client.pipeline()
+        for tenant_id in tenant_ids:
+            pipe.incr(_version_key(tenant_id))
+            pipe.expire(_version_key(tenant_id), VERSION_TTL)
+        pipe.execute()
+        return
+    with _lock:
+        for tenant_id in tenant_ids:
+            _memory_versions[tenant_id] = _memory_versions.get(tenant_id, 0) + 1
+
+
+def cached(tenant_id: int, name: str, compute: Callable[[], Any], ttl: Optional[int] = None) -> Any:
+    """
+    Devolve ``compute()`` do cache do tenant na versão atual dos dados.
+
+    O valor precisa ser serializável em JSON. Falhas do Redis não derrubam a
+    requisição: o valor é recalculado e o erro contado nas métricas.
+    """
+    client = get_redis()
+    ttl = CACHE_TTL if ttl is None else ttl
+    try:
+        key = f'{CACHE_PREFIX}:{tenant_id}:{name}:v{data_version(tenant_id)}'
+        if client:
+            payload = client.get(key)
+        else:
+            with _lock:
+                entry = _memory_values.get(key)
+            payload = entry[1] if entry and entry[0] > time.time() else None
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Tenant cache read failed for %s: %s", name, str(e))
+        _count(name, 'errors')
+        return compute()
+
+    if payload is not None:
+        _count(name, 'hits')
+        return json.loads(payload)
+
+    _count(name, 'misses')
+    value = compute()
+    try:
+        payload = json.dumps(value, default=str)
+        if client:
+            client.setex(key, ttl, payload)
+        else:
+            with _lock:
+                now = time.time()
+                # Remove entradas vencidas (versões antigas) para o dict não crescer
+                for stale in [k for k, (expires_at, _) in _memory_values.items() if expires_at <= now]:
+                    del _memory_values[stale]
+                _memory_values[key] = (now + ttl, payload)
+    except Exception as e:  # pylint: disable=broad-except
+        logger.warning("Tenant cache write failed for %s: %s", name, str(e))
+        _count(name, 'errors')
+    return value
+
+
+def metrics() -> Dict[str, Any]:
+    """Hits/misses por nome de cache (contadores do processo atual)."""
+    with _lock:
+        by_name = {name: dict(values) for name, values in _metrics.items()}
+    for values in by_name.values():
+        lookups = values['hits'] + values['misses']
+        values['hit_rate'] = round(values['hits'] / lookups * 100, 1) if lookups else 0
+    hits = sum(values['hits'] for values in by_name.values())
+    misses = sum(values['misses'] for values in by_name.values())
+    return {
+        'backend': 'redis' if get_redis() else 'memory',
+        'ttl_seconds': CACHE_TTL,
+        'hits': hits,
+        'misses': misses,
+        'hit_rate': round(hits / (hits + misses) * 100, 1) if hits + misses else 0,
+        'caches': by_name,
+    }
+
+
+def reset() -> None:
+    """Zera métricas e o fallback em memória (testes/benchmarks)."""
+    with _lock:
+        _metrics.clear()
+        _memory_values.clear()
+        _memory_versions.clear()
@@ -0,0 +1,65 @@
+"""
+Upsert portável: ``INSERT ... ON CONFLICT DO UPDATE`` no PostgreSQL e no SQLite,
+UPDATE-então-INSERT linha a linha nos demais dialetos
+"""
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Sequence
+
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql, sqlite
+
+_DIALECT_INSERTS = {'postgresql': postgresql.insert, 'sqlite': sqlite.insert}
+
+
+def _dialect_name(bind) -> str:
+    """Dialeto de uma Connection ou Session."""
+    dialect = getattr(bind, 'dialect', None)
+    if dialect is None:
+        dialect = bind.get_bind().dialect
+    return dialect.name
+
+
+def supports_native_upsert(bind) -> bool:
+    """True se o dialeto tem ON CONFLICT (um único statement para todas as linhas)."""
+    return _dialect_name(bind) in _DIALECT_INSERTS
+
+
+def upsert(bind, table, rows: Iterable[Dict[str, Any]], conflict_keys: Sequence[str],
+           set_: Callable[[Mapping[str, Any]], Dict[str, Any]], returning: Sequence = ()) -> List:
+    """
+    Insere ``rows`` ou, em conflito em ``conflict_keys``, atualiza com ``set_(incoming)`` (sem commit).
+
+    ``set_`` recebe os valores propostos da linha (``excluded`` no ON CONFLICT, o
+    próprio dict no fallback) e devolve ``{coluna: valor/expressão}``; assim um
+    incremento como ``table.c.n + incoming['n']`` vale nos dois caminhos.
+
+    Args:
+        bind: Session ou Connection onde executar
+        returning: colunas a retornar das linhas gravadas
+
+    Returns:
+        Linhas de ``returning`` (lista vazia sem ``returning``)
+    """
+    rows = list(rows)
+    if not rows:
+        return []
+
+    insert = _DIALECT_INSERTS.get(_dialect_name(bind))
+    if insert is not None:
+        stmt = insert(table).values(rows)
+        stmt = stmt.on_conflict_do_update(index_elements=list(conflict_keys), set_=set_(stmt.excluded))
+        if returning:
+            return bind.execute(stmt.returning(*returning)).all()
+        bind.execute(stmt)
+        return []
+
+    results = []
+    for row in rows:
+        stmt = update(table).where(*(table.c[key] == row[key] for key in conflict_keys)).values(set_(row))
+        if returning:
+            written = bind.execute(stmt.returning(*returning)).all()
+            if not written:
+                written = bind.execute(table.insert().values(row).returning(*returning)).all()
+            results.extend(written)
+        elif not bind.execute(stmt).rowcount:
+            bind.execute(table.insert().values(row))
+    return results
@@ -0,0 +1,92 @@
+"""
+App Flask por processo para workers Celery (e threads sem contexto de aplicação).
+
+``create_app()`` registra todos os blueprints e cria um engine SQLAlchemy com
+pool próprio; chamá-lo a cada task custa dezenas de milissegundos e abre um
+pool novo por execução. Aqui o app é criado uma vez por processo — depois do
+fork, no caso dos workers prefork — e reaproveitado por todas as tasks.
+
+- ``get_worker_app()``: app do processo atual (recriado se o PID mudou).
+- ``FlaskTask``: classe base das tasks (``make_celery``); executa cada task com app context.
+- ``connect_worker_signals()``: cria o app no ``worker_process_init`` e libera
+  o pool no ``worker_process_shutdown``.
+"""
+import logging
+import os
+import threading
+from contextlib import contextmanager
+from typing import Optional
+
+from celery import Task
+from celery.signals import worker_process_init, worker_process_shutdown
+from flask import Flask, has_app_context
+
+logger = logging.getLogger(__name__)
+
+_app: Optional[Flask] = None
+_app_pid: Optional[int] = None
+_app_lock = threading.Lock()
+
+
+def get_worker_app() -> Flask:
+    """App Flask do processo atual, criado na primeira chamada após o fork."""
+    global _app, _app_pid
+    pid = os.getpid()
+    if _app is None or _app_pid != pid:
+        with _app_lock:
+            if _app is None or _app_pid != pid:
+                from app import create_app
+                _app = create_app()
+                _app_pid = pid
+                logger.info("Flask app created for worker process %s", pid)
+    return _app
+
+
+@contextmanager
+def worker_app_context():
+    """Garante um app context: reaproveita o atual ou empurra o do processo."""
+    if has_app_context():
+        yield
+        return
+    with get_worker_app().app_context():
+        yield
+
+
+class FlaskTask(Task):
+    """Task Celery executada dentro do app context do processo."""
+
+    def __call__(self, *args, **kwargs):
+        with worker_app_context():
+            return super().__call__(*args, **kwargs)
+
+
+def _dispose_engine(app: Flask):
+    from extensions import db
+    with app.app_context():
+        db.engine.dispose()
+
+
+def _on_worker_process_init(**kwargs):
+    # Conexões herdadas do processo pai não podem ser usadas depois do fork
+    if _app is not None and _app_pid != os.getpid():
+        try:
+            from extensions import db
+            with _app.app_context():
+                db.engine.dispose(close=False)
+        except Exception:
+            logger.exception("Failed to discard inherited database pool")
+    get_worker_app()
+
+
+def _on_worker_process_shutdown(**kwargs):
+    if _app is not None and _app_pid == os.getpid():
+        try:
+            _dispose_engine(_app)
+        except Exception:
+            logger.exception("Failed to dispose database pool on worker shutdown")
+
+
+def connect_worker_signals():
+    """Conecta os sinais do ciclo de vida do worker (idempotente)."""
+    worker_process_init.connect(_on_worker_process_init, weak=False, dispatch_uid='worker_app.process_init')
+    worker_process_shutdown.connect(_on_worker_process_shutdown, weak=False, dispatch_uid='worker_app.process_shutdown')
@@ -224,11 +224,37 @@ export const authService = {
 
   // Importar listagens do Gandalf (bulk) - POST /integrations/gandalf/import
   // body: { filter?: any } - opcionalmente enviar um filtro (por ex. campos, data, status)
+  // A importação roda em segundo plano: inicia o job e acompanha
+  // GET /integrations/gandalf/import/<job_id> até terminar, devolvendo o job final
+  // ({ inserted, updated, skipped, total_listings, errors, status, ... }).
   async importGandalfListings(
-    body: { filter?: any; only_active?: boolean } = {}
+    body: { filter?: any; only_active?: boolean } = {},
+    onProgress?: (job: any) => void,
+    pollIntervalMs: number = 2000
   ): Promise<any> {
-    const resp = await apiPost<any>('/integrations/gandalf/import', body);
-    return resp;
+    const started = await apiPost<any>('/integrations/gandalf/import', body);
+    let job = started?.job;
+    while (job && (job.status === 'pending' || job.status === 'running')) {
+      onProgress?.(job);
+      await new Promise((resolve) => setTimeout(resolve, pollIntervalMs));
+      job = (await apiGet<any>(`/integrations/gandalf/import/${job.id}`))?.job;
+    }
+    if (job?.status === 'failed') {
+      throw new Error(job.error_message || 'Falha na importação');
+    }
+    return { ...job, message: job?.status === 'cancelled' ? 'Importação cancelada.' : 'Importação finalizada com sucesso.' };
+  },
+
+  // Progresso de uma importação - GET /integrations/gandalf/import/<job_id>
+  async getGandalfImportJob(jobId: number): Promise<any> {
+    const resp = await apiGet<any>(`/integrations/gandalf/import/${jobId}`);
+    return resp?.job;
+  },
+
+  // Cancelar uma importação - POST /integrations/gandalf/import/<job_id>/cancel
+  async cancelGandalfImport(jobId: number): Promise<any> {
+    const resp = await apiPost<any>(`/integrations/gandalf/import/${jobId}/cancel`);
+    return resp?.job;
   },
 
   // Importar um imóvel específico por external_id - POST /integrations/gandalf/import_one
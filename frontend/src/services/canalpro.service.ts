@@ -1,4 +1,5 @@
 import { apiGet, apiPost, apiDelete } from './api';
+import { authService } from './auth.service';
 import {
   ExportResult,
   ExportStatus,
@@ -122,7 +123,8 @@ export const canalproService = {
   // Importar imóveis do CanalPro (Gandalf)
   async importProperties(onlyActive: boolean = true): Promise<{ success: boolean; data?: any; error?: string }> {
     try {
-      const result = await apiPost<any>('/integrations/gandalf/import', { only_active: onlyActive });
+      // Inicia o job em segundo plano e aguarda o resultado final
+      const result = await authService.importGandalfListings({ only_active: onlyActive });
       return { success: true, data: result };
     } catch (err: any) {
       return { success: false, error: err?.message || 'Erro ao importar imóveis' };